@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Autotune the Granite worker pool for this host
+Sweeps worker process count against torch threads per worker, measures the
+aggregate tokens/sec under concurrent chat load and records the best split
+for GRANITE_WORKERS=auto
+
+Usage:
+    python autotune_granite_workers.py
+    python autotune_granite_workers.py --workers 1 2 4 --threads 1 2 4 --max-new-tokens 32
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# Add project root to path
+project_root = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, project_root)
+
+from benchmark_granite_backends import BENCHMARK_PROMPTS
+from src.chatbot.backends import resolve_backend
+from src.chatbot.granite_client import PromptRequest
+from src.chatbot.quantization import resolve_quantization_mode
+from src.chatbot.worker_pool import (DEFAULT_TUNING_FILE, InferenceWorkerPool, WorkerConfig,
+                                     available_cpus, assign_cpus)
+
+SYSTEM_PROMPT = "You are a knowledgeable and helpful financial advisor. Provide clear, practical, and actionable financial advice."
+
+
+def candidate_shapes(workers: list, threads: list, cpus: int, oversubscribe: bool) -> list:
+    """(workers, threads per worker) pairs to try"""
+    shapes = [(w, t) for w in workers for t in threads if oversubscribe or w * t <= cpus]
+    # Always include the in-process equivalent: one worker using every CPU
+    if (1, cpus) not in shapes:
+        shapes.insert(0, (1, cpus))
+    return shapes
+
+
+def measure(model_path: str, workers: int, threads: int, max_new_tokens: int, rounds: int) -> dict:
+    """Start a pool with one shape and time concurrent requests against it"""
+    config = WorkerConfig(model_path, "cpu", resolve_quantization_mode(device="cpu"), resolve_backend(device="cpu"),
+                          max_length=2048, max_new_tokens=max_new_tokens, threads=threads)
+    load_start = time.perf_counter()
+    try:
+        pool = InferenceWorkerPool(config, workers).start()
+    except Exception as e:
+        return {"workers": workers, "threads_per_worker": threads, "error": str(e)}
+    load_seconds = time.perf_counter() - load_start
+
+    requests = [PromptRequest(SYSTEM_PROMPT, f"\n\nUser Query: {question}\n\nFinancial Advice:")
+                for _ in range(rounds) for _, question in BENCHMARK_PROMPTS]
+    try:
+        # Warm every worker up (prefix cache, first-call allocations) before timing
+        for future in [pool.submit(request) for request in requests[:workers]]:
+            future.result()
+
+        # Keep every worker busy: twice as many concurrent callers as workers
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers * 2) as callers:
+            outputs = list(callers.map(lambda request: pool.submit(request).result(), requests))
+        elapsed = time.perf_counter() - start
+    finally:
+        pool.shutdown()
+
+    tokens = sum(output.new_tokens for output in outputs)
+    return {
+        "workers": workers,
+        "threads_per_worker": threads,
+        "pinned": assign_cpus(workers, threads)[0] is not None,
+        "load_seconds": load_seconds,
+        "requests": len(outputs),
+        "tokens": tokens,
+        "tokens_per_second": tokens / elapsed if elapsed else 0.0,
+        "requests_per_second": len(outputs) / elapsed if elapsed else 0.0,
+    }
+
+
+def main():
+    cpus = len(available_cpus())
+    parser = argparse.ArgumentParser(description="Autotune Granite worker processes and threads")
+    parser.add_argument("--model-path", default=os.getenv("GRANITE_MODEL_PATH", "ibm-granite/granite-3.3-2b-base"))
+    parser.add_argument("--workers", type=int, nargs="+", default=sorted({1, 2, 4, cpus}))
+    parser.add_argument("--threads", type=int, nargs="+", default=sorted({1, 2, 4, cpus}))
+    parser.add_argument("--oversubscribe", action="store_true", help="Also try shapes using more threads than CPUs")
+    parser.add_argument("--max-new-tokens", type=int, default=48)
+    parser.add_argument("--rounds", type=int, default=2, help="Passes over the prompt set per shape")
+    parser.add_argument("--output", default=os.getenv("GRANITE_WORKER_TUNING_FILE", DEFAULT_TUNING_FILE),
+                        help="Where to record the results (read by GRANITE_WORKERS=auto)")
+    args = parser.parse_args()
+
+    shapes = candidate_shapes(args.workers, args.threads, cpus, args.oversubscribe)
+    print(f"🧪 Autotuning Granite workers on {cpus} CPU(s): {len(shapes)} shape(s) to try...")
+    results = []
+    for workers, threads in shapes:
+        print(f"⚡ {workers} worker(s) x {threads} thread(s)...")
+        results.append(measure(args.model_path, workers, threads, args.max_new_tokens, args.rounds))
+
+    print(f"\n{'workers':>8}{'threads':>9}{'pinned':>8}{'load s':>8}{'tok/s':>8}{'req/s':>8}")
+    for result in results:
+        if "error" in result:
+            print(f"{result['workers']:>8}{result['threads_per_worker']:>9}  ❌ {result['error']}")
+            continue
+        print(f"{result['workers']:>8}{result['threads_per_worker']:>9}{'yes' if result['pinned'] else 'no':>8}"
+              f"{result['load_seconds']:>8.1f}{result['tokens_per_second']:>8.1f}{result['requests_per_second']:>8.2f}")
+
+    ranked = [result for result in results if "error" not in result]
+    if not ranked:
+        print("\n❌ No configuration could load the model")
+        sys.exit(1)
+    best = max(ranked, key=lambda result: result["tokens_per_second"])
+    print(f"\n🏆 Best for this host: {best['workers']} worker(s) x {best['threads_per_worker']} thread(s) "
+          f"({best['tokens_per_second']:.1f} tok/s)")
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump({
+            "host": {"cpus": cpus, "platform": platform.platform(), "processor": platform.processor()},
+            "model_path": args.model_path,
+            "max_new_tokens": args.max_new_tokens,
+            "best": best,
+            "results": results,
+        }, f, indent=2)
+    print(f"📁 Results written to {args.output} - set GRANITE_WORKERS=auto to use them")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Benchmark Granite execution backends side by side
+Compares load time, request latency and single/batched throughput of the
+eager, torch.compile and ONNX Runtime backends on fixed finance prompts
+
+Usage:
+    python benchmark_granite_backends.py
+    python benchmark_granite_backends.py --backends eager compile onnx --max-new-tokens 64 --output backends.json
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+# Add project root to path
+project_root = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, project_root)
+
+RESULT_MARKER = "RESULT_JSON:"
+
+# Fixed set of finance prompts, one or two per user type
+BENCHMARK_PROMPTS = [
+    ("student", "How should I budget my monthly allowance?"),
+    ("student", "Is it a good idea to get my first credit card?"),
+    ("professional", "How much of my salary should go into my 401k?"),
+    ("young_adult", "Should I pay off debt or build an emergency fund first?"),
+    ("senior", "How do I generate steady income in retirement?"),
+    ("general", "What is the 50/30/20 rule?"),
+]
+
+
+def percentile(values: list, fraction: float) -> float:
+    """Nearest-rank percentile of a list of numbers"""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else 0.0
+
+
+def run_backend(model_path: str, backend: str, max_new_tokens: int, rounds: int, batch_size: int) -> dict:
+    """Load Granite with one backend and time greedy generation (runs in a child process)"""
+    os.environ["GRANITE_BACKEND"] = backend
+    # Measure the backend itself: no batching window, no prefix reuse, no deadline
+    os.environ["GRANITE_BATCH_MAX_SIZE"] = "1"
+    os.environ["GRANITE_PREFIX_CACHE_SIZE"] = "0"
+    os.environ["GRANITE_DEADLINE_SECONDS"] = "0"
+
+    import torch
+    from src.chatbot.granite_client import GraniteClient
+
+    load_start = time.perf_counter()
+    client = GraniteClient(timeout_seconds=3600, model_path=model_path)
+    load_seconds = time.perf_counter() - load_start
+    if not client.initialized:
+        return {"backend": backend, "error": "Granite model could not be loaded"}
+    if client.backend != backend:
+        return {"backend": backend, "error": f"backend unavailable here (resolved to '{client.backend}')"}
+
+    model, tokenizer = client._handle.weights()
+    prompts = [client._build_full_prompt(question, user_type) for user_type, question in BENCHMARK_PROMPTS]
+
+    def generate(texts):
+        inputs = tokenizer(texts, return_tensors="pt", padding=True)
+        start = time.perf_counter()
+        with torch.no_grad():
+            outputs = model.generate(
+                **inputs,
+                max_new_tokens=max_new_tokens,
+                min_new_tokens=max_new_tokens,  # equal work for every backend
+                do_sample=False,
+                pad_token_id=tokenizer.pad_token_id,
+            )
+        return time.perf_counter() - start, (outputs.shape[1] - inputs["input_ids"].shape[1]) * len(texts)
+
+    # The first request pays for lazy initialisation (graph capture, session warm-up)
+    first_seconds, _ = generate(prompts[:1])
+
+    latencies, total_tokens, total_seconds = [], 0, 0.0
+    for _ in range(rounds):
+        for prompt in prompts:
+            seconds, tokens = generate([prompt])
+            latencies.append(seconds)
+            total_tokens += tokens
+            total_seconds += seconds
+
+    batch_tokens, batch_seconds = 0, 0.0
+    for start in range(0, len(prompts), batch_size):
+        seconds, tokens = generate(prompts[start:start + batch_size])
+        batch_tokens += tokens
+        batch_seconds += seconds
+
+    return {
+        "backend": backend,
+        "load_seconds": load_seconds,
+        "load_timings": client.load_timings,
+        "first_request_ms": first_seconds * 1000.0,
+        "p50_latency_ms": percentile(latencies, 0.50) * 1000.0,
+        "p95_latency_ms": percentile(latencies, 0.95) * 1000.0,
+        "tokens_per_second": total_tokens / total_seconds if total_seconds else 0.0,
+        "batched_tokens_per_second": batch_tokens / batch_seconds if batch_seconds else 0.0,
+    }
+
+
+def run_in_subprocess(model_path: str, backend: str, max_new_tokens: int, rounds: int, batch_size: int) -> dict:
+    """Run one backend in a fresh interpreter so compile caches and memory do not leak between runs"""
+    command = [sys.executable, os.path.abspath(__file__), "--worker", backend,
+               "--model-path", model_path, "--max-new-tokens", str(max_new_tokens),
+               "--rounds", str(rounds), "--batch-size", str(batch_size)]
+    completed = subprocess.run(command, capture_output=True, text=True, cwd=project_root)
+    for line in reversed(completed.stdout.splitlines()):
+        if line.startswith(RESULT_MARKER):
+            return json.loads(line[len(RESULT_MARKER):])
+    return {"backend": backend, "error": completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else "no result"}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Granite execution backends")
+    parser.add_argument("--model-path", default=os.getenv("GRANITE_MODEL_PATH", "ibm-granite/granite-3.3-2b-base"))
+    parser.add_argument("--backends", nargs="+", default=["eager", "compile", "onnx"])
+    parser.add_argument("--max-new-tokens", type=int, default=48)
+    parser.add_argument("--rounds", type=int, default=2, help="Passes over the prompt set for latency")
+    parser.add_argument("--batch-size", type=int, default=4, help="Prompts per batched generate() call")
+    parser.add_argument("--output", help="Write the full results to this JSON file")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        result = run_backend(args.model_path, args.worker, args.max_new_tokens, args.rounds, args.batch_size)
+        print(RESULT_MARKER + json.dumps(result))
+        return
+
+    print(f"🧪 Benchmarking Granite backends on {len(BENCHMARK_PROMPTS)} finance prompts...")
+    results = []
+    for backend in args.backends:
+        print(f"⚡ Running backend '{backend}'...")
+        results.append(run_in_subprocess(args.model_path, backend, args.max_new_tokens, args.rounds, args.batch_size))
+
+    print(f"\n{'backend':<9}{'load s':>8}{'first ms':>10}{'p50 ms':>9}{'p95 ms':>9}{'tok/s':>8}{'batch tok/s':>13}")
+    for result in results:
+        if "error" in result:
+            print(f"{result['backend']:<9}❌ {result['error']}")
+            continue
+        print(f"{result['backend']:<9}{result['load_seconds']:>8.1f}{result['first_request_ms']:>10.0f}"
+              f"{result['p50_latency_ms']:>9.0f}{result['p95_latency_ms']:>9.0f}"
+              f"{result['tokens_per_second']:>8.1f}{result['batched_tokens_per_second']:>13.1f}")
+
+    ranked = [result for result in results if "error" not in result]
+    if ranked:
+        fastest = max(ranked, key=lambda result: result["tokens_per_second"])
+        print(f"\n🏆 Fastest single-stream backend here: {fastest['backend']} (set GRANITE_BACKEND={fastest['backend']})")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n📁 Full results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
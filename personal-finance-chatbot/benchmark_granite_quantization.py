@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+"""
+Benchmark quantized Granite CPU inference against float32
+Compares resident memory, tokens/second and output drift on fixed finance prompts
+
+Usage:
+    python benchmark_granite_quantization.py
+    python benchmark_granite_quantization.py --modes none int8 bf16 --max-new-tokens 64 --output quant.json
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+# Add project root to path
+project_root = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, project_root)
+
+RESULT_MARKER = "RESULT_JSON:"
+
+# Fixed set of finance prompts, one or two per user type
+BENCHMARK_PROMPTS = [
+    ("student", "How should I budget my monthly allowance?"),
+    ("student", "Is it a good idea to get my first credit card?"),
+    ("professional", "How much of my salary should go into my 401k?"),
+    ("young_adult", "Should I pay off debt or build an emergency fund first?"),
+    ("senior", "How do I generate steady income in retirement?"),
+    ("general", "What is the 50/30/20 rule?"),
+]
+
+
+def current_rss_bytes() -> int:
+    """Resident set size of this process"""
+    try:
+        with open("/proc/self/status", "r") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    import resource
+    # ru_maxrss is a peak, in KB on Linux and bytes on macOS
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss if sys.platform == "darwin" else maxrss * 1024
+
+
+def run_mode(model_path: str, mode: str, max_new_tokens: int) -> dict:
+    """Load Granite in one quantization mode and time greedy generation (runs in a child process)"""
+    os.environ["GRANITE_QUANTIZATION"] = mode
+    # Measure the model itself: no batching window, no prefix reuse
+    os.environ["GRANITE_BATCH_MAX_SIZE"] = "1"
+    os.environ["GRANITE_PREFIX_CACHE_SIZE"] = "0"
+
+    import torch
+    from src.chatbot.granite_client import GraniteClient
+    from src.chatbot.quantization import model_memory_bytes
+
+    rss_before = current_rss_bytes()
+    load_start = time.perf_counter()
+    client = GraniteClient(timeout_seconds=3600, model_path=model_path)
+    load_seconds = time.perf_counter() - load_start
+    if not client.initialized:
+        return {"mode": mode, "error": "Granite model could not be loaded"}
+    rss_loaded = current_rss_bytes()
+
+    model, tokenizer = client._handle.weights()
+    token_ids, texts = [], []
+    total_tokens, total_seconds = 0, 0.0
+    for user_type, question in BENCHMARK_PROMPTS:
+        inputs = tokenizer(client._build_full_prompt(question, user_type), return_tensors="pt")
+        start = time.perf_counter()
+        with torch.no_grad():
+            outputs = model.generate(
+                **inputs,
+                max_new_tokens=max_new_tokens,
+                min_new_tokens=max_new_tokens,  # equal work in every mode
+                do_sample=False,
+                pad_token_id=tokenizer.pad_token_id or tokenizer.eos_token_id,
+            )
+        total_seconds += time.perf_counter() - start
+        new_ids = outputs[0, inputs["input_ids"].shape[1]:].tolist()
+        total_tokens += len(new_ids)
+        token_ids.append(new_ids)
+        texts.append(tokenizer.decode(new_ids, skip_special_tokens=True))
+
+    return {
+        "mode": mode,
+        "resolved_mode": client.quantization,
+        "load_seconds": load_seconds,
+        "rss_mb": rss_loaded / 1024 ** 2,
+        "rss_delta_mb": (rss_loaded - rss_before) / 1024 ** 2,
+        "weights_mb": model_memory_bytes(model) / 1024 ** 2,
+        "tokens_per_second": total_tokens / total_seconds if total_seconds else 0.0,
+        "token_ids": token_ids,
+        "texts": texts,
+    }
+
+
+def output_drift(reference: list, candidate: list) -> dict:
+    """How far a mode's greedy outputs move away from the float32 ones"""
+    matches, total, divergences = 0, 0, []
+    for ref_ids, ids in zip(reference, candidate):
+        total += len(ref_ids)
+        matches += sum(1 for a, b in zip(ref_ids, ids) if a == b)
+        first = next((i for i, (a, b) in enumerate(zip(ref_ids, ids)) if a != b), min(len(ref_ids), len(ids)))
+        divergences.append(first)
+    return {
+        "token_agreement": matches / total if total else 1.0,
+        "avg_first_divergence": sum(divergences) / len(divergences) if divergences else 0.0,
+        "identical_outputs": sum(1 for ref_ids, ids in zip(reference, candidate) if ref_ids == ids),
+    }
+
+
+def run_in_subprocess(model_path: str, mode: str, max_new_tokens: int) -> dict:
+    """Run one mode in a fresh interpreter so its memory is measured in isolation"""
+    command = [sys.executable, os.path.abspath(__file__), "--worker", mode,
+               "--model-path", model_path, "--max-new-tokens", str(max_new_tokens)]
+    completed = subprocess.run(command, capture_output=True, text=True, cwd=project_root)
+    for line in reversed(completed.stdout.splitlines()):
+        if line.startswith(RESULT_MARKER):
+            return json.loads(line[len(RESULT_MARKER):])
+    return {"mode": mode, "error": completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else "no result"}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark quantized Granite CPU inference")
+    parser.add_argument("--model-path", default=os.getenv("GRANITE_MODEL_PATH", "ibm-granite/granite-3.3-2b-base"))
+    parser.add_argument("--modes", nargs="+", default=["none", "int8", "bf16"])
+    parser.add_argument("--max-new-tokens", type=int, default=48)
+    parser.add_argument("--output", help="Write the full results to this JSON file")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(RESULT_MARKER + json.dumps(run_mode(args.model_path, args.worker, args.max_new_tokens)))
+        return
+
+    print(f"🧪 Benchmarking Granite quantization modes on {len(BENCHMARK_PROMPTS)} finance prompts...")
+    modes = ["none"] + [mode for mode in args.modes if mode != "none"]
+    results = []
+    for mode in modes:
+        print(f"⚡ Running mode '{mode}'...")
+        results.append(run_in_subprocess(args.model_path, mode, args.max_new_tokens))
+
+    reference = results[0]
+    if "error" in reference:
+        print(f"❌ float32 reference run failed: {reference['error']}")
+        return
+
+    print(f"\n{'mode':<8}{'resolved':<10}{'RSS MB':>10}{'weights MB':>12}{'tok/s':>10}{'agreement':>11}{'1st diff':>10}")
+    for result in results:
+        if "error" in result:
+            print(f"{result['mode']:<8}❌ {result['error']}")
+            continue
+        result["drift"] = output_drift(reference["token_ids"], result["token_ids"])
+        print(f"{result['mode']:<8}{result['resolved_mode']:<10}{result['rss_mb']:>10.0f}{result['weights_mb']:>12.0f}"
+              f"{result['tokens_per_second']:>10.1f}{result['drift']['token_agreement']:>10.1%}"
+              f"{result['drift']['avg_first_divergence']:>10.1f}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n📁 Full results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
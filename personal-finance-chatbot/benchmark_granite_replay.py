@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Replay benchmark for deterministic Granite generation
+Runs fixed finance prompts with greedy or seeded decoding. The first run
+records every answer in the output cache; later runs generate again, check
+that each answer is identical and compare its timing with the recorded one,
+so code changes are timed on exactly the same work
+
+Usage:
+    python benchmark_granite_replay.py
+    python benchmark_granite_replay.py --decoding seeded --seed 7 --cache-dir ./replay-cache --output replay.json
+"""
+
+import argparse
+import json
+import os
+import sys
+
+# Add project root to path
+project_root = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, project_root)
+
+from benchmark_granite_backends import BENCHMARK_PROMPTS
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "smartspends", "outputs")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record or replay deterministic Granite answers and compare timings")
+    parser.add_argument("--model-path", default=os.getenv("GRANITE_MODEL_PATH", "ibm-granite/granite-3.3-2b-base"))
+    parser.add_argument("--decoding", choices=["greedy", "seeded"], default="greedy")
+    parser.add_argument("--seed", type=int, default=0, help="RNG seed for --decoding seeded")
+    parser.add_argument("--cache-dir", default=os.getenv("GRANITE_OUTPUT_CACHE_DIR", DEFAULT_CACHE_DIR))
+    parser.add_argument("--output", help="Write the full results to this JSON file")
+    args = parser.parse_args()
+
+    os.environ.update(GRANITE_DECODING=args.decoding, GRANITE_SEED=str(args.seed),
+                      GRANITE_OUTPUT_CACHE_DIR=args.cache_dir, GRANITE_OUTPUT_CACHE_MODE="verify",
+                      # Full answers only: a deadline would cut runs short at different points
+                      GRANITE_DEADLINE_SECONDS="0")
+
+    from src.chatbot.granite_client import GraniteClient
+
+    client = GraniteClient(timeout_seconds=3600, model_path=args.model_path)
+    if not client.initialized:
+        print("❌ Granite model could not be loaded")
+        sys.exit(1)
+    cache = client._output_cache()
+
+    print(f"🧪 Replaying {len(BENCHMARK_PROMPTS)} finance prompts with {args.decoding} decoding "
+          f"(outputs in {args.cache_dir})...")
+    results = []
+    for user_type, question in BENCHMARK_PROMPTS:
+        assembled = client._assemble_prompt(question, user_type, [])
+        stored = cache.entry(assembled.prefix, assembled.suffix)
+        mismatches = cache.get_stats()["mismatches"]
+        client.get_response(question, user_type)
+        stats = client.last_generation_stats
+        result = {
+            "user_type": user_type,
+            "question": question,
+            "new_tokens": stats.get("new_tokens"),
+            "generation_ms": 1000.0 * stats.get("generation_seconds", 0.0),
+            "recorded_ms": 1000.0 * stored["stats"].get("generation_seconds", 0.0) if stored else None,
+        }
+        if stored:
+            result["identical"] = cache.get_stats()["mismatches"] == mismatches
+        results.append(result)
+
+    print(f"\n{'user type':<14}{'tokens':>7}{'recorded ms':>13}{'now ms':>9}{'same':>6}")
+    for result in results:
+        recorded = f"{result['recorded_ms']:.0f}" if result["recorded_ms"] is not None else "-"
+        same = {True: "yes", False: "NO"}.get(result.get("identical"), "new")
+        print(f"{result['user_type']:<14}{result['new_tokens']:>7}{recorded:>13}{result['generation_ms']:>9.0f}{same:>6}")
+
+    stats = cache.get_stats()
+    if stats["verified"]:
+        print(f"\n⚖️ {stats['verified']} answer(s) compared, {stats['mismatches']} differ; "
+              f"{stats['speedup_vs_stored']:.2f}x the recorded speed")
+    else:
+        print(f"\n📁 Recorded {stats['stores']} answer(s) - run again to compare timings on the same work")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"decoding": client.decoding._asdict(), "output_cache": stats, "results": results}, f, indent=2)
+        print(f"📁 Full results written to {args.output}")
+    if stats["mismatches"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Benchmark speculative decoding for Granite
+Times greedy generation of fixed finance prompts with and without a draft
+model and reports the draft acceptance rate and the measured speedup
+
+Usage:
+    python benchmark_granite_speculative.py --draft-model ibm-granite/granite-3.0-1b-a400m-base
+    python benchmark_granite_speculative.py --draft-model ./my-draft --max-new-tokens 64 --output speculative.json
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+# Add project root to path
+project_root = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, project_root)
+
+from benchmark_granite_backends import BENCHMARK_PROMPTS, percentile
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark Granite speculative decoding")
+    parser.add_argument("--model-path", default=os.getenv("GRANITE_MODEL_PATH", "ibm-granite/granite-3.3-2b-base"))
+    parser.add_argument("--draft-model", default=os.getenv("GRANITE_DRAFT_MODEL"), required=not os.getenv("GRANITE_DRAFT_MODEL"))
+    parser.add_argument("--max-new-tokens", type=int, default=48)
+    parser.add_argument("--rounds", type=int, default=2, help="Passes over the prompt set")
+    parser.add_argument("--output", help="Write the full results to this JSON file")
+    args = parser.parse_args()
+
+    # Measure decoding itself: no prefix reuse, no deadline
+    os.environ["GRANITE_PREFIX_CACHE_SIZE"] = "0"
+    os.environ["GRANITE_DEADLINE_SECONDS"] = "0"
+
+    import torch
+    from src.chatbot.granite_client import GraniteClient
+    from src.chatbot.speculative import SpeculativeDecoder
+
+    print(f"🧪 Benchmarking speculative decoding on {len(BENCHMARK_PROMPTS)} finance prompts...")
+    client = GraniteClient(timeout_seconds=3600, model_path=args.model_path)
+    if not client.initialized:
+        print("❌ Granite model could not be loaded")
+        sys.exit(1)
+    model, tokenizer = client._handle.weights()
+    decoder = SpeculativeDecoder(client._handle.weights, args.draft_model, client.device)
+    if not decoder.ensure_loaded():
+        print(f"❌ Draft model unusable: {decoder.error}")
+        sys.exit(1)
+
+    prompts = [client._build_full_prompt(question, user_type) for user_type, question in BENCHMARK_PROMPTS]
+
+    def generate(prompt, speculative):
+        inputs = tokenizer(prompt, return_tensors="pt").to(client.device)
+        kwargs = dict(**inputs, max_new_tokens=args.max_new_tokens, do_sample=False,
+                      pad_token_id=tokenizer.eos_token_id)
+        start = time.perf_counter()
+        with torch.no_grad():
+            outputs = decoder.generate(model, **kwargs)[0] if speculative else model.generate(**kwargs)
+        return time.perf_counter() - start, outputs[0, inputs["input_ids"].shape[1]:].tolist()
+
+    # Warm both paths up before timing
+    generate(prompts[0], False)
+    generate(prompts[0], True)
+
+    results = {}
+    identical = 0
+    for mode, speculative in (("plain", False), ("speculative", True)):
+        latencies, tokens = [], 0
+        for _ in range(args.rounds):
+            for prompt in prompts:
+                seconds, ids = generate(prompt, speculative)
+                latencies.append(seconds)
+                tokens += len(ids)
+        results[mode] = {
+            "p50_latency_ms": percentile(latencies, 0.50) * 1000.0,
+            "p95_latency_ms": percentile(latencies, 0.95) * 1000.0,
+            "tokens_per_second": tokens / sum(latencies) if latencies else 0.0,
+        }
+
+    # Greedy speculative decoding must not change the answer
+    for prompt in prompts:
+        identical += generate(prompt, False)[1] == generate(prompt, True)[1]
+
+    stats = decoder.get_stats()
+    plain, assisted = results["plain"], results["speculative"]
+    speedup = assisted["tokens_per_second"] / plain["tokens_per_second"] if plain["tokens_per_second"] else 0.0
+    results.update({
+        "draft_model": args.draft_model,
+        "acceptance_rate": stats["acceptance_rate"],
+        "measured_speedup": speedup,
+        "estimated_speedup": stats["estimated_speedup"],
+        "identical_outputs": f"{identical}/{len(prompts)}",
+    })
+
+    print(f"\n{'mode':<13}{'p50 ms':>9}{'p95 ms':>9}{'tok/s':>8}")
+    for mode in ("plain", "speculative"):
+        print(f"{mode:<13}{results[mode]['p50_latency_ms']:>9.0f}{results[mode]['p95_latency_ms']:>9.0f}"
+              f"{results[mode]['tokens_per_second']:>8.1f}")
+    print(f"\n🎯 Draft acceptance rate: {stats['acceptance_rate']:.0%}")
+    print(f"⚡ Measured speedup: {speedup:.2f}x (estimated from forward passes: {stats['estimated_speedup']:.2f}x)")
+    print(f"🔁 Identical greedy outputs: {results['identical_outputs']}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n📁 Full results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
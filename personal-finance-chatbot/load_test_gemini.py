@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Offline load test of the Gemini chat path
+Starts the local Gemini stand-in (or uses --endpoint), points GeminiClient at
+it and sends concurrent chat requests through DualAIClient, then reports
+throughput, latency percentiles and how many answers came from Gemini, from
+the Granite fallback or as an error message. Needs no network access or
+Gemini key; Granite answers in Lite mode
+
+Client-side limits come from the usual GEMINI_* variables (e.g. GEMINI_RPM=0
+to see the stand-in's own 429s); the stand-in's behaviour from the options
+
+Usage:
+    python load_test_gemini.py
+    python load_test_gemini.py --users 32 --requests 10 --latency lognormal:1.2,0.6 --error-rate 0.05
+    python load_test_gemini.py --stream --burst-every 20 --burst-seconds 5 --output load.json
+"""
+
+import argparse
+import concurrent.futures
+import contextlib
+import json
+import os
+import sys
+import time
+
+# Add project root to path
+project_root = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, project_root)
+
+from benchmark_granite_backends import BENCHMARK_PROMPTS, percentile
+from src.chatbot.gemini_standin import ANSWER_OPENING, GeminiStandIn, StandInConfig
+
+
+def run_user(client, index: int, requests: int, stream: bool) -> list:
+    """One simulated user asking `requests` questions in turn"""
+    results = []
+    for number in range(requests):
+        user_type, question = BENCHMARK_PROMPTS[(index + number) % len(BENCHMARK_PROMPTS)]
+        # Each user has their own age, so only the same user's repeats have identical prompts
+        user_context = {'user_type': user_type, 'age': 22 + index, 'experience_level': 'beginner'}
+        start = time.perf_counter()
+        first_chunk = None
+        if stream:
+            parts = []
+            for chunk in client.stream_gemini_response(question, user_context):
+                if first_chunk is None:
+                    first_chunk = time.perf_counter() - start
+                parts.append(chunk)
+            answer = "".join(parts)
+        else:
+            answer = client.get_response(question, user_context)
+        results.append({
+            "seconds": time.perf_counter() - start,
+            "first_chunk_seconds": first_chunk,
+            "gemini": ANSWER_OPENING in answer,
+        })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-test DualAIClient against a local Gemini stand-in")
+    parser.add_argument("--users", type=int, default=16, help="Concurrent users")
+    parser.add_argument("--requests", type=int, default=5, help="Questions per user")
+    parser.add_argument("--stream", action="store_true", help="Stream the answers (stream_gemini_response)")
+    parser.add_argument("--endpoint", help="Use a stand-in that is already running instead of starting one")
+    parser.add_argument("--latency", default=StandInConfig._field_defaults["latency"],
+                        help="Stand-in time to first byte, e.g. fixed:0.5 or lognormal:0.8,0.5 (seconds)")
+    parser.add_argument("--chunk-delay", default=StandInConfig._field_defaults["chunk_delay"],
+                        help="Stand-in delay between streamed chunks")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of stand-in requests failing with 5xx")
+    parser.add_argument("--burst-every", type=float, default=0.0, help="Seconds between 429 bursts (0 = none)")
+    parser.add_argument("--burst-seconds", type=float, default=0.0, help="Length of each 429 burst")
+    parser.add_argument("--rpm", type=int, default=0, help="Stand-in requests per minute before 429 (0 = unlimited)")
+    parser.add_argument("--seed", type=int, default=0, help="Stand-in random seed")
+    parser.add_argument("--verbose", action="store_true", help="Keep the clients' per-request log lines")
+    parser.add_argument("--output", help="Write the full results to this JSON file")
+    args = parser.parse_args()
+
+    standin = None
+    endpoint = args.endpoint
+    if not endpoint:
+        config = StandInConfig(latency=args.latency, chunk_delay=args.chunk_delay, error_rate=args.error_rate,
+                               burst_every=args.burst_every, burst_seconds=args.burst_seconds, rpm=args.rpm,
+                               seed=args.seed)
+        standin = GeminiStandIn(config).start()
+        endpoint = standin.endpoint
+    os.environ["GEMINI_API_ENDPOINT"] = endpoint
+    os.environ.setdefault("GRANITE_PREFER_LITE", "true")
+
+    from src.chatbot.dual_ai_client import DualAIClient
+
+    client = DualAIClient("standin-key")
+    if client.active_ai != "gemini":
+        print("❌ Gemini client could not be set up")
+        sys.exit(1)
+
+    total = args.users * args.requests
+    print(f"🧪 {args.users} users x {args.requests} {'streamed ' if args.stream else ''}requests "
+          f"against {endpoint}...")
+    quiet = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(open(os.devnull, "w"))
+    start = time.perf_counter()
+    with quiet, concurrent.futures.ThreadPoolExecutor(max_workers=args.users) as pool:
+        futures = [pool.submit(run_user, client, index, args.requests, args.stream) for index in range(args.users)]
+        results = [result for future in futures for result in future.result()]
+    elapsed = time.perf_counter() - start
+
+    latencies = [result["seconds"] for result in results]
+    first_chunks = [result["first_chunk_seconds"] for result in results if result["first_chunk_seconds"] is not None]
+    gemini = sum(result["gemini"] for result in results)
+    failovers = client.gemini_failovers
+    summary = {
+        "endpoint": endpoint,
+        "users": args.users,
+        "requests": total,
+        "stream": args.stream,
+        "seconds": elapsed,
+        "requests_per_second": total / elapsed if elapsed else 0.0,
+        "latency_p50": percentile(latencies, 0.50),
+        "latency_p95": percentile(latencies, 0.95),
+        "latency_p99": percentile(latencies, 0.99),
+        "latency_max": max(latencies, default=0.0),
+        "first_chunk_p50": percentile(first_chunks, 0.50) if first_chunks else None,
+        "first_chunk_p95": percentile(first_chunks, 0.95) if first_chunks else None,
+        "gemini_answers": gemini,
+        "granite_failovers": failovers,
+        "error_messages": total - gemini - failovers,
+    }
+    info = client.gemini_client.get_model_info()
+
+    print(f"\n⏱️ {total} requests in {elapsed:.1f}s ({summary['requests_per_second']:.1f} req/s)")
+    print(f"📈 Latency p50 {summary['latency_p50']:.2f}s, p95 {summary['latency_p95']:.2f}s, "
+          f"p99 {summary['latency_p99']:.2f}s, max {summary['latency_max']:.2f}s")
+    if first_chunks:
+        print(f"⚡ First chunk p50 {summary['first_chunk_p50']:.2f}s, p95 {summary['first_chunk_p95']:.2f}s")
+    print(f"🔮 Gemini answers: {gemini}   🔧 Granite failovers: {failovers}   "
+          f"⚠️ Error messages: {summary['error_messages']}")
+    rate_limit = info["rate_limit"]
+    print(f"🚦 Client rate limit: {rate_limit['retries']} retries, {rate_limit['quota_errors']} quota errors, "
+          f"{rate_limit['server_errors']} server errors, {rate_limit['rejected']} turned away")
+    if standin:
+        stats = standin.get_stats()
+        print(f"🧪 Stand-in: {stats['requests']} requests, statuses {stats['statuses']}, "
+              f"peak {stats['peak_in_flight']} in flight")
+        standin.stop()
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"summary": summary, "standin": standin.get_stats() if standin else None,
+                       "gemini": {key: info[key] for key in ("async", "single_flight", "rate_limit")},
+                       "results": results}, f, indent=2)
+        print(f"💾 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Prepare shared Granite weights for every app process on this host
+Loads Granite once and writes its weights to GRANITE_SHARED_WEIGHTS_DIR, so
+app processes started afterwards with the same setting map that file instead
+of each loading a private copy
+
+Usage:
+    python prepare_shared_weights.py --dir /dev/shm/smartspends
+    GRANITE_SHARED_WEIGHTS_DIR=/dev/shm/smartspends streamlit run src/app.py --server.port 8501
+"""
+
+import argparse
+import os
+import sys
+
+# Add project root to path
+project_root = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, project_root)
+
+from src.chatbot.model_loader import GraniteModelLoader
+from src.chatbot.quantization import load_dtype, resolve_quantization_mode
+from src.chatbot.shared_weights import SharedWeightsStore, resolve_shared_weights_dir
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write Granite weights for sharing between app processes")
+    parser.add_argument("--model-path", default=os.getenv("GRANITE_MODEL_PATH", "ibm-granite/granite-3.3-2b-base"))
+    parser.add_argument("--dir", default=os.getenv("GRANITE_SHARED_WEIGHTS_DIR"),
+                        required=not os.getenv("GRANITE_SHARED_WEIGHTS_DIR"),
+                        help="Shared directory (a tmpfs such as /dev/shm keeps the pages in RAM)")
+    parser.add_argument("--quantization", default=None, help="none or bf16 (defaults to GRANITE_QUANTIZATION)")
+    args = parser.parse_args()
+
+    os.environ["GRANITE_SHARED_WEIGHTS_DIR"] = args.dir
+    quantization = resolve_quantization_mode(args.quantization, device="cpu")
+    if resolve_shared_weights_dir("cpu", quantization) is None:
+        sys.exit(1)
+
+    loader = GraniteModelLoader(args.model_path)
+    store = SharedWeightsStore.from_env(args.dir)
+    local_dir = loader.resolve()
+    path = store.ensure(loader, local_dir, load_dtype(quantization))
+    if path is None:
+        print("❌ Another process is still writing the shared weights")
+        sys.exit(1)
+
+    print(f"✅ Shared weights ready: {path} ({os.path.getsize(path) / 1024 ** 2:.0f} MB)")
+    print(f"   Start each app process with GRANITE_SHARED_WEIGHTS_DIR={args.dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Token report for Gemini prompts
+Compares the input tokens of the previous one-block prompt (instructions,
+profile and question resent together) with the compact prompt (system
+instruction plus a cached profile block and the question) for a set of
+typical profiles and questions
+
+Tokens are counted with the Gemini API when GEMINI_API_KEY is set (or
+--count api), otherwise estimated at 4 characters per token
+
+Usage:
+    python report_gemini_prompt_tokens.py
+    python report_gemini_prompt_tokens.py --count api --output prompt_tokens.json
+"""
+
+import argparse
+import json
+import os
+import sys
+
+# Add project root to path
+project_root = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, project_root)
+
+from src.chatbot.gemini_prompts import SYSTEM_INSTRUCTION, build_prompt, profile_cache_stats
+from src.chatbot.rate_limiter import CHARS_PER_TOKEN
+
+SAMPLE_PROFILES = {
+    "student": {'age': 21, 'occupation': 'student', 'income': 15000, 'experience_level': 'beginner',
+                'goals': ['Emergency fund'], 'risk_tolerance': 'low'},
+    "young_adult": {'age': 26, 'occupation': 'software engineer', 'income': 85000,
+                    'experience_level': 'intermediate', 'goals': ['Buy a house', 'Retirement'],
+                    'risk_tolerance': 'moderate'},
+    "professional": {'age': 38, 'occupation': 'doctor', 'income': 250000, 'experience_level': 'advanced',
+                     'goals': ['Children education', 'Retirement', 'Tax saving'], 'risk_tolerance': 'high'},
+    "senior": {'age': 64, 'occupation': 'retired teacher', 'income': 40000, 'experience_level': 'intermediate',
+               'goals': ['Regular income'], 'risk_tolerance': 'low'},
+    "unspecified": {},
+}
+
+SAMPLE_QUESTIONS = [
+    "How much should I save every month?",
+    "Should I invest in PPF or ELSS for tax saving?",
+    "How big should my emergency fund be?",
+]
+
+
+def legacy_prompt(user_input, user_context):
+    """The prompt as it was built before the system instruction (everything in one block)"""
+    age = user_context.get('age', 'Not specified')
+    occupation = user_context.get('occupation', 'Not specified')
+    income = user_context.get('income', 'Not specified')
+    experience_level = user_context.get('experience_level', 'beginner')
+    goals = user_context.get('goals', [])
+    risk_tolerance = user_context.get('risk_tolerance', 'moderate')
+
+    return f"""You are a professional financial advisor AI assistant focusing on Indian financial context. Provide personalized, actionable financial advice.
+
+USER PROFILE:
+- Age: {age}
+- Occupation: {occupation}
+- Monthly Income: ₹{income} (if specified)
+- Financial Experience: {experience_level}
+- Financial Goals: {', '.join(goals) if goals else 'General financial wellness'}
+- Risk Tolerance: {risk_tolerance}
+
+USER QUESTION: {user_input}
+
+INSTRUCTIONS:
+1. Provide specific, actionable financial advice tailored to their profile and Indian financial context
+2. Consider their age, income level, and experience when giving recommendations
+3. Include concrete numbers, percentages, or rupee amounts when relevant
+4. Use Indian financial instruments (PPF, EPF, SIP, NSC, etc.) when suggesting investments
+5. Keep the response concise but comprehensive (3-4 paragraphs max)
+6. Use a friendly, professional tone
+7. If asking about specific investments, include appropriate disclaimers
+8. Focus on practical steps they can take immediately
+9. Use ₹ (INR) currency throughout your response
+
+Please provide your personalized financial advice:"""
+
+
+def make_counter(mode):
+    """Function counting the tokens of (text, system instruction or None)"""
+    if mode == "estimate":
+        return lambda text, system=None: (len(text) + len(system or "")) // CHARS_PER_TOKEN
+
+    import google.generativeai as genai
+    from src.chatbot.gemini_client import GEMINI_MODEL
+
+    genai.configure(api_key=os.environ["GEMINI_API_KEY"])
+    plain = genai.GenerativeModel(GEMINI_MODEL)
+    with_system = genai.GenerativeModel(GEMINI_MODEL, system_instruction=SYSTEM_INSTRUCTION)
+
+    def count(text, system=None):
+        model = with_system if system else plain
+        return model.count_tokens(text).total_tokens
+
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare input tokens of the old and compact Gemini prompts")
+    parser.add_argument("--count", choices=["auto", "api", "estimate"], default="auto",
+                        help="Count with the Gemini API or estimate from characters (auto: API if GEMINI_API_KEY is set)")
+    parser.add_argument("--output", help="Write the full results to this JSON file")
+    args = parser.parse_args()
+
+    mode = args.count
+    if mode == "auto":
+        mode = "api" if os.getenv("GEMINI_API_KEY") else "estimate"
+    if mode == "api" and not os.getenv("GEMINI_API_KEY"):
+        print("❌ --count api needs GEMINI_API_KEY")
+        sys.exit(1)
+    count = make_counter(mode)
+
+    system_tokens = count(SYSTEM_INSTRUCTION)
+    print(f"🧮 Counting prompt tokens ({'Gemini API' if mode == 'api' else f'estimate, {CHARS_PER_TOKEN} chars/token'}); "
+          f"system instruction: {system_tokens} tokens")
+
+    results = []
+    for user_type, profile in SAMPLE_PROFILES.items():
+        for question in SAMPLE_QUESTIONS:
+            prompt = build_prompt(question, profile)
+            old = count(legacy_prompt(question, profile))
+            new = count(prompt, SYSTEM_INSTRUCTION)
+            results.append({
+                "user_type": user_type,
+                "question": question,
+                "old_tokens": old,
+                "new_tokens": new,
+                "new_prompt_tokens": count(prompt),
+                "saved_percent": 100.0 * (old - new) / old if old else 0.0,
+            })
+
+    print(f"\n{'Profile':<14}{'Question':<50}{'Old':>6}{'New':>6}{'Saved':>8}")
+    for result in results:
+        print(f"{result['user_type']:<14}{result['question'][:48]:<50}{result['old_tokens']:>6}"
+              f"{result['new_tokens']:>6}{result['saved_percent']:>7.1f}%")
+
+    old_total = sum(result["old_tokens"] for result in results)
+    new_total = sum(result["new_tokens"] for result in results)
+    cache = profile_cache_stats()
+    print(f"\n📉 {old_total} -> {new_total} input tokens over {len(results)} requests "
+          f"({100.0 * (old_total - new_total) / old_total:.1f}% fewer; "
+          f"the {system_tokens}-token system instruction is included in every new request)")
+    print(f"🗂️ Profile blocks: {cache['misses']} rendered, {cache['hits']} reused")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"count": mode, "system_instruction_tokens": system_tokens, "old_total": old_total,
+                       "new_total": new_total, "profile_cache": cache, "results": results}, f, indent=2)
+        print(f"💾 Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -910,6 +910,25 @@ def display_login_page():
             else:
                 st.error("Please enter your full name to continue.")
 
+def render_response_stream(chunks, placeholder, max_chars: int = 250) -> str:
+    """Render AI text chunks progressively and return the final (length-limited) response"""
+    response = ""
+    for chunk in chunks:
+        response += chunk
+        if len(response) > max_chars:
+            break
+        placeholder.markdown(response + "▌")
+    
+    # Stop generation early once we have more than we will show
+    if hasattr(chunks, "close"):
+        chunks.close()
+    
+    # Limit response length
+    if len(response) > max_chars:
+        response = response[:max_chars - 3] + "..."
+    placeholder.markdown(response)
+    return response
+
 def display_chat_page():
     """Enhanced Chat interface page"""
     if st.button("← Back to Dashboard", key="back_from_chat"):
@@ -967,26 +986,30 @@ def display_chat_page():
                     
                     # Create enhanced user context for AI
                     user_context = {**user_profile, 'user_type': user_type} if user_profile else {'user_type': 'general'}
+                    # Earlier turns, so Granite can follow up on them (trimmed to its token budget)
+                    user_context['conversation_history'] = list(st.session_state.conversation_history)
                     
                     # Generate response using selected AI model
                     enhanced_prompt = f"Give a short, actionable financial advice in 2-3 sentences maximum. Question: {user_input}"
                     
                     if st.session_state.selected_ai_model == "Gemini":
-                        response = ai_client.get_gemini_response(enhanced_prompt, user_context)
+                        # Show Gemini's answer as it is written
+                        st.success("💡 **Quick AI Advice:**")
+                        response = render_response_stream(
+                            ai_client.stream_gemini_response(enhanced_prompt, user_context),
+                            st.empty()
+                        )
                     else:
-                        response = ai_client.get_granite_response(enhanced_prompt, user_context)
-                    
-                    # Limit response length
-                    if len(response) > 250:
-                        response = response[:247] + "..."
+                        # Granite runs locally - show tokens as they are generated
+                        st.success("💡 **Quick AI Advice:**")
+                        response = render_response_stream(
+                            ai_client.stream_granite_response(enhanced_prompt, user_context),
+                            st.empty()
+                        )
                     
                     # Store in conversation history
                     st.session_state.conversation_history.append((user_input, response))
                     
-                    # Display response
-                    st.success("💡 **Quick AI Advice:**")
-                    st.write(response)
-                    
                 except Exception as e:
                     st.error(f"❌ System Error: {str(e)}")
                     st.info("🔄 Please try your question again.")
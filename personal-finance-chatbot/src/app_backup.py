@@ -1532,7 +1532,7 @@ def display_chat_page():
                 
                 # Test AI connection before using
                 connections = ai_client.test_connections()
-                if not any(connections.values()):
+                if all(ok is False for ok in connections.values()):
                     st.error("❌ AI services are currently unavailable. Please try again in a moment.")
                     return
                 
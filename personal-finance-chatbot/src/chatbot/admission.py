@@ -0,0 +1,177 @@
+# -*- coding: utf-8 -*-
+"""
+Admission control for local Granite inference.
+
+Only a few requests can run on the model at once; the rest wait in a bounded
+queue. A request is turned away straight away when the queue is full, or
+after waiting too long, so the caller can answer with Granite Lite instead of
+leaving the user staring at a spinner. Interactive chat is served before
+background work and may push background requests out of a full queue.
+"""
+
+import contextlib
+import heapq
+import itertools
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict, Iterator, Optional
+
+PRIORITIES = {"interactive": 0, "background": 10}
+
+REJECT_REASONS = ("queue_full", "queue_timeout", "preempted")
+
+
+class AdmissionRejectedError(RuntimeError):
+    """Raised when a request is not admitted to the model"""
+
+    def __init__(self, reason: str, message: str):
+        super().__init__(message)
+        self.reason = reason
+
+
+class _Waiter:
+    """A queued request waiting for a free slot"""
+
+    def __init__(self, priority: int, sequence: int):
+        self.priority = priority
+        self.sequence = sequence
+        self.enqueued_at = time.perf_counter()
+        self.event = threading.Event()
+        self.granted = False
+        self.rejected: Optional[str] = None
+
+    def __lt__(self, other: "_Waiter") -> bool:
+        return (self.priority, self.sequence) < (other.priority, other.sequence)
+
+
+def resolve_priority(priority: str) -> int:
+    """Numeric priority (lower runs first) for a priority name"""
+    if priority not in PRIORITIES:
+        raise ValueError(f"Unknown priority '{priority}' (expected one of {', '.join(PRIORITIES)})")
+    return PRIORITIES[priority]
+
+
+class AdmissionController:
+    """
+    Lets up to `max_concurrent` requests use the model at once and queues up
+    to `max_queue_depth` more, highest priority first.
+    """
+
+    def __init__(self, max_concurrent: int = 1, max_queue_depth: int = 16,
+                 max_wait_seconds: Optional[float] = 10.0, metrics_window: int = 1000):
+        """
+        Args:
+            max_concurrent: Requests allowed on the model at the same time
+            max_queue_depth: Requests allowed to wait for a slot (0 = none)
+            max_wait_seconds: Longest a request waits for a slot (None = no limit)
+            metrics_window: Number of recent queue waits kept for percentiles
+        """
+        self.max_concurrent = max(1, int(max_concurrent))
+        self.max_queue_depth = max(0, int(max_queue_depth))
+        self.max_wait_seconds = max_wait_seconds
+        self._lock = threading.Lock()
+        self._waiters: list = []  # heap of _Waiter
+        self._sequence = itertools.count()
+        self._active = 0
+        self._wait_times = deque(maxlen=metrics_window)
+        self._admitted = 0
+        self._rejected: Dict[str, int] = {reason: 0 for reason in REJECT_REASONS}
+        self._peak_queue_depth = 0
+
+    @classmethod
+    def from_env(cls, default_concurrency: int = 1) -> "AdmissionController":
+        """Build a controller configured by GRANITE_MAX_CONCURRENT / GRANITE_MAX_QUEUE_DEPTH / GRANITE_MAX_QUEUE_WAIT_SECONDS"""
+        return cls(
+            max_concurrent=int(os.getenv("GRANITE_MAX_CONCURRENT", 0)) or default_concurrency,
+            max_queue_depth=int(os.getenv("GRANITE_MAX_QUEUE_DEPTH", 16)),
+            max_wait_seconds=float(os.getenv("GRANITE_MAX_QUEUE_WAIT_SECONDS", 10)) or None,
+        )
+
+    def _reject(self, reason: str, message: str) -> AdmissionRejectedError:
+        # Called with self._lock held
+        self._rejected[reason] += 1
+        return AdmissionRejectedError(reason, message)
+
+    def acquire(self, priority: str = "interactive", max_wait_seconds: Optional[float] = None):
+        """
+        Take a model slot, waiting in the queue if all are busy.
+
+        Args:
+            priority: "interactive" (chat) or "background"
+            max_wait_seconds: Overrides the controller's queue-wait limit
+
+        Raises:
+            AdmissionRejectedError: If the queue is full, the wait ran out or a
+                higher-priority request took this one's place
+        """
+        rank = resolve_priority(priority)
+        limit = self.max_wait_seconds if max_wait_seconds is None else max_wait_seconds
+        with self._lock:
+            if self._active < self.max_concurrent and not self._waiters:
+                self._active += 1
+                self._admitted += 1
+                self._wait_times.append(0.0)
+                return
+            if len(self._waiters) >= self.max_queue_depth:
+                # Make room by pushing out the newest lower-priority waiter, if any
+                victim = max(self._waiters, key=lambda w: (w.priority, w.sequence), default=None)
+                if victim is None or victim.priority <= rank:
+                    raise self._reject("queue_full", f"Granite queue is full ({self.max_queue_depth} waiting)")
+                self._waiters.remove(victim)
+                heapq.heapify(self._waiters)
+                victim.rejected = "preempted"
+                self._rejected["preempted"] += 1
+                victim.event.set()
+            waiter = _Waiter(rank, next(self._sequence))
+            heapq.heappush(self._waiters, waiter)
+            self._peak_queue_depth = max(self._peak_queue_depth, len(self._waiters))
+
+        waiter.event.wait(limit)
+        with self._lock:
+            if waiter.granted:
+                self._admitted += 1
+                self._wait_times.append(time.perf_counter() - waiter.enqueued_at)
+                return
+            if waiter.rejected == "preempted":
+                raise AdmissionRejectedError("preempted", "Granite request was displaced by interactive requests")
+            self._waiters.remove(waiter)
+            heapq.heapify(self._waiters)
+            raise self._reject("queue_timeout", f"Granite queue wait exceeded {limit:.1f}s")
+
+    def release(self):
+        """Give a slot back, handing it to the best waiting request"""
+        with self._lock:
+            if self._waiters:
+                waiter = heapq.heappop(self._waiters)
+                waiter.granted = True
+                waiter.event.set()
+            else:
+                self._active -= 1
+
+    @contextlib.contextmanager
+    def admit(self, priority: str = "interactive", max_wait_seconds: Optional[float] = None) -> Iterator[None]:
+        """Hold a model slot for the duration of the block (see acquire)"""
+        self.acquire(priority, max_wait_seconds)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def get_stats(self) -> Dict[str, object]:
+        """Slot usage, queue depth, waits and rejections"""
+        with self._lock:
+            waits = sorted(self._wait_times)
+            return {
+                "max_concurrent": self.max_concurrent,
+                "max_queue_depth": self.max_queue_depth,
+                "max_wait_seconds": self.max_wait_seconds,
+                "active": self._active,
+                "queued": len(self._waiters),
+                "peak_queue_depth": self._peak_queue_depth,
+                "admitted": self._admitted,
+                "rejected": dict(self._rejected),
+                "avg_wait_ms": 1000.0 * sum(waits) / len(waits) if waits else 0.0,
+                "p95_wait_ms": 1000.0 * waits[int(0.95 * (len(waits) - 1))] if waits else 0.0,
+            }
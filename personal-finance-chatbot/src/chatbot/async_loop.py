@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""
+One background asyncio event loop per process.
+
+Streamlit runs each script on its own thread, and asyncio.run() would create a
+fresh event loop for every call, dropping any connection bound to the
+previous one. Coroutines submitted here all run on one long-lived daemon
+loop instead. Async clients created on it (such as Gemini's gRPC channel) are
+therefore reused, and synchronous code can wait for them with a timeout.
+"""
+
+import asyncio
+import concurrent.futures
+import queue
+import threading
+from typing import Any, AsyncIterable, Awaitable, Iterator, Optional
+
+
+class BackgroundEventLoop:
+    """An asyncio event loop running forever on a daemon thread"""
+
+    def __init__(self, name: str = "smartspends-asyncio"):
+        self.name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        """The running loop (started on first use)"""
+        with self._lock:
+            if self._loop is None or self._loop.is_closed():
+                ready = threading.Event()
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._run, args=(self._loop, ready), name=self.name, daemon=True)
+                self._thread.start()
+                ready.wait()
+            return self._loop
+
+    @staticmethod
+    def _run(loop: asyncio.AbstractEventLoop, ready: threading.Event):
+        asyncio.set_event_loop(loop)
+        loop.call_soon(ready.set)
+        loop.run_forever()
+
+    def in_loop_thread(self) -> bool:
+        """True when called from the loop's own thread (where blocking on it would deadlock)"""
+        return self._thread is not None and threading.current_thread() is self._thread
+
+    def submit(self, coro: Awaitable[Any]) -> concurrent.futures.Future:
+        """Schedule a coroutine on the loop; cancelling the returned future cancels it"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro: Awaitable[Any], timeout: Optional[float] = None) -> Any:
+        """
+        Run a coroutine on the loop and wait for its result.
+
+        The coroutine is cancelled if the wait ends early: on timeout, or when
+        the waiting thread is interrupted (e.g. Streamlit stopping a script run).
+
+        Raises:
+            concurrent.futures.TimeoutError: If it did not finish within timeout
+        """
+        if self.in_loop_thread():
+            raise RuntimeError("BackgroundEventLoop.run() called from the loop thread - await the coroutine instead")
+        future = self.submit(coro)
+        try:
+            return future.result(timeout)
+        except BaseException:
+            future.cancel()
+            raise
+
+    def iterate(self, aiterable: AsyncIterable[Any], timeout: Optional[float] = None) -> Iterator[Any]:
+        """
+        Consume an async iterable on the loop and yield its items here.
+
+        Closing the returned generator (or the waiting thread being
+        interrupted) cancels the iteration on the loop.
+
+        Args:
+            aiterable: Async iterable to consume (e.g. an async generator)
+            timeout: Longest to wait for each item
+
+        Raises:
+            concurrent.futures.TimeoutError: If the next item did not arrive within timeout
+        """
+        if self.in_loop_thread():
+            raise RuntimeError("BackgroundEventLoop.iterate() called from the loop thread - use async for instead")
+        items: "queue.Queue" = queue.Queue()
+
+        async def pump():
+            try:
+                async for item in aiterable:
+                    items.put((True, item))
+            except BaseException as e:
+                items.put((False, e))
+                raise
+            items.put((False, None))
+
+        future = self.submit(pump())
+        try:
+            while True:
+                try:
+                    is_item, value = items.get(timeout=timeout)
+                except queue.Empty:
+                    raise concurrent.futures.TimeoutError(f"No item within {timeout}s") from None
+                if is_item:
+                    yield value
+                elif value is None:
+                    return
+                else:
+                    raise value
+        finally:
+            future.cancel()
+
+    def stop(self):
+        """Stop the loop thread (a later call to `loop` starts a new one)"""
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop, self._thread = None, None
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(loop.stop)
+            if thread is not None:
+                thread.join(timeout=5.0)
+            if not loop.is_running():
+                loop.close()
+
+
+_background_loop = BackgroundEventLoop()
+
+
+def get_background_loop() -> BackgroundEventLoop:
+    """The process-wide background event loop"""
+    return _background_loop
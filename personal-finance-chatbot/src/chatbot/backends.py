@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+"""
+Execution backends for local Granite inference.
+
+Selected with GRANITE_BACKEND:
+- "eager" (default): plain PyTorch AutoModelForCausalLM, as before
+- "compile": the same model with its forward pass run through torch.compile
+  (slow first request while the graph compiles, faster decoding afterwards)
+- "onnx": the model exported once to ONNX and run by an ONNX Runtime CPU
+  session (needs `pip install optimum[onnxruntime]`)
+
+Every backend returns a model with the usual generate() API, so batching,
+stopping criteria and streaming work unchanged. The PyTorch backends map the
+weights from GRANITE_SHARED_WEIGHTS_DIR when it is set (see shared_weights.py).
+"""
+
+import importlib.util
+import os
+import re
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import torch
+
+from .model_loader import GraniteModelLoader
+from .quantization import apply_quantization, load_dtype
+from .shared_weights import SharedWeightsStore, resolve_shared_weights_dir
+
+BACKENDS = ("eager", "compile", "onnx")
+DEFAULT_ONNX_DIR = os.path.join(os.path.expanduser("~"), ".cache", "smartspends", "onnx")
+
+
+def onnx_runtime_available() -> bool:
+    """True when optimum's ONNX Runtime integration is installed"""
+    try:
+        return (importlib.util.find_spec("onnxruntime") is not None
+                and importlib.util.find_spec("optimum.onnxruntime") is not None)
+    except ModuleNotFoundError:
+        return False
+
+
+def resolve_backend(name: Optional[str] = None, device: str = "cpu") -> str:
+    """
+    Turn the requested backend into the one that will actually be used.
+
+    Returns:
+        "eager", "compile" or "onnx"
+    """
+    name = (name or os.getenv("GRANITE_BACKEND", "eager")).strip().lower()
+    if name not in BACKENDS:
+        print(f"⚠️ Unknown GRANITE_BACKEND '{name}' - using eager PyTorch")
+        return "eager"
+    if name == "compile" and not hasattr(torch, "compile"):
+        print("⚠️ torch.compile needs PyTorch 2.0+ - using eager PyTorch")
+        return "eager"
+    if name == "onnx":
+        if device != "cpu":
+            print("⚠️ The ONNX Runtime backend is CPU only - using eager PyTorch")
+            return "eager"
+        if not onnx_runtime_available():
+            print("⚠️ ONNX Runtime backend needs: pip install optimum[onnxruntime] - using eager PyTorch")
+            return "eager"
+    return name
+
+
+class EagerBackend:
+    """Plain PyTorch: load the weights and run them as they are"""
+
+    name = "eager"
+    # Injecting precomputed past_key_values needs a PyTorch model
+    supports_prefix_cache = True
+
+    def load(self, loader: GraniteModelLoader, device: str, quantization: str) -> Tuple[Any, Any]:
+        """
+        Load (model, tokenizer) for generation.
+
+        Args:
+            loader: Resolves, verifies and loads the files
+            device: "cpu" or "cuda"
+            quantization: Resolved quantization mode (CPU only)
+        """
+        if device == "cpu":
+            shared_dir = resolve_shared_weights_dir(device, quantization)
+            if shared_dir:
+                # Map the host-wide copy instead of reading a private one
+                model, tokenizer = SharedWeightsStore.from_env(shared_dir).load(loader, load_dtype(quantization))
+            else:
+                model, tokenizer = loader.load(device, torch_dtype=load_dtype(quantization))
+            model = apply_quantization(model, quantization)
+        else:
+            model, tokenizer = loader.load(device)
+        return self.optimize(model, tokenizer, loader.timings), tokenizer
+
+    def optimize(self, model, tokenizer, timings: Dict[str, float]):
+        """Backend-specific post-processing of the loaded model"""
+        return model
+
+
+class CompiledBackend(EagerBackend):
+    """PyTorch with the forward pass compiled by torch.compile"""
+
+    name = "compile"
+
+    def optimize(self, model, tokenizer, timings: Dict[str, float]):
+        eager_forward = model.forward
+        # dynamic=True: prompt and cache lengths change every step
+        model.forward = torch.compile(eager_forward, dynamic=True)
+
+        # Compile now instead of on the first chat request, and fall back if
+        # this platform cannot compile (no C++ compiler, unsupported ops...)
+        start = time.perf_counter()
+        try:
+            inputs = tokenizer("Warm-up", return_tensors="pt").to(model.device)
+            with torch.no_grad():
+                model.generate(**inputs, max_new_tokens=2, do_sample=False,
+                               pad_token_id=tokenizer.eos_token_id if tokenizer.pad_token_id is None
+                               else tokenizer.pad_token_id)
+        except Exception as e:
+            print(f"⚠️ torch.compile failed ({e}) - using eager PyTorch")
+            model.forward = eager_forward
+        timings["compile"] = time.perf_counter() - start
+        return model
+
+
+class OnnxRuntimeBackend:
+    """Model exported to ONNX once, then run by an ONNX Runtime CPU session"""
+
+    name = "onnx"
+    supports_prefix_cache = False
+
+    def __init__(self, export_dir: Optional[str] = None):
+        self.export_dir = export_dir or os.getenv("GRANITE_ONNX_DIR", DEFAULT_ONNX_DIR)
+
+    def export_path(self, loader: GraniteModelLoader, local_dir: str) -> str:
+        """
+        Directory holding the export of one model revision (edited local
+        weights get a new export instead of the stale one).
+        """
+        name = re.sub(r"[^A-Za-z0-9_.-]+", "--", loader.model_path.strip("/\\"))
+        return os.path.join(self.export_dir, f"{name}-{loader.fingerprint(local_dir)}")
+
+    def load(self, loader: GraniteModelLoader, device: str, quantization: str) -> Tuple[Any, Any]:
+        from optimum.onnxruntime import ORTModelForCausalLM
+        from transformers import AutoTokenizer
+
+        total_start = time.perf_counter()
+        local_dir = loader.resolve()
+        tokenizer = AutoTokenizer.from_pretrained(local_dir, local_files_only=True)
+
+        # One export per model revision; later loads reuse it
+        onnx_dir = self.export_path(loader, local_dir)
+        start = time.perf_counter()
+        if os.path.isfile(os.path.join(onnx_dir, "model.onnx")):
+            model = ORTModelForCausalLM.from_pretrained(onnx_dir, provider="CPUExecutionProvider")
+        else:
+            print(f"📦 Exporting Granite to ONNX in {onnx_dir} (one-time)...")
+            model = ORTModelForCausalLM.from_pretrained(local_dir, export=True, provider="CPUExecutionProvider")
+            model.save_pretrained(onnx_dir)
+        loader.timings["weights"] = time.perf_counter() - start
+        loader.timings["total"] = time.perf_counter() - total_start
+
+        if quantization != "none":
+            print("⚠️ GRANITE_QUANTIZATION does not apply to the ONNX Runtime backend")
+        if os.getenv("GRANITE_SHARED_WEIGHTS_DIR", "").strip():
+            print("⚠️ GRANITE_SHARED_WEIGHTS_DIR does not apply to the ONNX Runtime backend")
+        return model, tokenizer
+
+
+def get_backend(name: str):
+    """Backend instance for a resolved backend name"""
+    if name == "compile":
+        return CompiledBackend()
+    if name == "onnx":
+        return OnnxRuntimeBackend()
+    return EagerBackend()
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+"""
+Background loading for the full Granite client.
+
+Loading (and possibly downloading) the weights takes far longer than anyone
+should wait for a chat answer. BackgroundLoader runs the load on a daemon
+thread, exposes its progress and readiness, hands the finished client to
+ready callbacks and can be cancelled.
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+# factory(progress_callback, cancel_event) -> client with an `initialized` flag
+ClientFactory = Callable[[Callable[[str, float], None], threading.Event], Any]
+
+LOAD_STATES = ("pending", "loading", "ready", "failed", "cancelled")
+
+
+class BackgroundLoader:
+    """
+    Runs a slow client factory once on a daemon thread.
+
+    State goes pending -> loading -> ready | failed | cancelled.
+    """
+
+    def __init__(self, factory: ClientFactory, name: str = "granite-loader"):
+        """
+        Args:
+            factory: Builds the client, reporting progress and honouring the cancel event
+            name: Name of the loader thread
+        """
+        self.factory = factory
+        self.name = name
+        self.state = "pending"
+        self.stage = "pending"
+        self.fraction = 0.0
+        self.error: Optional[str] = None
+        self.client: Any = None
+        self._cancel_event = threading.Event()
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+        self._ready_callbacks: List[Callable[[Any], None]] = []
+        self._started_at: Optional[float] = None
+        self._finished_at: Optional[float] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "BackgroundLoader":
+        """Start loading (no-op if already started)"""
+        with self._lock:
+            if self._thread is not None:
+                return self
+            self.state = "loading"
+            self._started_at = time.perf_counter()
+            self._thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+            self._thread.start()
+        return self
+
+    def _on_progress(self, stage: str, fraction: float):
+        with self._lock:
+            self.stage = stage
+            self.fraction = max(self.fraction, min(1.0, fraction))
+
+    def _run(self):
+        client, error = None, None
+        try:
+            client = self.factory(self._on_progress, self._cancel_event)
+        except Exception as e:
+            error = str(e)
+
+        with self._lock:
+            self._finished_at = time.perf_counter()
+            if self._cancel_event.is_set():
+                self.state = "cancelled"
+            elif client is not None and getattr(client, "initialized", True):
+                self.state, self.stage, self.fraction = "ready", "ready", 1.0
+                self.client = client
+            else:
+                self.state = "failed"
+                self.error = error or "Model could not be loaded"
+            callbacks = list(self._ready_callbacks) if self.state == "ready" else []
+
+        if self.state != "ready" and client is not None and hasattr(client, "release"):
+            # Cancelled after the weights were already in - give them back
+            client.release()
+        if self.state == "ready":
+            print(f"✅ Background Granite load finished in {self._finished_at - self._started_at:.1f}s")
+        elif self.state == "cancelled":
+            print("🛑 Background Granite load cancelled")
+        else:
+            print(f"❌ Background Granite load failed: {self.error}")
+
+        for callback in callbacks:
+            try:
+                callback(client)
+            except Exception as e:
+                print(f"⚠️ Granite ready callback failed: {e}")
+        # Set last, so waiters see the effects of the ready callbacks
+        self._done.set()
+
+    def add_ready_callback(self, callback: Callable[[Any], None]):
+        """Call `callback(client)` once the client is ready (immediately if it already is)"""
+        with self._lock:
+            if self.state != "ready":
+                self._ready_callbacks.append(callback)
+                return
+        callback(self.client)
+
+    def cancel(self) -> bool:
+        """
+        Ask the load to stop at its next checkpoint.
+
+        Returns:
+            False if the load had already finished
+        """
+        with self._lock:
+            if self.state not in ("pending", "loading"):
+                return False
+            self._cancel_event.set()
+            if self._thread is None:
+                self.state = "cancelled"
+                self._done.set()
+        return True
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait for the load to finish; True if the client is ready"""
+        return self._done.wait(timeout) and self.state == "ready"
+
+    @property
+    def is_ready(self) -> bool:
+        return self.state == "ready"
+
+    def get_progress(self) -> Dict[str, Any]:
+        """Current state, stage, fraction done and elapsed time"""
+        with self._lock:
+            if self._started_at is None:
+                elapsed = 0.0
+            else:
+                elapsed = (self._finished_at or time.perf_counter()) - self._started_at
+            return {
+                "state": self.state,
+                "stage": self.stage,
+                "fraction": self.fraction,
+                "elapsed_seconds": elapsed,
+                "error": self.error,
+            }
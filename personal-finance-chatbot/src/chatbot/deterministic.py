@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+"""
+Deterministic Granite decoding and an on-disk cache of its outputs.
+
+By default answers are sampled (temperature 0.3, top-p 0.9), so two runs of
+the same prompt differ in wording, length and therefore timing.
+GRANITE_DECODING selects:
+- "sample" (default): the usual sampled answers
+- "greedy": always the most likely token
+- "seeded": the usual sampling, with the RNG reset to GRANITE_SEED before
+  every request
+
+Both deterministic modes answer one prompt at a time (batching is turned off),
+since the other prompts in a batch would change the padding and the random draws.
+
+With a deterministic mode and GRANITE_OUTPUT_CACHE_DIR set, outputs are stored
+on disk under a key made from the model revision, the prompt and the
+generation settings. GRANITE_OUTPUT_CACHE_MODE chooses what happens next:
+- "replay" (default): a stored output is returned instead of generating again
+- "verify": always generate, then compare with the stored output and its
+  timing, so benchmarks and regression tests compare timings on equal work
+"""
+
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+import torch
+
+DECODING_MODES = ("sample", "greedy", "seeded")
+OUTPUT_CACHE_MODES = ("replay", "verify")
+
+# Sampling settings of the default mode
+SAMPLING_KWARGS = {"do_sample": True, "temperature": 0.3, "top_p": 0.9}
+
+
+class DecodingConfig(NamedTuple):
+    """How the next token is picked"""
+    mode: str = "sample"
+    seed: int = 0
+
+    @property
+    def deterministic(self) -> bool:
+        """True when the same prompt always gives the same answer"""
+        return self.mode in ("greedy", "seeded")
+
+    def sampling_kwargs(self) -> Dict[str, Any]:
+        """generate() arguments for this mode"""
+        if self.mode == "greedy":
+            return {"do_sample": False}
+        return dict(SAMPLING_KWARGS)
+
+    def seed_generation(self):
+        """Reset the RNG right before generate() in seeded mode"""
+        if self.mode == "seeded":
+            torch.manual_seed(self.seed)
+
+
+def resolve_decoding(mode: Optional[str] = None, seed: Optional[int] = None) -> DecodingConfig:
+    """
+    Turn the requested decoding mode (GRANITE_DECODING / GRANITE_SEED) into
+    the one that will actually be used.
+    """
+    mode = (mode or os.getenv("GRANITE_DECODING", "sample")).strip().lower()
+    if mode not in DECODING_MODES:
+        print(f"⚠️ Unknown GRANITE_DECODING '{mode}' - sampling as usual")
+        mode = "sample"
+    return DecodingConfig(mode, int(os.getenv("GRANITE_SEED", 0)) if seed is None else seed)
+
+
+class OutputCache:
+    """
+    Stored outputs of deterministic generations, one JSON file per key.
+    Shared by every client of the same weights (see ModelHandle.attachment).
+    """
+
+    def __init__(self, directory: str, settings: Dict[str, Any], mode: str = "replay"):
+        """
+        Args:
+            directory: Where the outputs are stored
+            settings: Everything besides the prompt that decides the output
+                (model revision, decoding mode, seed, token budget, ...)
+            mode: "replay" or "verify"
+        """
+        self.directory = directory
+        self.settings = settings
+        self.mode = mode
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.verified = 0
+        self.mismatches = 0
+        self.stored_seconds = 0.0
+        self.verified_seconds = 0.0
+
+    @classmethod
+    def from_env(cls, settings: Dict[str, Any]) -> Optional["OutputCache"]:
+        """Cache in GRANITE_OUTPUT_CACHE_DIR (None when unset) using GRANITE_OUTPUT_CACHE_MODE"""
+        directory = os.getenv("GRANITE_OUTPUT_CACHE_DIR", "").strip()
+        if not directory:
+            return None
+        mode = os.getenv("GRANITE_OUTPUT_CACHE_MODE", "replay").strip().lower()
+        if mode not in OUTPUT_CACHE_MODES:
+            print(f"⚠️ Unknown GRANITE_OUTPUT_CACHE_MODE '{mode}' - replaying stored outputs")
+            mode = "replay"
+        return cls(directory, settings, mode)
+
+    def key(self, prefix: str, suffix: str) -> str:
+        """Cache key of one prompt under this cache's settings"""
+        payload = json.dumps({"settings": self.settings, "prefix": prefix, "suffix": suffix},
+                             sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def _read(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def entry(self, prefix: str, suffix: str) -> Optional[Dict[str, Any]]:
+        """Stored record for a prompt, if any (not counted as a hit)"""
+        return self._read(self.key(prefix, suffix))
+
+    def get(self, prefix: str, suffix: str) -> Optional[Tuple[str, int, Dict[str, Any]]]:
+        """
+        Stored (text, new_tokens, stats) to replay for a prompt.
+
+        Returns:
+            None on a miss, and always in verify mode (the caller generates)
+        """
+        if self.mode != "replay":
+            return None
+        entry = self._read(self.key(prefix, suffix))
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return entry["text"], entry["new_tokens"], dict(entry["stats"], output_cache_hit=True)
+
+    def put(self, prefix: str, suffix: str, text: str, new_tokens: int, stats: Dict[str, Any]) -> Optional[bool]:
+        """
+        Record a freshly generated output.
+
+        Returns:
+            In verify mode, whether it matches the stored output (None if there
+            was none yet); otherwise None
+        """
+        if stats.get("truncated") or stats.get("stop_reason") == "stream_closed":
+            return None  # Cut short by a deadline or the reader: not the full answer
+        key = self.key(prefix, suffix)
+        seconds = stats.get("generation_seconds", 0.0)
+        stored = self._read(key)
+        if stored is not None:
+            # Streamed runs count a final EOS token that batched runs leave out, so compare the text
+            matches = stored["text"] == text
+            with self._lock:
+                self.verified += 1
+                self.mismatches += 0 if matches else 1
+                self.stored_seconds += stored["stats"].get("generation_seconds", 0.0)
+                self.verified_seconds += seconds
+            if not matches:
+                print(f"⚠️ Granite output differs from the stored one for cache key {key[:12]}")
+            return matches
+
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"settings": self.settings, "prefix": prefix, "suffix": suffix, "text": text,
+                       "new_tokens": new_tokens, "stats": stats}, f, ensure_ascii=False, default=str)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self.stores += 1
+        return None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hits, stores and, in verify mode, output mismatches and timing against the stored runs"""
+        with self._lock:
+            return {
+                "directory": self.directory,
+                "mode": self.mode,
+                "hits": self.hits,
+                "misses": self.misses,
+                "stores": self.stores,
+                "verified": self.verified,
+                "mismatches": self.mismatches,
+                "speedup_vs_stored": (self.stored_seconds / self.verified_seconds
+                                      if self.verified_seconds else None),
+            }
@@ -4,8 +4,12 @@ Dual AI Client: Gemini Primary + Granite Fallback
 """
 
 import os
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterator, Optional
+from .admission import AdmissionRejectedError
 from .gemini_client import GeminiClient
+from .health import HealthProbe
+from .rate_limiter import GeminiBusyError
+from .granite_client_lite import GraniteClientLite
 from .granite_smart_client import GraniteSmartClient
 
 class DualAIClient:
@@ -28,6 +32,15 @@ class DualAIClient:
         self.gemini_client = None
         self.granite_client = None
         self.active_ai = None
+        # Answers instantly when local inference is too busy to take a request
+        self.lite_client = GraniteClientLite()
+        self.busy_fallbacks = 0
+        self.gemini_failovers = 0
+        # Cached backend health, so status checks never wait for a probe
+        self.health = {
+            "gemini": HealthProbe.from_env("gemini", self._check_gemini),
+            "granite": HealthProbe.from_env("granite", self._check_granite),
+        }
         
         self._initialize_clients()
     
@@ -53,9 +66,11 @@ class DualAIClient:
         # Initialize Granite as fallback
         try:
             print("🔧 Initializing Granite AI (Fallback)...")
+            # Lite answers right away; with GRANITE_PREFER_LITE=false the full
+            # model loads in the background and replaces Lite once ready
             self.granite_client = GraniteSmartClient(
                 timeout_seconds=self.granite_timeout, 
-                prefer_lite=True  # Use Lite for fast fallback
+                prefer_lite=os.getenv("GRANITE_PREFER_LITE", "true").lower() in ("1", "true", "yes")
             )
             
             if not self.active_ai:  # If Gemini failed
@@ -66,7 +81,35 @@ class DualAIClient:
                 
         except Exception as e:
             print(f"❌ Granite initialization error: {e}")
+        
+        # First health results arrive in the background
+        self.refresh_health()
+    
+    def _check_gemini(self) -> bool:
+        return bool(self.gemini_client and self.gemini_client.health_check())
+    
+    def _check_granite(self) -> bool:
+        return bool(self.granite_client and self.granite_client.health_check())
+    
+    def refresh_health(self, wait: bool = False):
+        """Re-run both health probes now (in the background unless wait is set)"""
+        for probe in self.health.values():
+            probe.refresh()
+        if wait:
+            for probe in self.health.values():
+                probe.wait()
     
+    def _busy_fallback(self, user_input: str, user_context: Dict[str, Any], error: AdmissionRejectedError) -> str:
+        """Granite Lite answer for a request local inference could not take"""
+        self.busy_fallbacks += 1
+        print(f"🚦 Granite busy ({error.reason}) - answering with Granite Lite")
+        return self.lite_client.get_response(user_input, user_context)
+
+    def _gemini_failover(self, error: GeminiBusyError):
+        """Note a Gemini request handed to Granite because Gemini could not take it in time"""
+        self.gemini_failovers += 1
+        print(f"🚦 Gemini busy ({error.reason}) - failing over to Granite")
+
     def get_response(self, user_input: str, user_context: Dict[str, Any]) -> str:
         """
         Get AI response with smart fallback
@@ -88,6 +131,8 @@ class DualAIClient:
                 else:
                     print("⚠️ Gemini returned empty response, trying Granite...")
                     
+            except GeminiBusyError as e:
+                self._gemini_failover(e)
             except Exception as e:
                 print(f"❌ Gemini error: {e}, falling back to Granite...")
         
@@ -101,6 +146,10 @@ class DualAIClient:
                     model_name = granite_info.get('model_name', 'Granite AI')
                     return f"🔧 **{model_name} Response:**\n\n{response}"
                     
+            except AdmissionRejectedError as e:
+                response = self._busy_fallback(user_input, user_context, e)
+                model_name = self.lite_client.get_model_info()['model_name']
+                return f"🔧 **{model_name} Response:**\n\n{response}"
             except Exception as e:
                 print(f"❌ Granite error: {e}")
         
@@ -140,27 +189,23 @@ Please try asking your question again in a moment, or check your internet connec
                 'capabilities': ['Basic responses only']
             }
     
-    def test_connections(self) -> Dict[str, bool]:
-        """Test both AI connections"""
-        results = {}
+    def test_connections(self, refresh: bool = False) -> Dict[str, Optional[bool]]:
+        """
+        Health of both AI backends from the cached probes (returns immediately).
         
-        # Test Gemini
-        if self.gemini_client:
-            results['gemini'] = self.gemini_client.test_connection()
-        else:
-            results['gemini'] = False
-            
-        # Test Granite
-        if self.granite_client:
-            try:
-                test_response = self.granite_client.get_response("Hello", {})
-                results['granite'] = len(test_response.strip()) > 5
-            except:
-                results['granite'] = False
-        else:
-            results['granite'] = False
-            
-        return results
+        Args:
+            refresh: Probe both backends now and wait for the results
+        
+        Returns:
+            True/False per backend, None while its first probe is still running
+        """
+        if refresh:
+            self.refresh_health(wait=True)
+        return {name: probe.status()["healthy"] for name, probe in self.health.items()}
+    
+    def get_health(self) -> Dict[str, Dict[str, Any]]:
+        """Cached probe results with their age, latency and last error"""
+        return {name: probe.status() for name, probe in self.health.items()}
     
     def switch_to_granite(self):
         """Manually switch to Granite AI"""
@@ -184,10 +229,50 @@ Please try asking your question again in a moment, or check your internet connec
             try:
                 response = self.gemini_client.get_response(user_input, user_context)
                 return response if response else "Sorry, I couldn't generate a response right now."
+            except GeminiBusyError as e:
+                if self.granite_client:
+                    self._gemini_failover(e)
+                    return self.get_granite_response(user_input, user_context)
+                return "The AI service is busy right now. Please try again in a moment."
             except Exception as e:
                 return f"Gemini AI is currently unavailable. Error: {str(e)}"
         return "Gemini AI is not available. Please try Granite AI."
     
+    def stream_gemini_response(self, user_input: str, user_context: Dict[str, Any]) -> Iterator[str]:
+        """Stream a response specifically from Gemini AI as text chunks"""
+        if not (self.gemini_client and self.gemini_client.initialized):
+            yield "Gemini AI is not available. Please try Granite AI."
+            return
+        
+        produced = False
+        stream = None
+        busy = None
+        try:
+            stream = self.gemini_client.stream_response(user_input, user_context)
+            for chunk in stream:
+                produced = True
+                yield chunk
+        except GeminiBusyError as e:
+            # Raised before any chunk, so Granite's answer is the whole response
+            busy = e
+        except Exception as e:
+            yield f"Gemini AI is currently unavailable. Error: {str(e)}"
+            return
+        finally:
+            # Propagate early exit so the Gemini request is cancelled too
+            if stream is not None and hasattr(stream, "close"):
+                stream.close()
+        
+        if busy is not None:
+            if self.granite_client:
+                self._gemini_failover(busy)
+                yield from self.stream_granite_response(user_input, user_context)
+            else:
+                yield "The AI service is busy right now. Please try again in a moment."
+            return
+        if not produced:
+            yield "Sorry, I couldn't generate a response right now."
+    
     def get_granite_response(self, user_input: str, user_context: Dict[str, Any]) -> str:
         """Get response specifically from Granite AI"""
         if self.granite_client:
@@ -196,14 +281,59 @@ Please try asking your question again in a moment, or check your internet connec
                 enhanced_prompt = f"As a financial advisor, provide specific actionable advice for: {user_input}"
                 response = self.granite_client.get_response(enhanced_prompt, user_context)
                 return response if response else "Sorry, I couldn't generate a response right now."
+            except AdmissionRejectedError as e:
+                return self._busy_fallback(user_input, user_context, e)
             except Exception as e:
                 return f"Granite AI is currently unavailable. Error: {str(e)}"
         return "Granite AI is not available. Please try Gemini AI."
     
+    def stream_granite_response(self, user_input: str, user_context: Dict[str, Any]) -> Iterator[str]:
+        """Stream a response specifically from Granite AI as text chunks"""
+        if not self.granite_client:
+            yield "Granite AI is not available. Please try Gemini AI."
+            return
+        
+        produced = False
+        stream = None
+        try:
+            # Same enhanced prompt as get_granite_response
+            enhanced_prompt = f"As a financial advisor, provide specific actionable advice for: {user_input}"
+            stream = self.granite_client.stream_response(enhanced_prompt, user_context)
+            for chunk in stream:
+                produced = True
+                yield chunk
+        except AdmissionRejectedError as e:
+            # Raised before any chunk, so the Lite answer is the whole response
+            yield self._busy_fallback(user_input, user_context, e)
+            return
+        except Exception as e:
+            yield f"Granite AI is currently unavailable. Error: {str(e)}"
+            return
+        finally:
+            # Propagate early exit so local generation stops too
+            if stream is not None and hasattr(stream, "close"):
+                stream.close()
+        
+        if not produced:
+            yield "Sorry, I couldn't generate a response right now."
+    
     def get_status(self) -> str:
         """Get current system status"""
         gemini_status = "✅ Ready" if (self.gemini_client and self.gemini_client.initialized) else "❌ Unavailable"
         granite_status = "✅ Ready" if self.granite_client else "❌ Unavailable"
+        health = self.get_health()
+        if self.gemini_client and self.gemini_client.initialized and health["gemini"]["healthy"] is False:
+            gemini_status = f"⚠️ Unreachable ({health['gemini']['error']})"
+        if self.granite_client and health["granite"]["healthy"] is False:
+            granite_status = f"⚠️ Not ready ({health['granite']['error']})"
+        progress = self.granite_client.get_load_progress() if self.granite_client else None
+        if progress and progress["state"] == "loading":
+            granite_status = f"⏳ Lite mode - full model loading ({progress['stage']}, {progress['fraction']:.0%})"
+        # Lite has no queue; the full client only reports one that already exists
+        admission_stats = getattr(self.granite_client, "get_admission_stats", None)
+        admission = admission_stats() if admission_stats else None
+        if admission and (admission["active"] or admission["queued"]):
+            granite_status += f" - {admission['active']} running, {admission['queued']} queued"
         
         return f"""🤖 **Dual AI System Status:**
 
@@ -1,36 +1,248 @@
 # -*- coding: utf-8 -*-
 """
 Google Gemini AI Client for Personal Finance Chatbot
+
+Requests are made with the asyncio API (`agenerate`, `agenerate_many`) on one
+background event loop shared by the whole process (see async_loop.py), so the
+underlying gRPC connection is reused instead of every Streamlit script thread
+blocking on its own call. A process-wide gate caps the requests in flight
+(GEMINI_MAX_CONCURRENT); requests that cannot get a slot within
+GEMINI_QUEUE_TIMEOUT_SECONDS are answered with a "busy" message. The sync
+`get_response` is a thin wrapper that waits on the loop long enough for the
+quota queue and every retry; if there is still no answer it cancels the
+request and raises GeminiBusyError.
+
+`astream` / `stream_response` yield the answer in chunks as Gemini writes it.
+A safety block or an empty answer ends the stream with an explanation rather
+than an exception, and closing the stream cancels the request.
+
+Concurrent requests with an identical prompt share one upstream call (see
+single_flight.py; GEMINI_SINGLE_FLIGHT=false turns this off).
+
+Requests are held to the per-minute quotas and 429 / 5xx errors are retried
+with backoff (see rate_limiter.py). When Gemini cannot answer in reasonable
+time (quota queue too long, no request slot free, or still failing after the
+retries) GeminiBusyError is raised so the caller can fail over to Granite.
+
+GEMINI_API_ENDPOINT sends the requests to another Gemini-compatible REST
+endpoint instead of Google's, such as the local stand-in used for offline
+load tests (see gemini_rest.py and gemini_standin.py).
 """
 
+import asyncio
+import concurrent.futures
+import hashlib
+import itertools
+import json
 import os
+import threading
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Optional, Tuple
+
 import google.generativeai as genai
-from typing import Dict, Any, Optional
+
+from .async_loop import BackgroundEventLoop, get_background_loop
+from .gemini_prompts import SYSTEM_INSTRUCTION, build_prompt, profile_cache_stats
+from .gemini_rest import GeminiRestModel
+from .rate_limiter import GeminiBusyError, GeminiRateLimiter, estimate_tokens, retry_kind
+from .single_flight import SingleFlight
+
+DEFAULT_MAX_CONCURRENT = 8
+DEFAULT_TIMEOUT_SECONDS = 15.0
+DEFAULT_QUEUE_TIMEOUT_SECONDS = 10.0
+
+GEMINI_MODEL = 'gemini-1.5-flash'
+GENERATION_SETTINGS = {
+    'max_output_tokens': 800,  # Limit response length
+    'temperature': 0.7,        # Balance creativity and accuracy
+    'top_p': 0.9,
+}
+
+BUSY_MESSAGE = "The AI service is busy right now. Please try again in a moment."
+TIMEOUT_MESSAGE = "The AI service took too long to respond. Please try again."
+BLOCKED_MESSAGE = "Your request was blocked by content filters. Please rephrase your question."
+EMPTY_MESSAGE = "I couldn't generate a detailed response right now. Please rephrase your question or try again."
+# Appended when a filter stops an answer part way through
+WITHHELD_NOTICE = "\n\n⚠️ The rest of this answer was withheld by content filters."
+
+# Finish reasons meaning the answer was stopped by a filter rather than finished
+BLOCKED_FINISH_REASONS = ("SAFETY", "RECITATION", "BLOCKLIST", "PROHIBITED_CONTENT", "SPII")
+
+
+def _total_tokens(response) -> Optional[int]:
+    """Tokens Gemini counted for a response (None if it did not say)"""
+    return getattr(getattr(response, "usage_metadata", None), "total_token_count", None) or None
+
+
+def _enum_name(value) -> str:
+    return getattr(value, "name", str(value))
+
+
+def chunk_text(chunk) -> Tuple[str, Optional[str]]:
+    """
+    Text of one streamed Gemini chunk, and why the answer was blocked if it was.
+
+    Returns:
+        (text, block reason such as "SAFETY", or None)
+    """
+    block_reason = getattr(getattr(chunk, "prompt_feedback", None), "block_reason", None)
+    if block_reason:
+        return "", _enum_name(block_reason)
+    candidates = getattr(chunk, "candidates", None) or []
+    finish_reason = _enum_name(candidates[0].finish_reason) if candidates else None
+    try:
+        text = chunk.text or ""
+    except (ValueError, IndexError):
+        text = ""  # No text parts, e.g. the final chunk of a blocked answer
+    return text, finish_reason if finish_reason in BLOCKED_FINISH_REASONS else None
+
+
+class GeminiRequestGate:
+    """
+    Caps the Gemini requests in flight across every client in the process.
+    Only used from the background event loop.
+    """
+
+    def __init__(self, max_concurrent: int = DEFAULT_MAX_CONCURRENT):
+        self.max_concurrent = max(1, max_concurrent)
+        self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.waiting = 0
+        self.peak_in_flight = 0
+        self.requests = 0
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.timeouts = 0
+        self.rejected = 0
+
+    @asynccontextmanager
+    async def slot(self, queue_timeout: Optional[float] = None):
+        """
+        Hold one of the request slots.
+
+        Raises:
+            asyncio.TimeoutError: If no slot was free within queue_timeout
+        """
+        with self._lock:
+            self.requests += 1
+            self.waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), queue_timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                self.rejected += 1
+            raise
+        finally:
+            with self._lock:
+                self.waiting -= 1
+        with self._lock:
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+            self._semaphore.release()
+
+    def record(self, outcome: str):
+        """Count how a request that got a slot ended: completed, failed, cancelled or timeouts"""
+        with self._lock:
+            setattr(self, outcome, getattr(self, outcome) + 1)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Requests in flight and waiting, plus how past requests ended"""
+        with self._lock:
+            return {
+                "max_concurrent": self.max_concurrent,
+                "in_flight": self.in_flight,
+                "waiting": self.waiting,
+                "peak_in_flight": self.peak_in_flight,
+                "requests": self.requests,
+                "completed": self.completed,
+                "failed": self.failed,
+                "cancelled": self.cancelled,
+                "timeouts": self.timeouts,
+                "rejected": self.rejected,
+            }
+
+
+_gate: Optional[GeminiRequestGate] = None
+_gate_lock = threading.Lock()
+
+
+def get_request_gate() -> GeminiRequestGate:
+    """The process-wide gate, sized by GEMINI_MAX_CONCURRENT on first use"""
+    global _gate
+    with _gate_lock:
+        if _gate is None:
+            _gate = GeminiRequestGate(int(os.getenv("GEMINI_MAX_CONCURRENT", DEFAULT_MAX_CONCURRENT)))
+        return _gate
+
+
+_rate_limiter: Optional[GeminiRateLimiter] = None
+
+
+def get_rate_limiter() -> GeminiRateLimiter:
+    """The process-wide Gemini quota limiter, configured from the environment on first use"""
+    global _rate_limiter
+    with _gate_lock:
+        if _rate_limiter is None:
+            _rate_limiter = GeminiRateLimiter.from_env()
+        return _rate_limiter
+
+
+_single_flight = SingleFlight()
+
+
+def get_single_flight() -> SingleFlight:
+    """The process-wide coalescer of identical Gemini requests"""
+    return _single_flight
+
 
 class GeminiClient:
     """
     Google Gemini AI client for generating personalized financial advice
     """
     
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, event_loop: Optional[BackgroundEventLoop] = None,
+                 endpoint: Optional[str] = None):
         """
         Initialize the Gemini client
         
         Args:
             api_key: Google Gemini API key
+            event_loop: Loop the requests run on (the process-wide one by default)
+            endpoint: Gemini-compatible REST endpoint to use instead of Google's
+                (GEMINI_API_ENDPOINT by default, e.g. the local stand-in)
         """
         self.api_key = api_key
+        self.endpoint = endpoint or os.getenv("GEMINI_API_ENDPOINT") or None
         self.initialized = False
         self.model = None
+        self.event_loop = event_loop or get_background_loop()
+        self.gate = get_request_gate()
+        self.rate_limiter = get_rate_limiter()
+        self.single_flight = get_single_flight() if os.getenv("GEMINI_SINGLE_FLIGHT", "true").lower() == "true" else None
+        self.timeout_seconds = float(os.getenv("GEMINI_TIMEOUT_SECONDS", DEFAULT_TIMEOUT_SECONDS))
+        self.queue_timeout_seconds = float(os.getenv("GEMINI_QUEUE_TIMEOUT_SECONDS", DEFAULT_QUEUE_TIMEOUT_SECONDS))
         
         try:
-            # Configure Gemini API
-            genai.configure(api_key=api_key)
-            
-            # Initialize the model (using Gemini 1.5 Flash for speed and efficiency)
-            self.model = genai.GenerativeModel('gemini-1.5-flash')
+            if self.endpoint:
+                self.model = GeminiRestModel(GEMINI_MODEL, api_key, self.endpoint,
+                                             system_instruction=SYSTEM_INSTRUCTION)
+            else:
+                # Configure Gemini API
+                genai.configure(api_key=api_key)
+                
+                # Initialize the model (using Gemini 1.5 Flash for speed and efficiency)
+                # The fixed instructions are sent as the system instruction (see gemini_prompts.py)
+                self.model = genai.GenerativeModel(GEMINI_MODEL, system_instruction=SYSTEM_INSTRUCTION)
             self.initialized = True
-            print("✅ Gemini AI client initialized successfully!")
+            print("✅ Gemini AI client initialized successfully!"
+                  + (f" (endpoint {self.endpoint})" if self.endpoint else ""))
             
         except Exception as e:
             print(f"❌ Failed to initialize Gemini client: {e}")
@@ -38,7 +250,7 @@ class GeminiClient:
     
     def get_response(self, user_input: str, user_context: Dict[str, Any]) -> str:
         """
-        Generate a response using Gemini AI
+        Generate a response using Gemini AI (blocking wrapper around agenerate)
         
         Args:
             user_input: User's question or query
@@ -46,97 +258,351 @@ class GeminiClient:
             
         Returns:
             AI-generated response
+            
+        Raises:
+            GeminiBusyError: If Gemini cannot answer in time (fail over to Granite)
+        """
+        timeout = self._wait_timeout()
+        try:
+            return self.event_loop.run(self.agenerate(user_input, user_context), timeout=timeout)
+        except concurrent.futures.TimeoutError:
+            raise self._wait_expired(timeout) from None
+    
+    def get_responses(self, requests: Iterable[Tuple[str, Dict[str, Any]]]) -> List[str]:
+        """
+        Generate several responses concurrently (blocking wrapper around agenerate_many)
+        
+        Args:
+            requests: (user_input, user_context) pairs
+            
+        Returns:
+            Responses in the same order as the requests (BUSY_MESSAGE for those Gemini could not take)
+        """
+        requests = list(requests)
+        # Requests beyond the concurrency cap queue for their slot, so allow one more round of waiting
+        return self.event_loop.run(self.agenerate_many(requests), timeout=self._wait_timeout(len(requests)))
+    
+    def _wait_timeout(self, count: int = 1) -> Optional[float]:
+        """Longest a sync caller waits: queueing for a slot, then the request with its
+        quota waits, retries and backoff (None = no limit)"""
+        request_seconds = self.rate_limiter.worst_case_seconds(self.timeout_seconds)
+        if not self.queue_timeout_seconds or request_seconds is None:
+            return None
+        rounds = -(-max(1, count) // self.gate.max_concurrent)
+        return self.queue_timeout_seconds + rounds * request_seconds + 5.0
+    
+    def _wait_expired(self, timeout: float) -> GeminiBusyError:
+        """Error for a sync caller that gave up waiting (the request is cancelled)"""
+        print(f"⏱️ Gemini request still running after {timeout:.0f}s - cancelled")
+        return GeminiBusyError("timeout", f"Gemini did not answer within {timeout:.0f}s")
+    
+    async def agenerate(self, user_input: str, user_context: Dict[str, Any]) -> str:
+        """
+        Generate a response using Gemini AI without blocking the event loop
+        
+        Waits for one of the GEMINI_MAX_CONCURRENT request slots, or joins an
+        identical request already running. Cancelling the awaiting task
+        cancels the request once no other caller is waiting for it.
+        
+        Args:
+            user_input: User's question or query
+            user_context: User demographics and context
+            
+        Returns:
+            AI-generated response
+            
+        Raises:
+            GeminiBusyError: If Gemini cannot answer in time (fail over to Granite)
+        """
+        prompt, answer = self._prepare_prompt(user_input, user_context)
+        if answer is not None:
+            return answer
+        if self.single_flight is None:
+            return await self._agenerate_upstream(prompt)
+        return await self.single_flight.do(self._flight_key(prompt), lambda: self._agenerate_upstream(prompt))
+    
+    async def _agenerate_upstream(self, prompt: str) -> str:
+        """Make one Gemini request for prompt"""
+        try:
+            async with self.gate.slot(self.queue_timeout_seconds or None):
+                try:
+                    response, reserved = await self._send(prompt)
+                except asyncio.CancelledError:
+                    self.gate.record("cancelled")
+                    raise
+                except asyncio.TimeoutError:
+                    self.gate.record("timeouts")
+                    print(f"⏱️ Gemini did not answer within {self.timeout_seconds:.0f}s")
+                    return TIMEOUT_MESSAGE
+                except GeminiBusyError:
+                    self.gate.record("failed")
+                    raise
+                except Exception as e:
+                    self.gate.record("failed")
+                    return self._error_message(e)
+                self.gate.record("completed")
+                self.rate_limiter.settle(reserved, _total_tokens(response))
+        except asyncio.TimeoutError:
+            raise self._no_slot() from None
+        
+        return self._response_text(response)
+    
+    async def astream(self, user_input: str, user_context: Dict[str, Any]) -> AsyncIterator[str]:
+        """
+        Stream a response using Gemini AI as text chunks, as they are written
+        
+        Holds one request slot for the whole stream, which identical requests
+        made meanwhile share. A safety block, an empty answer, an error or
+        GEMINI_TIMEOUT_SECONDS without a new chunk ends the stream with a
+        message instead of raising. Closing the generator (or cancelling the
+        consuming task) cancels the request once no other caller reads it.
+        
+        Args:
+            user_input: User's question or query
+            user_context: User demographics and context
+            
+        Yields:
+            Text chunks of the response
+            
+        Raises:
+            GeminiBusyError: Before the first chunk, if Gemini cannot answer in time
+        """
+        prompt, answer = self._prepare_prompt(user_input, user_context)
+        if answer is not None:
+            yield answer
+            return
+        if self.single_flight is None:
+            chunks = self._astream_upstream(prompt)
+        else:
+            chunks = self.single_flight.stream(self._flight_key(prompt, stream=True),
+                                               lambda: self._astream_upstream(prompt))
+        try:
+            async for chunk in chunks:
+                yield chunk
+        finally:
+            await chunks.aclose()
+    
+    async def _astream_upstream(self, prompt: str) -> AsyncIterator[str]:
+        """Make one streamed Gemini request for prompt"""
+        try:
+            async with self.gate.slot(self.queue_timeout_seconds or None):
+                produced = False
+                finished = False
+                usage = None
+                reserved = None
+                chunks = None
+                try:
+                    response, reserved = await self._send(prompt, stream=True)
+                    chunks = response.__aiter__()
+                    while True:
+                        try:
+                            chunk = await asyncio.wait_for(chunks.__anext__(), self.timeout_seconds)
+                        except StopAsyncIteration:
+                            break
+                        usage = _total_tokens(chunk) or usage
+                        text, block_reason = chunk_text(chunk)
+                        if not produced:
+                            text = text.lstrip()
+                        if text:
+                            produced = True
+                            yield text
+                        if block_reason:
+                            print(f"⚠️ Gemini answer blocked ({block_reason})")
+                            yield WITHHELD_NOTICE if produced else BLOCKED_MESSAGE
+                            produced = True
+                            break
+                    finished = True
+                except (asyncio.CancelledError, GeneratorExit):
+                    self.gate.record("cancelled")
+                    raise
+                except asyncio.TimeoutError:
+                    self.gate.record("timeouts")
+                    print(f"⏱️ Gemini stream stalled for {self.timeout_seconds:.0f}s")
+                    yield ("\n\n" if produced else "") + TIMEOUT_MESSAGE
+                    return
+                except GeminiBusyError:
+                    self.gate.record("failed")
+                    raise
+                except Exception as e:
+                    self.gate.record("failed")
+                    yield ("\n\n" if produced else "") + self._error_message(e)
+                    return
+                finally:
+                    if reserved is not None:
+                        # Usage comes with the last chunks; a stream cut short without it is refunded
+                        self.rate_limiter.settle(reserved, usage if usage is not None or finished else 0)
+                    # Ends the upstream response (and its connection) when the reader stops early
+                    if chunks is not None and hasattr(chunks, "aclose"):
+                        await chunks.aclose()
+                self.gate.record("completed")
+                if not produced:
+                    print("⚠️ Gemini streamed an empty response")
+                    yield EMPTY_MESSAGE
+        except asyncio.TimeoutError:
+            raise self._no_slot() from None
+    
+    def stream_response(self, user_input: str, user_context: Dict[str, Any]) -> Iterator[str]:
+        """
+        Stream a response using Gemini AI (blocking wrapper around astream)
+        
+        Closing the generator cancels the request.
+        
+        Args:
+            user_input: User's question or query
+            user_context: User demographics and context
+            
+        Yields:
+            Text chunks of the response
+            
+        Raises:
+            GeminiBusyError: Before the first chunk, if Gemini cannot answer in time
+        """
+        timeout = self._wait_timeout()
+        produced = False
+        try:
+            for chunk in self.event_loop.iterate(self.astream(user_input, user_context), timeout=timeout):
+                produced = True
+                yield chunk
+        except concurrent.futures.TimeoutError:
+            if not produced:
+                raise self._wait_expired(timeout) from None
+            print(f"⏱️ No Gemini chunk within {timeout:.0f}s - cancelled")
+            yield "\n\n" + TIMEOUT_MESSAGE
+    
+    async def agenerate_many(self, requests: Iterable[Tuple[str, Dict[str, Any]]]) -> List[str]:
+        """
+        Generate several responses concurrently (at most GEMINI_MAX_CONCURRENT in flight)
+        
+        Args:
+            requests: (user_input, user_context) pairs
+            
+        Returns:
+            Responses in the same order as the requests; cancelling the
+            awaiting task cancels every request still running
+        """
+        async def answer(user_input: str, user_context: Dict[str, Any]) -> str:
+            try:
+                return await self.agenerate(user_input, user_context)
+            except GeminiBusyError:
+                return BUSY_MESSAGE
+        
+        return list(await asyncio.gather(*(answer(user_input, user_context)
+                                           for user_input, user_context in requests)))
+    
+    async def _send(self, prompt: str, stream: bool = False) -> Tuple[Any, int]:
+        """
+        Send one Gemini request within the quotas, retrying 429 and 5xx errors
+        with backoff (called holding a request slot)
+        
+        Returns:
+            (response, tokens reserved for it; the caller settles them with
+            the real usage, failed attempts are refunded here)
+            
+        Raises:
+            GeminiBusyError: If the quota queue is too long, or 429 / 5xx persist after the retries
+        """
+        reserved = estimate_tokens(SYSTEM_INSTRUCTION + prompt, GENERATION_SETTINGS['max_output_tokens'])
+        for attempt in itertools.count():
+            await self.rate_limiter.acquire(reserved)
+            try:
+                response = await asyncio.wait_for(
+                    self.model.generate_content_async(
+                        prompt,
+                        generation_config=self._generation_config(),
+                        stream=stream,
+                        request_options={'timeout': self.timeout_seconds}
+                    ),
+                    self.timeout_seconds
+                )
+                return response, reserved
+            except (asyncio.CancelledError, asyncio.TimeoutError):
+                self.rate_limiter.settle(reserved, 0)
+                raise
+            except Exception as e:
+                # A rejected attempt generated nothing: give its tokens back before retrying or giving up
+                self.rate_limiter.settle(reserved, 0)
+                kind = retry_kind(e)
+                delay = self.rate_limiter.retry_delay(e, attempt)
+                if delay is None:
+                    if kind is None:
+                        raise
+                    print(f"🚦 Gemini still failing ({kind}) after {attempt} retries: {e}")
+                    raise GeminiBusyError(kind, f"Gemini {kind} error after {attempt} retries: {e}") from e
+                print(f"🔁 Gemini {kind} error ({e}) - retry {attempt + 1} in {delay:.1f}s")
+                await asyncio.sleep(delay)
+    
+    def _no_slot(self) -> GeminiBusyError:
+        """Error for a request that found no free request slot in time"""
+        print(f"⚠️ No Gemini request slot free within {self.queue_timeout_seconds:.0f}s")
+        return GeminiBusyError("slot_timeout", f"No Gemini request slot free within "
+                                               f"{self.queue_timeout_seconds:.0f}s", self.queue_timeout_seconds)
+    
+    def _prepare_prompt(self, user_input: str, user_context: Dict[str, Any]) -> Tuple[Optional[str], Optional[str]]:
+        """
+        Sanitize the question and build its prompt
+        
+        Returns:
+            (prompt, None), or (None, answer) when there is nothing to ask Gemini
         """
         if not self.initialized:
-            return "Sorry, I'm currently unavailable. Please try again later."
+            return None, "Sorry, I'm currently unavailable. Please try again later."
         
         # Sanitize input
         if not user_input or len(user_input.strip()) == 0:
-            return "Please ask me a financial question!"
+            return None, "Please ask me a financial question!"
         
         # Clean and limit input length
         user_input = user_input.strip()
         if len(user_input) > 500:
             user_input = user_input[:500] + "..."
         
-        try:
-            # Create a detailed prompt for financial advice
-            prompt = self._create_financial_prompt(user_input, user_context)
-            
-            # Generate response with timeout and safety settings
-            generation_config = genai.types.GenerationConfig(
-                max_output_tokens=800,  # Limit response length
-                temperature=0.7,        # Balance creativity and accuracy
-                top_p=0.9
-            )
-            
-            response = self.model.generate_content(
-                prompt, 
-                generation_config=generation_config,
-                request_options={'timeout': 15}  # 15 second timeout
-            )
-            
-            if response.text and len(response.text.strip()) > 10:
-                return response.text.strip()
-            else:
-                print(f"⚠️ Gemini returned empty or very short response: '{response.text}'")
-                return "I couldn't generate a detailed response right now. Please rephrase your question or try again."
-                
-        except Exception as e:
-            error_msg = str(e).lower()
-            print(f"❌ Error generating Gemini response: {e}")
-            
-            # Provide more specific error messages
-            if "quota" in error_msg or "limit" in error_msg:
-                return "The AI service has reached its usage limit. Please try again in a few minutes."
-            elif "network" in error_msg or "connection" in error_msg:
-                return "Network connection issue. Please check your internet connection and try again."
-            elif "api" in error_msg or "key" in error_msg:
-                return "API configuration issue. Please contact support."
-            elif "safety" in error_msg or "blocked" in error_msg:
-                return "Your request was blocked by content filters. Please rephrase your question."
-            else:
-                return f"I encountered a technical issue ({type(e).__name__}). Please try again or use simpler terms."
+        # Create a detailed prompt for financial advice
+        return self._create_financial_prompt(user_input, user_context), None
+    
+    def _generation_config(self):
+        """Generation settings shared by every request"""
+        return genai.types.GenerationConfig(**GENERATION_SETTINGS)
+    
+    def _flight_key(self, prompt: str, stream: bool = False) -> str:
+        """Requests with the same key would make the same upstream call"""
+        payload = json.dumps({'model': GEMINI_MODEL, 'settings': GENERATION_SETTINGS, 'stream': stream,
+                              'system': SYSTEM_INSTRUCTION, 'prompt': prompt}, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    def _response_text(self, response) -> str:
+        """Text of a Gemini response, or a fallback message when it is empty or blocked"""
+        text, block_reason = chunk_text(response)
+        if block_reason:
+            print(f"⚠️ Gemini answer blocked ({block_reason})")
+            return BLOCKED_MESSAGE
+        if text and len(text.strip()) > 10:
+            return text.strip()
+        print(f"⚠️ Gemini returned empty or very short response: '{text}'")
+        return EMPTY_MESSAGE
+    
+    def _error_message(self, e: Exception) -> str:
+        """User-facing message for a failed Gemini request"""
+        error_msg = str(e).lower()
+        print(f"❌ Error generating Gemini response: {e}")
+        
+        # Provide more specific error messages
+        if "quota" in error_msg or "limit" in error_msg:
+            return "The AI service has reached its usage limit. Please try again in a few minutes."
+        elif "network" in error_msg or "connection" in error_msg:
+            return "Network connection issue. Please check your internet connection and try again."
+        elif "api" in error_msg or "key" in error_msg:
+            return "API configuration issue. Please contact support."
+        elif "safety" in error_msg or "blocked" in error_msg:
+            return BLOCKED_MESSAGE
+        else:
+            return f"I encountered a technical issue ({type(e).__name__}). Please try again or use simpler terms."
     
     def _create_financial_prompt(self, user_input: str, user_context: Dict[str, Any]) -> str:
         """
-        Create a detailed prompt for financial advice
+        Create the per-request prompt for financial advice (the user's profile
+        and question; the fixed instructions are the model's system instruction)
         """
-        # Extract user context
-        age = user_context.get('age', 'Not specified')
-        occupation = user_context.get('occupation', 'Not specified')
-        income = user_context.get('income', 'Not specified')
-        experience_level = user_context.get('experience_level', 'beginner')
-        goals = user_context.get('goals', [])
-        risk_tolerance = user_context.get('risk_tolerance', 'moderate')
-        
-        # Create comprehensive prompt
-        prompt = f"""You are a professional financial advisor AI assistant focusing on Indian financial context. Provide personalized, actionable financial advice.
-
-USER PROFILE:
-- Age: {age}
-- Occupation: {occupation}
-- Monthly Income: ₹{income} (if specified)
-- Financial Experience: {experience_level}
-- Financial Goals: {', '.join(goals) if goals else 'General financial wellness'}
-- Risk Tolerance: {risk_tolerance}
-
-USER QUESTION: {user_input}
-
-INSTRUCTIONS:
-1. Provide specific, actionable financial advice tailored to their profile and Indian financial context
-2. Consider their age, income level, and experience when giving recommendations
-3. Include concrete numbers, percentages, or rupee amounts when relevant
-4. Use Indian financial instruments (PPF, EPF, SIP, NSC, etc.) when suggesting investments
-5. Keep the response concise but comprehensive (3-4 paragraphs max)
-6. Use a friendly, professional tone
-7. If asking about specific investments, include appropriate disclaimers
-8. Focus on practical steps they can take immediately
-9. Use ₹ (INR) currency throughout your response
-
-Please provide your personalized financial advice:"""
-
-        return prompt
+        return build_prompt(user_input, user_context)
     
     def get_model_info(self) -> Dict[str, Any]:
         """
@@ -144,9 +610,14 @@ Please provide your personalized financial advice:"""
         """
         return {
             'model_name': 'Google Gemini 1.5 Flash',
-            'model_path': 'gemini-1.5-flash',
+            'model_path': GEMINI_MODEL,
             'device': 'cloud',
+            'endpoint': self.endpoint,
             'initialized': self.initialized,
+            'async': self.gate.get_stats(),
+            'single_flight': self.single_flight.get_stats() if self.single_flight else None,
+            'rate_limit': self.rate_limiter.get_stats(),
+            'profile_cache': profile_cache_stats(),
             'capabilities': [
                 'Advanced conversational AI',
                 'Real-time financial knowledge',
@@ -156,16 +627,22 @@ Please provide your personalized financial advice:"""
             ]
         }
     
-    def test_connection(self) -> bool:
+    def health_check(self) -> bool:
         """
-        Test if the Gemini connection is working
+        Cheap reachability check: counts the tokens of a short text instead of
+        generating, so it costs no generation quota and returns in one round trip.
+        Raises the API error when Gemini cannot be reached.
         """
         if not self.initialized:
             return False
-            
+        result = self.event_loop.run(self.model.count_tokens_async("ping"), timeout=self.timeout_seconds)
+        return result.total_tokens > 0
+
+    def test_connection(self) -> bool:
+        """
+        Test if the Gemini connection is working
+        """
         try:
-            # Simple test query
-            test_response = self.model.generate_content("Hello, please respond with 'Connection successful'")
-            return test_response.text is not None
-        except:
-            return False
\ No newline at end of file
+            return self.health_check()
+        except Exception:
+            return False
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+Compact Gemini prompts.
+
+The fixed advisor instructions are the model's system instruction, set once
+when the model is created, so each request only carries the user's profile
+and question. The profile block is rendered once per version of a profile
+(any change to the fields it shows makes a new version) and cached, since
+the same users ask many questions.
+
+Gemini still bills the system instruction's tokens with every request;
+explicit context caching only starts at 32k tokens, far above these
+prompts. The saving comes from the shorter wording and from leaving out
+unspecified profile fields. report_gemini_prompt_tokens.py compares the
+sizes with the previous one-block prompt.
+"""
+
+import functools
+from typing import Any, Dict, Optional, Tuple
+
+SYSTEM_INSTRUCTION = """You are a professional financial advisor for users in India. Give personalized, actionable advice:
+- Tailor it to the user's profile (age, income, experience, goals, risk tolerance)
+- Give concrete numbers, percentages or rupee amounts, always in ₹ (INR)
+- Prefer Indian instruments (PPF, EPF, SIP, NSC, etc.) and add a disclaimer when suggesting investments
+- Focus on practical steps they can take right away
+- Be concise (3-4 paragraphs max), friendly and professional"""
+
+QUESTION_TEMPLATE = "\n\nUSER QUESTION: {question}"
+PROFILE_CACHE_SIZE = 256
+
+
+def profile_version(user_context: Dict[str, Any]) -> Tuple:
+    """The profile fields the prompt shows; equal tuples render the same block"""
+    goals = user_context.get('goals') or []
+    return (
+        user_context.get('age'),
+        user_context.get('occupation'),
+        user_context.get('income'),
+        user_context.get('experience_level', 'beginner'),
+        tuple(goals) if isinstance(goals, (list, tuple)) else (str(goals),),
+        user_context.get('risk_tolerance', 'moderate'),
+    )
+
+
+@functools.lru_cache(maxsize=PROFILE_CACHE_SIZE)
+def _render_profile_block(age, occupation, income, experience_level, goals, risk_tolerance) -> str:
+    fields = [
+        ("Age", age),
+        ("Occupation", occupation),
+        ("Monthly income", f"₹{income}" if income not in (None, '') else None),
+        ("Experience", experience_level),
+        ("Goals", ', '.join(str(goal) for goal in goals) or 'General financial wellness'),
+        ("Risk tolerance", risk_tolerance),
+    ]
+    # Unspecified fields are left out rather than spelled "Not specified"
+    return "USER PROFILE: " + "; ".join(f"{name} {value}" for name, value in fields if value not in (None, ''))
+
+
+def profile_block(user_context: Dict[str, Any]) -> str:
+    """The user's profile block (rendered once per profile version)"""
+    version = profile_version(user_context)
+    try:
+        return _render_profile_block(*version)
+    except TypeError:
+        return _render_profile_block.__wrapped__(*version)  # Unhashable field values: render without caching
+
+
+def build_prompt(user_input: str, user_context: Dict[str, Any]) -> str:
+    """Per-request prompt: the profile block and the question (the instructions are the system instruction)"""
+    return profile_block(user_context) + QUESTION_TEMPLATE.format(question=user_input)
+
+
+def profile_cache_stats() -> Dict[str, Optional[int]]:
+    """Hits and misses of the rendered profile blocks"""
+    info = _render_profile_block.cache_info()
+    return {"hits": info.hits, "misses": info.misses, "profiles": info.currsize, "max_profiles": info.maxsize}
@@ -0,0 +1,191 @@
+# -*- coding: utf-8 -*-
+"""
+Gemini over plain HTTP, for pointing GeminiClient at another endpoint.
+
+With GEMINI_API_ENDPOINT set (e.g. http://127.0.0.1:8765 for the local
+stand-in in gemini_standin.py) requests go to that base URL through the
+public REST API (generateContent, streamGenerateContent with server-sent
+events, countTokens) instead of Google's gRPC service. Requests and answers
+are the SDK's own protos and response types, so GeminiClient handles them
+exactly like real ones, and HTTP errors become the same google.api_core
+exceptions (429 -> TooManyRequests), so retries and failover behave the same.
+
+Each request opens its own connection with asyncio streams; only used from
+the background event loop (see async_loop.py).
+"""
+
+import asyncio
+import json
+import ssl
+import urllib.parse
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+
+from google.api_core import exceptions as api_exceptions
+from google.generativeai import protos
+from google.generativeai.types import GenerateContentResponse, generation_types
+
+API_VERSION = "v1beta"
+
+
+class GeminiRestModel:
+    """The part of genai.GenerativeModel GeminiClient uses, over the REST API"""
+
+    def __init__(self, model_name: str, api_key: str, endpoint: str, system_instruction: Optional[str] = None):
+        """
+        Args:
+            model_name: Gemini model, e.g. 'gemini-1.5-flash'
+            api_key: Sent in the x-goog-api-key header
+            endpoint: Base URL, http:// or https://
+            system_instruction: Sent with every generation request
+        """
+        parts = urllib.parse.urlsplit(endpoint)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise ValueError(f"Invalid Gemini endpoint '{endpoint}' (expected http://host:port)")
+        self.model_name = model_name
+        self.api_key = api_key
+        self.endpoint = endpoint.rstrip("/")
+        self.system_instruction = system_instruction
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == "https" else 80)
+        self.ssl = ssl.create_default_context() if parts.scheme == "https" else None
+        self.base_path = parts.path.rstrip("/")
+
+    def _request(self, contents: str, generation_config=None) -> protos.GenerateContentRequest:
+        request = protos.GenerateContentRequest(
+            model=f"models/{self.model_name}",
+            contents=[protos.Content(role="user", parts=[protos.Part(text=contents)])],
+        )
+        if self.system_instruction:
+            request.system_instruction = protos.Content(parts=[protos.Part(text=self.system_instruction)])
+        if generation_config is not None:
+            request.generation_config = protos.GenerationConfig(
+                generation_types.to_generation_config_dict(generation_config))
+        return request
+
+    async def generate_content_async(self, contents: str, generation_config=None, stream: bool = False,
+                                     request_options: Optional[Dict[str, Any]] = None):
+        """
+        Generate an answer (the caller enforces timeouts)
+
+        Returns:
+            A GenerateContentResponse, or for stream=True an async iterable of
+            them, available once the response headers have arrived
+        """
+        body = protos.GenerateContentRequest.to_json(self._request(contents, generation_config), indent=None)
+        method = "streamGenerateContent?alt=sse" if stream else "generateContent"
+        reader, writer, headers = await self._post(method, body)
+        if stream:
+            return _EventStream(reader, writer, headers)
+        try:
+            payload = await _read_all(reader, headers)
+        finally:
+            writer.close()
+        return _response(payload)
+
+    async def count_tokens_async(self, contents: str, **kwargs):
+        """Token count of contents (a CountTokensResponse, like the SDK's)"""
+        body = json.dumps({"contents": [{"role": "user", "parts": [{"text": contents}]}]})
+        reader, writer, headers = await self._post("countTokens", body)
+        try:
+            payload = await _read_all(reader, headers)
+        finally:
+            writer.close()
+        return protos.CountTokensResponse.from_json(payload.decode("utf-8"), ignore_unknown_fields=True)
+
+    async def _post(self, method: str, body: str) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter, Dict[str, str]]:
+        """
+        Send a request and read the response headers
+
+        Raises:
+            google.api_core.exceptions.GoogleAPICallError: For a non-200 status
+        """
+        path = f"{self.base_path}/{API_VERSION}/models/{self.model_name}:{method}"
+        data = body.encode("utf-8")
+        reader, writer = await asyncio.open_connection(self.host, self.port, ssl=self.ssl)
+        try:
+            writer.write((f"POST {path} HTTP/1.1\r\n"
+                          f"Host: {self.host}:{self.port}\r\n"
+                          f"x-goog-api-key: {self.api_key}\r\n"
+                          "Content-Type: application/json\r\n"
+                          f"Content-Length: {len(data)}\r\n"
+                          "Connection: close\r\n\r\n").encode("latin-1") + data)
+            await writer.drain()
+            status = int((await reader.readline()).split()[1])
+            headers = {}
+            while True:
+                line = (await reader.readline()).decode("latin-1").strip()
+                if not line:
+                    break
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+            if status != 200:
+                raise _api_error(status, await _read_all(reader, headers))
+            return reader, writer, headers
+        except BaseException:
+            writer.close()
+            raise
+
+
+class _EventStream:
+    """Streamed answer: one GenerateContentResponse per server-sent event"""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, headers: Dict[str, str]):
+        self.reader = reader
+        self.writer = writer
+        self.headers = headers
+
+    async def __aiter__(self) -> AsyncIterator[GenerateContentResponse]:
+        buffer = b""
+        data = []
+        try:
+            async for block in _body(self.reader, self.headers):
+                buffer += block
+                *lines, buffer = buffer.split(b"\n")
+                for line in lines:
+                    line = line.rstrip(b"\r")
+                    if line.startswith(b"data:"):
+                        data.append(line[5:].strip())
+                    elif not line and data:
+                        yield _response(b"\n".join(data))
+                        data = []
+            if data:
+                yield _response(b"\n".join(data))
+        finally:
+            self.writer.close()
+
+
+def _response(payload: bytes) -> GenerateContentResponse:
+    proto = protos.GenerateContentResponse.from_json(payload.decode("utf-8"), ignore_unknown_fields=True)
+    return GenerateContentResponse.from_response(proto)
+
+
+def _api_error(status: int, payload: bytes) -> api_exceptions.GoogleAPICallError:
+    """The google.api_core exception for an error response (TooManyRequests for 429, ...)"""
+    try:
+        message = json.loads(payload)["error"]["message"]
+    except (ValueError, KeyError, TypeError):
+        message = payload.decode("utf-8", "replace")[:200] or "no details"
+    return api_exceptions.from_http_status(status, message)
+
+
+async def _body(reader: asyncio.StreamReader, headers: Dict[str, str]) -> AsyncIterator[bytes]:
+    """Response body as it arrives (chunked, with a length, or up to the end of the connection)"""
+    if headers.get("transfer-encoding", "").lower() == "chunked":
+        while True:
+            size = int((await reader.readline()).split(b";")[0], 16)
+            if size == 0:
+                return
+            yield await reader.readexactly(size)
+            await reader.readline()
+    elif "content-length" in headers:
+        yield await reader.readexactly(int(headers["content-length"]))
+    else:
+        while True:
+            block = await reader.read(65536)
+            if not block:
+                return
+            yield block
+
+
+async def _read_all(reader: asyncio.StreamReader, headers: Dict[str, str]) -> bytes:
+    return b"".join([block async for block in _body(reader, headers)])
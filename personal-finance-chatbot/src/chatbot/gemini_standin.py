@@ -0,0 +1,366 @@
+# -*- coding: utf-8 -*-
+"""
+Local stand-in for the Gemini API, for load tests without network access.
+
+Serves the REST calls GeminiClient makes (generateContent,
+streamGenerateContent?alt=sse and countTokens, see gemini_rest.py) with
+canned financial answers, and misbehaves on purpose as configured:
+
+- latency: time to the first byte, drawn from a distribution spec such as
+  "fixed:0.5", "uniform:0.2,1.5", "normal:0.8,0.2", "lognormal:0.8,0.5"
+  (median and sigma) or "exponential:0.6" (mean), all in seconds
+- error_rate: share of requests failing with 500 / 503 (after the latency)
+- 429 bursts: the last burst_seconds of every burst_every seconds, requests get 429;
+  rpm adds a per-minute quota like Gemini's (requests over it get 429)
+- streaming: words per chunk and the delay between chunks (a distribution)
+
+Point GeminiClient at it with GEMINI_API_ENDPOINT=http://127.0.0.1:8765 (any
+API key works), or use GeminiStandIn in-process as load_test_gemini.py does.
+Run it on its own with:
+
+    python -m src.chatbot.gemini_standin --port 8765 --latency lognormal:0.8,0.5
+"""
+
+import argparse
+import collections
+import json
+import math
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+from google.generativeai import protos
+
+ANSWER_OPENING = "Here is a practical plan for your question"
+ANSWER_BODY = (
+    "Start by tracking every expense for one month so you know where your money goes. "
+    "Keep an emergency fund of six months of expenses in a savings account or liquid fund. "
+    "Then automate a monthly SIP into a diversified index fund, and use PPF or ELSS for the "
+    "Section 80C tax deduction. Review your plan every six months and increase your SIP by "
+    "ten percent whenever your income grows. This is general guidance, not personalised "
+    "investment advice; markets carry risk."
+)
+
+_PATH = re.compile(r"^/v1[a-z0-9]*/models/([^/:]+):(\w+)$")
+_ERRORS = {
+    429: ("RESOURCE_EXHAUSTED", "Resource has been exhausted (e.g. check quota)."),
+    500: ("INTERNAL", "An internal error has occurred."),
+    503: ("UNAVAILABLE", "The model is overloaded. Please try again later."),
+}
+
+
+class LatencyDistribution:
+    """Random delays in seconds, from a spec such as "lognormal:0.8,0.5" """
+
+    KINDS = {"fixed": 1, "uniform": 2, "normal": 2, "lognormal": 2, "exponential": 1}
+
+    def __init__(self, kind: str, params: Tuple[float, ...]):
+        if self.KINDS.get(kind) != len(params):
+            raise ValueError(f"Invalid latency '{kind}:{','.join(map(str, params))}' "
+                             f"(expected one of {', '.join(self.KINDS)} with its parameters)")
+        self.kind = kind
+        self.params = params
+
+    @classmethod
+    def parse(cls, spec: str) -> "LatencyDistribution":
+        """Build from "kind:p1[,p2]"; a plain number is a fixed delay"""
+        kind, _, params = spec.partition(":")
+        if not params:
+            return cls("fixed", (float(kind),))
+        return cls(kind.strip().lower(), tuple(float(p) for p in params.split(",")))
+
+    def sample(self, rng: random.Random) -> float:
+        a = self.params[0]
+        if self.kind == "fixed":
+            value = a
+        elif self.kind == "uniform":
+            value = rng.uniform(a, self.params[1])
+        elif self.kind == "normal":
+            value = rng.gauss(a, self.params[1])
+        elif self.kind == "lognormal":
+            value = rng.lognormvariate(math.log(a), self.params[1]) if a > 0 else 0.0
+        else:
+            value = rng.expovariate(1 / a) if a > 0 else 0.0
+        return max(0.0, value)
+
+    def __str__(self) -> str:
+        return f"{self.kind}:{','.join(f'{p:g}' for p in self.params)}"
+
+
+class StandInConfig(NamedTuple):
+    """How the stand-in answers (see the module docstring)"""
+    latency: str = "lognormal:0.6,0.4"
+    chunk_delay: str = "fixed:0.05"
+    words_per_chunk: int = 8
+    error_rate: float = 0.0
+    burst_every: float = 0.0
+    burst_seconds: float = 0.0
+    rpm: int = 0
+    seed: Optional[int] = None
+
+
+class GeminiStandIn:
+    """Gemini-compatible HTTP server on a background thread"""
+
+    def __init__(self, config: StandInConfig = StandInConfig(), host: str = "127.0.0.1", port: int = 0):
+        """
+        Args:
+            config: Latency, error and 429 behaviour
+            host: Interface to listen on
+            port: Port to listen on (0 = any free port, see endpoint)
+        """
+        self.config = config
+        self.latency = LatencyDistribution.parse(config.latency)
+        self.chunk_delay = LatencyDistribution.parse(config.chunk_delay)
+        self.host = host
+        self.port = port
+        self.started_at = time.monotonic()
+        self.burst_until = 0.0
+        self._rng = random.Random(config.seed)
+        self._recent = collections.deque()
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+        self.requests = 0
+        self.streamed = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.disconnects = 0
+        self.statuses: Dict[int, int] = collections.Counter()
+
+    @property
+    def endpoint(self) -> str:
+        """Base URL for GEMINI_API_ENDPOINT"""
+        return f"http://{self.host}:{self.port}"
+
+    def start(self) -> "GeminiStandIn":
+        """Start serving (returns self, so it can be used as a context manager)"""
+        if self._server is None:
+            self._server = ThreadingHTTPServer((self.host, self.port), _make_handler(self))
+            self._server.daemon_threads = True
+            self.port = self._server.server_address[1]
+            self.started_at = time.monotonic()
+            self._thread = threading.Thread(target=self._server.serve_forever, name="gemini-standin", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop serving; requests in progress are abandoned"""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "GeminiStandIn":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def start_burst(self, seconds: float):
+        """Answer every generation request with 429 for the next `seconds`"""
+        with self._lock:
+            self.burst_until = max(self.burst_until, time.monotonic() + seconds)
+
+    def _in_burst(self, now: float) -> bool:
+        config = self.config
+        if now < self.burst_until:
+            return True
+        return (config.burst_every > 0 and config.burst_seconds > 0
+                and (now - self.started_at) % config.burst_every >= config.burst_every - config.burst_seconds)
+
+    def _plan(self) -> Tuple[int, float]:
+        """(HTTP status, seconds before the first byte) for a new generation request"""
+        now = time.monotonic()
+        with self._lock:
+            self.requests += 1
+            while self._recent and now - self._recent[0] >= 60:
+                self._recent.popleft()
+            if self._in_burst(now) or (self.config.rpm and len(self._recent) >= self.config.rpm):
+                return 429, 0.0  # Quota errors come back straight away, like Gemini's
+            self._recent.append(now)
+            delay = self.latency.sample(self._rng)
+            if self._rng.random() < self.config.error_rate:
+                return self._rng.choice((500, 503)), delay
+            return 200, delay
+
+    def _chunk_delays(self, count: int) -> List[float]:
+        with self._lock:
+            return [self.chunk_delay.sample(self._rng) for _ in range(count)]
+
+    def _record(self, status: int, streamed: bool = False):
+        with self._lock:
+            self.statuses[status] += 1
+            self.streamed += streamed
+
+    def _enter(self):
+        with self._lock:
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    def _leave(self, disconnected: bool = False):
+        with self._lock:
+            self.in_flight -= 1
+            self.disconnects += disconnected
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Requests served, by HTTP status, and concurrency"""
+        with self._lock:
+            return {
+                "endpoint": self.endpoint,
+                "latency": str(self.latency),
+                "requests": self.requests,
+                "streamed": self.streamed,
+                "statuses": dict(self.statuses),
+                "in_flight": self.in_flight,
+                "peak_in_flight": self.peak_in_flight,
+                "disconnects": self.disconnects,
+            }
+
+
+def answer_text(prompt: str) -> str:
+    """Canned answer for a prompt (mentions the question so answers differ)"""
+    question = prompt.rsplit("USER QUESTION:", 1)[-1].strip().splitlines()[0] if prompt.strip() else ""
+    return f"{ANSWER_OPENING} \"{question[:80]}\": {ANSWER_BODY}"
+
+
+def _count_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+def _chunk_proto(text: str, finish: bool = False, prompt_tokens: int = 0, answer_tokens: int = 0):
+    response = protos.GenerateContentResponse(
+        candidates=[protos.Candidate(index=0, content=protos.Content(role="model", parts=[protos.Part(text=text)]))],
+        model_version="standin",
+    )
+    if finish:
+        response.candidates[0].finish_reason = protos.Candidate.FinishReason.STOP
+        response.usage_metadata = protos.GenerateContentResponse.UsageMetadata(
+            prompt_token_count=prompt_tokens, candidates_token_count=answer_tokens,
+            total_token_count=prompt_tokens + answer_tokens)
+    return protos.GenerateContentResponse.to_json(response, indent=None, use_integers_for_enums=False)
+
+
+def _make_handler(standin: GeminiStandIn):
+    class Handler(BaseHTTPRequestHandler):
+        """One request to the stand-in (HTTP/1.0: the connection closes after each answer)"""
+
+        def log_message(self, format, *args):
+            pass  # Load tests make thousands of requests
+
+        def _send_json(self, status: int, payload: str):
+            data = payload.encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=UTF-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _send_error(self, status: int, message: Optional[str] = None):
+            name, default = _ERRORS.get(status, ("INVALID_ARGUMENT", "Invalid request."))
+            self._send_json(status, json.dumps({"error": {"code": status, "message": message or default,
+                                                          "status": name}}))
+
+        def do_POST(self):
+            path, _, query = self.path.partition("?")
+            match = _PATH.match(path)
+            body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            if not match or match.group(2) not in ("generateContent", "streamGenerateContent", "countTokens"):
+                self._send_error(404, f"Method not found: {path}")
+                return
+            method = match.group(2)
+            try:
+                if method == "countTokens":
+                    request = protos.CountTokensRequest.from_json(body.decode("utf-8"), ignore_unknown_fields=True)
+                    text = " ".join(part.text for content in request.contents for part in content.parts)
+                    self._send_json(200, json.dumps({"totalTokens": _count_tokens(text)}))
+                    return
+                request = protos.GenerateContentRequest.from_json(body.decode("utf-8"), ignore_unknown_fields=True)
+            except ValueError as e:
+                self._send_error(400, f"Invalid JSON payload: {e}")
+                return
+
+            prompt = " ".join(part.text for content in request.contents for part in content.parts)
+            system = " ".join(part.text for part in request.system_instruction.parts)
+            status, delay = standin._plan()
+            standin._enter()
+            disconnected = False
+            try:
+                time.sleep(delay)
+                if status != 200:
+                    standin._record(status)
+                    self._send_error(status)
+                elif method == "generateContent":
+                    text = answer_text(prompt)
+                    standin._record(200)
+                    self._send_json(200, _chunk_proto(text, True, _count_tokens(system + prompt), _count_tokens(text)))
+                else:
+                    self._stream(prompt, system, sse="alt=sse" in query)
+            except (BrokenPipeError, ConnectionResetError):
+                disconnected = True  # The client gave up (cancelled or timed out)
+            finally:
+                standin._leave(disconnected)
+
+        def _stream(self, prompt: str, system: str, sse: bool):
+            words = answer_text(prompt).split(" ")
+            size = max(1, standin.config.words_per_chunk)
+            pieces = [" ".join(words[i:i + size]) + " " for i in range(0, len(words), size)]
+            pieces[-1] = pieces[-1].rstrip()
+            delays = standin._chunk_delays(len(pieces) - 1)
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream" if sse else "application/json; charset=UTF-8")
+            self.end_headers()
+            standin._record(200, streamed=True)
+            events = []
+            for index, piece in enumerate(pieces):
+                if index:
+                    time.sleep(delays[index - 1])
+                last = index == len(pieces) - 1
+                event = _chunk_proto(piece, last, _count_tokens(system + prompt), _count_tokens(" ".join(words)))
+                if sse:
+                    self.wfile.write(f"data: {event}\r\n\r\n".encode("utf-8"))
+                    self.wfile.flush()
+                else:
+                    events.append(event)
+            if not sse:
+                self.wfile.write(("[" + ",".join(events) + "]").encode("utf-8"))
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Gemini-compatible stand-in for offline load tests")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", default=StandInConfig._field_defaults["latency"],
+                        help="Time to first byte: fixed:S, uniform:A,B, normal:MEAN,SD, lognormal:MEDIAN,SIGMA "
+                             "or exponential:MEAN (seconds)")
+    parser.add_argument("--chunk-delay", default=StandInConfig._field_defaults["chunk_delay"],
+                        help="Delay between streamed chunks (same forms as --latency)")
+    parser.add_argument("--words-per-chunk", type=int, default=StandInConfig._field_defaults["words_per_chunk"])
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests failing with 500/503")
+    parser.add_argument("--burst-every", type=float, default=0.0, help="Seconds between 429 bursts (0 = none)")
+    parser.add_argument("--burst-seconds", type=float, default=0.0, help="Length of each 429 burst")
+    parser.add_argument("--rpm", type=int, default=0, help="Requests per minute before 429 (0 = unlimited)")
+    parser.add_argument("--seed", type=int, help="Random seed for repeatable runs")
+    args = parser.parse_args()
+
+    config = StandInConfig(latency=args.latency, chunk_delay=args.chunk_delay, words_per_chunk=args.words_per_chunk,
+                           error_rate=args.error_rate, burst_every=args.burst_every,
+                           burst_seconds=args.burst_seconds, rpm=args.rpm, seed=args.seed)
+    standin = GeminiStandIn(config, args.host, args.port).start()
+    print(f"🧪 Gemini stand-in listening on {standin.endpoint} (latency {standin.latency})")
+    print(f"💡 Point the app at it with GEMINI_API_ENDPOINT={standin.endpoint}")
+    try:
+        while True:
+            time.sleep(60)
+            print(f"📊 {standin.get_stats()}")
+    except KeyboardInterrupt:
+        standin.stop()
+
+
+if __name__ == "__main__":
+    main()
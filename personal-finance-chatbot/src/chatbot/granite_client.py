@@ -1,10 +1,441 @@
 # -*- coding: utf-8 -*-
 import os
-from typing import Dict, Any, Optional
+import functools
+from typing import Callable, Dict, Any, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
 import torch
-from transformers import AutoModelForCausalLM, AutoTokenizer
+from transformers import AutoTokenizer, StoppingCriteria, StoppingCriteriaList, TextIteratorStreamer
+from transformers.generation.streamers import BaseStreamer
 import threading
 import time
+import weakref
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from .model_registry import get_model_registry, ModelHandle
+from .model_loader import GraniteModelLoader, LoadCancelledError, ProgressCallback
+from .inference_scheduler import BatchingScheduler
+from .prefix_cache import PrefixKVCache
+from .deterministic import DecodingConfig, OutputCache, resolve_decoding
+from .quantization import model_memory_bytes, resolve_quantization_mode
+from .backends import get_backend, resolve_backend
+from .speculative import SpeculativeDecoder
+from .admission import AdmissionController
+from .prompt_assembler import QUERY_TEMPLATE, AssembledPrompt, PromptAssembler
+from .warmup import WARMUP_PROMPTS, WarmupTracker, combine_reports
+from .worker_pool import InferenceWorkerPool, WorkerConfig, WorkerStream, resolve_worker_config
+
+# Text after any of these patterns is the model continuing the prompt format
+STOP_PATTERNS = [
+    "\n\nUser Query:",
+    "\n\nFinancial Advice:",
+    "\nUser:",
+    "\nAssistant:",
+    "\n---",
+]
+MAX_RESPONSE_LINES = 10  # Limit to 10 lines for conciseness
+DEFAULT_MAX_NEW_TOKENS = 400
+MIN_NEW_TOKENS = 50
+REPETITION_PENALTY = 1.1
+EARLY_STOP_REASONS = ("stop_pattern", "line_limit", "repeated_line")
+# Extra time a deadlined request waits for its batch to hand back the partial answer
+DEADLINE_GRACE_SECONDS = 1.0
+
+
+def find_stop_reason(text: str) -> Optional[str]:
+    """
+    Why generation can end here, judged on the text generated so far.
+    Anything produced after this point would be thrown away by _clean_response.
+    """
+    for pattern in STOP_PATTERNS:
+        if pattern in text:
+            return "stop_pattern"
+
+    # Only lines terminated by a newline are final
+    complete_lines = [line.strip() for line in text.split('\n')[:-1] if line.strip()]
+    for previous, line in zip(complete_lines, complete_lines[1:]):
+        if line == previous:
+            return "repeated_line"
+    if len(complete_lines) >= MAX_RESPONSE_LINES:
+        return "line_limit"
+    return None
+
+
+class AdviceResponse(str):
+    """
+    Advice text that also says whether it was cut short by a deadline.
+    A plain str everywhere else, so existing callers keep working.
+    """
+
+    def __new__(cls, text: str, truncated: bool = False):
+        response = super().__new__(cls, text)
+        response.truncated = truncated
+        return response
+
+
+class FinancialAdviceStoppingCriteria(StoppingCriteria):
+    """
+    Ends each sequence as soon as its answer is complete: a stop pattern, the
+    line limit, a repeated line, the request's deadline or its stream being
+    closed. Works per row, so batched sequences finish independently, and
+    records why and when each row stopped.
+    """
+
+    # A stop condition can only appear when a token adds one of these characters
+    TRIGGER_CHARS = ("\n", ":", "-")
+
+    def __init__(self, tokenizer, prompt_len: int, deadlines: Optional[List[Optional[float]]] = None,
+                 on_row_done: Optional[Callable[[int, Any], None]] = None,
+                 stop_events: Optional[List[Optional[threading.Event]]] = None):
+        """
+        Args:
+            deadlines: Per-row time.monotonic() deadlines (None = no deadline)
+            on_row_done: Called with (row, token ids) once a row has finished
+            stop_events: Per-row events set when nobody reads the answer any more
+        """
+        self.tokenizer = tokenizer
+        self.prompt_len = prompt_len
+        self.deadlines = deadlines or []
+        self.stop_events = stop_events or []
+        self.on_row_done = on_row_done
+        self.stop_reasons: Dict[int, str] = {}
+
+    def _row_reason(self, row: int, new_ids, now: float) -> Optional[str]:
+        deadline = self.deadlines[row] if row < len(self.deadlines) else None
+        if deadline is not None and now >= deadline:
+            return "deadline"
+        if new_ids.shape[0] == 0:
+            return None
+        if self.on_row_done is not None and int(new_ids[-1]) == self.tokenizer.eos_token_id:
+            # generate() finishes this row itself; only noted so it can be handed back early
+            return "eos"
+        last_piece = self.tokenizer.decode(new_ids[-1:], skip_special_tokens=True)
+        if not any(char in last_piece for char in self.TRIGGER_CHARS):
+            return None
+        return find_stop_reason(self.tokenizer.decode(new_ids, skip_special_tokens=True))
+
+    def _closed_reason(self, row: int) -> Optional[str]:
+        stop_event = self.stop_events[row] if row < len(self.stop_events) else None
+        return "stream_closed" if stop_event is not None and stop_event.is_set() else None
+
+    def __call__(self, input_ids, scores, **kwargs):
+        done = torch.zeros(input_ids.shape[0], dtype=torch.bool, device=input_ids.device)
+        now = time.monotonic()
+        for row in range(input_ids.shape[0]):
+            if row in self.stop_reasons:
+                done[row] = True
+                continue
+            reason = self._row_reason(row, input_ids[row, self.prompt_len:], now) or self._closed_reason(row)
+            if reason:
+                self.stop_reasons[row] = reason
+                done[row] = True
+                if self.on_row_done is not None:
+                    self.on_row_done(row, input_ids[row, self.prompt_len:])
+        return done
+
+
+def build_generation_kwargs(inputs, tokenizer, max_length: int,
+                            max_new_tokens: int = DEFAULT_MAX_NEW_TOKENS,
+                            decoding: Optional[DecodingConfig] = None) -> Dict[str, Any]:
+    """Sampling settings shared by blocking, batched and streaming generation"""
+    input_len = inputs["input_ids"].shape[1]
+    # New-token budget, capped so prompt + answer still fit the context window
+    budget = max(1, min(max_new_tokens, max_length - input_len))
+    return dict(
+        **inputs,
+        max_new_tokens=budget,
+        min_new_tokens=min(MIN_NEW_TOKENS, budget),
+        **(decoding or DecodingConfig()).sampling_kwargs(),
+        pad_token_id=tokenizer.pad_token_id if tokenizer.pad_token_id is not None else tokenizer.eos_token_id,
+        repetition_penalty=REPETITION_PENALTY
+    )
+
+
+def _stop_stats(criteria: FinancialAdviceStoppingCriteria, row: int, new_tokens: int,
+                budget: int) -> Dict[str, Any]:
+    """Per-request record of why generation ended and how many tokens that saved"""
+    reason = criteria.stop_reasons.get(row)
+    if reason is None:
+        reason = "max_new_tokens" if new_tokens >= budget else "eos"
+    return {
+        "stop_reason": reason,
+        "max_new_tokens": budget,
+        "tokens_saved": budget - new_tokens if reason in EARLY_STOP_REASONS else 0,
+        "truncated": reason == "deadline",
+    }
+
+
+class GenerationOutput(NamedTuple):
+    """Raw text generated for one prompt plus bookkeeping about the run"""
+    text: str
+    new_tokens: int
+    stats: Dict[str, Any]
+
+
+class PromptRequest(NamedTuple):
+    """One prompt for generate_batch, split so the system prompt prefix can be cached"""
+    prefix: str
+    suffix: str
+    deadline: Optional[float] = None  # time.monotonic() value after which decoding stops
+    streamer: Any = None  # transformers streamer receiving this prompt's new tokens
+    stop_event: Optional[threading.Event] = None  # Set to stop this prompt's generation early
+
+
+class _BatchStreamer(BaseStreamer):
+    """Hands each row of a batched generate() to its own streamer (rows without one are skipped)"""
+
+    def __init__(self, streamers: List[Any]):
+        self.streamers = list(streamers)
+
+    def put(self, value):
+        for row, streamer in enumerate(self.streamers):
+            if streamer is not None:
+                streamer.put(value[row:row + 1])
+
+    def end_row(self, row: int):
+        """End one row's stream; the padding generate() adds to finished rows is not passed on"""
+        streamer, self.streamers[row] = self.streamers[row], None
+        if streamer is not None:
+            streamer.end()
+
+    def end(self):
+        for row in range(len(self.streamers)):
+            self.end_row(row)
+
+
+def generate_batch(weights: Callable[[], Tuple[Any, Any]], device: str, max_length: int,
+                   prompts: List[Tuple],
+                   prefix_cache: Optional[PrefixKVCache] = None,
+                   max_new_tokens: int = DEFAULT_MAX_NEW_TOKENS,
+                   on_result: Optional[Callable[[int, GenerationOutput], None]] = None,
+                   speculative: Optional[SpeculativeDecoder] = None,
+                   decoding: Optional[DecodingConfig] = None) -> List[GenerationOutput]:
+    """
+    Run one (left-padded) generate() call for several prompts.
+
+    Args:
+        prompts: PromptRequests or (system prompt prefix, query suffix) pairs;
+            requests with a streamer get their own answer streamed as it is decoded
+        prefix_cache: Reuses precomputed prefix key/values for single prompts
+        max_new_tokens: Token budget for each answer
+        on_result: Called with (index, output) as soon as a prompt's answer is
+            final, before the rest of the batch has finished
+        speculative: Draft-model decoder used for single prompts
+        decoding: Sampled (default), greedy or seeded decoding
+
+    Returns:
+        One GenerationOutput per prompt, in prompt order
+    """
+    model, tokenizer = weights()
+    if model is None:
+        raise RuntimeError("Granite model is not loaded")
+
+    requests = [PromptRequest(*prompt) for prompt in prompts]
+    stats: Dict[str, Any] = {}
+    if prefix_cache is not None and len(requests) == 1:
+        # Left padding would shift the prefix, so only unpadded runs reuse it
+        inputs, stats = prefix_cache.build_inputs(requests[0].prefix, requests[0].suffix)
+    else:
+        inputs = tokenizer([r.prefix + r.suffix for r in requests], return_tensors="pt", padding=True).to(device)
+    prompt_len = inputs["input_ids"].shape[1]
+    generation_kwargs = build_generation_kwargs(inputs, tokenizer, max_length, max_new_tokens, decoding)
+    budget = generation_kwargs["max_new_tokens"]
+    start = time.perf_counter()
+    finished: Dict[int, GenerationOutput] = {}
+    streamed = any(r.streamer is not None for r in requests)
+    streamer = _BatchStreamer([r.streamer for r in requests]) if streamed else None
+
+    def row_output(index: int, row) -> GenerationOutput:
+        if tokenizer.pad_token_id is not None:
+            new_tokens = int((row != tokenizer.pad_token_id).sum())
+        else:
+            new_tokens = row.shape[0]
+        row_stats = dict(stats, generation_seconds=time.perf_counter() - start,
+                         **_stop_stats(criteria, index, new_tokens, budget))
+        return GenerationOutput(tokenizer.decode(row, skip_special_tokens=True).strip(), new_tokens, row_stats)
+
+    def row_done(index: int, row):
+        finished[index] = row_output(index, row)
+        on_result(index, finished[index])
+        if streamer is not None:
+            streamer.end_row(index)
+
+    criteria = FinancialAdviceStoppingCriteria(
+        tokenizer, prompt_len, deadlines=[r.deadline for r in requests],
+        on_row_done=row_done if on_result is not None else None,
+        stop_events=[r.stop_event for r in requests]
+    )
+
+    generation_kwargs["stopping_criteria"] = StoppingCriteriaList([criteria])
+    if streamer is not None:
+        generation_kwargs["streamer"] = streamer
+    if decoding is not None:
+        decoding.seed_generation()
+    try:
+        with torch.no_grad():
+            # Assisted generation only supports one sequence at a time
+            if speculative is not None and len(requests) == 1 and speculative.ensure_loaded():
+                outputs, stats["speculative"] = speculative.generate(model, **generation_kwargs)
+            else:
+                outputs = model.generate(**generation_kwargs)
+    finally:
+        # generate() ends the streams itself unless it failed
+        if streamer is not None:
+            streamer.end()
+
+    # Decode new tokens only; with left padding they start at the same column
+    return [finished.get(index) or row_output(index, row) for index, row in enumerate(outputs[:, prompt_len:])]
+
+
+def generate_stream(weights: Callable[[], Tuple[Any, Any]], device: str, max_length: int,
+                    request: PromptRequest, streamer,
+                    prefix_cache: Optional[PrefixKVCache] = None,
+                    max_new_tokens: int = DEFAULT_MAX_NEW_TOKENS,
+                    stop_criteria: Optional[List[StoppingCriteria]] = None,
+                    speculative: Optional[SpeculativeDecoder] = None,
+                    decoding: Optional[DecodingConfig] = None) -> GenerationOutput:
+    """
+    Generate one answer, handing its text to `streamer` as it is decoded.
+
+    Args:
+        streamer: transformers streamer receiving the new tokens
+        stop_criteria: Extra stopping criteria (e.g. the consumer went away)
+
+    Returns:
+        GenerationOutput for the whole answer once generation has ended
+    """
+    model, tokenizer = weights()
+    if model is None:
+        raise RuntimeError("Granite model is not loaded")
+
+    if prefix_cache is not None:
+        inputs, stats = prefix_cache.build_inputs(request.prefix, request.suffix)
+    else:
+        inputs, stats = tokenizer(request.prefix + request.suffix, return_tensors="pt").to(device), {}
+    prompt_len = inputs["input_ids"].shape[1]
+    criteria = FinancialAdviceStoppingCriteria(tokenizer, prompt_len, deadlines=[request.deadline])
+    generation_kwargs = build_generation_kwargs(inputs, tokenizer, max_length, max_new_tokens, decoding)
+    generation_kwargs.update(streamer=streamer,
+                             stopping_criteria=StoppingCriteriaList([criteria, *(stop_criteria or [])]))
+    if decoding is not None:
+        decoding.seed_generation()
+    start = time.perf_counter()
+    with torch.no_grad():
+        if speculative is not None and speculative.ensure_loaded():
+            outputs, stats["speculative"] = speculative.generate(model, **generation_kwargs)
+        else:
+            outputs = model.generate(**generation_kwargs)
+
+    new_ids = outputs[0, prompt_len:]
+    run_stats = dict(stats, generation_seconds=time.perf_counter() - start,
+                     **_stop_stats(criteria, 0, new_ids.shape[0], generation_kwargs["max_new_tokens"]))
+    return GenerationOutput(tokenizer.decode(new_ids, skip_special_tokens=True).strip(), new_ids.shape[0], run_stats)
+
+
+def load_granite_weights(model_path: str, device: str, quantization: str, backend: str = "eager",
+                         progress_callback: Optional[ProgressCallback] = None,
+                         cancel_event: Optional[threading.Event] = None,
+                         timings: Optional[Dict[str, float]] = None) -> Tuple[Any, Any]:
+    """
+    Load Granite model and tokenizer ready for (batched) generation.
+    Safetensors shards are memory-mapped, so reloads after idle eviction read
+    mostly from the page cache.
+
+    Args:
+        backend: Resolved execution backend (see backends.py)
+        timings: Filled with the per-stage load times
+
+    Returns:
+        (model, tokenizer) tuple
+    """
+    # Resolve from the local cache and only re-download missing/corrupt shards
+    loader = GraniteModelLoader(model_path, progress_callback=progress_callback, cancel_event=cancel_event)
+    model, tokenizer = get_backend(backend).load(loader, device, quantization)
+    if timings is not None:
+        timings.update(loader.timings)
+    
+    # Batched generation pads prompts on the left so new tokens line up
+    if tokenizer.pad_token is None:
+        tokenizer.pad_token = tokenizer.eos_token
+    tokenizer.padding_side = "left"
+    
+    if loader.repaired_files:
+        print(f"🔧 Re-downloaded shards: {', '.join(loader.repaired_files)}")
+    print(f"Granite model loaded successfully! ({loader.format_timings()})")
+    return model, tokenizer
+
+
+class StreamingResponseCleaner:
+    """
+    Incremental version of GraniteClient._clean_response.
+
+    Text is only released once it can no longer be removed by cleaning: a tail
+    that might be the start of a stop pattern, or a line that might turn out to
+    repeat the previous one, is held back until more tokens arrive. The chunks
+    returned by feed() and finish() therefore always concatenate to the same
+    text _clean_response would produce for the whole output.
+    """
+
+    def __init__(self):
+        self.raw = ""
+        self.emitted = ""
+        self.stopped = False
+
+    def feed(self, text: str) -> str:
+        """Add newly generated text and return the part that is safe to show"""
+        if self.stopped:
+            return ""
+        self.raw += text
+
+        raw = self.raw
+        for pattern in STOP_PATTERNS:
+            if pattern in raw:
+                raw = raw.split(pattern)[0]
+                self.stopped = True
+
+        cleaned_lines = self._clean_lines(raw)
+        if len(cleaned_lines) > MAX_RESPONSE_LINES:
+            self.stopped = True
+        if self.stopped:
+            return self._release('\n'.join(cleaned_lines[:MAX_RESPONSE_LINES]))
+
+        stable = raw[:self._stable_length(raw)]
+        stable_lines = self._clean_lines(stable)
+        # A line still being written may end up equal to the previous line
+        if (len(stable_lines) >= 2 and not stable.endswith('\n')
+                and stable_lines[-2].startswith(stable_lines[-1])):
+            stable_lines = stable_lines[:-1]
+        return self._release('\n'.join(stable_lines[:MAX_RESPONSE_LINES]))
+
+    def finish(self) -> str:
+        """Release whatever is left once generation has ended"""
+        raw = self.raw
+        for pattern in STOP_PATTERNS:
+            if pattern in raw:
+                raw = raw.split(pattern)[0]
+        return self._release('\n'.join(self._clean_lines(raw)[:MAX_RESPONSE_LINES]))
+
+    @staticmethod
+    def _clean_lines(text: str) -> List[str]:
+        cleaned_lines = []
+        for line in text.strip().split('\n'):
+            line = line.strip()
+            if line and (not cleaned_lines or line != cleaned_lines[-1]):
+                cleaned_lines.append(line)
+        return cleaned_lines
+
+    @staticmethod
+    def _stable_length(raw: str) -> int:
+        """Length of the prefix of raw that cannot grow into a stop pattern"""
+        for start in range(max(0, len(raw) - max(len(p) for p in STOP_PATTERNS)), len(raw)):
+            tail = raw[start:]
+            if any(pattern.startswith(tail) for pattern in STOP_PATTERNS):
+                return start
+        return len(raw)
+
+    def _release(self, cleaned: str) -> str:
+        if not cleaned.startswith(self.emitted):
+            return ""
+        chunk = cleaned[len(self.emitted):]
+        self.emitted = cleaned
+        return chunk
 
 
 class GraniteClient:
@@ -13,18 +444,81 @@ class GraniteClient:
     Compatible with the Watson client interface for seamless integration.
     """
     
-    def __init__(self, timeout_seconds: int = 60):
-        self.model_path = "ibm-granite/granite-3.3-2b-base"
+    def __init__(self, timeout_seconds: Optional[int] = 60, model_path: Optional[str] = None,
+                 progress_callback: Optional[ProgressCallback] = None,
+                 cancel_event: Optional[threading.Event] = None):
+        """
+        Args:
+            timeout_seconds: How long to wait for a download (None = as long as it takes)
+            model_path: Hugging Face repo id or local model directory
+            progress_callback: Receives (stage, fraction done) while the weights load
+            cancel_event: Set it to stop loading at the next stage boundary
+        """
+        self.model_path = model_path or os.getenv("GRANITE_MODEL_PATH", "ibm-granite/granite-3.3-2b-base")
         self.device = "cuda" if torch.cuda.is_available() else "cpu"
-        self.model = None
-        self.tokenizer = None
-        self.max_length = 2048  # Reasonable limit for responses
+        # Opt-in int8/bf16 CPU inference (GRANITE_QUANTIZATION)
+        self.quantization = resolve_quantization_mode(device=self.device)
+        # Eager PyTorch, torch.compile or ONNX Runtime (GRANITE_BACKEND)
+        self.backend = resolve_backend(device=self.device)
+        self._handle: Optional[ModelHandle] = None
+        self._handle_finalizer = None
+        self.max_length = 2048  # Context limit for prompt + response
+        self.max_new_tokens = int(os.getenv("GRANITE_MAX_NEW_TOKENS", DEFAULT_MAX_NEW_TOKENS))
+        self.total_tokens_saved = 0
         self.initialized = False
         self.download_timeout = timeout_seconds
+        self.load_timings: Dict[str, float] = {}
+        self.progress_callback = progress_callback
+        self.cancel_event = cancel_event
+        # Small draft model for speculative decoding (GRANITE_DRAFT_MODEL, off by default)
+        self.draft_model_path = os.getenv("GRANITE_DRAFT_MODEL", "").strip() or None
+        # Sampled, greedy or seeded decoding (GRANITE_DECODING / GRANITE_SEED)
+        self.decoding = resolve_decoding()
+        # Concurrent requests are batched into one generate() call unless the max batch
+        # size is 1; speculative and deterministic decoding run one prompt at a time,
+        # so they turn batching off
+        self.batching_enabled = (int(os.getenv("GRANITE_BATCH_MAX_SIZE", 4)) > 1 and not self.draft_model_path
+                                 and not self.decoding.deterministic)
+        # System prompt key/values are reused across requests unless the cache size is 0
+        self.prefix_cache_enabled = (int(os.getenv("GRANITE_PREFIX_CACHE_SIZE", 8)) > 0
+                                     and get_backend(self.backend).supports_prefix_cache)
+        self.last_generation_stats: Dict[str, Any] = {}
+        # Unload the weights after this long without Granite requests (0 = keep resident)
+        self.idle_timeout_seconds = float(os.getenv("GRANITE_IDLE_TIMEOUT_SECONDS", 0)) or None
+        # Default per-request generation deadline in seconds (0 = no deadline)
+        self.deadline_seconds = float(os.getenv("GRANITE_DEADLINE_SECONDS", 60)) or None
+        # Run inference in worker processes instead of this one (GRANITE_WORKERS, 0 = in-process)
+        self.workers, self.threads_per_worker = resolve_worker_config()
+        # Touch the weights and run a few prompts per user type before reporting ready (GRANITE_WARMUP)
+        self.warmup_enabled = os.getenv("GRANITE_WARMUP", "true").strip().lower() not in ("0", "false", "no", "off")
+        self.warmup_rounds = int(os.getenv("GRANITE_WARMUP_ROUNDS", 2))
+        self.warmup_max_new_tokens = int(os.getenv("GRANITE_WARMUP_MAX_NEW_TOKENS", 8))
         
         # Initialize model and tokenizer with timeout
         self._init_granite_with_timeout()
     
+    @property
+    def model(self):
+        """Shared Granite model from the process-wide registry (None when workers hold it)"""
+        return self._handle.model if self._handle and not self.workers else None
+
+    @property
+    def tokenizer(self):
+        """Shared Granite tokenizer from the process-wide registry"""
+        return self._handle.tokenizer if self._handle else None
+
+    @property
+    def _pool(self) -> Optional[InferenceWorkerPool]:
+        """Worker processes shared by every client in this process, when GRANITE_WORKERS is set"""
+        return self._handle.model if self._handle and self.workers else None
+
+    def _registry_key(self) -> tuple:
+        """Load settings that identify a shareable copy of the weights"""
+        if self.workers:
+            return ("worker_pool", self.model_path, self.device, self.quantization, self.backend,
+                    self.workers, self.threads_per_worker)
+        return (self.model_path, self.device, self.quantization, self.backend)
+
     def _init_granite_with_timeout(self):
         """Initialize Granite with a timeout for downloads"""
         # Check if model is already cached to skip timeout for cached models
@@ -33,7 +527,10 @@ class GraniteClient:
             self._init_granite()
             return
         
-        print(f"📥 Model not cached - downloading with {self.download_timeout}s timeout...")
+        if self.download_timeout is None:
+            print("📥 Model not cached - downloading...")
+        else:
+            print(f"📥 Model not cached - downloading with {self.download_timeout}s timeout...")
         def init_worker():
             self._init_granite()
         
@@ -51,6 +548,8 @@ class GraniteClient:
     
     def _is_model_cached(self) -> bool:
         """Check if the model is already cached locally"""
+        if os.path.isdir(self.model_path):
+            return True
         try:
             from huggingface_hub import snapshot_download
             cache_dir = snapshot_download(self.model_path, local_files_only=True)
@@ -59,38 +558,32 @@ class GraniteClient:
             return False
 
     def _init_granite(self):
-        """Initialize Granite model and tokenizer"""
+        """Initialize Granite model and tokenizer from the shared registry"""
         try:
+            if self.workers:
+                self._init_worker_pool()
+                return
             print(f"Loading Granite model on {self.device}...")
-            
-            # Load tokenizer with force_download to handle corrupted files
-            print("Loading tokenizer...")
-            self.tokenizer = AutoTokenizer.from_pretrained(
-                self.model_path, 
-                force_download=True
+            handle = get_model_registry().acquire(
+                self._registry_key(), self._load_model_and_tokenizer, idle_timeout=self.idle_timeout_seconds,
+                # Reloads after idle eviction must not keep this client alive
+                reloader=functools.partial(load_granite_weights, self.model_path, self.device, self.quantization,
+                                           self.backend)
             )
-            
-            # Load model with appropriate device mapping and force_download
-            print("Loading model...")
-            if self.device == "cuda":
-                self.model = AutoModelForCausalLM.from_pretrained(
-                    self.model_path, 
-                    device_map="auto",
-                    torch_dtype=torch.bfloat16,
-                    force_download=True
-                )
-            else:
-                self.model = AutoModelForCausalLM.from_pretrained(
-                    self.model_path,
-                    torch_dtype=torch.float32,
-                    force_download=True
-                )
-                self.model = self.model.to(self.device)
-            
-            self.model.eval()
+            self._handle = handle
+            # Give the weights back when this client is garbage collected
+            # (e.g. when a Streamlit session ends)
+            self._handle_finalizer = weakref.finalize(self, handle.release)
+            if self.draft_model_path:
+                self._speculative_decoder().ensure_loaded()
+            # Ready only once the first requests no longer pay for a cold start
+            self._warm_up()
             self.initialized = True
-            print("Granite model loaded successfully!")
+            print(f"Granite model ready! (shared by {handle.refcount} client(s) in this process)")
             
+        except LoadCancelledError:
+            print("🛑 Granite model load cancelled")
+            self.release()
         except Exception as e:
             print(f"Error initializing Granite model: {e}")
             print("This could be due to:")
@@ -101,6 +594,52 @@ class GraniteClient:
             print("\nFalling back to rule-based responses...")
             self.initialized = False
 
+    def _init_worker_pool(self):
+        """Take the shared worker pool from the registry, starting it on first use"""
+        handle = get_model_registry().acquire(self._registry_key(), self._start_worker_pool)
+        # Registered as an attachment so the last release shuts the workers down
+        handle.attachment("worker_pool", lambda weights: weights()[0])
+        self._handle = handle
+        self._handle_finalizer = weakref.finalize(self, handle.release)
+        if self.warmup_enabled:
+            # Each worker warmed itself up before reporting ready
+            reports = [state["warmup"] for state in self._pool.get_stats()["processes"] if state.get("warmup")]
+            tracker = self._warmup_tracker()
+            if tracker.report is None and reports:
+                tracker.record(combine_reports(reports))
+        self.initialized = True
+        print(f"Granite worker pool ready! (shared by {handle.refcount} client(s) in this process)")
+
+    def _start_worker_pool(self) -> Tuple[InferenceWorkerPool, Any]:
+        """Spawn the worker processes (called by the registry only on first use)"""
+        config = WorkerConfig(self.model_path, self.device, self.quantization, self.backend, self.max_length,
+                              self.max_new_tokens, self.threads_per_worker,
+                              prefix_cache=self.prefix_cache_enabled, draft_model_path=self.draft_model_path,
+                              warmup_requests=tuple(self._warmup_requests().items()) if self.warmup_enabled else (),
+                              warmup_rounds=self.warmup_rounds, warmup_max_new_tokens=self.warmup_max_new_tokens,
+                              decoding=self.decoding)
+        pool = InferenceWorkerPool(config, self.workers, progress_callback=self.progress_callback)
+        pool.start(self.cancel_event)
+        # Only the tokenizer lives here, for fitting prompts into the context window
+        local_dir = GraniteModelLoader(self.model_path).resolve()
+        return pool, AutoTokenizer.from_pretrained(local_dir, local_files_only=True)
+
+    def _load_model_and_tokenizer(self):
+        """Load the Granite weights (called by the registry only on first use)"""
+        timings: Dict[str, float] = {}
+        weights = load_granite_weights(self.model_path, self.device, self.quantization, self.backend,
+                                       self.progress_callback, self.cancel_event, timings)
+        self.load_timings = timings
+        return weights
+
+    def release(self):
+        """Release this client's reference to the shared Granite weights"""
+        if self._handle_finalizer is not None:
+            self._handle_finalizer()
+        self._handle = None
+        self._handle_finalizer = None
+        self.initialized = False
+
     def create_session(self) -> Optional[str]:
         """Create a session (compatibility method - Granite doesn't need sessions)"""
         return "granite_session_local" if self.initialized else None
@@ -119,44 +658,372 @@ class GraniteClient:
             }
         }
 
-    def generate_financial_advice(self, prompt: str, user_type: str = "general") -> str:
-        """Generate personalized financial advice using Granite model"""
-        if not self.initialized:
-            return self._fallback_financial_advice(prompt, user_type)
-        
+    def _resolve_user_type(self, user_type: Union[str, Dict[str, Any], None]) -> str:
+        """Accept either a user type or a full user context dict"""
+        if isinstance(user_type, dict):
+            return user_type.get('user_type', 'general') or 'general'
+        return user_type or "general"
+
+    def _conversation_history(self, user_context: Union[str, Dict[str, Any], None]) -> List[Any]:
+        """Earlier (question, answer) turns passed in the user context, oldest first"""
+        if isinstance(user_context, dict):
+            return list(user_context.get('conversation_history') or [])
+        return []
+
+    def _build_prompt_parts(self, prompt: str, user_type: str) -> Tuple[str, str]:
+        """Split the prompt into the fixed system prefix and the per-request query"""
         # Create demographic-aware system prompt
         system_prompt = self._create_financial_system_prompt(user_type)
-        full_prompt = f"{system_prompt}\n\nUser Query: {prompt}\n\nFinancial Advice:"
+        return system_prompt, QUERY_TEMPLATE.format(query=prompt)
+
+    def _assemble_prompt(self, prompt: str, user_type: str, history: List[Any]) -> AssembledPrompt:
+        """Fit system prompt, recent history and query into the context window, leaving room for the answer"""
+        assembler = PromptAssembler.from_env(self.tokenizer, self.max_length, self.max_new_tokens)
+        return assembler.assemble(self._create_financial_system_prompt(user_type), prompt, history)
+
+    def _build_full_prompt(self, prompt: str, user_type: str) -> str:
+        """Create the complete prompt fed to the model"""
+        return "".join(self._build_prompt_parts(prompt, user_type))
+
+    def _scheduler(self) -> Optional[BatchingScheduler]:
+        """Batching scheduler shared by every client of the loaded weights"""
+        if not self.batching_enabled or self._handle is None or self.workers:
+            return None
+        device, max_length, max_new_tokens, decoding = self.device, self.max_length, self.max_new_tokens, self.decoding
+        prefix_cache = self._prefix_cache()
+        return self._handle.attachment(
+            "batching_scheduler",
+            lambda weights: BatchingScheduler.from_env(
+                functools.partial(generate_batch, weights, device, max_length,
+                                  prefix_cache=prefix_cache, max_new_tokens=max_new_tokens, decoding=decoding)
+            )
+        )
+
+    def _admission(self) -> AdmissionController:
+        """Bounded request queue shared by every client of the loaded weights"""
+        # As many requests as can actually make progress at once run; the rest queue
+        if self.workers:
+            concurrency = self.workers
+        elif self.batching_enabled:
+            concurrency = int(os.getenv("GRANITE_BATCH_MAX_SIZE", 4))
+        else:
+            concurrency = 1
+        return self._handle.attachment("admission_controller",
+                                       lambda weights: AdmissionController.from_env(concurrency))
+
+    def _prefix_cache(self) -> Optional[PrefixKVCache]:
+        """System prompt KV cache shared by every client of the loaded weights"""
+        if not self.prefix_cache_enabled or self._handle is None or self.workers:
+            return None
+        device = self.device
+        return self._handle.attachment("prefix_kv_cache", lambda weights: PrefixKVCache.from_env(weights, device))
+
+    def _speculative_decoder(self) -> Optional[SpeculativeDecoder]:
+        """Draft-model decoder shared by every client of the loaded weights"""
+        if not self.draft_model_path or self._handle is None or self.workers:
+            return None
+        draft_path, device = self.draft_model_path, self.device
+        return self._handle.attachment(
+            f"speculative_decoder:{draft_path}",
+            lambda weights: SpeculativeDecoder(weights, draft_path, device)
+        )
+
+    def _warmup_tracker(self) -> WarmupTracker:
+        """Warm-up state and first-request latency shared by every client of the loaded weights"""
+        rounds, max_new_tokens = self.warmup_rounds, self.warmup_max_new_tokens
+        return self._handle.attachment("warmup", lambda weights: WarmupTracker(rounds, max_new_tokens, weights))
+
+    def _warmup_requests(self) -> Dict[str, PromptRequest]:
+        """One representative prompt per user type, split like real requests"""
+        return {user_type: PromptRequest(*self._build_prompt_parts(question, user_type))
+                for user_type, question in WARMUP_PROMPTS.items()}
+
+    def _warm_up(self):
+        """Warm the in-process weights up, unless another client already did"""
+        if not self.warmup_enabled:
+            return
+        tracker = self._warmup_tracker()
+        if tracker.report is not None or tracker.error is not None:
+            return
+        if self.progress_callback is not None:
+            self.progress_callback("warming_up", 1.0)
+        requests = self._warmup_requests()
+        handle, device, max_length, decoding = self._handle, self.device, self.max_length, self.decoding
+        prefix_cache, speculative = self._prefix_cache(), self._speculative_decoder()
+
+        def generate(user_type: str):
+            generate_batch(handle.weights, device, max_length, [requests[user_type]], prefix_cache,
+                           tracker.max_new_tokens, speculative=speculative, decoding=decoding)
+
+        with handle.in_use():
+            tracker.run(handle.model, generate, list(requests), self.cancel_event)
+
+    def _output_cache(self) -> Optional[OutputCache]:
+        """Stored deterministic outputs shared by every client of the loaded weights"""
+        if (not self.decoding.deterministic or self._handle is None
+                or not os.getenv("GRANITE_OUTPUT_CACHE_DIR", "").strip()):
+            return None
+        model_path, settings = self.model_path, {
+            "model_path": self.model_path, "quantization": self.quantization, "backend": self.backend,
+            "decoding": self.decoding.mode, "seed": self.decoding.seed, "max_length": self.max_length,
+            "max_new_tokens": self.max_new_tokens, "min_new_tokens": MIN_NEW_TOKENS,
+            "repetition_penalty": REPETITION_PENALTY, **self.decoding.sampling_kwargs(),
+        }
+
+        def create(weights):
+            # Outputs are only comparable for the very same weights
+            loader = GraniteModelLoader(model_path, verify="off")
+            return OutputCache.from_env(dict(settings, revision=loader.fingerprint(loader.resolve())))
+
+        return self._handle.attachment("output_cache", create)
+
+    def _record_generation_stats(self, stats: Dict[str, Any]):
+        """Keep per-request stats for get_model_info() and report prefix cache savings"""
+        self.last_generation_stats = stats
+        self.total_tokens_saved += stats.get("tokens_saved", 0)
+        if stats.get("prefix_cache_hit"):
+            print(f"⚡ Reused cached system prompt ({stats['prefix_tokens']} tokens) - "
+                  f"saved {stats['prefill_saved_ms']:.0f}ms of prefill")
+
+    def _deadline(self, deadline_seconds: Optional[float]) -> Optional[float]:
+        """Absolute time.monotonic() deadline for a request starting now"""
+        if deadline_seconds is None:
+            deadline_seconds = self.deadline_seconds
+        return time.monotonic() + deadline_seconds if deadline_seconds else None
+
+    def generate_financial_advice(self, prompt: str, user_type: str = "general",
+                                  deadline_seconds: Optional[float] = None,
+                                  priority: str = "interactive") -> AdviceResponse:
+        """
+        Generate personalized financial advice using Granite model
+
+        Args:
+            user_type: User type, or the full user context; its
+                `conversation_history` turns are included as far as the
+                GRANITE_HISTORY_TOKEN_BUDGET allows
+            deadline_seconds: Stop decoding after this long and return the partial
+                answer (defaults to GRANITE_DEADLINE_SECONDS; 0/None = no limit)
+            priority: "interactive" (chat) or "background"; decides the queue order
+
+        Returns:
+            The cleaned advice; `.truncated` is True when the deadline cut it short
+
+        Raises:
+            AdmissionRejectedError: If the request queue is full or the wait for
+                the model ran out (callers answer with Granite Lite instead)
+        """
+        history = self._conversation_history(user_type)
+        user_type = self._resolve_user_type(user_type)
+        if not self.initialized:
+            return AdviceResponse(self._fallback_financial_advice(prompt, user_type))
+        
+        started = time.perf_counter()
+        deadline = self._deadline(deadline_seconds)
+        assembled = self._assemble_prompt(prompt, user_type, history)
+        request = PromptRequest(assembled.prefix, assembled.suffix, deadline=deadline)
+        admission = self._admission()
+        admission.acquire(priority)
         
         try:
-            # Tokenize input
-            inputs = self.tokenizer(full_prompt, return_tensors="pt").to(self.device)
-            
-            # Generate response
-            with torch.no_grad():
-                outputs = self.model.generate(
-                    **inputs,
-                    max_length=min(inputs.input_ids.shape[1] + 400, self.max_length),
-                    min_length=inputs.input_ids.shape[1] + 50,
-                    temperature=0.3,
-                    top_p=0.9,
-                    do_sample=True,
-                    pad_token_id=self.tokenizer.eos_token_id,
-                    repetition_penalty=1.1
-                )
-            
-            # Decode and extract new tokens only
-            full_response = self.tokenizer.decode(outputs[0], skip_special_tokens=True)
-            advice = full_response[len(full_prompt):].strip()
+            output_cache = self._output_cache()
+            cached = output_cache.get(request.prefix, request.suffix) if output_cache is not None else None
+            if cached is not None:
+                # Deterministic answer generated before: replay it
+                output = GenerationOutput(*cached)
+            else:
+                # Generate response, batched with other sessions' requests when possible;
+                # holding the weights keeps idle eviction away until the answer is in
+                with self._handle.in_use():
+                    # Worker processes and the batching scheduler both answer with a Future
+                    dispatcher = self._pool or self._scheduler()
+                    if dispatcher is not None:
+                        future = dispatcher.submit(request)
+                        timeout = None if deadline is None else max(0.0, deadline - time.monotonic()) + DEADLINE_GRACE_SECONDS
+                        try:
+                            output = future.result(timeout=timeout)
+                        except FutureTimeoutError:
+                            # Still queued behind other batches - nothing partial to return
+                            future.cancel()
+                            print("⏱️ Granite deadline expired before generation started")
+                            return AdviceResponse(self._fallback_financial_advice(prompt, user_type), truncated=True)
+                    else:
+                        output = generate_batch(
+                            self._handle.weights, self.device, self.max_length, [request], self._prefix_cache(),
+                            self.max_new_tokens, speculative=self._speculative_decoder(), decoding=self.decoding
+                        )[0]
+                if output_cache is not None:
+                    output_cache.put(request.prefix, request.suffix, *output)
+            self._record_generation_stats(dict(output.stats, new_tokens=output.new_tokens,
+                                               prompt_tokens=assembled.token_counts))
+            self._warmup_tracker().record_request(time.perf_counter() - started)
+            truncated = output.stats.get("truncated", False)
             
             # Clean up the response
-            advice = self._clean_response(advice)
+            advice = self._clean_response(output.text)
+            
+            if truncated:
+                print(f"⏱️ Granite deadline reached - returning partial answer ({output.new_tokens} tokens)")
+            return AdviceResponse(advice if advice else self._fallback_financial_advice(prompt, user_type), truncated)
             
-            return advice if advice else self._fallback_financial_advice(prompt, user_type)
+        except Exception as e:
+            print(f"Error generating advice with Granite: {e}")
+            return AdviceResponse(self._fallback_financial_advice(prompt, user_type))
+        finally:
+            admission.release()
+
+    def stream_financial_advice(self, prompt: str, user_type: str = "general",
+                                deadline_seconds: Optional[float] = None,
+                                priority: str = "interactive") -> Iterator[str]:
+        """
+        Generate financial advice as a stream of cleaned text chunks.
+        Chunks are yielded as soon as the model produces them; closing the
+        generator early stops generation, and so does the deadline. History and
+        admission work as in generate_financial_advice; AdmissionRejectedError is
+        raised from the first next() call.
+        """
+        history = self._conversation_history(user_type)
+        user_type = self._resolve_user_type(user_type)
+        if not self.initialized:
+            yield self._fallback_financial_advice(prompt, user_type)
+            return
+        
+        started = time.perf_counter()
+        assembled = self._assemble_prompt(prompt, user_type, history)
+        request = PromptRequest(assembled.prefix, assembled.suffix, deadline=self._deadline(deadline_seconds))
+        admission = self._admission()
+        admission.acquire(priority)
+        try:
+            output_cache = self._output_cache()
+            cached = output_cache.get(request.prefix, request.suffix) if output_cache is not None else None
+            if cached is not None:
+                output = GenerationOutput(*cached)
+                self._record_generation_stats(dict(output.stats, new_tokens=output.new_tokens,
+                                                   prompt_tokens=assembled.token_counts))
+                yield from self._clean_stream([output.text], lambda: None, prompt, user_type)
+            elif self._pool is not None:
+                yield from self._stream_from_pool(request, prompt, user_type, assembled.token_counts)
+            else:
+                yield from self._stream_in_process(request, prompt, user_type, assembled.token_counts)
+            self._warmup_tracker().record_request(time.perf_counter() - started)
+        finally:
+            admission.release()
+
+    def _submit_stream(self, request: PromptRequest) -> Future:
+        """Queue a streamed request with the batching scheduler, or generate it on a thread of its own"""
+        scheduler = self._scheduler()
+        if scheduler is not None:
+            return scheduler.submit(request)
+        
+        # Unbatched (deterministic decoding, draft model...): admission lets one run at a time
+        future: Future = Future()
+        future.set_running_or_notify_cancel()
+        handle, prefix_cache, speculative = self._handle, self._prefix_cache(), self._speculative_decoder()
+        
+        def deliver(index: int, output: GenerationOutput):
+            if not future.done():
+                future.set_result(output)
+        
+        def generate_worker():
+            try:
+                output = generate_batch(
+                    handle.weights, self.device, self.max_length, [request], prefix_cache, self.max_new_tokens,
+                    on_result=deliver, speculative=speculative, decoding=self.decoding
+                )[0]
+                deliver(0, output)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+        
+        threading.Thread(target=generate_worker, daemon=True).start()
+        return future
+
+    def _stream_in_process(self, request: PromptRequest, prompt: str, user_type: str,
+                           prompt_tokens: Dict[str, Any]) -> Iterator[str]:
+        """Stream an answer generated in this process, batched with other sessions' requests when possible"""
+        stop_event = threading.Event()
+        recorded = threading.Event()
+        generation_error: List[Exception] = []
+        streamer = TextIteratorStreamer(self.tokenizer, skip_prompt=True, skip_special_tokens=True)
+        request = request._replace(streamer=streamer, stop_event=stop_event)
+        output_cache = self._output_cache()
+        
+        def finished(future: Future):
+            # Runs as soon as this row is done (or failed), possibly before the rest of its batch
+            try:
+                output = future.result()
+                if output_cache is not None:
+                    output_cache.put(request.prefix, request.suffix, *output)
+                self._record_generation_stats(dict(output.stats, new_tokens=output.new_tokens,
+                                                   prompt_tokens=prompt_tokens))
+            except Exception as e:
+                generation_error.append(e)
+            finally:
+                recorded.set()
+                streamer.end()
+        
+        # Holding the weights keeps idle eviction away until the answer is in
+        with self._handle.in_use():
+            try:
+                future = self._submit_stream(request)
+            except Exception as e:
+                print(f"Error generating advice with Granite: {e}")
+                yield self._fallback_financial_advice(prompt, user_type)
+                return
+            future.add_done_callback(finished)
             
+            try:
+                yield from self._clean_stream(streamer, stop_event.set, prompt, user_type)
+                # The row ends within a step of stop_event; let it record its stats
+                recorded.wait(timeout=1.0)
+                if generation_error:
+                    print(f"Error generating advice with Granite: {generation_error[0]}")
+            finally:
+                # Also reached when the consumer stops iterating early
+                stop_event.set()
+
+    def _stream_from_pool(self, request: PromptRequest, prompt: str, user_type: str,
+                          prompt_tokens: Dict[str, Any]) -> Iterator[str]:
+        """Stream an answer generated by one of the worker processes"""
+        try:
+            stream: WorkerStream = self._pool.stream(request)
         except Exception as e:
             print(f"Error generating advice with Granite: {e}")
-            return self._fallback_financial_advice(prompt, user_type)
+            yield self._fallback_financial_advice(prompt, user_type)
+            return
+        
+        try:
+            yield from self._clean_stream(stream, stream.close, prompt, user_type)
+            # The worker hands back its stats within a step of being stopped
+            if stream.wait(timeout=1.0):
+                if stream.error:
+                    print(f"Error generating advice with Granite: {stream.error}")
+                elif stream.output is not None:
+                    self._record_generation_stats(dict(stream.output.stats, new_tokens=stream.output.new_tokens,
+                                                       prompt_tokens=prompt_tokens))
+                    output_cache = self._output_cache()
+                    if output_cache is not None:
+                        output_cache.put(request.prefix, request.suffix, *stream.output)
+        finally:
+            stream.close()
+
+    def _clean_stream(self, texts: Iterable[str], stop: Callable[[], None], prompt: str,
+                      user_type: str) -> Iterator[str]:
+        """Yield cleaned chunks of raw generated text, calling stop() once the answer is complete"""
+        cleaner = StreamingResponseCleaner()
+        for text in texts:
+            chunk = cleaner.feed(text)
+            if chunk:
+                yield chunk
+            if cleaner.stopped:
+                # Only cut generation short here: a stream that ran out ended on its own
+                stop()
+                break
+        
+        chunk = cleaner.finish()
+        if chunk:
+            yield chunk
+        if not cleaner.emitted:
+            yield self._fallback_financial_advice(prompt, user_type)
 
     def _create_financial_system_prompt(self, user_type: str) -> str:
         """Create system prompt based on user demographics"""
@@ -182,15 +1049,7 @@ class GraniteClient:
         response = response.strip()
         
         # Stop at common ending patterns
-        stop_patterns = [
-            "\n\nUser Query:",
-            "\n\nFinancial Advice:",
-            "\nUser:",
-            "\nAssistant:",
-            "\n---",
-        ]
-        
-        for pattern in stop_patterns:
+        for pattern in STOP_PATTERNS:
             if pattern in response:
                 response = response.split(pattern)[0]
         
@@ -202,7 +1061,7 @@ class GraniteClient:
             if line and (not cleaned_lines or line != cleaned_lines[-1]):
                 cleaned_lines.append(line)
         
-        return '\n'.join(cleaned_lines[:10])  # Limit to 10 lines for conciseness
+        return '\n'.join(cleaned_lines[:MAX_RESPONSE_LINES])
 
     def _fallback_financial_advice(self, prompt: str, user_type: str) -> str:
         """Provide fallback advice when Granite is unavailable"""
@@ -236,12 +1095,44 @@ class GraniteClient:
         """Delete session (compatibility method - no action needed for local model)"""
         pass
 
-    def get_response(self, user_input: str, user_type: str = "general") -> str:
+    def get_response(self, user_input: str, user_type: str = "general",
+                     deadline_seconds: Optional[float] = None, priority: str = "interactive") -> AdviceResponse:
         """
         Get response using Granite model (main interface method)
         """
         # For Granite, we primarily use the generative model
-        return self.generate_financial_advice(user_input, user_type)
+        return self.generate_financial_advice(user_input, user_type, deadline_seconds, priority)
+
+    def stream_response(self, user_input: str, user_type: str = "general",
+                        deadline_seconds: Optional[float] = None, priority: str = "interactive") -> Iterator[str]:
+        """
+        Stream a response using Granite model (streaming counterpart of get_response)
+        """
+        return self.stream_financial_advice(user_input, user_type, deadline_seconds, priority)
+
+    def _weights_info(self) -> Dict[str, Any]:
+        """Resident/evicted state of the shared weights and the memory they hold"""
+        if self._handle is None:
+            return {"state": "not_loaded", "memory_bytes": 0}
+        info = self._handle.get_stats()
+        model = self._handle.model
+        info["memory_bytes"] = model_memory_bytes(model) if model is not None else 0
+        # Set when the weights are mapped from GRANITE_SHARED_WEIGHTS_DIR rather than held privately
+        info["shared_file"] = getattr(model, "shared_weights_path", None)
+        return info
+
+    def health_check(self) -> bool:
+        """Cheap readiness check without generating: the weights are loaded and,
+        with GRANITE_WORKERS, at least one worker process is ready"""
+        if not self.initialized:
+            return False
+        pool = self._pool
+        return pool is None or pool.get_stats()["ready_workers"] > 0
+
+    def get_admission_stats(self) -> Optional[Dict[str, Any]]:
+        """Queue stats for status displays, without creating the queue or touching the weights"""
+        admission = self._handle.existing_attachment("admission_controller") if self._handle else None
+        return admission.get_stats() if admission else None
 
     def get_model_info(self) -> Dict[str, Any]:
         """Get information about the loaded model"""
@@ -249,7 +1140,23 @@ class GraniteClient:
             "model_name": "IBM Granite 3.3 2B Base",
             "model_path": self.model_path,
             "device": self.device,
+            "quantization": self.quantization,
+            "backend": self.backend,
             "initialized": self.initialized,
+            "shared_clients": self._handle.refcount if self._handle else 0,
+            "weights": self._weights_info(),
+            "load_timings": self.load_timings,
+            "batching": self._scheduler().get_metrics() if self._scheduler() else None,
+            "prefix_cache": self._prefix_cache().get_stats() if self._prefix_cache() else None,
+            "speculative": self._speculative_decoder().get_stats() if self._speculative_decoder() else None,
+            "workers": self._pool.get_stats() if self._pool else None,
+            "admission": self._admission().get_stats() if self._handle else None,
+            "warmup": self._warmup_tracker().get_stats() if self._handle else None,
+            "decoding": self.decoding._asdict(),
+            "output_cache": self._output_cache().get_stats() if self._output_cache() else None,
+            "last_generation": self.last_generation_stats,
+            "total_tokens_saved": self.total_tokens_saved,
+            "deadline_seconds": self.deadline_seconds,
             "capabilities": [
                 "Financial advice generation",
                 "Personalized responses by user type", 
@@ -1,6 +1,6 @@
 # -*- coding: utf-8 -*-
 import os
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterator, Optional
 
 class GraniteClientLite:
     """
@@ -227,8 +227,9 @@ class GraniteClientLite:
         """Delete session (compatibility method)"""
         pass
 
-    def get_response(self, user_input: str, user_context: Dict[str, Any] = None) -> str:
-        """Get response using enhanced rules with user context"""
+    def get_response(self, user_input: str, user_context: Dict[str, Any] = None,
+                     priority: str = "interactive") -> str:
+        """Get response using enhanced rules with user context (rule-based answers never queue, so priority is ignored)"""
         if user_context is None:
             user_context = {}
         
@@ -250,6 +251,15 @@ class GraniteClientLite:
         # Generate direct response based on user input and context
         return self._generate_dynamic_response(user_input, user_type, income, balance, spending, age)
 
+    def stream_response(self, user_input: str, user_context: Dict[str, Any] = None,
+                        priority: str = "interactive") -> Iterator[str]:
+        """Stream interface for parity with GraniteClient - rule-based answers arrive in one chunk"""
+        yield self.get_response(user_input, user_context)
+
+    def health_check(self) -> bool:
+        """Rule-based answers need no model, so the lite client is always healthy"""
+        return True
+
     def get_model_info(self) -> Dict[str, Any]:
         """Get information about the lite client"""
         return {
@@ -1,7 +1,10 @@
 # -*- coding: utf-8 -*-
 import os
+import threading
 from typing import Dict, Any, Optional
 
+from .background_loader import BackgroundLoader
+
 def create_granite_client(timeout_seconds: int = 30, prefer_lite: bool = False):
     """
     Smart factory function that chooses the best Granite client based on availability.
@@ -51,13 +54,81 @@ def create_granite_client(timeout_seconds: int = 30, prefer_lite: bool = False):
     return GraniteClientLite()
 
 
+def _load_full_client(model_path: Optional[str], progress_callback, cancel_event):
+    """Build the full GraniteClient for the background loader"""
+    from .granite_client import GraniteClient
+    return GraniteClient(timeout_seconds=None, model_path=model_path,
+                         progress_callback=progress_callback, cancel_event=cancel_event)
+
+
 class GraniteSmartClient:
     """
-    Smart wrapper that automatically chooses the best available Granite client
+    Smart wrapper that automatically chooses the best available Granite client.
+    
+    Unless Lite is preferred, the full model loads in the background while
+    Granite Lite answers; the full client is swapped in as soon as it is ready.
     """
     
-    def __init__(self, timeout_seconds: int = 30, prefer_lite: bool = False):
-        self.client = create_granite_client(timeout_seconds, prefer_lite)
+    def __init__(self, timeout_seconds: int = 30, prefer_lite: bool = False, model_path: Optional[str] = None):
+        """
+        Args:
+            timeout_seconds: How long to wait for the full model before answering with Lite
+            prefer_lite: If True, use lite version even if full model is available
+            model_path: Hugging Face repo id or local model directory for the full model
+        """
+        from .granite_client_lite import GraniteClientLite
+        self.client = GraniteClientLite() if prefer_lite else None
+        self.loader: Optional[BackgroundLoader] = None
+        self._swap_lock = threading.Lock()
+        if prefer_lite:
+            print("🔧 Using Granite Lite by preference")
+            return
+        
+        self.loader = BackgroundLoader(
+            lambda progress, cancel: _load_full_client(model_path, progress, cancel)
+        )
+        self.loader.start()
+        if self.loader.wait(timeout_seconds):
+            self.client = self.loader.client
+            print("✅ Full Granite AI client initialized successfully!")
+            return
+        
+        # Lite answers until the background load finishes
+        self.client = GraniteClientLite()
+        if self.loader.state == "loading":
+            print(f"⏳ Full Granite model still loading after {timeout_seconds}s - Lite answers until it is ready")
+        self.loader.add_ready_callback(self._swap_in)
+    
+    def _swap_in(self, client):
+        """Replace Lite with the freshly loaded full client"""
+        with self._swap_lock:
+            self.client = client
+        print("🔄 Full Granite model ready - switched from Lite")
+    
+    @property
+    def is_full_model_ready(self) -> bool:
+        """True once requests are answered by the full model"""
+        return self.loader is not None and self.loader.is_ready and self.client is self.loader.client
+    
+    def wait_until_ready(self, timeout: Optional[float] = None) -> bool:
+        """Block until the full client is swapped in (or the load ends without it)"""
+        if self.loader is None:
+            return False
+        return self.loader.wait(timeout) and self.is_full_model_ready
+    
+    def cancel_loading(self) -> bool:
+        """Stop the background load; Lite keeps answering"""
+        return self.loader.cancel() if self.loader else False
+    
+    def get_load_progress(self) -> Optional[Dict[str, Any]]:
+        """State, stage and fraction done of the background load (None if not loading)"""
+        return self.loader.get_progress() if self.loader else None
+    
+    def get_model_info(self) -> Dict[str, Any]:
+        """Info about the client currently answering, plus background load progress"""
+        info = self.client.get_model_info()
+        info["background_load"] = self.get_load_progress()
+        return info
     
     def __getattr__(self, name):
         """Delegate all method calls to the underlying client"""
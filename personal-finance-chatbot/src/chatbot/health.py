@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+Cached health probes for the AI backends.
+
+Checking a backend by generating an answer costs a Gemini request (and
+quota) or a full Granite generation, and the status page would pay that on
+every render. Each backend instead has a cheap health_check() (a Gemini
+token count, Granite's loaded/worker state), and a HealthProbe keeps its
+last result for HEALTH_PROBE_TTL_SECONDS.
+
+Reading a probe never waits: it returns the cached result straight away
+and, once that result is older than the TTL, starts one refresh in a
+background thread (stale-while-revalidate). Until the first check finishes
+the result is None (not known yet).
+"""
+
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+DEFAULT_TTL_SECONDS = 30.0
+
+
+class HealthProbe:
+    """Last result of a backend's health check, refreshed in the background"""
+
+    def __init__(self, name: str, check: Callable[[], bool], ttl_seconds: float = DEFAULT_TTL_SECONDS):
+        """
+        Args:
+            name: Backend name (used for the refresh thread)
+            check: Returns whether the backend is healthy; an exception counts as unhealthy
+            ttl_seconds: How long a result is used before it is refreshed
+        """
+        self.name = name
+        self.check = check
+        self.ttl_seconds = ttl_seconds
+        self.healthy: Optional[bool] = None
+        self.error: Optional[str] = None
+        self.checked_at: Optional[float] = None
+        self.latency_ms: Optional[float] = None
+        self.probes = 0
+        self.failures = 0
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, name: str, check: Callable[[], bool]) -> "HealthProbe":
+        """Build a probe with the TTL from HEALTH_PROBE_TTL_SECONDS"""
+        return cls(name, check, float(os.getenv("HEALTH_PROBE_TTL_SECONDS", DEFAULT_TTL_SECONDS)))
+
+    def is_stale(self, now: Optional[float] = None) -> bool:
+        """Whether there is no result yet or it is older than the TTL"""
+        now = time.monotonic() if now is None else now
+        return self.checked_at is None or now - self.checked_at >= self.ttl_seconds
+
+    def refresh(self, wait: bool = False, timeout: Optional[float] = None) -> bool:
+        """
+        Run the check in a background thread (unless one is already running).
+
+        Args:
+            wait: Block until the check has finished
+            timeout: Longest wait in seconds (None = until it finishes)
+
+        Returns:
+            True if this call started a check
+        """
+        with self._lock:
+            thread = self._thread
+            started = thread is None
+            if started:
+                thread = threading.Thread(target=self._probe, name=f"health-{self.name}", daemon=True)
+                self._thread = thread
+                thread.start()
+        if wait:
+            thread.join(timeout)
+        return started
+
+    def wait(self, timeout: Optional[float] = None):
+        """Block until the running check (if any) has finished"""
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def _probe(self):
+        start = time.perf_counter()
+        try:
+            healthy, error = bool(self.check()), None
+        except Exception as e:
+            healthy, error = False, str(e) or type(e).__name__
+        with self._lock:
+            self.healthy = healthy
+            self.error = error if error or healthy else "health check failed"
+            self.checked_at = time.monotonic()
+            self.latency_ms = (time.perf_counter() - start) * 1000
+            self.probes += 1
+            self.failures += not healthy
+            self._thread = None
+
+    def status(self) -> Dict[str, Any]:
+        """The cached result (never waits for a check); starts a refresh when it is stale"""
+        now = time.monotonic()
+        if self.is_stale(now):
+            self.refresh()
+        with self._lock:
+            return {
+                "healthy": self.healthy,
+                "error": self.error,
+                "age_seconds": max(0.0, now - self.checked_at) if self.checked_at is not None else None,
+                "latency_ms": self.latency_ms,
+                "refreshing": self._thread is not None,
+                "probes": self.probes,
+                "failures": self.failures,
+            }
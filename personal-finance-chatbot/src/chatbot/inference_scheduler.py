@@ -0,0 +1,189 @@
+# -*- coding: utf-8 -*-
+"""
+Dynamic request batching for local Granite inference.
+
+Concurrent chat sessions share one model. Instead of each session calling
+generate() on its own (and fighting over CPU threads), prompts are queued,
+collected for a short window and run through a single batched generate()
+call, with each result routed back to its caller.
+"""
+
+import functools
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+# (prompts, on_result=...) -> one result per prompt, in the same order. Each
+# result is a sequence whose second item is the number of new tokens
+# generated; callers get the whole result back from their Future. A batch
+# function may call on_result(index, result) as soon as one prompt is done,
+# so that caller does not wait for the longest answer in the batch.
+BatchGenerateFn = Callable[..., List[Sequence[Any]]]
+
+
+class SchedulerClosedError(RuntimeError):
+    """Raised for requests that cannot run because the scheduler was shut down"""
+
+
+class _PendingRequest:
+    def __init__(self, prompt: Any):
+        self.prompt = prompt
+        self.future: Future = Future()
+        self.enqueued_at = time.perf_counter()
+
+
+class BatchingScheduler:
+    """
+    Collects pending prompts for up to `max_wait_ms` (or until `max_batch_size`
+    prompts are waiting) and runs them as one batch on a worker thread.
+    """
+
+    def __init__(self, generate_batch: BatchGenerateFn, max_batch_size: int = 4,
+                 max_wait_ms: float = 25.0, metrics_window: int = 1000):
+        """
+        Args:
+            generate_batch: Function running one batched generation
+            max_batch_size: Largest number of prompts per generate() call
+            max_wait_ms: How long the first prompt of a batch waits for company
+            metrics_window: Number of recent requests kept for latency percentiles
+        """
+        self.generate_batch = generate_batch
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait_seconds = max(0.0, float(max_wait_ms)) / 1000.0
+
+        self._queue: "queue.Queue[Optional[_PendingRequest]]" = queue.Queue()
+        self._closed = False
+        self._metrics_lock = threading.Lock()
+        self._queue_times = deque(maxlen=metrics_window)
+        self._total_requests = 0
+        self._total_batches = 0
+        self._total_tokens = 0
+        self._busy_seconds = 0.0
+        self._largest_batch = 0
+        self._started_at = time.perf_counter()
+
+        self._worker = threading.Thread(target=self._run, name="granite-batcher", daemon=True)
+        self._worker.start()
+
+    @classmethod
+    def from_env(cls, generate_batch: BatchGenerateFn) -> "BatchingScheduler":
+        """Build a scheduler configured by GRANITE_BATCH_MAX_SIZE / GRANITE_BATCH_MAX_WAIT_MS"""
+        return cls(
+            generate_batch,
+            max_batch_size=int(os.getenv("GRANITE_BATCH_MAX_SIZE", 4)),
+            max_wait_ms=float(os.getenv("GRANITE_BATCH_MAX_WAIT_MS", 25)),
+        )
+
+    def submit(self, prompt: Any) -> Future:
+        """Queue a prompt and return a Future resolving to its generation result"""
+        if self._closed:
+            raise SchedulerClosedError("Inference scheduler has been shut down")
+        request = _PendingRequest(prompt)
+        self._queue.put(request)
+        return request.future
+
+    def generate(self, prompt: Any, timeout: Optional[float] = None) -> Sequence[Any]:
+        """Queue a prompt and wait for its generation result"""
+        return self.submit(prompt).result(timeout=timeout)
+
+    def _collect_batch(self, first: _PendingRequest) -> List[_PendingRequest]:
+        batch = [first]
+        deadline = first.enqueued_at + self.max_wait_seconds
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                request = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if request is None:
+                # Shutdown sentinel - finish this batch, then stop
+                self._queue.put(None)
+                break
+            batch.append(request)
+        return batch
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                break
+            batch = self._collect_batch(first)
+
+            started = time.perf_counter()
+            active = [request for request in batch if request.future.set_running_or_notify_cancel()]
+            if not active:
+                continue
+            deliver = functools.partial(self._deliver, active)
+            try:
+                results = self.generate_batch([request.prompt for request in active], on_result=deliver)
+                if len(results) != len(active):
+                    raise RuntimeError(f"Batch returned {len(results)} results for {len(active)} prompts")
+            except Exception as e:
+                for request in active:
+                    if not request.future.done():
+                        request.future.set_exception(e)
+                continue
+            finished = time.perf_counter()
+
+            for index, result in enumerate(results):
+                deliver(index, result)
+            self._record_batch(active, results, started, finished)
+
+        # Fail anything still waiting after shutdown
+        while True:
+            try:
+                request = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if request is not None and request.future.set_running_or_notify_cancel():
+                request.future.set_exception(SchedulerClosedError("Inference scheduler has been shut down"))
+
+    @staticmethod
+    def _deliver(active: List[_PendingRequest], index: int, result: Sequence[Any]):
+        """Resolve one caller's Future; results handed back early are not set twice"""
+        future = active[index].future
+        if not future.done():
+            future.set_result(result)
+
+    def _record_batch(self, batch: List[_PendingRequest], results: List[Sequence[Any]],
+                      started: float, finished: float):
+        with self._metrics_lock:
+            self._total_requests += len(batch)
+            self._total_batches += 1
+            self._total_tokens += sum(result[1] for result in results)
+            self._busy_seconds += finished - started
+            self._largest_batch = max(self._largest_batch, len(batch))
+            for request in batch:
+                self._queue_times.append(started - request.enqueued_at)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """Throughput and queueing statistics"""
+        with self._metrics_lock:
+            queue_times = sorted(self._queue_times)
+            elapsed = time.perf_counter() - self._started_at
+            return {
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait_seconds * 1000.0,
+                "pending_requests": self._queue.qsize(),
+                "total_requests": self._total_requests,
+                "total_batches": self._total_batches,
+                "avg_batch_size": self._total_requests / self._total_batches if self._total_batches else 0.0,
+                "largest_batch": self._largest_batch,
+                "avg_queue_ms": 1000.0 * sum(queue_times) / len(queue_times) if queue_times else 0.0,
+                "p95_queue_ms": 1000.0 * queue_times[int(0.95 * (len(queue_times) - 1))] if queue_times else 0.0,
+                "tokens_per_second": self._total_tokens / self._busy_seconds if self._busy_seconds else 0.0,
+                "requests_per_second": self._total_requests / elapsed if elapsed else 0.0,
+            }
+
+    def shutdown(self, wait: bool = False):
+        """Stop accepting prompts; prompts already queued are still answered"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        if wait and threading.current_thread() is not self._worker:
+            self._worker.join(timeout=5)
@@ -0,0 +1,304 @@
+# -*- coding: utf-8 -*-
+"""
+Offline-first loader for the Granite weights.
+
+Resolves the model from the local Hugging Face cache (or a local directory),
+checks every weight shard against a stored checksum manifest, downloads again
+only the shards that are missing or corrupt, and records how long each load
+stage took. Progress can be observed through a callback and the load can be
+cancelled between stages and shards.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+DEFAULT_MANIFEST_DIR = os.path.join(os.path.expanduser("~"), ".cache", "smartspends")
+WEIGHT_FILE_SUFFIXES = (".safetensors", ".bin")
+_SHA256_RE = re.compile(r"^[0-9a-f]{64}$")
+
+
+# (stage, fraction of the whole load completed)
+ProgressCallback = Callable[[str, float], None]
+
+
+class ModelLoadError(Exception):
+    """Raised when the model cannot be resolved or repaired locally"""
+
+
+class LoadCancelledError(ModelLoadError):
+    """Raised when a load is stopped through its cancel event"""
+
+
+def _sha256_file(path: str, chunk_size: int = 8 * 1024 * 1024) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class GraniteModelLoader:
+    """
+    Resolve, verify and load a causal LM without re-downloading what is
+    already on disk.
+
+    The manifest stores, per weight shard, the expected sha256 plus the size
+    and mtime at which the shard was last verified, so later loads only rehash
+    files that changed on disk (or every file with verify="full").
+    """
+
+    def __init__(self, model_path: str, manifest_dir: Optional[str] = None,
+                 verify: Optional[str] = None, progress_callback: Optional[ProgressCallback] = None,
+                 cancel_event: Optional[threading.Event] = None):
+        """
+        Args:
+            model_path: Hugging Face repo id or local model directory
+            manifest_dir: Where checksum manifests are stored
+            verify: "fast" (rehash only changed files), "full" or "off"
+            progress_callback: Called with (stage, fraction done) as the load advances
+            cancel_event: When set, the load stops at the next stage or shard boundary
+        """
+        self.model_path = model_path
+        self.manifest_dir = manifest_dir or os.getenv("GRANITE_MANIFEST_DIR", DEFAULT_MANIFEST_DIR)
+        self.verify = (verify or os.getenv("GRANITE_VERIFY_CHECKSUMS", "fast")).lower()
+        self.is_local_dir = os.path.isdir(model_path)
+        self.revision: Optional[str] = None
+        self.repaired_files: List[str] = []
+        self.timings: Dict[str, float] = {}
+        self.progress_callback = progress_callback
+        self.cancel_event = cancel_event
+
+    def _report(self, stage: str, fraction: float):
+        """Stop here if cancelled, otherwise tell the caller how far the load is"""
+        if self.cancel_event is not None and self.cancel_event.is_set():
+            raise LoadCancelledError(f"Loading {self.model_path} was cancelled")
+        if self.progress_callback is not None:
+            self.progress_callback(stage, fraction)
+
+    # ------------------------------------------------------------------
+    # Resolution
+    # ------------------------------------------------------------------
+    def resolve(self) -> str:
+        """
+        Find the model files locally (downloading only if nothing is cached),
+        then verify and repair the weight shards.
+
+        Returns:
+            Local directory containing the model files
+        """
+        start = time.perf_counter()
+        self._report("resolving", 0.0)
+        local_dir = self._resolve_snapshot()
+        self.timings["resolve"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        if self.verify != "off":
+            self._verify_and_repair(local_dir)
+        self.timings["verify"] = time.perf_counter() - start
+        return local_dir
+
+    def _resolve_snapshot(self) -> str:
+        if self.is_local_dir:
+            return self.model_path
+
+        from huggingface_hub import snapshot_download
+        try:
+            local_dir = snapshot_download(self.model_path, local_files_only=True)
+        except Exception:
+            print(f"📥 {self.model_path} not in local cache - downloading (~5GB, one-time)...")
+            local_dir = snapshot_download(self.model_path)
+
+        # Snapshot directories are named after the commit they were taken from
+        self.revision = os.path.basename(os.path.normpath(local_dir))
+        return local_dir
+
+    def _weight_files(self, local_dir: str) -> List[str]:
+        """Names of the weight shards the model needs"""
+        for index_name in ("model.safetensors.index.json", "pytorch_model.bin.index.json"):
+            index_path = os.path.join(local_dir, index_name)
+            if os.path.exists(index_path):
+                with open(index_path, "r", encoding="utf-8") as f:
+                    weight_map = json.load(f).get("weight_map", {})
+                return sorted(set(weight_map.values()))
+
+        return sorted(
+            name for name in os.listdir(local_dir)
+            if name.endswith(WEIGHT_FILE_SUFFIXES)
+        )
+
+    def fingerprint(self, local_dir: str) -> str:
+        """
+        Identifies the exact weights in local_dir: the snapshot commit for Hub
+        models, otherwise a hash of the path and every shard's size and mtime
+        (so edited local weights get a new fingerprint).
+        """
+        if self.revision:
+            return self.revision
+        digest = hashlib.sha1(os.path.abspath(local_dir).encode("utf-8"))
+        for name in self._weight_files(local_dir):
+            stat = os.stat(os.path.join(local_dir, name))
+            digest.update(f"{name}:{stat.st_size}:{stat.st_mtime_ns}".encode("utf-8"))
+        return digest.hexdigest()[:16]
+
+    # ------------------------------------------------------------------
+    # Manifest handling
+    # ------------------------------------------------------------------
+    def manifest_path(self) -> str:
+        name = re.sub(r"[^A-Za-z0-9_.-]+", "--", self.model_path.strip("/\\"))
+        return os.path.join(self.manifest_dir, f"{name}.manifest.json")
+
+    def _load_manifest(self) -> Dict[str, Any]:
+        try:
+            with open(self.manifest_path(), "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return {"revision": self.revision, "files": {}}
+
+        # A different snapshot means different shards - start over
+        if manifest.get("revision") != self.revision:
+            return {"revision": self.revision, "files": {}}
+        return manifest
+
+    def _save_manifest(self, manifest: Dict[str, Any]):
+        os.makedirs(self.manifest_dir, exist_ok=True)
+        tmp_path = self.manifest_path() + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path())
+
+    def _expected_sha256(self, path: str) -> Optional[str]:
+        """
+        Expected checksum for a shard that has no manifest entry yet.
+        LFS blobs in the Hugging Face cache are stored under their sha256,
+        so the blob name is an offline source of truth.
+        """
+        blob_name = os.path.basename(os.path.realpath(path))
+        return blob_name if _SHA256_RE.match(blob_name) else None
+
+    # ------------------------------------------------------------------
+    # Verification and repair
+    # ------------------------------------------------------------------
+    def _check_shard(self, path: str, record: Optional[Dict[str, Any]]) -> Tuple[bool, Optional[str]]:
+        """
+        Returns:
+            (is_valid, sha256 of the file if it had to be hashed)
+        """
+        if not os.path.exists(path):
+            return False, None
+
+        stat = os.stat(path)
+        if record and self.verify == "fast":
+            if record.get("size") == stat.st_size and record.get("mtime_ns") == stat.st_mtime_ns:
+                return True, record.get("sha256")
+
+        if record and record.get("size") not in (None, stat.st_size):
+            return False, None
+
+        actual = _sha256_file(path)
+        expected = record.get("sha256") if record else self._expected_sha256(path)
+        # With no recorded or blob-derived checksum, trust the file on first use
+        return (expected is None or actual == expected), actual
+
+    def _verify_and_repair(self, local_dir: str):
+        manifest = self._load_manifest()
+        records = manifest.setdefault("files", {})
+        changed = False
+
+        names = self._weight_files(local_dir)
+        for done, name in enumerate(names):
+            self._report("verifying", 0.05 + 0.25 * done / len(names))
+            path = os.path.join(local_dir, name)
+            record = records.get(name)
+            valid, sha256 = self._check_shard(path, record)
+
+            if not valid:
+                print(f"🔧 Shard {name} is missing or corrupt - downloading it again")
+                path = self._redownload(local_dir, name)
+                sha256 = _sha256_file(path)
+                expected = (record or {}).get("sha256") or self._expected_sha256(path)
+                if expected and sha256 != expected:
+                    raise ModelLoadError(f"Checksum mismatch for {name} after re-download")
+                self.repaired_files.append(name)
+
+            stat = os.stat(path)
+            new_record = {"sha256": sha256, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+            if record != new_record:
+                records[name] = new_record
+                changed = True
+
+        if changed:
+            self._save_manifest(manifest)
+
+    def _redownload(self, local_dir: str, filename: str) -> str:
+        if self.is_local_dir:
+            raise ModelLoadError(
+                f"Shard {filename} in {local_dir} is missing or corrupt and cannot be re-downloaded"
+            )
+
+        from huggingface_hub import hf_hub_download
+        return hf_hub_download(
+            self.model_path,
+            filename,
+            revision=self.revision,
+            force_download=True,
+        )
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+    def load(self, device: str, torch_dtype=None,
+             model_kwargs: Optional[Dict[str, Any]] = None) -> Tuple[Any, Any]:
+        """
+        Resolve the files and load tokenizer and model strictly from disk.
+
+        Args:
+            device: "cpu" or "cuda"
+            torch_dtype: Weight dtype (defaults to bf16 on CUDA, fp32 on CPU)
+            model_kwargs: Extra keyword arguments for from_pretrained
+
+        Returns:
+            (model, tokenizer) tuple
+        """
+        import torch
+        from transformers import AutoModelForCausalLM, AutoTokenizer
+
+        total_start = time.perf_counter()
+        local_dir = self.resolve()
+
+        start = time.perf_counter()
+        self._report("tokenizer", 0.3)
+        tokenizer = AutoTokenizer.from_pretrained(local_dir, local_files_only=True)
+        self.timings["tokenizer"] = time.perf_counter() - start
+
+        kwargs = {"low_cpu_mem_usage": True, "local_files_only": True}
+        if device == "cuda":
+            kwargs.update(device_map="auto", torch_dtype=torch_dtype or torch.bfloat16)
+        else:
+            kwargs.update(torch_dtype=torch_dtype or torch.float32)
+        kwargs.update(model_kwargs or {})
+
+        start = time.perf_counter()
+        self._report("weights", 0.35)
+        model = AutoModelForCausalLM.from_pretrained(local_dir, **kwargs)
+        self.timings["weights"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        self._report("device_move", 0.9)
+        if device != "cuda":
+            model = model.to(device)
+        model.eval()
+        self.timings["device_move"] = time.perf_counter() - start
+
+        self.timings["total"] = time.perf_counter() - total_start
+        self._report("loaded", 1.0)
+        return model, tokenizer
+
+    def format_timings(self) -> str:
+        """One-line summary of the load-time breakdown"""
+        order = ["resolve", "verify", "tokenizer", "export", "weights", "device_move", "compile", "total"]
+        return ", ".join(f"{stage}={self.timings[stage]:.2f}s" for stage in order if stage in self.timings)
@@ -0,0 +1,341 @@
+# -*- coding: utf-8 -*-
+"""
+Process-wide registry for locally loaded Granite weights.
+
+Streamlit keeps one DualAIClient per browser session, so every session builds
+its own GraniteClient. The clients take their model and tokenizer from this
+registry instead of loading them, which keeps a single refcounted copy of the
+weights per process no matter how many sessions are open.
+
+Entries acquired with an idle timeout have their model evicted after that
+long without use; the next request reloads it transparently.
+"""
+
+import contextlib
+import gc
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Iterator, Optional, Tuple
+
+
+class _RegistryEntry:
+    """One shared model/tokenizer pair and the number of clients using it"""
+
+    def __init__(self):
+        self.load_lock = threading.Lock()
+        self.model = None
+        self.tokenizer = None
+        self.refcount = 0
+        self.attachments: Dict[str, Any] = {}
+        self.attachment_lock = threading.RLock()  # Creation only; factories may be slow
+        # Idle eviction
+        self.reloader: Optional[Callable[[], Tuple[Any, Any]]] = None
+        self.idle_timeout: Optional[float] = None
+        self.last_used = time.monotonic()
+        self.active = 0
+        self.evictions = 0
+        self.reloads = 0
+        self.last_reload_seconds: Optional[float] = None
+
+    @property
+    def evicted(self) -> bool:
+        return self.model is None and self.reloader is not None
+
+    def weights(self) -> Tuple[Any, Any]:
+        """Current (model, tokenizer) pair, reloading an evicted model first"""
+        self.last_used = time.monotonic()
+        reloaded = False
+        if self.evicted:
+            with self.load_lock:
+                if self.evicted:
+                    start = time.perf_counter()
+                    self.model, self.tokenizer = self.reloader()
+                    self.last_reload_seconds = time.perf_counter() - start
+                    self.reloads += 1
+                    reloaded = True
+                    print(f"♻️ Reloaded evicted model weights in {self.last_reload_seconds:.1f}s")
+        weights = self.model, self.tokenizer
+        if reloaded:
+            # Outside load_lock: hooks may use the weights themselves (e.g. warm-up generations)
+            for attachment in list(self.attachments.values()):
+                on_reload = getattr(attachment, "on_reload", None)
+                if callable(on_reload):
+                    on_reload()
+        return weights
+
+    def stats(self) -> Dict[str, Any]:
+        if self.model is not None:
+            state = "resident"
+        else:
+            state = "evicted" if self.evicted else "not_loaded"
+        return {
+            "state": state,
+            "refcount": self.refcount,
+            "idle_timeout_seconds": self.idle_timeout,
+            "idle_seconds": time.monotonic() - self.last_used,
+            "evictions": self.evictions,
+            "reloads": self.reloads,
+            "last_reload_seconds": self.last_reload_seconds,
+        }
+
+
+class ModelHandle:
+    """
+    A client's reference to a shared model/tokenizer pair.
+    Call release() (or let the owning client be garbage collected) to give it back.
+    """
+
+    def __init__(self, registry: "ModelRegistry", key: Hashable, entry: _RegistryEntry):
+        self._registry = registry
+        self._entry = entry
+        self.key = key
+        self.released = False
+
+    @property
+    def model(self):
+        return None if self.released else self._entry.model
+
+    @property
+    def tokenizer(self):
+        return None if self.released else self._entry.tokenizer
+
+    def weights(self) -> Tuple[Any, Any]:
+        """Current (model, tokenizer) pair, reloading evicted weights if needed"""
+        if self.released:
+            return None, None
+        return self._entry.weights()
+
+    @contextlib.contextmanager
+    def in_use(self) -> Iterator[Tuple[Any, Any]]:
+        """Hold the weights for a generation: they are not evicted until it ends"""
+        with self._registry._lock:
+            self._entry.active += 1
+        try:
+            yield self.weights()
+        finally:
+            with self._registry._lock:
+                self._entry.active -= 1
+                self._entry.last_used = time.monotonic()
+
+    @property
+    def refcount(self) -> int:
+        return self._entry.refcount
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Resident/evicted state, idle time and reload counters"""
+        return self._entry.stats()
+
+    def attachment(self, name: str, factory: Callable[[Callable[[], Tuple[Any, Any]]], Any]) -> Any:
+        """
+        Get a per-model helper object shared by every client of these weights
+        (e.g. an inference scheduler), creating it on first use.
+
+        Args:
+            name: Attachment name
+            factory: Called once with a zero-argument function returning the
+                current (model, tokenizer) pair
+
+        Returns:
+            The shared attachment
+        """
+        return self._registry._attachment(self._entry, name, factory)
+
+    def existing_attachment(self, name: str) -> Optional[Any]:
+        """The attachment called `name` if some client has created it, else None (never creates one)"""
+        return self._registry._existing_attachment(self._entry, name)
+
+    def release(self):
+        """Return the weights to the registry (safe to call more than once)"""
+        if self.released:
+            return
+        self.released = True
+        self._registry._release(self.key, self._entry)
+
+
+class ModelRegistry:
+    """
+    Thread-safe, refcounted store of loaded models keyed by their load settings
+    (model path, device, dtype...). The first acquire() for a key runs the
+    loader; later ones reuse the result until the last handle is released.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Dict[Hashable, _RegistryEntry] = {}
+        self._reaper: Optional[threading.Thread] = None
+        self._reaper_wake = threading.Event()
+
+    def acquire(self, key: Hashable, loader: Callable[[], Tuple[Any, Any]],
+                idle_timeout: Optional[float] = None,
+                reloader: Optional[Callable[[], Tuple[Any, Any]]] = None) -> ModelHandle:
+        """
+        Get a handle on the model for `key`, loading it with `loader` if needed.
+
+        Args:
+            key: Hashable description of the load settings
+            loader: Callable returning a (model, tokenizer) tuple
+            idle_timeout: Evict the model after this many seconds without use
+                (None/0 keeps it resident)
+            reloader: Loads evicted weights again (defaults to `loader`); it is
+                kept for the life of the entry, so it must not hold on to the client
+
+        Returns:
+            ModelHandle sharing the loaded model and tokenizer
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = _RegistryEntry()
+                self._entries[key] = entry
+            entry.refcount += 1
+            if idle_timeout:
+                entry.idle_timeout = min(entry.idle_timeout or idle_timeout, idle_timeout)
+                entry.reloader = entry.reloader or reloader or loader
+                self._start_reaper()
+
+        # Load outside the registry lock so other keys are not blocked,
+        # while concurrent acquirers of the same key wait for a single load
+        try:
+            with entry.load_lock:
+                if entry.model is None:
+                    entry.model, entry.tokenizer = loader()
+        except Exception:
+            self._release(key, entry)
+            raise
+
+        return ModelHandle(self, key, entry)
+
+    def _attachment(self, entry: _RegistryEntry, name: str, factory) -> Any:
+        with self._lock:
+            attachment = entry.attachments.get(name)
+        if attachment is not None:
+            return attachment
+        # Factories may touch the disk or network, so they run outside the registry
+        # lock that every client's in_use() and release need; one runs at a time per model
+        with entry.attachment_lock:
+            with self._lock:
+                attachment = entry.attachments.get(name)
+            if attachment is None:
+                attachment = factory(entry.weights)
+                with self._lock:
+                    entry.attachments[name] = attachment
+            return attachment
+
+    def _existing_attachment(self, entry: _RegistryEntry, name: str) -> Optional[Any]:
+        with self._lock:
+            return entry.attachments.get(name)
+
+    def _release(self, key: Hashable, entry: _RegistryEntry):
+        with self._lock:
+            entry.refcount -= 1
+            if entry.refcount > 0:
+                return
+            if self._entries.get(key) is entry:
+                del self._entries[key]
+
+        # Last user gone - stop helpers and drop our references so the weights can be freed
+        entry.reloader = None
+        for attachment in entry.attachments.values():
+            shutdown = getattr(attachment, "shutdown", None)
+            if callable(shutdown):
+                shutdown()
+        entry.attachments = {}
+        entry.model = None
+        entry.tokenizer = None
+
+    def evict(self, key: Hashable) -> bool:
+        """
+        Unload the model for `key` now; the next use reloads it.
+
+        Returns:
+            True if a resident model was evicted
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.reloader is None or entry.active > 0:
+                return False
+        with entry.load_lock:
+            # A generation may have started since the check above: look again,
+            # and clear the weights under the same lock in_use() counts with
+            with self._lock:
+                if entry.model is None or entry.active > 0:
+                    return False
+                entry.model = None
+                entry.evictions += 1
+            for attachment in list(entry.attachments.values()):
+                on_evict = getattr(attachment, "on_evict", None)
+                if callable(on_evict):
+                    on_evict()
+        gc.collect()
+        return True
+
+    def evict_idle(self) -> int:
+        """
+        Evict every model unused for longer than its idle timeout.
+
+        Returns:
+            Number of models evicted
+        """
+        now = time.monotonic()
+        with self._lock:
+            idle = [
+                key for key, entry in self._entries.items()
+                if entry.idle_timeout and entry.model is not None and entry.active == 0
+                and now - entry.last_used >= entry.idle_timeout
+            ]
+        evicted = 0
+        for key in idle:
+            if self.evict(key):
+                evicted += 1
+                print(f"💤 Evicted idle model {key[0] if isinstance(key, tuple) else key}")
+        return evicted
+
+    def _start_reaper(self):
+        # Called with self._lock held; wakes a running reaper to pick up new timeouts
+        if self._reaper is None:
+            self._reaper = threading.Thread(target=self._reap, name="model-idle-reaper", daemon=True)
+            self._reaper.start()
+        self._reaper_wake.set()
+
+    def _reap(self):
+        while True:
+            with self._lock:
+                timeouts = [entry.idle_timeout for entry in self._entries.values() if entry.idle_timeout]
+            # Check often enough to evict within ~25% of the shortest timeout
+            self._reaper_wake.wait(min(60.0, max(0.05, min(timeouts) / 4)) if timeouts else 60.0)
+            self._reaper_wake.clear()
+            self.evict_idle()
+
+    def get_refcount(self, key: Hashable) -> int:
+        """Number of live handles for `key` (0 if not loaded)"""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry.refcount if entry else 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Summary of the models currently held by the registry"""
+        with self._lock:
+            return {
+                "loaded_models": len(self._entries),
+                "models": [
+                    {
+                        "key": key,
+                        "loaded": entry.model is not None,
+                        **entry.stats(),
+                    }
+                    for key, entry in self._entries.items()
+                ],
+            }
+
+
+_registry: Optional[ModelRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_model_registry() -> ModelRegistry:
+    """Get the process-wide model registry"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ModelRegistry()
+        return _registry
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""
+Reusable KV-cache prefixes for the fixed Granite system prompts.
+
+Every request starts with one of a handful of system prompts (one per user
+type). Their past key/values are computed once, kept in a small LRU cache and
+copied into each generate() call, so prefill only has to cover the
+"User Query: ..." part of the prompt.
+"""
+
+import copy
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Tuple
+
+import torch
+
+
+class _PrefixEntry:
+    def __init__(self, input_ids, past_key_values, prefill_seconds: float):
+        self.input_ids = input_ids
+        self.past_key_values = past_key_values
+        self.prefill_seconds = prefill_seconds
+
+
+class PrefixKVCache:
+    """
+    Bounded LRU cache of prompt-prefix key/values for one model.
+    Shared by every client of the same weights (see ModelHandle.attachment).
+    """
+
+    def __init__(self, weights: Callable[[], Tuple[Any, Any]], device: str, max_entries: int = 8):
+        """
+        Args:
+            weights: Returns the current (model, tokenizer) pair
+            device: Device the model runs on
+            max_entries: Number of prefixes kept before the least recently used is dropped
+        """
+        self.weights = weights
+        self.device = device
+        self.max_entries = max(1, int(max_entries))
+        self._entries: "OrderedDict[str, _PrefixEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.total_prefill_saved = 0.0
+
+    @classmethod
+    def from_env(cls, weights: Callable[[], Tuple[Any, Any]], device: str) -> "PrefixKVCache":
+        """Build a cache sized by GRANITE_PREFIX_CACHE_SIZE"""
+        return cls(weights, device, max_entries=int(os.getenv("GRANITE_PREFIX_CACHE_SIZE", 8)))
+
+    def _compute(self, prefix: str) -> _PrefixEntry:
+        model, tokenizer = self.weights()
+        input_ids = tokenizer(prefix, return_tensors="pt").input_ids.to(self.device)
+        start = time.perf_counter()
+        with torch.no_grad():
+            outputs = model(input_ids=input_ids, use_cache=True)
+        return _PrefixEntry(input_ids, outputs.past_key_values, time.perf_counter() - start)
+
+    def _get_entry(self, prefix: str) -> Tuple[_PrefixEntry, bool]:
+        with self._lock:
+            entry = self._entries.get(prefix)
+            if entry is not None:
+                self._entries.move_to_end(prefix)
+                self.hits += 1
+                self.total_prefill_saved += entry.prefill_seconds
+                return entry, True
+
+            # Computed under the lock: only a few distinct prefixes ever exist,
+            # and this keeps concurrent first requests from doing the work twice
+            entry = self._compute(prefix)
+            self.misses += 1
+            self._entries[prefix] = entry
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+            return entry, False
+
+    def build_inputs(self, prefix: str, suffix: str) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """
+        Build generate() inputs for prefix + suffix that reuse the cached prefix.
+
+        Returns:
+            (generate keyword arguments, per-request stats)
+        """
+        entry, hit = self._get_entry(prefix)
+        _, tokenizer = self.weights()
+        suffix_ids = tokenizer(suffix, return_tensors="pt", add_special_tokens=False).input_ids.to(self.device)
+        input_ids = torch.cat([entry.input_ids, suffix_ids], dim=1)
+
+        inputs = {
+            "input_ids": input_ids,
+            "attention_mask": torch.ones_like(input_ids),
+            # generate() extends the cache in place, so each request gets its own copy
+            "past_key_values": copy.deepcopy(entry.past_key_values),
+        }
+        stats = {
+            "prefix_cache_hit": hit,
+            "prefix_tokens": entry.input_ids.shape[1],
+            "prefill_tokens": suffix_ids.shape[1],
+            "prefill_saved_ms": entry.prefill_seconds * 1000.0 if hit else 0.0,
+        }
+        return inputs, stats
+
+    def clear(self):
+        """Drop all cached prefixes"""
+        with self._lock:
+            self._entries.clear()
+
+    def on_evict(self):
+        """Called by the registry when the model is evicted for being idle"""
+        self.clear()
+
+    def shutdown(self):
+        """Called by the registry when the weights are released"""
+        self.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Hit rate and total prefill time saved"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "total_prefill_saved_ms": self.total_prefill_saved * 1000.0,
+            }
@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""
+Token-budgeted prompt assembly for Granite.
+
+The context window holds the system prompt, earlier turns of the
+conversation, the new question and the answer. The answer's share
+(max_new_tokens) is reserved first; the system prompt and question always go
+in (the question is cut short if it alone would eat into the answer), and the
+most recent conversation turns fill whatever is left of the history budget.
+
+The system prompt stays the whole prefix, so its cached key/values (see
+prefix_cache.py) are reused whatever history comes after it.
+"""
+
+import os
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+QUERY_TEMPLATE = "\n\nUser Query: {query}\n\nFinancial Advice:"
+# Earlier turns use the same format, so a model that starts a new turn hits a stop pattern
+TURN_TEMPLATE = "\n\nUser Query: {question}\n\nFinancial Advice: {answer}"
+DEFAULT_HISTORY_TOKEN_BUDGET = 512
+
+# (question, answer) tuples as kept by the chat page, or dicts with those keys
+HistoryTurn = Union[Sequence[str], Dict[str, str]]
+
+
+class AssembledPrompt(NamedTuple):
+    """Prompt split for the prefix cache, plus the tokens spent on each section"""
+    prefix: str
+    suffix: str
+    token_counts: Dict[str, Any]
+
+
+def _turn_parts(turn: HistoryTurn) -> Optional[Tuple[str, str]]:
+    """(question, answer) of one history turn, or None if it is not usable"""
+    if isinstance(turn, dict):
+        question, answer = turn.get("question"), turn.get("answer")
+    elif isinstance(turn, (list, tuple)) and len(turn) >= 2:
+        question, answer = turn[0], turn[1]
+    else:
+        return None
+    if not question or not answer:
+        return None
+    return str(question).strip(), str(answer).strip()
+
+
+class PromptAssembler:
+    """Builds prompts that always leave room for the answer"""
+
+    def __init__(self, tokenizer, max_length: int = 2048, answer_tokens: int = 400,
+                 history_budget: int = DEFAULT_HISTORY_TOKEN_BUDGET):
+        """
+        Args:
+            tokenizer: The loaded Granite tokenizer (used for counting)
+            max_length: Context window for prompt + answer
+            answer_tokens: Tokens reserved for the answer
+            history_budget: Most tokens spent on earlier conversation turns
+        """
+        self.tokenizer = tokenizer
+        self.max_length = max_length
+        self.answer_tokens = min(answer_tokens, max_length - 1)
+        self.history_budget = max(0, history_budget)
+
+    @classmethod
+    def from_env(cls, tokenizer, max_length: int, answer_tokens: int) -> "PromptAssembler":
+        """Build an assembler whose history budget is GRANITE_HISTORY_TOKEN_BUDGET"""
+        return cls(tokenizer, max_length, answer_tokens,
+                   history_budget=int(os.getenv("GRANITE_HISTORY_TOKEN_BUDGET", DEFAULT_HISTORY_TOKEN_BUDGET)))
+
+    def count(self, text: str) -> int:
+        """Number of tokens in text"""
+        return len(self._ids(text))
+
+    def _ids(self, text: str) -> List[int]:
+        return self.tokenizer(text, add_special_tokens=False)["input_ids"]
+
+    def _truncate_query(self, query: str, max_tokens: int) -> str:
+        """Keep the start of the question within max_tokens"""
+        ids = self._ids(query)[:max(0, max_tokens)]
+        return self.tokenizer.decode(ids, skip_special_tokens=True).rstrip() if ids else ""
+
+    def assemble(self, system_prompt: str, query: str,
+                 history: Optional[Iterable[HistoryTurn]] = None) -> AssembledPrompt:
+        """
+        Fit the system prompt, recent history and query into the prompt budget.
+
+        Args:
+            system_prompt: Fixed instructions (becomes the cacheable prefix)
+            query: The user's new question
+            history: Earlier turns, oldest first
+
+        Returns:
+            AssembledPrompt whose token_counts has the tokens used by the
+            "system", "history" and "query" sections, the "prompt" total, the
+            "answer_reserved" tokens and how many history turns were kept or dropped
+        """
+        prompt_budget = self.max_length - self.answer_tokens
+        system_tokens = self.count(system_prompt)
+        query_text = QUERY_TEMPLATE.format(query=query)
+        query_tokens = self.count(query_text)
+
+        query_truncated = False
+        overflow = system_tokens + query_tokens - prompt_budget
+        if overflow > 0:
+            # The answer's reservation wins over the end of an over-long question
+            query = self._truncate_query(query, self.count(query) - overflow)
+            query_text = QUERY_TEMPLATE.format(query=query)
+            query_tokens = self.count(query_text)
+            query_truncated = True
+
+        turns = [parts for parts in (_turn_parts(turn) for turn in (history or [])) if parts]
+        room = min(self.history_budget, max(0, prompt_budget - system_tokens - query_tokens))
+        kept: List[str] = []
+        history_tokens = 0
+        # Newest turns first; stop at the first one that does not fit so the kept turns stay contiguous
+        for question, answer in reversed(turns):
+            text = TURN_TEMPLATE.format(question=question, answer=answer)
+            tokens = self.count(text)
+            if history_tokens + tokens > room:
+                break
+            kept.insert(0, text)
+            history_tokens += tokens
+
+        # Section counts can differ slightly from the joined prompt at the seams
+        total = self.count(system_prompt + "".join(kept) + query_text)
+        while kept and total > prompt_budget:
+            history_tokens -= self.count(kept.pop(0))
+            total = self.count(system_prompt + "".join(kept) + query_text)
+
+        return AssembledPrompt(system_prompt, "".join(kept) + query_text, {
+            "system": system_tokens,
+            "history": history_tokens,
+            "query": query_tokens,
+            "prompt": total,
+            "answer_reserved": self.answer_tokens,
+            "context_window": self.max_length,
+            "history_turns": len(kept),
+            "history_turns_dropped": len(turns) - len(kept),
+            "query_truncated": query_truncated,
+        })
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""
+Opt-in reduced-precision CPU inference for Granite.
+
+Selected with GRANITE_QUANTIZATION:
+- "none" (default): float32 weights, as before
+- "int8": dynamic int8 quantization of every nn.Linear (weights stored as
+  int8, activations quantized on the fly)
+- "bf16": bfloat16 weights when the CPU has native bf16 support
+  (AVX512-BF16 / AMX), otherwise float32
+- "auto": bf16 where supported, int8 elsewhere
+
+Only applies on CPU; CUDA keeps its bf16 load path.
+"""
+
+import os
+import warnings
+from typing import Optional
+
+import torch
+
+QUANTIZATION_MODES = ("none", "int8", "bf16", "auto")
+
+
+def cpu_supports_bf16() -> bool:
+    """True when the CPU can run bfloat16 matmuls natively"""
+    try:
+        with open("/proc/cpuinfo", "r", encoding="utf-8") as f:
+            flags = f.read()
+        return "avx512_bf16" in flags or "amx_bf16" in flags
+    except OSError:
+        # No /proc (macOS/Windows) - Apple silicon has native bf16
+        try:
+            return torch.backends.mps.is_available()
+        except AttributeError:
+            return False
+
+
+def resolve_quantization_mode(mode: Optional[str] = None, device: str = "cpu") -> str:
+    """
+    Turn the requested mode into the one that will actually be used.
+
+    Returns:
+        "none", "int8" or "bf16"
+    """
+    mode = (mode or os.getenv("GRANITE_QUANTIZATION", "none")).strip().lower()
+    if mode not in QUANTIZATION_MODES:
+        print(f"⚠️ Unknown GRANITE_QUANTIZATION '{mode}' - using full precision")
+        return "none"
+    if device != "cpu" or mode == "none":
+        return "none"
+
+    if mode == "auto":
+        return "bf16" if cpu_supports_bf16() else "int8"
+    if mode == "bf16" and not cpu_supports_bf16():
+        print("⚠️ This CPU has no native bf16 support - using float32 instead")
+        return "none"
+    return mode
+
+
+def load_dtype(mode: str) -> torch.dtype:
+    """Dtype the weights should be loaded in for a resolved mode"""
+    return torch.bfloat16 if mode == "bf16" else torch.float32
+
+
+def apply_quantization(model, mode: str):
+    """
+    Post-load conversion for a resolved mode (int8 needs float32 weights in).
+
+    Returns:
+        The model to use for inference
+    """
+    if mode != "int8":
+        return model
+
+    with warnings.catch_warnings():
+        # torch marks the eager quantization API as deprecated but it remains
+        # the only dependency-free int8 path for CPU inference
+        warnings.simplefilter("ignore")
+        from torch.ao.quantization import quantize_dynamic
+        return quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+
+
+def model_memory_bytes(model) -> int:
+    """Bytes held by parameters, buffers and packed int8 weights"""
+    if not isinstance(model, torch.nn.Module):
+        # e.g. an ONNX Runtime session - its memory is not visible from here
+        return 0
+    total = sum(t.numel() * t.element_size() for t in model.parameters())
+    total += sum(t.numel() * t.element_size() for t in model.buffers())
+    for module in model.modules():
+        packed = getattr(module, "_packed_params", None)
+        if packed is not None and hasattr(packed, "_weight_bias"):
+            weight, bias = packed._weight_bias()
+            total += weight.numel() * weight.element_size()
+            if bias is not None:
+                total += bias.numel() * bias.element_size()
+    return total
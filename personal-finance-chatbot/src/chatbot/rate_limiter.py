@@ -0,0 +1,303 @@
+# -*- coding: utf-8 -*-
+"""
+Client-side rate limiting for the Gemini API.
+
+Gemini enforces requests-per-minute and tokens-per-minute quotas and answers
+429 once they are used up; without limiting, every later request still goes
+out and fails the same way. Two token buckets (GEMINI_RPM and GEMINI_TPM)
+hold requests back until the quota allows them, in a first come, first
+served queue so a large request is not starved by smaller ones.
+
+A request whose estimated wait in that queue is longer than
+GEMINI_MAX_QUEUE_WAIT_SECONDS is turned away with GeminiBusyError straight
+away, so the caller can fail over to Granite rather than keep the user
+waiting. A 429 from the API pauses the queue for the backoff delay, so the
+requests behind it wait (or fail over) instead of hitting the quota again.
+
+Token use is estimated before a request (prompt characters / 4 plus the
+answer's token budget) and corrected with the real usage afterwards; attempts
+that fail (a 429 or 5xx before a retry, a timeout, a cancellation) are refunded.
+"""
+
+import asyncio
+import collections
+import os
+import random
+import threading
+import time
+from typing import Any, Dict, Optional
+
+DEFAULT_REQUESTS_PER_MINUTE = 15
+DEFAULT_TOKENS_PER_MINUTE = 1_000_000
+DEFAULT_MAX_QUEUE_WAIT_SECONDS = 5.0
+DEFAULT_MAX_RETRIES = 2
+DEFAULT_BACKOFF_BASE_SECONDS = 1.0
+MAX_BACKOFF_SECONDS = 30.0
+
+CHARS_PER_TOKEN = 4
+
+
+class GeminiBusyError(RuntimeError):
+    """Raised when a Gemini request would wait too long (or the quota is used up)"""
+
+    def __init__(self, reason: str, message: str, estimated_wait: Optional[float] = None):
+        super().__init__(message)
+        self.reason = reason
+        self.estimated_wait = estimated_wait
+
+
+def estimate_tokens(prompt: str, max_output_tokens: int) -> int:
+    """Tokens a request may use against the per-minute quota: its prompt plus the whole answer budget"""
+    return len(prompt) // CHARS_PER_TOKEN + 1 + max_output_tokens
+
+
+def retry_kind(error: BaseException) -> Optional[str]:
+    """
+    Whether a failed request is worth retrying.
+
+    Returns:
+        "quota" for 429, "server" for 5xx errors, None for errors a retry will not fix
+    """
+    code = getattr(error, "code", None)
+    code = code if isinstance(code, int) else None
+    message = str(error).lower()
+    if code == 429 or "429" in message or "resource exhausted" in message or "quota" in message:
+        return "quota"
+    if (code is not None and 500 <= code < 600) or any(
+            f"{status} " in message for status in (500, 502, 503, 504)):
+        return "server"
+    return None
+
+
+def backoff_delay(attempt: int, base: float = DEFAULT_BACKOFF_BASE_SECONDS) -> float:
+    """Exponential backoff with jitter: between half and all of base * 2**attempt (capped)"""
+    ceiling = min(MAX_BACKOFF_SECONDS, base * 2 ** attempt)
+    return ceiling / 2 + random.uniform(0, ceiling / 2)
+
+
+class TokenBucket:
+    """Refills at `per_minute` units a minute, up to a minute's worth"""
+
+    def __init__(self, per_minute: float):
+        self.per_minute = per_minute
+        self.rate = per_minute / 60.0
+        self.capacity = float(per_minute)
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def level_at(self, now: float) -> float:
+        """Units available at `now` (without spending any)"""
+        return min(self.capacity, self.level + (now - self.updated) * self.rate)
+
+    def _refill(self, now: float):
+        self.level = self.level_at(now)
+        self.updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until `amount` units are available"""
+        return max(0.0, (amount - self.level_at(now)) / self.rate)
+
+    def take(self, amount: float, now: float):
+        """Spend units (the level may go below zero for a request bigger than the bucket)"""
+        self._refill(now)
+        self.level -= amount
+
+    def give_back(self, amount: float, now: float):
+        """Return units that were reserved but not used (negative to charge more)"""
+        self._refill(now)
+        self.level = min(self.capacity, self.level + amount)
+
+
+class GeminiRateLimiter:
+    """
+    Queues Gemini requests until the request and token quotas allow them.
+    Only used from the background event loop (see async_loop.py).
+    """
+
+    def __init__(self, requests_per_minute: float = DEFAULT_REQUESTS_PER_MINUTE,
+                 tokens_per_minute: float = DEFAULT_TOKENS_PER_MINUTE,
+                 max_queue_wait: float = DEFAULT_MAX_QUEUE_WAIT_SECONDS,
+                 max_retries: int = DEFAULT_MAX_RETRIES,
+                 backoff_base: float = DEFAULT_BACKOFF_BASE_SECONDS):
+        """
+        Args:
+            requests_per_minute: Request quota (0 = unlimited)
+            tokens_per_minute: Token quota (0 = unlimited)
+            max_queue_wait: Longest estimated wait before a request is turned away (0 = no limit)
+            max_retries: Retries of a request that failed with 429 or 5xx
+            backoff_base: First retry delay in seconds (doubles per retry, with jitter)
+        """
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute > 0 else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute > 0 else None
+        self.max_queue_wait = max_queue_wait
+        self.max_retries = max(0, max_retries)
+        self.backoff_base = backoff_base
+        self.paused_until = 0.0
+        self._queue: "collections.OrderedDict[object, int]" = collections.OrderedDict()
+        self._queued_tokens = 0
+        self._turn = asyncio.Event()
+        self._lock = threading.Lock()
+        self.admitted = 0
+        self.rejected = 0
+        self.waited_seconds = 0.0
+        self.max_waited_seconds = 0.0
+        self.retries = 0
+        self.quota_errors = 0
+        self.server_errors = 0
+
+    @classmethod
+    def from_env(cls) -> "GeminiRateLimiter":
+        """Build a limiter from GEMINI_RPM, GEMINI_TPM, GEMINI_MAX_QUEUE_WAIT_SECONDS,
+        GEMINI_MAX_RETRIES and GEMINI_BACKOFF_BASE_SECONDS"""
+        return cls(
+            requests_per_minute=float(os.getenv("GEMINI_RPM", DEFAULT_REQUESTS_PER_MINUTE)),
+            tokens_per_minute=float(os.getenv("GEMINI_TPM", DEFAULT_TOKENS_PER_MINUTE)),
+            max_queue_wait=float(os.getenv("GEMINI_MAX_QUEUE_WAIT_SECONDS", DEFAULT_MAX_QUEUE_WAIT_SECONDS)),
+            max_retries=int(os.getenv("GEMINI_MAX_RETRIES", DEFAULT_MAX_RETRIES)),
+            backoff_base=float(os.getenv("GEMINI_BACKOFF_BASE_SECONDS", DEFAULT_BACKOFF_BASE_SECONDS)),
+        )
+
+    def estimate_wait(self, tokens: int, now: Optional[float] = None) -> float:
+        """Seconds a request arriving now would wait, behind every request already queued"""
+        now = time.monotonic() if now is None else now
+        wait = max(0.0, self.paused_until - now)
+        if self.requests is not None:
+            wait = max(wait, self.requests.wait_time(len(self._queue) + 1, now))
+        if self.tokens is not None:
+            wait = max(wait, self.tokens.wait_time(self._queued_tokens + min(tokens, self.tokens.capacity), now))
+        return wait
+
+    def _head_wait(self, tokens: int, now: float) -> float:
+        """Seconds until the request at the head of the queue may go"""
+        wait = max(0.0, self.paused_until - now)
+        if self.requests is not None:
+            wait = max(wait, self.requests.wait_time(1, now))
+        if self.tokens is not None:
+            # A request bigger than the whole bucket goes once it is full, then leaves it in debt
+            wait = max(wait, self.tokens.wait_time(min(tokens, self.tokens.capacity), now))
+        return wait
+
+    def _next_turn(self):
+        self._turn.set()
+        self._turn = asyncio.Event()
+
+    async def acquire(self, tokens: int) -> float:
+        """
+        Wait until this request may be sent, then charge it to the quotas.
+
+        Args:
+            tokens: Estimated tokens the request uses (see estimate_tokens)
+
+        Returns:
+            Seconds spent waiting
+
+        Raises:
+            GeminiBusyError: If the estimated wait is over max_queue_wait
+        """
+        start = time.monotonic()
+        estimate = self.estimate_wait(tokens, start)
+        if self.max_queue_wait and estimate > self.max_queue_wait:
+            with self._lock:
+                self.rejected += 1
+            raise GeminiBusyError("queue_wait", f"Gemini quota queue wait is ~{estimate:.1f}s "
+                                                f"(limit {self.max_queue_wait:.0f}s)", estimate)
+
+        ticket = object()
+        self._queue[ticket] = tokens
+        self._queued_tokens += tokens
+        try:
+            while True:
+                now = time.monotonic()
+                if next(iter(self._queue)) is ticket:
+                    wait = self._head_wait(tokens, now)
+                    if wait <= 0:
+                        break
+                    turn = self._turn
+                    try:
+                        # Woken early if a 429 pauses the queue meanwhile; the wait is then recomputed
+                        await asyncio.wait_for(turn.wait(), wait)
+                    except asyncio.TimeoutError:
+                        pass
+                else:
+                    await self._turn.wait()
+            if self.requests is not None:
+                self.requests.take(1, now)
+            if self.tokens is not None:
+                self.tokens.take(tokens, now)
+        finally:
+            del self._queue[ticket]
+            self._queued_tokens -= tokens
+            self._next_turn()
+
+        waited = time.monotonic() - start
+        with self._lock:
+            self.admitted += 1
+            self.waited_seconds += waited
+            self.max_waited_seconds = max(self.max_waited_seconds, waited)
+        return waited
+
+    def settle(self, reserved: int, used: Optional[int]):
+        """Correct the token bucket with the tokens a finished request really used
+        (0 for an attempt that failed, None to keep the estimate)"""
+        if self.tokens is not None and used is not None:
+            self.tokens.give_back(reserved - used, time.monotonic())
+
+    def worst_case_seconds(self, request_seconds: float) -> Optional[float]:
+        """
+        Longest one request can take through the quota queue and every retry.
+
+        Args:
+            request_seconds: Timeout of a single attempt
+
+        Returns:
+            Seconds, or None if the queue wait is unlimited
+        """
+        if not self.max_queue_wait:
+            return None
+        backoff = sum(min(MAX_BACKOFF_SECONDS, self.backoff_base * 2 ** attempt)
+                      for attempt in range(self.max_retries))
+        return (self.max_retries + 1) * (self.max_queue_wait + request_seconds) + backoff
+
+    def retry_delay(self, error: BaseException, attempt: int) -> Optional[float]:
+        """
+        Backoff before retrying a failed request, or None if it should not be retried.
+
+        A 429 also pauses the whole queue for the delay, so the requests
+        behind it do not hit the quota again in the meantime.
+        """
+        kind = retry_kind(error)
+        with self._lock:
+            if kind == "quota":
+                self.quota_errors += 1
+            elif kind == "server":
+                self.server_errors += 1
+        if kind is None:
+            return None
+        delay = backoff_delay(attempt, self.backoff_base)
+        if kind == "quota":
+            self.paused_until = max(self.paused_until, time.monotonic() + delay)
+            self._next_turn()
+        if attempt >= self.max_retries:
+            return None
+        with self._lock:
+            self.retries += 1
+        return delay
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Quota use, queue and retry counters"""
+        now = time.monotonic()
+        with self._lock:
+            return {
+                "requests_per_minute": self.requests.per_minute if self.requests else None,
+                "tokens_per_minute": self.tokens.per_minute if self.tokens else None,
+                "queued": len(self._queue),
+                "estimated_wait_seconds": self.estimate_wait(0, now),
+                "paused_seconds": max(0.0, self.paused_until - now),
+                "admitted": self.admitted,
+                "rejected": self.rejected,
+                "avg_wait_seconds": self.waited_seconds / self.admitted if self.admitted else None,
+                "max_wait_seconds": self.max_waited_seconds,
+                "retries": self.retries,
+                "quota_errors": self.quota_errors,
+                "server_errors": self.server_errors,
+            }
@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+"""
+Granite weights shared by every app process on a host.
+
+Each `streamlit run` process normally reads the safetensors shards and keeps
+its own private copy of the weights. With GRANITE_SHARED_WEIGHTS_DIR set
+(ideally a tmpfs such as /dev/shm), the weights are written once, already in
+their load dtype, to a single state-dict file there, and every process maps
+that file read-only instead of copying it. The pages live once in the page
+cache however many app processes (or worker processes) use them.
+
+The file is written by whichever process needs it first, or beforehand by
+prepare_shared_weights.py. An OS lock on a lock file stops two processes
+writing it at once; the others wait for it to appear. The OS drops the lock
+when its holder exits, so a writer killed part way through (OOM, SIGKILL) does
+not leave the others waiting: the next process takes over and writes the file.
+
+int8 quantization rewrites the weights in each process, so it cannot share
+them; bf16 and unquantized fp32 can.
+"""
+
+import gc
+import inspect
+import os
+import re
+import time
+from typing import Any, Optional, Tuple
+
+import torch
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from .model_loader import GraniteModelLoader, ModelLoadError
+
+DEFAULT_EXPORT_WAIT_SECONDS = 900
+SHAREABLE_QUANTIZATION = ("none", "bf16")
+
+
+def mmap_load_supported() -> bool:
+    """True when torch.load can map a file instead of reading it (PyTorch 2.1+)"""
+    return "mmap" in inspect.signature(torch.load).parameters
+
+
+def resolve_shared_weights_dir(device: str = "cpu", quantization: str = "none") -> Optional[str]:
+    """
+    Directory for shared weights, or None when they cannot be used.
+
+    Returns:
+        GRANITE_SHARED_WEIGHTS_DIR if set and usable for this device and quantization
+    """
+    directory = os.getenv("GRANITE_SHARED_WEIGHTS_DIR", "").strip()
+    if not directory:
+        return None
+    if device != "cpu":
+        print("⚠️ Shared weights are CPU only - loading a private copy")
+        return None
+    if quantization not in SHAREABLE_QUANTIZATION:
+        print(f"⚠️ {quantization} weights are rebuilt in every process and cannot be shared - loading a private copy")
+        return None
+    if not mmap_load_supported():
+        print("⚠️ Shared weights need PyTorch 2.1+ - loading a private copy")
+        return None
+    return directory
+
+
+def _try_lock(fd: int) -> bool:
+    """Take an exclusive lock on an open file without waiting (released by the OS if the process dies)"""
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            os.lseek(fd, 0, os.SEEK_SET)
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+
+def _unlock(fd: int):
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    else:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+
+class SharedWeightsStore:
+    """Writes Granite state dicts into a shared directory and maps them back"""
+
+    def __init__(self, directory: str, wait_seconds: float = DEFAULT_EXPORT_WAIT_SECONDS):
+        """
+        Args:
+            directory: Where the shared state-dict files live
+            wait_seconds: Longest to wait for another process writing the same file
+        """
+        self.directory = directory
+        self.wait_seconds = wait_seconds
+
+    @classmethod
+    def from_env(cls, directory: str) -> "SharedWeightsStore":
+        """Build a store whose writer wait is GRANITE_SHARED_WEIGHTS_WAIT_SECONDS"""
+        return cls(directory, float(os.getenv("GRANITE_SHARED_WEIGHTS_WAIT_SECONDS", DEFAULT_EXPORT_WAIT_SECONDS)))
+
+    def path_for(self, loader: GraniteModelLoader, local_dir: str, dtype) -> str:
+        """
+        File holding the weights of one model revision in one dtype (edited
+        local weights get a new file instead of the stale one).
+        """
+        name = re.sub(r"[^A-Za-z0-9_.-]+", "--", loader.model_path.strip("/\\"))
+        return os.path.join(self.directory,
+                            f"{name}-{loader.fingerprint(local_dir)}-{str(dtype).replace('torch.', '')}.pt")
+
+    def export(self, model, path: str):
+        """Write the model's state dict to path atomically"""
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            torch.save(model.state_dict(), tmp_path)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _wait_for_writer(self, loader: GraniteModelLoader, fd: int) -> bool:
+        """Wait while another process holds the lock; True once this process has it"""
+        deadline = time.perf_counter() + self.wait_seconds
+        while time.perf_counter() < deadline:
+            loader._report("weights", 0.35)
+            time.sleep(0.5)
+            if _try_lock(fd):
+                return True
+        return False
+
+    def ensure(self, loader: GraniteModelLoader, local_dir: str, dtype) -> Optional[str]:
+        """
+        Make sure the shared file for this model exists, writing it if needed.
+
+        Returns:
+            Path of the shared file, or None if it is not available (another
+            writer took too long)
+        """
+        path = self.path_for(loader, local_dir, dtype)
+        if os.path.isfile(path):
+            return path
+
+        os.makedirs(self.directory, exist_ok=True)
+        # Whoever holds the lock on this file is the writer; its mere existence means nothing
+        fd = os.open(f"{path}.lock", os.O_CREAT | os.O_RDWR)
+        locked = False
+        try:
+            locked = _try_lock(fd)
+            if not locked:
+                print(f"⏳ Waiting for another process to share Granite weights in {path}...")
+                locked = self._wait_for_writer(loader, fd)
+                if not locked:
+                    return None
+            if os.path.isfile(path):
+                return path  # Written by the process we waited for
+
+            # First here, or the previous writer died before finishing
+            os.ftruncate(fd, 0)
+            os.write(fd, f"{os.getpid()}\n".encode())
+            print(f"📦 Writing shared Granite weights to {path} (one-time per host)...")
+            start = time.perf_counter()
+            model, _ = loader.load("cpu", torch_dtype=dtype)
+            self.export(model, path)
+            del model
+            gc.collect()
+            loader.timings["export"] = time.perf_counter() - start
+            # Waiters check for the file once they get the lock, so removing it
+            # here costs at most a redundant (atomic) write if one races in
+            os.remove(f"{path}.lock")
+        finally:
+            if locked:
+                _unlock(fd)
+            os.close(fd)
+        return path
+
+    def map(self, local_dir: str, path: str):
+        """Build the model around the weights mapped from path"""
+        from accelerate import init_empty_weights
+        from transformers import AutoConfig, AutoModelForCausalLM, GenerationConfig
+
+        config = AutoConfig.from_pretrained(local_dir, local_files_only=True)
+        # Parameters start on the meta device and are replaced by the mapped
+        # tensors; computed buffers (rotary frequencies) stay real
+        with init_empty_weights(include_buffers=False):
+            model = AutoModelForCausalLM.from_config(config)
+
+        state_dict = torch.load(path, map_location="cpu", mmap=True, weights_only=True)
+        model.load_state_dict(state_dict, strict=False, assign=True)
+        model.tie_weights()
+        missing = [name for name, param in model.named_parameters() if param.is_meta]
+        if missing:
+            raise ModelLoadError(f"Shared weights in {path} are missing {len(missing)} tensors ({missing[0]}, ...)")
+
+        try:
+            model.generation_config = GenerationConfig.from_pretrained(local_dir, local_files_only=True)
+        except Exception:
+            pass  # No generation_config.json: keep the defaults from_config gave
+        model.eval()
+        model.shared_weights_path = path
+        return model
+
+    def load(self, loader: GraniteModelLoader, dtype) -> Tuple[Any, Any]:
+        """
+        Load (model, tokenizer) with the weights mapped from the shared directory,
+        falling back to a private copy if the shared file cannot be used.
+        """
+        from transformers import AutoTokenizer
+
+        total_start = time.perf_counter()
+        local_dir = loader.resolve()
+
+        start = time.perf_counter()
+        loader._report("tokenizer", 0.3)
+        tokenizer = AutoTokenizer.from_pretrained(local_dir, local_files_only=True)
+        loader.timings["tokenizer"] = time.perf_counter() - start
+
+        path = self.ensure(loader, local_dir, dtype)
+        if path is None:
+            print("⚠️ Shared Granite weights not ready - loading a private copy")
+            return loader.load("cpu", torch_dtype=dtype)
+
+        start = time.perf_counter()
+        loader._report("weights", 0.35)
+        try:
+            model = self.map(local_dir, path)
+        except Exception as e:
+            print(f"⚠️ Could not map shared weights from {path} ({e}) - loading a private copy")
+            return loader.load("cpu", torch_dtype=dtype)
+        loader.timings["weights"] = time.perf_counter() - start
+        loader.timings["total"] = time.perf_counter() - total_start
+        loader._report("loaded", 1.0)
+        print(f"🔗 Granite weights mapped from {path}")
+        return model, tokenizer
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""
+Single-flight coalescing of identical in-flight requests.
+
+Many users tap the same suggested questions, and users in the same profile
+bucket get identical prompts. While one request for a key is running, later
+callers with the same key wait for it instead of making their own upstream
+call, and all of them receive its result. Nothing is kept after the request
+finishes; the next caller starts a fresh one.
+
+Streams are shared the same way: a caller that joins late first gets the
+chunks produced so far, then follows along live.
+
+The shared request keeps running while anyone still waits for it and is
+cancelled once every caller has gone. All methods must run on one event loop
+(see async_loop.py).
+"""
+
+import asyncio
+import threading
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+
+class _Flight:
+    """One shared upstream call"""
+
+    def __init__(self):
+        self.task: Optional[asyncio.Future] = None
+        self.waiters = 0
+        self.chunks: List[Any] = []
+        self.done = False
+        self.error: Optional[BaseException] = None
+        self.changed = asyncio.Event()
+
+    def notify(self):
+        """Wake the readers waiting for the next chunk"""
+        self.changed.set()
+        self.changed = asyncio.Event()
+
+
+class SingleFlight:
+    """Shares one upstream call between concurrent callers with the same key"""
+
+    def __init__(self):
+        self._flights: Dict[str, _Flight] = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.upstream = 0
+        self.coalesced = 0
+        self.abandoned = 0
+
+    def _join(self, key: str, start: Callable[[_Flight], Awaitable[Any]]) -> _Flight:
+        """The running flight for key, starting one if there is none"""
+        flight = self._flights.get(key)
+        with self._lock:
+            self.calls += 1
+            if flight is not None:
+                self.coalesced += 1
+            else:
+                self.upstream += 1
+        if flight is None:
+            flight = _Flight()
+            self._flights[key] = flight
+            flight.task = asyncio.ensure_future(start(flight))
+            flight.task.add_done_callback(lambda _task: self._finish(key, flight))
+        flight.waiters += 1
+        return flight
+
+    def _finish(self, key: str, flight: _Flight):
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+    def _leave(self, key: str, flight: _Flight):
+        """Drop one caller; the upstream call is cancelled when the last one leaves"""
+        flight.waiters -= 1
+        if flight.waiters == 0 and not flight.task.done():
+            flight.task.cancel()
+            self._finish(key, flight)
+            with self._lock:
+                self.abandoned += 1
+
+    async def do(self, key: str, call: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Await call(), or the identical call already running for key.
+
+        Cancelling one caller does not affect the others.
+        """
+        async def start(flight: _Flight):
+            return await call()
+
+        flight = self._join(key, start)
+        try:
+            return await asyncio.shield(flight.task)
+        finally:
+            self._leave(key, flight)
+
+    async def stream(self, key: str, call: Callable[[], AsyncIterator[Any]]) -> AsyncIterator[Any]:
+        """
+        Iterate call(), or the identical stream already running for key
+        (from its first chunk, whenever the caller joins).
+
+        Closing one caller's iterator does not affect the others.
+        """
+        async def start(flight: _Flight):
+            try:
+                async for chunk in call():
+                    flight.chunks.append(chunk)
+                    flight.notify()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                flight.error = e
+            finally:
+                flight.done = True
+                flight.notify()
+
+        flight = self._join(key, start)
+        index = 0
+        try:
+            while True:
+                if index < len(flight.chunks):
+                    index += 1
+                    yield flight.chunks[index - 1]
+                elif flight.done:
+                    if flight.error is not None:
+                        raise flight.error
+                    return
+                else:
+                    await flight.changed.wait()
+        finally:
+            self._leave(key, flight)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Calls made, how many shared an upstream call, and upstream calls running now"""
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "upstream": self.upstream,
+                "coalesced": self.coalesced,
+                "abandoned": self.abandoned,
+                "in_flight": len(self._flights),
+                "coalesced_ratio": self.coalesced / self.calls if self.calls else 0.0,
+            }
@@ -0,0 +1,195 @@
+# -*- coding: utf-8 -*-
+"""
+Speculative (assisted) decoding for Granite.
+
+A much smaller draft causal LM proposes the next few tokens and Granite
+checks them all in one forward pass, keeping the ones it agrees with. Output
+follows Granite's own distribution; it just needs fewer slow forward passes.
+
+Enabled with GRANITE_DRAFT_MODEL (repo id or local directory of a small
+model sharing Granite's tokenizer). Runs one prompt at a time, so batching is
+turned off while it is active.
+
+Acceptance is measured by counting forward passes: every Granite pass yields
+the accepted draft tokens plus one of its own, so
+accepted = new tokens - Granite passes, and every draft pass proposes one token.
+"""
+
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from .model_loader import GraniteModelLoader
+
+
+class _ForwardTimer:
+    """Counts and times a module's forward passes, per calling thread"""
+
+    def __init__(self, module):
+        self._local = threading.local()
+        self._handles = [
+            module.register_forward_pre_hook(self._before),
+            module.register_forward_hook(self._after),
+        ]
+
+    def _before(self, module, args):
+        if getattr(self._local, "durations", None) is not None:
+            self._local.started = time.perf_counter()
+
+    def _after(self, module, args, output):
+        durations = getattr(self._local, "durations", None)
+        if durations is not None:
+            durations.append(time.perf_counter() - self._local.started)
+
+    def start(self):
+        self._local.durations = []
+
+    def stop(self) -> list:
+        durations, self._local.durations = self._local.durations, None
+        return durations
+
+    def remove(self):
+        for handle in self._handles:
+            handle.remove()
+
+
+class SpeculativeDecoder:
+    """
+    Runs assisted generation with a draft model and keeps acceptance and
+    speedup statistics. Shared by every client of the same Granite weights
+    (see ModelHandle.attachment).
+    """
+
+    def __init__(self, weights: Callable[[], Tuple[Any, Any]], draft_path: str, device: str):
+        """
+        Args:
+            weights: Returns the current Granite (model, tokenizer) pair
+            draft_path: Repo id or local directory of the draft model
+            device: Device both models run on
+        """
+        self.weights = weights
+        self.draft_path = draft_path
+        self.device = device
+        self.draft_model = None
+        self.error: Optional[str] = None
+        self._load_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._timers: Dict[int, _ForwardTimer] = {}
+        self.generations = 0
+        self.total_new_tokens = 0
+        self.total_draft_tokens = 0
+        self.total_accepted_tokens = 0
+        self.total_seconds = 0.0
+        self.total_estimated_baseline_seconds = 0.0
+
+    def ensure_loaded(self) -> bool:
+        """Load the draft model if needed; False if it cannot be used"""
+        with self._load_lock:
+            if self.draft_model is not None:
+                return True
+            if self.error is not None:
+                return False
+            try:
+                model, tokenizer = self.weights()
+                draft, _ = GraniteModelLoader(self.draft_path).load(self.device)
+                target_vocab = model.get_input_embeddings().num_embeddings
+                draft_vocab = draft.get_input_embeddings().num_embeddings
+                if draft_vocab != target_vocab:
+                    raise ValueError(f"draft vocabulary ({draft_vocab}) differs from Granite's ({target_vocab})")
+                self.draft_model = draft
+                print(f"🚀 Speculative decoding enabled with draft model {self.draft_path}")
+                return True
+            except Exception as e:
+                self.error = str(e)
+                print(f"⚠️ Draft model {self.draft_path} unusable ({e}) - generating without it")
+                return False
+
+    def _timer(self, module) -> _ForwardTimer:
+        # One timer per module object; a reloaded model gets a fresh one
+        with self._stats_lock:
+            timer = self._timers.get(id(module))
+            if timer is None:
+                timer = _ForwardTimer(module)
+                self._timers[id(module)] = timer
+            return timer
+
+    def generate(self, model, **generation_kwargs) -> Tuple[Any, Dict[str, Any]]:
+        """
+        Assisted generate() for a single prompt.
+
+        Returns:
+            (generate() output ids, per-request speculative stats)
+        """
+        draft = self.draft_model if self.ensure_loaded() else None
+        if draft is None:
+            raise RuntimeError(f"Draft model unavailable: {self.error or 'evicted'}")
+
+        prompt_len = generation_kwargs["input_ids"].shape[1]
+        target_timer, draft_timer = self._timer(model), self._timer(draft)
+        target_timer.start()
+        draft_timer.start()
+        start = time.perf_counter()
+        try:
+            outputs = model.generate(**generation_kwargs, assistant_model=draft)
+        finally:
+            elapsed = time.perf_counter() - start
+            target_passes = target_timer.stop()
+            draft_passes = draft_timer.stop()
+
+        new_tokens = outputs.shape[1] - prompt_len
+        accepted = min(len(draft_passes), max(0, new_tokens - len(target_passes)))
+        # Without a draft: one prefill pass, then one pass per further token
+        if target_passes:
+            decode_passes = target_passes[1:] or target_passes
+            baseline = target_passes[0] + max(0, new_tokens - 1) * sum(decode_passes) / len(decode_passes)
+        else:
+            baseline = elapsed
+        stats = {
+            "draft_tokens": len(draft_passes),
+            "accepted_tokens": accepted,
+            "acceptance_rate": accepted / len(draft_passes) if draft_passes else 0.0,
+            "target_passes": len(target_passes),
+            "estimated_speedup": baseline / elapsed if elapsed else 1.0,
+        }
+
+        with self._stats_lock:
+            self.generations += 1
+            self.total_new_tokens += new_tokens
+            self.total_draft_tokens += len(draft_passes)
+            self.total_accepted_tokens += accepted
+            self.total_seconds += elapsed
+            self.total_estimated_baseline_seconds += baseline
+        return outputs, stats
+
+    def _drop_draft(self):
+        with self._load_lock:
+            self.draft_model = None
+            with self._stats_lock:
+                for timer in self._timers.values():
+                    timer.remove()
+                self._timers = {}
+
+    def on_evict(self):
+        """Called by the registry when Granite is evicted for being idle"""
+        self._drop_draft()
+
+    def shutdown(self):
+        """Called by the registry when the weights are released"""
+        self._drop_draft()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Acceptance rate and estimated end-to-end speedup so far"""
+        with self._stats_lock:
+            return {
+                "draft_model": self.draft_path,
+                "loaded": self.draft_model is not None,
+                "error": self.error,
+                "generations": self.generations,
+                "draft_tokens": self.total_draft_tokens,
+                "accepted_tokens": self.total_accepted_tokens,
+                "acceptance_rate": (self.total_accepted_tokens / self.total_draft_tokens
+                                    if self.total_draft_tokens else 0.0),
+                "tokens_per_second": self.total_new_tokens / self.total_seconds if self.total_seconds else 0.0,
+                "estimated_speedup": (self.total_estimated_baseline_seconds / self.total_seconds
+                                      if self.total_seconds else 1.0),
+            }
@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+"""
+Start-up warm-up for Granite.
+
+The first generate() after a load pays for lazy allocations, kernel selection
+and weight pages that have never been read (memory-mapped safetensors and
+shared weights are only paged in when touched, and a forward pass reads just
+a few rows of the embedding table). Warming up reads every weight page once,
+then runs a short representative question for each user type a few times,
+so this happens before the client reports ready rather than during the first
+user's request.
+
+The first round of each question gives its cold latency, later rounds the
+warm one; the first real request afterwards is tracked as well.
+
+Weights evicted after GRANITE_IDLE_TIMEOUT_SECONDS are warmed up again when
+they are reloaded, before the request that reloaded them runs.
+
+Configured with GRANITE_WARMUP (on by default), GRANITE_WARMUP_ROUNDS and
+GRANITE_WARMUP_MAX_NEW_TOKENS.
+"""
+
+import itertools
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import torch
+
+from .model_loader import LoadCancelledError
+
+# One typical question per user type; each also warms that type's system prompt in the prefix cache
+WARMUP_PROMPTS = {
+    "general": "What is a good first step to improve my finances?",
+    "student": "How can I make a monthly budget on a part-time income?",
+    "professional": "Should I get my full 401k match before paying off my car loan?",
+    "young_adult": "How big should my emergency fund be before I start investing?",
+    "senior": "How can I make my retirement savings last?",
+}
+
+PAGE_SIZE = 4096
+
+
+def _mean(values: List[float]) -> Optional[float]:
+    return sum(values) / len(values) if values else None
+
+
+def touch_weight_pages(model, page_size: int = PAGE_SIZE) -> int:
+    """
+    Read one value from every memory page of the model's CPU tensors.
+
+    Returns:
+        Bytes of tensor data covered (0 for models without PyTorch tensors, e.g. ONNX Runtime)
+    """
+    if not isinstance(model, torch.nn.Module):
+        return 0
+    seen = set()
+    total = 0
+    with torch.no_grad():
+        for tensor in itertools.chain(model.parameters(), model.buffers()):
+            if tensor.device.type != "cpu" or tensor.numel() == 0 or tensor.data_ptr() in seen:
+                continue
+            seen.add(tensor.data_ptr())
+            step = max(1, page_size // tensor.element_size())
+            tensor.detach().reshape(-1)[::step].float().sum()
+            total += tensor.numel() * tensor.element_size()
+    return total
+
+
+def warm_up(model, generate: Callable[[str], Any], user_types: Iterable[str], rounds: int = 2,
+            cancel_event: Optional[threading.Event] = None) -> Dict[str, Any]:
+    """
+    Touch the weights, then time `rounds` warm-up generations per user type.
+
+    Args:
+        model: Model whose weight pages are read first (None to skip)
+        generate: Runs one short warm-up generation for a user type
+        user_types: User types to warm up, in order
+        rounds: Generations per user type (the first is the cold one)
+        cancel_event: When set, warm-up stops before the next generation
+
+    Returns:
+        Pages touched, cold and warm latency per user type and overall
+    """
+    total_start = time.perf_counter()
+    touched = touch_weight_pages(model) if model is not None else 0
+    touch_seconds = time.perf_counter() - total_start
+
+    per_type: Dict[str, Dict[str, Optional[float]]] = {}
+    latencies: List[float] = []
+    for user_type in user_types:
+        rounds_ms = []
+        for _ in range(max(1, rounds)):
+            if cancel_event is not None and cancel_event.is_set():
+                raise LoadCancelledError("Granite warm-up was cancelled")
+            start = time.perf_counter()
+            generate(user_type)
+            rounds_ms.append(1000.0 * (time.perf_counter() - start))
+        per_type[user_type] = {"cold_ms": rounds_ms[0], "warm_ms": _mean(rounds_ms[1:])}
+        latencies.extend(rounds_ms)
+
+    return {
+        "touched_mb": touched / 1024 ** 2,
+        "touch_seconds": touch_seconds,
+        "rounds": max(1, rounds),
+        "first_ms": latencies[0] if latencies else None,
+        "cold_ms": _mean([stats["cold_ms"] for stats in per_type.values()]),
+        "warm_ms": _mean([stats["warm_ms"] for stats in per_type.values() if stats["warm_ms"] is not None]),
+        "user_types": per_type,
+        "seconds": time.perf_counter() - total_start,
+    }
+
+
+def combine_reports(reports: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Average the warm-up reports of several worker processes"""
+    if not reports:
+        return None
+    return {
+        "first_ms": _mean([r["first_ms"] for r in reports if r.get("first_ms") is not None]),
+        "cold_ms": _mean([r["cold_ms"] for r in reports if r.get("cold_ms") is not None]),
+        "warm_ms": _mean([r["warm_ms"] for r in reports if r.get("warm_ms") is not None]),
+        "seconds": max(r["seconds"] for r in reports),
+        "workers": reports,
+    }
+
+
+class WarmupTracker:
+    """
+    Warm-up result and request latency for one loaded copy of the weights.
+    Shared by every client of the weights (see ModelHandle.attachment), so
+    only the first client warms up.
+    """
+
+    def __init__(self, rounds: int = 2, max_new_tokens: int = 8,
+                 weights: Optional[Callable[[], Tuple[Any, Any]]] = None):
+        """
+        Args:
+            rounds: Warm-up generations per user type
+            max_new_tokens: Tokens generated per warm-up request
+            weights: Returns the current (model, tokenizer) pair; needed to warm up reloads
+        """
+        self.rounds = rounds
+        self.max_new_tokens = max_new_tokens
+        self.weights = weights
+        self._generate: Optional[Callable[[str], Any]] = None
+        self._user_types: List[str] = []
+        self.report: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self._run_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.first_request_ms: Optional[float] = None
+        self.requests = 0
+        self.total_request_seconds = 0.0
+
+    def run(self, model, generate: Callable[[str], Any], user_types: Iterable[str],
+            cancel_event: Optional[threading.Event] = None) -> Optional[Dict[str, Any]]:
+        """
+        Warm up unless another client already did (see warm_up).
+
+        Returns:
+            The warm-up report, or None if warm-up failed (the model still works, just cold)
+
+        Raises:
+            LoadCancelledError: If cancel_event was set during warm-up
+        """
+        with self._run_lock:
+            # Kept so that reloaded weights can be warmed up the same way (see on_reload)
+            self._generate, self._user_types = generate, list(user_types)
+            if self.report is None:
+                try:
+                    self.record(warm_up(model, generate, self._user_types, self.rounds, cancel_event))
+                except LoadCancelledError:
+                    raise
+                except Exception as e:
+                    self.error = str(e)
+                    print(f"⚠️ Granite warm-up failed ({e}) - the first requests will be slower")
+            return self.report
+
+    def record(self, report: Optional[Dict[str, Any]]):
+        """Keep a finished warm-up report (e.g. combined from the worker processes)"""
+        self.report = report
+        if report is not None:
+            warm = f" -> {report['warm_ms']:.0f}ms warm" if report.get("warm_ms") is not None else ""
+            print(f"🔥 Granite warmed up in {report['seconds']:.1f}s "
+                  f"(first request {report['first_ms']:.0f}ms, {report['cold_ms']:.0f}ms cold{warm})")
+
+    def record_request(self, seconds: float):
+        """Note how long a real request took; the first one shows what warm-up left cold"""
+        with self._stats_lock:
+            if self.first_request_ms is None:
+                self.first_request_ms = 1000.0 * seconds
+            self.requests += 1
+            self.total_request_seconds += seconds
+
+    def on_evict(self):
+        """Called by the registry when the weights are evicted: they are cold again until on_reload"""
+        with self._stats_lock:
+            self.report = None
+            self.first_request_ms = None
+            self.requests = 0
+            self.total_request_seconds = 0.0
+
+    def on_reload(self):
+        """Called by the registry after evicted weights were reloaded: warm them up again"""
+        if self._generate is None or self.weights is None:
+            return
+        self.error = None
+        self.run(self.weights()[0], self._generate, self._user_types)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Warm-up report plus first and average request latency"""
+        with self._stats_lock:
+            return {
+                "warmed_up": self.report is not None,
+                "error": self.error,
+                "report": self.report,
+                "first_request_ms": self.first_request_ms,
+                "requests": self.requests,
+                "avg_request_ms": (1000.0 * self.total_request_seconds / self.requests
+                                   if self.requests else None),
+            }
@@ -0,0 +1,465 @@
+# -*- coding: utf-8 -*-
+"""
+Multi-process Granite inference.
+
+Streamlit serves every session from threads of one process, so in-process
+inference shares one interpreter and one PyTorch thread pool. With
+GRANITE_WORKERS=N the weights are loaded by N spawned worker processes
+instead, each limited to its own torch.set_num_threads budget and, when the
+host has enough cores, pinned to its own CPUs. GraniteClient puts prompts on
+a shared task queue and whichever worker is idle picks up the next one.
+
+GRANITE_WORKERS=auto uses the best worker/thread split recorded by
+autotune_granite_workers.py for this host.
+"""
+
+import itertools
+import json
+import multiprocessing
+import os
+import queue
+import threading
+from concurrent.futures import Future
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+import torch
+from transformers import StoppingCriteria, TextStreamer
+
+from .deterministic import DecodingConfig
+from .model_loader import LoadCancelledError, ModelLoadError, ProgressCallback
+
+DEFAULT_TUNING_FILE = os.path.join(os.path.expanduser("~"), ".cache", "smartspends", "worker_tuning.json")
+WORKER_SHUTDOWN_TIMEOUT = 5.0
+
+
+class WorkerPoolClosedError(RuntimeError):
+    """Raised for requests that cannot run because the worker pool is gone"""
+
+
+class WorkerConfig(NamedTuple):
+    """Everything a worker process needs to load Granite and answer prompts"""
+    model_path: str
+    device: str
+    quantization: str
+    backend: str
+    max_length: int
+    max_new_tokens: int
+    threads: int
+    prefix_cache: bool = True
+    draft_model_path: Optional[str] = None
+    # (user type, PromptRequest) pairs run before the worker reports ready (see warmup.py)
+    warmup_requests: Tuple = ()
+    warmup_rounds: int = 2
+    warmup_max_new_tokens: int = 8
+    decoding: Optional[DecodingConfig] = None
+
+
+def available_cpus() -> List[int]:
+    """CPU ids this process may run on"""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def assign_cpus(workers: int, threads: int, cpus: Optional[List[int]] = None) -> List[Optional[List[int]]]:
+    """
+    Give each worker its own block of `threads` CPUs.
+
+    Returns:
+        One CPU list per worker, or None for every worker when the host has too
+        few CPUs (or no affinity support) to keep the workers apart
+    """
+    cpus = available_cpus() if cpus is None else cpus
+    if not hasattr(os, "sched_setaffinity") or workers * threads > len(cpus):
+        return [None] * workers
+    return [cpus[index * threads:(index + 1) * threads] for index in range(workers)]
+
+
+def load_tuning(path: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """Best configuration recorded by autotune_granite_workers.py, or None"""
+    path = path or os.getenv("GRANITE_WORKER_TUNING_FILE", DEFAULT_TUNING_FILE)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f).get("best")
+    except (OSError, ValueError):
+        return None
+
+
+def resolve_worker_config(workers: Optional[str] = None, threads: Optional[str] = None) -> Tuple[int, int]:
+    """
+    Turn GRANITE_WORKERS / GRANITE_THREADS_PER_WORKER into the pool shape to use.
+
+    Returns:
+        (worker processes, torch threads per worker); (0, 0) means in-process inference
+    """
+    workers = (workers if workers is not None else os.getenv("GRANITE_WORKERS", "0")).strip().lower()
+    threads = threads if threads is not None else os.getenv("GRANITE_THREADS_PER_WORKER", "0")
+
+    if workers == "auto":
+        best = load_tuning()
+        if not best:
+            print("⚠️ GRANITE_WORKERS=auto but no tuning found (run autotune_granite_workers.py) - "
+                  "using in-process inference")
+            return 0, 0
+        return int(best["workers"]), int(best["threads_per_worker"])
+
+    try:
+        count = int(workers or 0)
+    except ValueError:
+        print(f"⚠️ Invalid GRANITE_WORKERS '{workers}' - using in-process inference")
+        return 0, 0
+    if count <= 0:
+        return 0, 0
+    try:
+        per_worker = int(threads or 0)
+    except ValueError:
+        per_worker = 0
+    # Default: split the CPUs evenly between the workers
+    return count, per_worker if per_worker > 0 else max(1, len(available_cpus()) // count)
+
+
+class _CancelCriteria(StoppingCriteria):
+    """Stops a worker's generation once the front end cancels its task"""
+
+    def __init__(self, cancelled, index: int, task_id: int):
+        self.cancelled = cancelled
+        self.index = index
+        self.task_id = task_id
+        self.triggered = False
+
+    def __call__(self, input_ids, scores, **kwargs):
+        self.triggered = self.triggered or self.cancelled[self.index] == self.task_id
+        return torch.full((input_ids.shape[0],), self.triggered, dtype=torch.bool, device=input_ids.device)
+
+
+def _worker_main(index: int, config: WorkerConfig, cpus: Optional[List[int]], tasks, results, cancelled):
+    """Entry point of a worker process: load Granite, then answer tasks until told to stop"""
+    try:
+        if cpus:
+            os.sched_setaffinity(0, cpus)
+        torch.set_num_threads(config.threads)
+        try:
+            torch.set_num_interop_threads(1)
+        except RuntimeError:
+            pass  # Already fixed by an earlier parallel region
+
+        from .granite_client import EARLY_STOP_REASONS, generate_batch, generate_stream, load_granite_weights
+        from .prefix_cache import PrefixKVCache
+        from .speculative import SpeculativeDecoder
+        from .warmup import warm_up
+
+        def report(stage: str, fraction: float):
+            results.put((None, "progress", index, (stage, fraction)))
+
+        model, tokenizer = load_granite_weights(config.model_path, config.device, config.quantization,
+                                                config.backend, progress_callback=report)
+        weights = lambda: (model, tokenizer)
+        prefix_cache = PrefixKVCache.from_env(weights, config.device) if config.prefix_cache else None
+        speculative = (SpeculativeDecoder(weights, config.draft_model_path, config.device)
+                       if config.draft_model_path else None)
+    except Exception as e:
+        results.put((None, "failed", index, str(e)))
+        return
+
+    warmup = None
+    if config.warmup_requests:
+        requests = dict(config.warmup_requests)
+        report("warming_up", 1.0)
+        try:
+            warmup = warm_up(model, lambda user_type: generate_batch(
+                weights, config.device, config.max_length, [requests[user_type]], prefix_cache,
+                config.warmup_max_new_tokens, speculative=speculative, decoding=config.decoding),
+                list(requests), config.warmup_rounds)
+        except Exception as e:
+            print(f"⚠️ Granite worker {index} warm-up failed ({e}) - its first requests will be slower")
+
+    class ChunkStreamer(TextStreamer):
+        """Sends decoded text back to the front end as it is produced"""
+
+        def __init__(self, task_id: int):
+            super().__init__(tokenizer, skip_prompt=True, skip_special_tokens=True)
+            self.task_id = task_id
+
+        def on_finalized_text(self, text: str, stream_end: bool = False):
+            if text:
+                results.put((self.task_id, "chunk", index, text))
+
+    results.put((None, "ready", index, {"pid": os.getpid(), "warmup": warmup}))
+    while True:
+        task = tasks.get()
+        if task is None:
+            break
+        task_id, kind, request = task
+        results.put((task_id, "started", index, None))
+        try:
+            if kind == "stream":
+                cancel = _CancelCriteria(cancelled, index, task_id)
+                output = generate_stream(weights, config.device, config.max_length, request,
+                                         ChunkStreamer(task_id), prefix_cache, config.max_new_tokens,
+                                         stop_criteria=[cancel], speculative=speculative,
+                                         decoding=config.decoding)
+                if cancel.triggered and output.stats["stop_reason"] not in EARLY_STOP_REASONS:
+                    output.stats["stop_reason"] = "stream_closed"
+            else:
+                output = generate_batch(weights, config.device, config.max_length, [request], prefix_cache,
+                                        config.max_new_tokens, speculative=speculative,
+                                        decoding=config.decoding)[0]
+            output.stats["worker"] = index
+            results.put((task_id, "result", index, output))
+        except Exception as e:
+            results.put((task_id, "error", index, str(e)))
+
+
+class WorkerStream:
+    """Raw text of one streamed answer as a worker produces it"""
+
+    def __init__(self, pool: "InferenceWorkerPool", task_id: int):
+        self._pool = pool
+        self.task_id = task_id
+        self._chunks: "queue.Queue[Optional[str]]" = queue.Queue()
+        self._done = threading.Event()
+        self.closed = False
+        self.output = None
+        self.error: Optional[str] = None
+
+    def _finish(self, output=None, error: Optional[str] = None):
+        self.output, self.error = output, error
+        self._done.set()
+        self._chunks.put(None)
+
+    def __iter__(self) -> Iterator[str]:
+        while True:
+            chunk = self._chunks.get()
+            if chunk is None:
+                return
+            yield chunk
+
+    def close(self):
+        """Stop generating (no-op once the answer is complete)"""
+        self.closed = True
+        if not self._done.is_set():
+            self._pool._cancel(self.task_id)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait for the worker to hand back the final GenerationOutput"""
+        return self._done.wait(timeout)
+
+
+class InferenceWorkerPool:
+    """
+    N worker processes, each holding its own copy of Granite. Answers come back
+    as Futures (submit) or as streams of raw text (stream).
+    """
+
+    def __init__(self, config: WorkerConfig, workers: int,
+                 progress_callback: Optional[ProgressCallback] = None):
+        """
+        Args:
+            config: Model and thread settings shared by every worker
+            workers: Number of worker processes
+            progress_callback: Receives (stage, fraction done) while the workers load
+        """
+        self.config = config
+        self.workers = max(1, int(workers))
+        self.progress_callback = progress_callback
+        # spawn: forking a process that already holds torch threads is unsafe
+        self._context = multiprocessing.get_context("spawn")
+        self._tasks = self._context.Queue()
+        self._results = self._context.Queue()
+        # Per worker: id of the task it should abandon
+        self._cancelled = self._context.Array("q", [-1] * self.workers, lock=False)
+        self._processes: List[Any] = []
+        self._lock = threading.Lock()
+        self._task_ids = itertools.count()
+        self._pending: Dict[int, Any] = {}  # task id -> Future or WorkerStream
+        self._running: Dict[int, int] = {}  # worker index -> task id
+        self._ready = threading.Event()
+        self._worker_state: Dict[int, Dict[str, Any]] = {}
+        self._progress: Dict[int, float] = {}
+        self._closed = False
+        self._collector: Optional[threading.Thread] = None
+        self.total_requests = 0
+        self.total_tokens = 0
+        self.busy_seconds = 0.0
+
+    def start(self, cancel_event: Optional[threading.Event] = None) -> "InferenceWorkerPool":
+        """
+        Spawn the workers and wait until each has loaded the model or failed.
+
+        Raises:
+            ModelLoadError: If no worker could load the model
+            LoadCancelledError: If cancel_event was set while loading
+        """
+        cpu_sets = assign_cpus(self.workers, self.config.threads)
+        print(f"🧵 Starting {self.workers} Granite worker process(es) with {self.config.threads} thread(s) each"
+              f"{' (pinned)' if cpu_sets[0] else ''}...")
+        for index, cpus in enumerate(cpu_sets):
+            process = self._context.Process(
+                target=_worker_main, name=f"granite-worker-{index}", daemon=True,
+                args=(index, self.config, cpus, self._tasks, self._results, self._cancelled)
+            )
+            process.start()
+            self._processes.append(process)
+            self._worker_state[index] = {"state": "loading", "pid": process.pid, "cpus": cpus, "requests": 0}
+        self._collector = threading.Thread(target=self._collect, name="granite-worker-results", daemon=True)
+        self._collector.start()
+
+        while not self._ready.wait(0.1):
+            if cancel_event is not None and cancel_event.is_set():
+                self.shutdown()
+                raise LoadCancelledError("Granite worker start-up cancelled")
+        failed = [state for state in self._worker_state.values() if state["state"] != "ready"]
+        if len(failed) == self.workers:
+            self.shutdown()
+            raise ModelLoadError(f"No Granite worker could load the model: {failed[0].get('error')}")
+        for state in failed:
+            print(f"⚠️ Granite worker failed to start: {state.get('error')}")
+        return self
+
+    def _submit(self, kind: str, request, pending) -> int:
+        with self._lock:
+            if self._closed:
+                raise WorkerPoolClosedError("Granite worker pool has been shut down")
+            task_id = next(self._task_ids)
+            self._pending[task_id] = pending
+        self._tasks.put((task_id, kind, request))
+        return task_id
+
+    def submit(self, request) -> Future:
+        """Queue a PromptRequest and return a Future resolving to its GenerationOutput"""
+        future: Future = Future()
+        self._submit("generate", request, future)
+        return future
+
+    def stream(self, request) -> WorkerStream:
+        """Queue a PromptRequest whose answer is streamed back as raw text"""
+        stream = WorkerStream(self, -1)
+        stream.task_id = self._submit("stream", request, stream)
+        return stream
+
+    def _cancel(self, task_id: int):
+        with self._lock:
+            for index, running in self._running.items():
+                if running == task_id:
+                    self._cancelled[index] = task_id
+
+    def _collect(self):
+        """Route worker messages to the waiting Futures and streams"""
+        while True:
+            try:
+                task_id, kind, index, payload = self._results.get(timeout=0.5)
+            except queue.Empty:
+                self._check_workers()
+                continue
+            if kind == "closed":
+                return
+            if task_id is None:
+                self._on_worker_message(kind, index, payload)
+                continue
+
+            with self._lock:
+                pending = self._pending.get(task_id)
+                if kind == "started":
+                    self._running[index] = task_id
+                    self._worker_state[index]["requests"] += 1
+                    # Cancelled or closed while queued: tell the worker to drop it straight away
+                    if isinstance(pending, Future):
+                        abandoned = not pending.set_running_or_notify_cancel()
+                    else:
+                        abandoned = pending is not None and pending.closed
+                    if abandoned:
+                        self._cancelled[index] = task_id
+                elif kind in ("result", "error"):
+                    self._pending.pop(task_id, None)
+                    if self._running.get(index) == task_id:
+                        del self._running[index]
+                    if kind == "result":
+                        self.total_requests += 1
+                        self.total_tokens += payload.new_tokens
+                        self.busy_seconds += payload.stats.get("generation_seconds", 0.0)
+            if pending is None:
+                continue
+            if kind == "chunk":
+                pending._chunks.put(payload)
+            elif kind in ("result", "error"):
+                self._resolve(pending, payload if kind == "result" else None,
+                              payload if kind == "error" else None)
+
+    @staticmethod
+    def _resolve(pending, output=None, error: Union[str, Exception, None] = None):
+        if isinstance(pending, WorkerStream):
+            pending._finish(output, None if error is None else str(error))
+        elif not pending.done():
+            if error is None:
+                pending.set_result(output)
+            else:
+                pending.set_exception(error if isinstance(error, Exception) else RuntimeError(error))
+
+    def _on_worker_message(self, kind: str, index: int, payload):
+        with self._lock:
+            state = self._worker_state[index]
+            if kind == "progress":
+                stage, fraction = payload
+                self._progress[index] = fraction
+                fraction = sum(self._progress.values()) / self.workers
+            elif kind == "ready":
+                state.update(state="ready", **payload)
+            elif kind == "failed":
+                state.update(state="failed", error=payload)
+            if all(s["state"] != "loading" for s in self._worker_state.values()):
+                self._ready.set()
+        if kind == "progress" and self.progress_callback is not None:
+            self.progress_callback(stage, fraction)
+
+    def _check_workers(self):
+        """Fail the task of any worker that died, and everything if none are left"""
+        lost: List[Any] = []
+        with self._lock:
+            for index, process in enumerate(self._processes):
+                state = self._worker_state[index]
+                if state["state"] in ("ready", "loading") and not process.is_alive():
+                    state.update(state="dead", error=f"exit code {process.exitcode}")
+                    task_id = self._running.pop(index, None)
+                    if task_id is not None and task_id in self._pending:
+                        lost.append(self._pending.pop(task_id))
+            if all(s["state"] != "loading" for s in self._worker_state.values()):
+                self._ready.set()
+            if not self._closed and not any(s["state"] == "ready" for s in self._worker_state.values()):
+                lost.extend(self._pending.values())
+                self._pending.clear()
+        for pending in lost:
+            self._resolve(pending, error="Granite worker process exited")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Worker states and aggregate throughput"""
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "threads_per_worker": self.config.threads,
+                "ready_workers": sum(1 for s in self._worker_state.values() if s["state"] == "ready"),
+                "pending_requests": len(self._pending),
+                "total_requests": self.total_requests,
+                "tokens_per_second": self.total_tokens / self.busy_seconds if self.busy_seconds else 0.0,
+                "processes": [dict(state, index=index) for index, state in sorted(self._worker_state.items())],
+            }
+
+    def shutdown(self):
+        """Stop the workers; requests still waiting fail with WorkerPoolClosedError"""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            pending = list(self._pending.values())
+            self._pending.clear()
+            # Abandon answers in progress; nobody is waiting for them any more
+            for index, task_id in self._running.items():
+                self._cancelled[index] = task_id
+        for _ in self._processes:
+            self._tasks.put(None)
+        for process in self._processes:
+            process.join(timeout=WORKER_SHUTDOWN_TIMEOUT)
+            if process.is_alive():
+                process.terminate()
+        self._results.put((None, "closed", -1, None))
+        for item in pending:
+            self._resolve(item, error=WorkerPoolClosedError("Granite worker pool has been shut down"))
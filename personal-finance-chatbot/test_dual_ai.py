@@ -44,7 +44,7 @@ def test_dual_ai():
     
     # Test connections
     print("\n🔧 Testing AI Connections...")
-    connections = ai_client.test_connections()
+    connections = ai_client.test_connections(refresh=True)
     print(f"🔮 Gemini Connection: {'✅ Working' if connections['gemini'] else '❌ Failed'}")
     print(f"🔧 Granite Connection: {'✅ Working' if connections['granite'] else '❌ Failed'}")
     
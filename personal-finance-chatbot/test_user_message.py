@@ -75,7 +75,7 @@ def test_multiple_messages():
                 
         # Test connection status
         print(f"\n🔗 Connection Status:")
-        connections = ai_client.test_connections()
+        connections = ai_client.test_connections(refresh=True)
         print(f"  Gemini: {'✅' if connections.get('gemini') else '❌'}")
         print(f"  Granite: {'✅' if connections.get('granite') else '❌'}")
         
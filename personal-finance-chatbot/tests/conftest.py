@@ -0,0 +1,77 @@
+"""
+Shared fixtures for the test suite
+Builds a tiny, randomly initialised Granite model so local-inference tests run offline
+"""
+
+import pytest
+
+
+TINY_CORPUS = [
+    "You are a knowledgeable and helpful financial advisor.",
+    "User Query: How should I budget my money?",
+    "Financial Advice: Save 20% of your income and build an emergency fund.",
+    "Invest in index funds, pay off debt, plan for retirement.",
+]
+
+
+def build_tiny_granite(target_dir: str, seed: int = 0, hidden_size: int = 32, num_layers: int = 2):
+    """Save a tiny random Granite causal LM and byte-level BPE tokenizer to target_dir"""
+    import torch
+    from tokenizers import Tokenizer, decoders, models, pre_tokenizers, trainers
+    from transformers import GraniteConfig, GraniteForCausalLM, PreTrainedTokenizerFast
+
+    tokenizer = Tokenizer(models.BPE())
+    tokenizer.pre_tokenizer = pre_tokenizers.ByteLevel(add_prefix_space=False)
+    tokenizer.decoder = decoders.ByteLevel()
+    trainer = trainers.BpeTrainer(
+        vocab_size=320,
+        special_tokens=["<|end_of_text|>"],
+        initial_alphabet=pre_tokenizers.ByteLevel.alphabet(),
+    )
+    tokenizer.train_from_iterator(TINY_CORPUS * 10, trainer)
+    hf_tokenizer = PreTrainedTokenizerFast(tokenizer_object=tokenizer, eos_token="<|end_of_text|>")
+
+    config = GraniteConfig(
+        vocab_size=len(hf_tokenizer),
+        hidden_size=hidden_size,
+        intermediate_size=hidden_size * 2,
+        num_hidden_layers=num_layers,
+        num_attention_heads=4,
+        num_key_value_heads=2,
+        max_position_embeddings=1024,
+        eos_token_id=hf_tokenizer.eos_token_id,
+        pad_token_id=hf_tokenizer.eos_token_id,
+    )
+    torch.manual_seed(seed)
+    model = GraniteForCausalLM(config)
+    model.save_pretrained(target_dir)
+    hf_tokenizer.save_pretrained(target_dir)
+    return target_dir
+
+
+@pytest.fixture(scope="session")
+def tiny_granite_dir(tmp_path_factory):
+    """Directory holding a tiny random Granite model and tokenizer"""
+    pytest.importorskip("torch")
+    pytest.importorskip("transformers")
+    return build_tiny_granite(str(tmp_path_factory.mktemp("tiny_granite")))
+
+
+@pytest.fixture(scope="session")
+def tiny_draft_dir(tmp_path_factory):
+    """Smaller tiny Granite with different weights but the same tokenizer (a draft model)"""
+    pytest.importorskip("torch")
+    pytest.importorskip("transformers")
+    return build_tiny_granite(str(tmp_path_factory.mktemp("tiny_draft")), seed=1, hidden_size=16, num_layers=1)
+
+
+@pytest.fixture(autouse=True)
+def isolated_manifest_dir(tmp_path, monkeypatch):
+    """Keep checksum manifests written during tests out of the user's cache"""
+    monkeypatch.setenv("GRANITE_MANIFEST_DIR", str(tmp_path / "manifests"))
+
+
+@pytest.fixture(autouse=True)
+def no_startup_warmup(monkeypatch):
+    """Skip the start-up warm-up so clients built in tests are ready straight away"""
+    monkeypatch.setenv("GRANITE_WARMUP", "false")
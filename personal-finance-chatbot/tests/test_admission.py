@@ -0,0 +1,156 @@
+"""
+Unit tests for admission control of local inference
+Tests the bounded queue, wait limits and priorities without loading a model
+"""
+
+import pytest
+import sys
+import os
+import threading
+import time
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from chatbot.admission import AdmissionController, AdmissionRejectedError
+
+
+def queue_behind(controller, priority, order, name, **kwargs):
+    """Start a thread that waits for a slot and records when it gets one"""
+    def run():
+        try:
+            with controller.admit(priority, **kwargs):
+                order.append(name)
+        except AdmissionRejectedError as e:
+            order.append(f"{name}:{e.reason}")
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+def wait_for_queue(controller, depth, timeout=5.0):
+    """Wait until `depth` requests are queued"""
+    deadline = time.monotonic() + timeout
+    while controller.get_stats()["queued"] < depth and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert controller.get_stats()["queued"] == depth
+
+
+class TestAdmissionController:
+    """Test slots, queueing and rejection"""
+
+    def test_admits_up_to_concurrency(self):
+        """Test that free slots are taken without waiting"""
+        controller = AdmissionController(max_concurrent=2, max_queue_depth=0)
+        controller.acquire()
+        controller.acquire()
+        stats = controller.get_stats()
+        assert stats["active"] == 2
+        assert stats["admitted"] == 2
+
+    def test_full_queue_rejects_immediately(self):
+        """Test that a request is turned away at once when no slot or queue place is free"""
+        controller = AdmissionController(max_concurrent=1, max_queue_depth=0)
+        controller.acquire()
+
+        start = time.perf_counter()
+        with pytest.raises(AdmissionRejectedError) as excinfo:
+            controller.acquire()
+        assert excinfo.value.reason == "queue_full"
+        assert time.perf_counter() - start < 0.5
+        assert controller.get_stats()["rejected"]["queue_full"] == 1
+
+    def test_queue_wait_limit(self):
+        """Test that a queued request gives up after the max wait"""
+        controller = AdmissionController(max_concurrent=1, max_queue_depth=4, max_wait_seconds=0.1)
+        controller.acquire()
+
+        with pytest.raises(AdmissionRejectedError) as excinfo:
+            controller.acquire()
+        assert excinfo.value.reason == "queue_timeout"
+        stats = controller.get_stats()
+        assert stats["queued"] == 0
+        assert stats["rejected"]["queue_timeout"] == 1
+
+    def test_released_slot_goes_to_waiter(self):
+        """Test that a waiting request runs once a slot frees up"""
+        controller = AdmissionController(max_concurrent=1, max_queue_depth=4, max_wait_seconds=5)
+        controller.acquire()
+        order = []
+        thread = queue_behind(controller, "interactive", order, "waiter")
+        wait_for_queue(controller, 1)
+
+        controller.release()
+        thread.join(timeout=5)
+        assert order == ["waiter"]
+        stats = controller.get_stats()
+        assert stats["active"] == 0
+        assert stats["admitted"] == 2
+        assert stats["avg_wait_ms"] > 0
+
+    def test_interactive_served_before_background(self):
+        """Test that interactive requests jump ahead of queued background work"""
+        controller = AdmissionController(max_concurrent=1, max_queue_depth=4, max_wait_seconds=5)
+        controller.acquire()
+        order = []
+        threads = [queue_behind(controller, "background", order, "background")]
+        wait_for_queue(controller, 1)
+        threads.append(queue_behind(controller, "interactive", order, "interactive"))
+        wait_for_queue(controller, 2)
+
+        controller.release()
+        for thread in threads:
+            thread.join(timeout=5)
+        assert order == ["interactive", "background"]
+
+    def test_interactive_preempts_background_in_full_queue(self):
+        """Test that a full queue drops background work to make room for chat"""
+        controller = AdmissionController(max_concurrent=1, max_queue_depth=1, max_wait_seconds=5)
+        controller.acquire()
+        order = []
+        background = queue_behind(controller, "background", order, "background")
+        wait_for_queue(controller, 1)
+
+        interactive = queue_behind(controller, "interactive", order, "interactive")
+        background.join(timeout=5)
+        assert order == ["background:preempted"]
+
+        controller.release()
+        interactive.join(timeout=5)
+        assert order == ["background:preempted", "interactive"]
+        assert controller.get_stats()["rejected"]["preempted"] == 1
+
+    def test_background_cannot_preempt_interactive(self):
+        """Test that background work is rejected rather than displacing chat"""
+        controller = AdmissionController(max_concurrent=1, max_queue_depth=1, max_wait_seconds=5)
+        controller.acquire()
+        order = []
+        interactive = queue_behind(controller, "interactive", order, "interactive")
+        wait_for_queue(controller, 1)
+
+        with pytest.raises(AdmissionRejectedError) as excinfo:
+            controller.acquire("background")
+        assert excinfo.value.reason == "queue_full"
+        controller.release()
+        interactive.join(timeout=5)
+
+    def test_unknown_priority(self):
+        """Test that an unknown priority name is an error"""
+        with pytest.raises(ValueError):
+            AdmissionController().acquire("urgent")
+
+    def test_from_env(self, monkeypatch):
+        """Test configuration from environment variables"""
+        monkeypatch.setenv("GRANITE_MAX_QUEUE_DEPTH", "3")
+        monkeypatch.setenv("GRANITE_MAX_QUEUE_WAIT_SECONDS", "2.5")
+        monkeypatch.delenv("GRANITE_MAX_CONCURRENT", raising=False)
+        controller = AdmissionController.from_env(default_concurrency=4)
+        assert controller.max_concurrent == 4
+        assert controller.max_queue_depth == 3
+        assert controller.max_wait_seconds == 2.5
+
+        monkeypatch.setenv("GRANITE_MAX_CONCURRENT", "2")
+        monkeypatch.setenv("GRANITE_MAX_QUEUE_WAIT_SECONDS", "0")
+        controller = AdmissionController.from_env(default_concurrency=4)
+        assert controller.max_concurrent == 2
+        assert controller.max_wait_seconds is None
@@ -0,0 +1,122 @@
+"""
+Unit tests for the Granite execution backends
+Tests backend selection, the torch.compile wiring and its eager fallback
+"""
+
+import pytest
+import sys
+import os
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+torch = pytest.importorskip("torch")
+
+from chatbot import backends
+from chatbot.backends import OnnxRuntimeBackend, get_backend, resolve_backend
+from chatbot.model_loader import GraniteModelLoader
+from chatbot.quantization import model_memory_bytes
+
+
+class TestResolveBackend:
+    """Test which backend a configuration ends up with"""
+
+    def test_default_is_eager(self, monkeypatch):
+        """Test that no configuration keeps eager PyTorch"""
+        monkeypatch.delenv("GRANITE_BACKEND", raising=False)
+        assert resolve_backend() == "eager"
+
+    def test_env_selects_backend(self, monkeypatch):
+        """Test that GRANITE_BACKEND picks the backend"""
+        monkeypatch.setenv("GRANITE_BACKEND", "compile")
+        assert resolve_backend() == "compile"
+
+    def test_unknown_backend_falls_back(self):
+        """Test that a typo does not break loading"""
+        assert resolve_backend("tensorrt") == "eager"
+
+    def test_onnx_without_runtime_falls_back(self, monkeypatch):
+        """Test that ONNX is only used when optimum/onnxruntime are installed"""
+        monkeypatch.setattr(backends, "onnx_runtime_available", lambda: False)
+        assert resolve_backend("onnx") == "eager"
+
+        monkeypatch.setattr(backends, "onnx_runtime_available", lambda: True)
+        assert resolve_backend("onnx") == "onnx"
+        assert resolve_backend("onnx", device="cuda") == "eager"
+
+    def test_prefix_cache_support(self):
+        """Test that only PyTorch backends accept injected prefix key/values"""
+        assert get_backend("eager").supports_prefix_cache
+        assert get_backend("compile").supports_prefix_cache
+        assert not get_backend("onnx").supports_prefix_cache
+
+    def test_memory_of_non_torch_model_is_unknown(self):
+        """Test that an ONNX Runtime model reports no torch memory"""
+        assert model_memory_bytes(object()) == 0
+
+
+class TestOnnxRuntimeBackend:
+    """Test where ONNX exports are kept (exporting itself needs optimum)"""
+
+    def test_export_dir_follows_local_weights(self, tiny_granite_dir, tmp_path):
+        """Test that edited local weights get a new export directory named after the model"""
+        backend = OnnxRuntimeBackend(str(tmp_path))
+        loader = GraniteModelLoader(tiny_granite_dir)
+        before = backend.export_path(loader, tiny_granite_dir)
+        assert os.path.basename(tiny_granite_dir) in os.path.basename(before)
+
+        shard = os.path.join(tiny_granite_dir, "model.safetensors")
+        stat = os.stat(shard)
+        try:
+            os.utime(shard, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+            assert backend.export_path(loader, tiny_granite_dir) != before
+        finally:
+            os.utime(shard, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        assert backend.export_path(loader, tiny_granite_dir) == before
+
+
+class TestCompiledBackend:
+    """Test the torch.compile backend with a stand-in compiler (real compiles take minutes)"""
+
+    def test_client_runs_compiled_forward(self, tiny_granite_dir, monkeypatch):
+        """Test that the model forward goes through torch.compile and generation still works"""
+        from chatbot.granite_client import GraniteClient
+
+        compiled_calls = []
+
+        def fake_compile(fn, **kwargs):
+            def compiled(*args, **inner_kwargs):
+                compiled_calls.append(kwargs)
+                return fn(*args, **inner_kwargs)
+            return compiled
+
+        monkeypatch.setattr(torch, "compile", fake_compile)
+        monkeypatch.setenv("GRANITE_BACKEND", "compile")
+        client = GraniteClient(model_path=tiny_granite_dir)
+
+        assert client.get_model_info()["backend"] == "compile"
+        assert "compile" in client.load_timings
+        warmup_calls = len(compiled_calls)
+        assert warmup_calls > 0
+        assert client.get_response("How should I budget?", "student")
+        assert len(compiled_calls) > warmup_calls
+        assert compiled_calls[0] == {"dynamic": True}
+        client.release()
+
+    def test_compile_failure_falls_back_to_eager(self, tiny_granite_dir, monkeypatch):
+        """Test that a platform that cannot compile still serves answers"""
+        from chatbot.granite_client import GraniteClient
+
+        def broken_compile(fn, **kwargs):
+            def compiled(*args, **inner_kwargs):
+                raise RuntimeError("no C++ compiler")
+            return compiled
+
+        monkeypatch.setattr(torch, "compile", broken_compile)
+        monkeypatch.setenv("GRANITE_BACKEND", "compile")
+        client = GraniteClient(model_path=tiny_granite_dir)
+
+        assert client.initialized
+        assert client.get_response("How should I budget?", "student")
+        assert client.get_model_info()["last_generation"]["new_tokens"] > 0
+        client.release()
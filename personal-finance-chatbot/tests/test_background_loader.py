@@ -0,0 +1,149 @@
+"""
+Unit tests for background Granite loading
+Tests loader states, progress, cancellation and the Lite -> full client hot-swap
+"""
+
+import pytest
+import sys
+import os
+import threading
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from chatbot.background_loader import BackgroundLoader
+from chatbot.granite_client_lite import GraniteClientLite
+
+
+class FakeClient:
+    """Stand-in for GraniteClient"""
+
+    def __init__(self, initialized=True):
+        self.initialized = initialized
+        self.released = False
+
+    def release(self):
+        self.released = True
+
+
+class TestBackgroundLoader:
+    """Test loader state transitions"""
+
+    def test_ready_client_reaches_callbacks(self):
+        """Test that a successful load reports progress and calls ready callbacks"""
+        def factory(progress, cancel_event):
+            progress("weights", 0.5)
+            return FakeClient()
+
+        loader = BackgroundLoader(factory)
+        received = []
+        loader.add_ready_callback(received.append)
+        loader.start()
+
+        assert loader.wait(timeout=5)
+        assert received == [loader.client]
+        progress = loader.get_progress()
+        assert progress["state"] == "ready"
+        assert progress["fraction"] == 1.0
+
+        # Late callbacks run straight away
+        late = []
+        loader.add_ready_callback(late.append)
+        assert late == [loader.client]
+
+    def test_uninitialized_client_is_a_failure(self):
+        """Test that a client that could not load its model leaves the loader failed"""
+        loader = BackgroundLoader(lambda progress, cancel_event: FakeClient(initialized=False)).start()
+
+        assert not loader.wait(timeout=5)
+        assert loader.get_progress()["state"] == "failed"
+        assert loader.client is None
+
+    def test_factory_error_is_reported(self):
+        """Test that an exception in the factory is captured"""
+        def factory(progress, cancel_event):
+            raise RuntimeError("disk full")
+
+        loader = BackgroundLoader(factory).start()
+
+        assert not loader.wait(timeout=5)
+        assert loader.get_progress()["error"] == "disk full"
+
+    def test_cancel_stops_load_and_releases_client(self):
+        """Test that cancelling mid-load ends in the cancelled state without a client"""
+        started = threading.Event()
+        client = FakeClient()
+
+        def factory(progress, cancel_event):
+            started.set()
+            cancel_event.wait(timeout=5)
+            return client
+
+        loader = BackgroundLoader(factory).start()
+        started.wait(timeout=5)
+
+        assert loader.cancel()
+        assert not loader.wait(timeout=5)
+        assert loader.get_progress()["state"] == "cancelled"
+        assert client.released
+        assert not loader.cancel()
+
+
+class TestGraniteSmartClientHotSwap:
+    """Test that Lite answers until the full client is swapped in"""
+
+    def test_lite_answers_until_full_model_is_ready(self, tiny_granite_dir, monkeypatch):
+        """Test the swap from Lite to the full client"""
+        pytest.importorskip("torch")
+        from chatbot import granite_smart_client
+        from chatbot.granite_client import GraniteClient
+        from chatbot.granite_smart_client import GraniteSmartClient
+
+        release_load = threading.Event()
+        real_loader = granite_smart_client._load_full_client
+
+        def slow_loader(model_path, progress, cancel_event):
+            release_load.wait(timeout=10)
+            return real_loader(model_path, progress, cancel_event)
+
+        monkeypatch.setattr(granite_smart_client, "_load_full_client", slow_loader)
+        client = GraniteSmartClient(timeout_seconds=0, model_path=tiny_granite_dir)
+
+        assert isinstance(client.client, GraniteClientLite)
+        assert client.get_load_progress()["state"] == "loading"
+        assert client.get_model_info()["background_load"]["state"] == "loading"
+
+        release_load.set()
+        assert client.wait_until_ready(timeout=30)
+        assert isinstance(client.client, GraniteClient)
+        assert client.get_response("How should I budget?", {"user_type": "student"})
+        client.release()
+
+    def test_cached_model_is_used_immediately(self, tiny_granite_dir):
+        """Test that a model loading within the timeout is used from the start"""
+        pytest.importorskip("torch")
+        from chatbot.granite_client import GraniteClient
+        from chatbot.granite_smart_client import GraniteSmartClient
+
+        client = GraniteSmartClient(timeout_seconds=30, model_path=tiny_granite_dir)
+
+        assert isinstance(client.client, GraniteClient)
+        assert client.is_full_model_ready
+        client.release()
+
+    def test_cancel_keeps_lite(self, tmp_path, monkeypatch):
+        """Test that cancelling the background load leaves Lite answering"""
+        from chatbot import granite_smart_client
+        from chatbot.granite_smart_client import GraniteSmartClient
+
+        def blocking_loader(model_path, progress, cancel_event):
+            cancel_event.wait(timeout=10)
+            return FakeClient()
+
+        monkeypatch.setattr(granite_smart_client, "_load_full_client", blocking_loader)
+        client = GraniteSmartClient(timeout_seconds=0, model_path=str(tmp_path))
+
+        assert client.cancel_loading()
+        assert not client.wait_until_ready(timeout=5)
+        assert isinstance(client.client, GraniteClientLite)
+        assert client.get_load_progress()["state"] == "cancelled"
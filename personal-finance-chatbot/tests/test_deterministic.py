@@ -0,0 +1,140 @@
+"""
+Unit tests for deterministic Granite decoding and the on-disk output cache
+Uses a tiny randomly initialised Granite model so everything runs offline
+"""
+
+import pytest
+import sys
+import os
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+pytest.importorskip("torch")
+
+from chatbot.deterministic import DecodingConfig, OutputCache, resolve_decoding
+
+
+class TestDecodingConfig:
+    """Test GRANITE_DECODING / GRANITE_SEED resolution"""
+
+    def test_default_is_sampling(self, monkeypatch):
+        """Test that answers are sampled unless asked otherwise"""
+        monkeypatch.delenv("GRANITE_DECODING", raising=False)
+        decoding = resolve_decoding()
+        assert decoding.mode == "sample"
+        assert not decoding.deterministic
+        assert decoding.sampling_kwargs()["do_sample"]
+
+    def test_greedy(self, monkeypatch):
+        """Test that greedy decoding turns sampling off"""
+        monkeypatch.setenv("GRANITE_DECODING", "greedy")
+        decoding = resolve_decoding()
+        assert decoding.deterministic
+        assert decoding.sampling_kwargs() == {"do_sample": False}
+
+    def test_seeded(self, monkeypatch):
+        """Test that seeded decoding keeps sampling with a fixed seed"""
+        monkeypatch.setenv("GRANITE_DECODING", "seeded")
+        monkeypatch.setenv("GRANITE_SEED", "7")
+        assert resolve_decoding() == DecodingConfig("seeded", 7)
+
+    def test_unknown_mode_falls_back(self):
+        """Test that an unknown mode samples as usual"""
+        assert resolve_decoding("beam").mode == "sample"
+
+
+class TestOutputCache:
+    """Test storing, replaying and verifying outputs"""
+
+    SETTINGS = {"revision": "abc", "decoding": "greedy", "max_new_tokens": 20}
+
+    def test_replay(self, tmp_path):
+        """Test that a stored output is replayed"""
+        cache = OutputCache(str(tmp_path), self.SETTINGS)
+        assert cache.get("system", "query") is None
+        cache.put("system", "query", "Save 20%.", 4, {"generation_seconds": 0.5})
+
+        text, new_tokens, stats = OutputCache(str(tmp_path), self.SETTINGS).get("system", "query")
+        assert (text, new_tokens) == ("Save 20%.", 4)
+        assert stats["output_cache_hit"]
+
+    def test_key_covers_settings_and_prompt(self, tmp_path):
+        """Test that other settings or prompts do not share entries"""
+        cache = OutputCache(str(tmp_path), self.SETTINGS)
+        other = OutputCache(str(tmp_path), dict(self.SETTINGS, revision="def"))
+        assert cache.key("system", "query") != other.key("system", "query")
+        assert cache.key("system", "query") != cache.key("system", "other query")
+
+    def test_partial_answers_are_not_stored(self, tmp_path):
+        """Test that deadline-truncated or closed streams are not recorded"""
+        cache = OutputCache(str(tmp_path), self.SETTINGS)
+        cache.put("system", "query", "Save", 1, {"truncated": True})
+        cache.put("system", "query", "Save", 1, {"stop_reason": "stream_closed"})
+        assert cache.entry("system", "query") is None
+
+    def test_verify_compares_text_and_timing(self, tmp_path):
+        """Test that verify mode always generates and counts differences"""
+        OutputCache(str(tmp_path), self.SETTINGS).put("system", "query", "Save 20%.", 4, {"generation_seconds": 1.0})
+        cache = OutputCache(str(tmp_path), self.SETTINGS, mode="verify")
+
+        assert cache.get("system", "query") is None
+        assert cache.put("system", "query", "Save 20%.", 4, {"generation_seconds": 0.5})
+        assert cache.put("system", "query", "Spend it all.", 4, {"generation_seconds": 0.5}) is False
+        stats = cache.get_stats()
+        assert stats["verified"] == 2
+        assert stats["mismatches"] == 1
+        assert stats["speedup_vs_stored"] == pytest.approx(2.0)
+
+
+class TestGraniteClientDeterministic:
+    """Test deterministic generation through GraniteClient"""
+
+    @pytest.fixture(autouse=True)
+    def short_answers(self, monkeypatch):
+        monkeypatch.setenv("GRANITE_MAX_NEW_TOKENS", "20")
+
+    @pytest.mark.parametrize("mode", ["greedy", "seeded"])
+    def test_repeated_answers_match(self, tiny_granite_dir, monkeypatch, mode):
+        """Test that deterministic modes give the same answer every time and do not batch"""
+        from chatbot.granite_client import GraniteClient
+
+        monkeypatch.setenv("GRANITE_DECODING", mode)
+        client = GraniteClient(model_path=tiny_granite_dir)
+        assert not client.batching_enabled
+
+        first = client.get_response("How should I budget?", "student")
+        assert client.get_response("How should I budget?", "student") == first
+        assert "".join(client.stream_response("How should I budget?", "student")) == first
+        client.release()
+
+    def test_replays_from_disk(self, tiny_granite_dir, tmp_path, monkeypatch):
+        """Test that a stored answer is replayed without generating"""
+        from chatbot.granite_client import GraniteClient
+
+        monkeypatch.setenv("GRANITE_DECODING", "greedy")
+        monkeypatch.setenv("GRANITE_OUTPUT_CACHE_DIR", str(tmp_path / "outputs"))
+        client = GraniteClient(model_path=tiny_granite_dir)
+
+        first = client.get_response("How should I budget?", "student")
+        assert not client.last_generation_stats.get("output_cache_hit")
+        assert client.get_response("How should I budget?", "student") == first
+        assert client.last_generation_stats["output_cache_hit"]
+        assert "".join(client.stream_response("How should I budget?", "student")) == first
+
+        info = client.get_model_info()
+        assert info["decoding"]["mode"] == "greedy"
+        assert info["output_cache"]["stores"] == 1
+        assert info["output_cache"]["hits"] == 2
+        client.release()
+
+    def test_sampling_is_never_cached(self, tiny_granite_dir, tmp_path, monkeypatch):
+        """Test that sampled answers are not stored"""
+        from chatbot.granite_client import GraniteClient
+
+        monkeypatch.setenv("GRANITE_OUTPUT_CACHE_DIR", str(tmp_path / "outputs"))
+        client = GraniteClient(model_path=tiny_granite_dir)
+        client.get_response("How should I budget?", "student")
+        assert client.get_model_info()["output_cache"] is None
+        assert not os.path.exists(tmp_path / "outputs")
+        client.release()
@@ -0,0 +1,235 @@
+"""
+Unit tests for the Dual AI client
+Tests routing between Gemini and Granite without network access or model downloads
+"""
+
+import pytest
+import sys
+import os
+from unittest.mock import patch, MagicMock
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+pytest.importorskip("google.generativeai")
+
+from chatbot.admission import AdmissionRejectedError
+from chatbot.dual_ai_client import DualAIClient
+from chatbot.granite_client_lite import GraniteClientLite
+from chatbot.rate_limiter import GeminiBusyError
+
+
+def make_dual_client(gemini_client=None, granite_client=None):
+    """Build a DualAIClient with the given backends instead of real ones"""
+    with patch.object(DualAIClient, '_initialize_clients'):
+        client = DualAIClient("test-key")
+    client.gemini_client = gemini_client
+    client.granite_client = granite_client
+    client.active_ai = "gemini" if gemini_client else ("granite" if granite_client else None)
+    return client
+
+
+class TestGraniteStreaming:
+    """Test streaming responses through the dual client"""
+
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.user_context = {
+            'user_type': 'student',
+            'age': 21,
+            'occupation': 'student',
+            'income': 15000,
+            'current_balance': 20000,
+            'monthly_spending': 12000,
+        }
+
+    def test_stream_granite_response_from_lite(self):
+        """Test that the Lite client streams its rule-based answer"""
+        client = make_dual_client(granite_client=GraniteClientLite())
+        chunks = list(client.stream_granite_response("How much should I save?", self.user_context))
+
+        assert len(chunks) == 1
+        assert "₹" in chunks[0]
+
+    def test_stream_granite_response_passes_chunks_through(self):
+        """Test that chunks from the Granite client are forwarded as they arrive"""
+        granite = MagicMock()
+        granite.stream_response.return_value = iter(["Save ", "20%", " monthly."])
+        client = make_dual_client(granite_client=granite)
+
+        chunks = list(client.stream_granite_response("How much should I save?", self.user_context))
+
+        assert chunks == ["Save ", "20%", " monthly."]
+        prompt, context = granite.stream_response.call_args[0]
+        assert "How much should I save?" in prompt
+        assert context is self.user_context
+
+    def test_stream_granite_response_reports_errors(self):
+        """Test that a failing Granite stream yields an error message instead of raising"""
+        def broken_stream(prompt, context):
+            yield "Partial"
+            raise RuntimeError("model crashed")
+
+        granite = MagicMock()
+        granite.stream_response.side_effect = broken_stream
+        client = make_dual_client(granite_client=granite)
+
+        chunks = list(client.stream_granite_response("Budget tips?", self.user_context))
+
+        assert chunks[0] == "Partial"
+        assert "unavailable" in chunks[-1]
+
+    def test_stream_without_granite(self):
+        """Test the message when no Granite client exists"""
+        client = make_dual_client()
+        chunks = list(client.stream_granite_response("Budget tips?", self.user_context))
+
+        assert chunks == ["Granite AI is not available. Please try Gemini AI."]
+
+
+class TestGeminiStreaming:
+    """Test streaming Gemini responses through the dual client"""
+
+    def test_stream_gemini_response_passes_chunks_through(self):
+        """Test that chunks from the Gemini client are forwarded as they arrive"""
+        gemini = MagicMock()
+        gemini.initialized = True
+        gemini.stream_response.return_value = iter(["Start a ", "SIP."])
+        client = make_dual_client(gemini_client=gemini)
+
+        chunks = list(client.stream_gemini_response("Where do I invest?", {'age': 25}))
+
+        assert chunks == ["Start a ", "SIP."]
+        assert gemini.stream_response.call_args[0][0] == "Where do I invest?"
+
+    def test_stream_gemini_response_reports_errors(self):
+        """Test that a failing Gemini stream yields an error message instead of raising"""
+        gemini = MagicMock()
+        gemini.initialized = True
+        gemini.stream_response.side_effect = RuntimeError("no loop")
+        client = make_dual_client(gemini_client=gemini)
+
+        chunks = list(client.stream_gemini_response("Budget tips?", {}))
+
+        assert chunks == ["Gemini AI is currently unavailable. Error: no loop"]
+
+    def test_busy_gemini_stream_fails_over_to_granite(self):
+        """Test that a stream Gemini cannot take in time is answered by Granite"""
+        gemini = MagicMock()
+        gemini.initialized = True
+        gemini.stream_response.side_effect = GeminiBusyError("queue_wait", "quota queue too long", 30.0)
+        granite = MagicMock()
+        granite.stream_response.return_value = iter(["Granite ", "advice."])
+        client = make_dual_client(gemini_client=gemini, granite_client=granite)
+
+        chunks = list(client.stream_gemini_response("Budget tips?", {}))
+
+        assert chunks == ["Granite ", "advice."]
+        assert client.gemini_failovers == 1
+
+    def test_busy_gemini_fails_over_in_auto_route(self):
+        """Test that get_response hands a busy Gemini request to Granite"""
+        gemini = MagicMock()
+        gemini.initialized = True
+        gemini.get_response.side_effect = GeminiBusyError("quota", "429 after retries")
+        client = make_dual_client(gemini_client=gemini, granite_client=GraniteClientLite())
+
+        response = client.get_response("How much should I save?", {'user_type': 'student'})
+
+        assert "Granite" in response
+        assert client.gemini_failovers == 1
+
+    def test_stream_without_gemini(self):
+        """Test the message when no Gemini client exists"""
+        client = make_dual_client()
+        chunks = list(client.stream_gemini_response("Budget tips?", {}))
+
+        assert chunks == ["Gemini AI is not available. Please try Granite AI."]
+
+
+class TestBusyGraniteFallback:
+    """Test that requests local inference cannot take get a Granite Lite answer"""
+
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.user_context = {'user_type': 'student', 'age': 21, 'income': 15000,
+                             'current_balance': 20000, 'monthly_spending': 12000}
+        self.granite = MagicMock()
+        self.granite.get_response.side_effect = AdmissionRejectedError("queue_full", "Granite queue is full")
+
+        def busy_stream(prompt, context):
+            raise AdmissionRejectedError("queue_timeout", "Granite queue wait exceeded 10.0s")
+            yield  # pragma: no cover - makes this a generator
+        self.granite.stream_response.side_effect = busy_stream
+        self.expected = GraniteClientLite().get_response("How much should I save?", self.user_context)
+
+    def test_get_granite_response_answers_with_lite(self):
+        """Test the blocking Granite path"""
+        client = make_dual_client(granite_client=self.granite)
+
+        assert client.get_granite_response("How much should I save?", self.user_context) == self.expected
+        assert client.busy_fallbacks == 1
+
+    def test_stream_granite_response_answers_with_lite(self):
+        """Test the streaming Granite path"""
+        client = make_dual_client(granite_client=self.granite)
+
+        chunks = list(client.stream_granite_response("How much should I save?", self.user_context))
+        assert chunks == [self.expected]
+
+    def test_get_response_answers_with_lite(self):
+        """Test the automatic Gemini -> Granite route"""
+        client = make_dual_client(granite_client=self.granite)
+
+        response = client.get_response("How much should I save?", self.user_context)
+        assert "Granite Lite" in response
+        assert self.expected in response
+
+    def test_connection_check_does_not_generate(self):
+        """Test that the Granite health check is a readiness probe, not a generation"""
+        self.granite.health_check.return_value = True
+        client = make_dual_client(granite_client=self.granite)
+
+        assert client.test_connections(refresh=True)["granite"] is True
+        self.granite.get_response.assert_not_called()
+
+
+class TestConnectionHealth:
+    """Test the cached backend health probes"""
+
+    def test_connection_results_are_cached(self):
+        """Test that repeated connection checks reuse the probe result"""
+        gemini = MagicMock()
+        gemini.health_check.return_value = True
+        client = make_dual_client(gemini_client=gemini, granite_client=GraniteClientLite())
+
+        assert client.test_connections(refresh=True) == {"gemini": True, "granite": True}
+        for _ in range(50):
+            assert client.test_connections() == {"gemini": True, "granite": True}
+        assert gemini.health_check.call_count == 1
+
+    def test_status_shows_unreachable_gemini(self):
+        """Test that a failing Gemini probe shows in the status text"""
+        gemini = MagicMock()
+        gemini.initialized = True
+        gemini.health_check.side_effect = RuntimeError("DNS lookup failed")
+        client = make_dual_client(gemini_client=gemini)
+
+        assert client.test_connections(refresh=True)["gemini"] is False
+        assert "Unreachable (DNS lookup failed)" in client.get_status()
+
+    def test_status_creates_no_attachments(self, tiny_granite_dir):
+        """Test that the status text does not start the scheduler or create other per-model helpers"""
+        pytest.importorskip("torch")
+        from chatbot.granite_smart_client import GraniteSmartClient
+
+        granite = GraniteSmartClient(timeout_seconds=30, model_path=tiny_granite_dir)
+        client = make_dual_client(granite_client=granite)
+        attachments = granite.client._handle._entry.attachments
+        before = set(attachments)
+        try:
+            assert "Ready" in client.get_status()
+            assert set(attachments) == before
+            assert "batching_scheduler" not in attachments
+        finally:
+            granite.release()
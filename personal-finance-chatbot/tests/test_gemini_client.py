@@ -0,0 +1,560 @@
+"""
+Unit tests for the asyncio Gemini client
+Uses a fake Gemini model so everything runs offline
+"""
+
+import pytest
+import asyncio
+import threading
+import time
+import sys
+import os
+from types import SimpleNamespace
+from unittest.mock import patch
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+pytest.importorskip("google.generativeai")
+
+from chatbot.async_loop import BackgroundEventLoop, get_background_loop
+from chatbot.gemini_client import (BLOCKED_MESSAGE, BUSY_MESSAGE, EMPTY_MESSAGE, GENERATION_SETTINGS, TIMEOUT_MESSAGE,
+                                   WITHHELD_NOTICE, GeminiClient, GeminiRequestGate, chunk_text)
+from chatbot.gemini_prompts import SYSTEM_INSTRUCTION
+from chatbot.rate_limiter import GeminiBusyError, GeminiRateLimiter, estimate_tokens
+from chatbot.single_flight import SingleFlight
+
+
+class FakeChunk:
+    """A streamed chunk shaped like Gemini's, whose text raises when it has none"""
+
+    def __init__(self, text="", finish_reason=None, block_reason=None):
+        self._text = text
+        self.prompt_feedback = SimpleNamespace(block_reason=block_reason)
+        self.candidates = [] if block_reason else [
+            SimpleNamespace(finish_reason=SimpleNamespace(name=finish_reason or "STOP"))]
+
+    @property
+    def text(self):
+        if not self._text:
+            raise ValueError("Invalid operation: the response has no parts")
+        return self._text
+
+
+class FakeStream:
+    """Async iterable of chunks, like Gemini's streamed response"""
+
+    def __init__(self, model, chunks, chunk_delay):
+        self.model = model
+        self.chunks = chunks
+        self.chunk_delay = chunk_delay
+
+    async def __aiter__(self):
+        for chunk in self.chunks:
+            try:
+                await asyncio.sleep(self.chunk_delay)
+            except asyncio.CancelledError:
+                self.model.cancelled += 1
+                raise
+            if isinstance(chunk, Exception):
+                raise chunk
+            yield chunk
+
+
+class FakeModel:
+    """Stands in for genai.GenerativeModel, answering after a delay"""
+
+    def __init__(self, delay=0.05, error=None, chunks=None, chunk_delay=0.01, errors=()):
+        self.delay = delay
+        self.error = error
+        self.errors = list(errors)
+        self.chunks = chunks
+        self.chunk_delay = chunk_delay
+        self.in_flight = 0
+        self.peak = 0
+        self.calls = 0
+        self.cancelled = 0
+        self.loops = set()
+
+    async def generate_content_async(self, prompt, **kwargs):
+        self.loops.add(asyncio.get_running_loop())
+        self.calls += 1
+        self.in_flight += 1
+        self.peak = max(self.peak, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        finally:
+            self.in_flight -= 1
+        if self.error:
+            raise self.error
+        if self.errors:
+            raise self.errors.pop(0)
+        if kwargs.get("stream"):
+            return FakeStream(self, self.chunks, self.chunk_delay)
+        question = prompt.split("USER QUESTION: ")[1].split("\n")[0]
+        return SimpleNamespace(text=f"Advice about {question} for you")
+
+    async def count_tokens_async(self, contents, **kwargs):
+        if self.error:
+            raise self.error
+        return SimpleNamespace(total_tokens=1)
+
+
+def make_client(model=None, max_concurrent=8, timeout_seconds=15.0, queue_timeout_seconds=10.0, rate_limiter=None):
+    """Build a GeminiClient around a fake model with its own request gate and (unlimited) rate limiter"""
+    with patch("chatbot.gemini_client.genai.configure"), patch("chatbot.gemini_client.genai.GenerativeModel"):
+        client = GeminiClient("test-key")
+    client.model = model or FakeModel()
+    client.gate = GeminiRequestGate(max_concurrent)
+    client.single_flight = SingleFlight()
+    client.rate_limiter = rate_limiter or GeminiRateLimiter(requests_per_minute=0, tokens_per_minute=0)
+    client.timeout_seconds = timeout_seconds
+    client.queue_timeout_seconds = queue_timeout_seconds
+    return client
+
+
+class TestAsyncGenerate:
+    """Test agenerate and agenerate_many"""
+
+    def test_agenerate_answers(self):
+        """Test that a single request returns the model's text"""
+        client = make_client()
+        answer = asyncio.run(client.agenerate("  budgeting  ", {"age": 30}))
+        assert answer == "Advice about budgeting for you"
+        assert client.gate.get_stats()["completed"] == 1
+
+    def test_instructions_are_the_system_instruction(self):
+        """Test that the model is created with the fixed instructions and requests carry only profile and question"""
+        with patch("chatbot.gemini_client.genai.configure"), \
+                patch("chatbot.gemini_client.genai.GenerativeModel") as model_class:
+            GeminiClient("test-key")
+        assert model_class.call_args.kwargs["system_instruction"] == SYSTEM_INSTRUCTION
+
+        client = make_client()
+        prompt = client._create_financial_prompt("budgeting", {'age': 30})
+        assert prompt == "USER PROFILE: Age 30; Experience beginner; Goals General financial wellness; " \
+                         "Risk tolerance moderate\n\nUSER QUESTION: budgeting"
+
+    def test_empty_input_skips_the_model(self):
+        """Test that empty questions are answered without a request"""
+        client = make_client()
+        assert asyncio.run(client.agenerate("   ", {})) == "Please ask me a financial question!"
+        assert client.gate.get_stats()["requests"] == 0
+
+    def test_many_keeps_order_and_caps_concurrency(self):
+        """Test that agenerate_many returns answers in request order with at most max_concurrent in flight"""
+        model = FakeModel(delay=0.05)
+        client = make_client(model, max_concurrent=3)
+        questions = [f"q{i}" for i in range(10)]
+
+        answers = asyncio.run(client.agenerate_many([(q, {}) for q in questions]))
+
+        assert answers == [f"Advice about {q} for you" for q in questions]
+        assert model.peak == 3
+        stats = client.gate.get_stats()
+        assert stats["peak_in_flight"] == 3
+        assert stats["completed"] == 10
+        assert stats["in_flight"] == 0
+
+    def test_cancellation_cancels_the_request(self):
+        """Test that cancelling the awaiting task cancels the model call and frees its slot"""
+        model = FakeModel(delay=5.0)
+        client = make_client(model, max_concurrent=1)
+
+        async def run():
+            task = asyncio.create_task(client.agenerate("slow", {}))
+            await asyncio.sleep(0.05)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(run())
+        assert model.cancelled == 1
+        stats = client.gate.get_stats()
+        assert stats["cancelled"] == 1
+        assert stats["in_flight"] == 0
+
+    def test_request_timeout(self):
+        """Test that a request slower than the timeout is cut off with a timeout message"""
+        client = make_client(FakeModel(delay=5.0), timeout_seconds=0.05)
+        assert asyncio.run(client.agenerate("slow", {})) == TIMEOUT_MESSAGE
+        assert client.gate.get_stats()["timeouts"] == 1
+
+    def test_busy_when_no_slot_frees_up(self):
+        """Test that a request waiting longer than the queue timeout is turned away (a busy message in batches)"""
+        client = make_client(FakeModel(delay=0.5), max_concurrent=1, queue_timeout_seconds=0.05)
+        answers = asyncio.run(client.agenerate_many([("first", {}), ("second", {})]))
+        assert answers == ["Advice about first for you", BUSY_MESSAGE]
+        assert client.gate.get_stats()["rejected"] == 1
+
+    def test_errors_map_to_messages(self):
+        """Test that API errors become friendly messages"""
+        client = make_client(FakeModel(error=RuntimeError("network connection dropped")))
+        assert "Network connection issue" in asyncio.run(client.agenerate("hi", {}))
+        assert client.gate.get_stats()["failed"] == 1
+
+
+class TestSyncWrapper:
+    """Test the blocking get_response wrapper"""
+
+    def test_requests_share_one_loop(self):
+        """Test that calls from several threads all run on the one background loop"""
+        model = FakeModel(delay=0.05)
+        client = make_client(model, max_concurrent=2)
+        answers = {}
+
+        def ask(i):
+            answers[i] = client.get_response(f"q{i}", {})
+
+        threads = [threading.Thread(target=ask, args=(i,)) for i in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert answers == {i: f"Advice about q{i} for you" for i in range(6)}
+        assert model.loops == {get_background_loop().loop}
+        assert model.peak == 2
+
+    def test_wait_covers_every_retry(self):
+        """Test that the sync wait outlasts the quota queue, every attempt and the backoff between them"""
+        limiter = GeminiRateLimiter(max_queue_wait=5, max_retries=2, backoff_base=1)
+        client = make_client(timeout_seconds=15, queue_timeout_seconds=10, rate_limiter=limiter)
+
+        assert client._wait_timeout() == 10 + 3 * (5 + 15) + (1 + 2) + 5
+        limiter.max_queue_wait = 0
+        assert client._wait_timeout() is None
+
+    def test_get_responses_keeps_order(self):
+        """Test the blocking wrapper around agenerate_many"""
+        client = make_client()
+        assert client.get_responses([("a", {}), ("b", {})]) == ["Advice about a for you", "Advice about b for you"]
+
+    def test_wait_timeout_cancels_the_request(self):
+        """Test that a sync caller giving up cancels the request on the loop and fails over"""
+        loop = BackgroundEventLoop("test-loop")
+        model = FakeModel(delay=5.0)
+        client = make_client(model)
+        client.event_loop = loop
+        with patch.object(GeminiClient, "_wait_timeout", return_value=0.1):
+            with pytest.raises(GeminiBusyError) as info:
+                client.get_response("slow", {})
+        assert info.value.reason == "timeout"
+        deadline = time.time() + 2
+        while model.cancelled == 0 and time.time() < deadline:
+            time.sleep(0.01)
+        assert model.cancelled == 1
+        loop.stop()
+
+    def test_run_from_loop_thread_is_refused(self):
+        """Test that blocking on the loop from its own thread raises instead of deadlocking"""
+        loop = BackgroundEventLoop("test-loop")
+
+        async def nested():
+            coro = asyncio.sleep(0)
+            try:
+                loop.run(coro)
+            finally:
+                coro.close()
+
+        with pytest.raises(RuntimeError):
+            loop.run(nested())
+        loop.stop()
+
+    def test_model_info_reports_async_stats(self):
+        """Test that get_model_info includes the request gate counters"""
+        client = make_client()
+        client.get_response("a", {})
+        info = client.get_model_info()["async"]
+        assert info["completed"] == 1
+        assert info["max_concurrent"] == 8
+
+
+    def test_connection_check_does_not_generate(self):
+        """Test that the health check counts tokens instead of generating an answer"""
+        model = FakeModel()
+        assert make_client(model).test_connection() is True
+        assert model.calls == 0
+
+        assert make_client(FakeModel(error=ConnectionError("unreachable"))).test_connection() is False
+
+
+class TestStreaming:
+    """Test astream and the blocking stream_response wrapper"""
+
+    def test_chunks_arrive_in_order(self):
+        """Test that text chunks are passed through as they are written"""
+        client = make_client(FakeModel(chunks=[FakeChunk("  Save "), FakeChunk("20% "), FakeChunk("monthly.")]))
+        assert list(client.stream_response("How much should I save?", {})) == ["Save ", "20% ", "monthly."]
+        assert client.gate.get_stats()["completed"] == 1
+
+    def test_blocked_prompt(self):
+        """Test that a prompt blocked before any text gives the content-filter message"""
+        client = make_client(FakeModel(chunks=[FakeChunk(block_reason=SimpleNamespace(name="SAFETY"))]))
+        assert list(client.stream_response("something unsafe", {})) == [BLOCKED_MESSAGE]
+
+    def test_blocked_mid_stream(self):
+        """Test that an answer stopped by a filter keeps its text and says the rest was withheld"""
+        chunks = [FakeChunk("Start of advice"), FakeChunk(finish_reason="SAFETY"), FakeChunk("never sent")]
+        client = make_client(FakeModel(chunks=chunks))
+        assert list(client.stream_response("question", {})) == ["Start of advice", WITHHELD_NOTICE]
+
+    def test_empty_stream(self):
+        """Test that a stream without any text ends with the empty-response message"""
+        client = make_client(FakeModel(chunks=[FakeChunk(""), FakeChunk("   ")]))
+        assert list(client.stream_response("question", {})) == [EMPTY_MESSAGE]
+
+    def test_error_mid_stream(self):
+        """Test that a failure after some text is reported after it instead of raising"""
+        client = make_client(FakeModel(chunks=[FakeChunk("Partial"), RuntimeError("connection reset")]))
+        chunks = list(client.stream_response("question", {}))
+        assert chunks[0] == "Partial"
+        assert "Network connection issue" in chunks[1]
+        assert client.gate.get_stats()["failed"] == 1
+
+    def test_stalled_stream_times_out(self):
+        """Test that a stream with no new chunk within the timeout ends with the timeout message"""
+        client = make_client(FakeModel(chunks=[FakeChunk("Partial"), FakeChunk("late")], chunk_delay=0.2),
+                             timeout_seconds=0.1)
+        assert asyncio.run(self._collect(client.astream("question", {}))) == [TIMEOUT_MESSAGE]
+
+    def test_closing_the_stream_cancels_the_request(self):
+        """Test that a reader that stops early cancels the request and frees its slot"""
+        model = FakeModel(chunks=[FakeChunk(f"part {i} ") for i in range(50)], chunk_delay=0.05)
+        client = make_client(model)
+        stream = client.stream_response("question", {})
+        assert next(stream) == "part 0 "
+        stream.close()
+
+        deadline = time.time() + 2
+        while client.gate.get_stats()["in_flight"] and time.time() < deadline:
+            time.sleep(0.01)
+        stats = client.gate.get_stats()
+        assert stats["in_flight"] == 0
+        assert stats["cancelled"] == 1
+        assert model.cancelled == 1
+
+    def test_chunk_text_of_full_responses(self):
+        """Test that a blocked non-streamed answer is reported as blocked, not as an API error"""
+        client = make_client()
+        assert chunk_text(FakeChunk("Hello")) == ("Hello", None)
+        assert client._response_text(FakeChunk(finish_reason="SAFETY")) == BLOCKED_MESSAGE
+
+    @staticmethod
+    async def _collect(stream):
+        return [chunk async for chunk in stream]
+
+
+class TestSingleFlight:
+    """Test that identical concurrent requests share one upstream call"""
+
+    def test_identical_requests_share_one_call(self):
+        """Test that concurrent identical prompts make one call and all get its answer"""
+        model = FakeModel(delay=0.1)
+        client = make_client(model)
+        answers = asyncio.run(client.agenerate_many([("budgeting", {"age": 30})] * 5 + [("saving", {"age": 30})]))
+
+        assert answers == ["Advice about budgeting for you"] * 5 + ["Advice about saving for you"]
+        assert model.calls == 2
+        stats = client.get_model_info()["single_flight"]
+        assert stats["upstream"] == 2
+        assert stats["coalesced"] == 4
+        assert stats["in_flight"] == 0
+
+    def test_different_profiles_are_not_shared(self):
+        """Test that the same question for different profiles makes separate calls"""
+        model = FakeModel(delay=0.05)
+        client = make_client(model)
+        asyncio.run(client.agenerate_many([("budgeting", {"age": 30}), ("budgeting", {"age": 60})]))
+        assert model.calls == 2
+
+    def test_finished_requests_are_not_reused(self):
+        """Test that only in-flight requests are shared: a later identical request calls again"""
+        model = FakeModel(delay=0.01)
+        client = make_client(model)
+        client.get_response("budgeting", {})
+        client.get_response("budgeting", {})
+        assert model.calls == 2
+
+    def test_one_caller_cancelling_keeps_the_call(self):
+        """Test that the shared call keeps running for the callers still waiting"""
+        model = FakeModel(delay=0.2)
+        client = make_client(model)
+
+        async def run():
+            first = asyncio.create_task(client.agenerate("budgeting", {}))
+            second = asyncio.create_task(client.agenerate("budgeting", {}))
+            await asyncio.sleep(0.05)
+            first.cancel()
+            return await second
+
+        assert asyncio.run(run()) == "Advice about budgeting for you"
+        assert model.cancelled == 0
+        assert model.calls == 1
+
+    def test_last_caller_cancelling_cancels_the_call(self):
+        """Test that the upstream call is cancelled once nobody waits for it"""
+        model = FakeModel(delay=5.0)
+        client = make_client(model)
+
+        async def run():
+            tasks = [asyncio.create_task(client.agenerate("budgeting", {})) for _ in range(2)]
+            await asyncio.sleep(0.05)
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await asyncio.sleep(0)
+
+        asyncio.run(run())
+        assert model.cancelled == 1
+        assert client.single_flight.get_stats()["abandoned"] == 1
+
+    def test_late_stream_reader_gets_every_chunk(self):
+        """Test that a reader joining a running stream gets the chunks already written, then the rest"""
+        model = FakeModel(chunks=[FakeChunk(f"part {i} ") for i in range(5)], chunk_delay=0.05)
+        client = make_client(model)
+
+        async def read(delay):
+            await asyncio.sleep(delay)
+            return "".join([chunk async for chunk in client.astream("question", {})])
+
+        async def run():
+            return await asyncio.gather(read(0), read(0.12))
+
+        first, late = asyncio.run(run())
+        assert first == late == "part 0 part 1 part 2 part 3 part 4 "
+        assert model.calls == 1
+        assert client.single_flight.get_stats()["coalesced"] == 1
+
+    def test_disabled(self):
+        """Test that without single-flight every request makes its own call"""
+        model = FakeModel(delay=0.05)
+        client = make_client(model)
+        client.single_flight = None
+        asyncio.run(client.agenerate_many([("budgeting", {})] * 3))
+        assert model.calls == 3
+        assert client.get_model_info()["single_flight"] is None
+
+
+class ApiError(Exception):
+    """Stands in for google.api_core errors, which carry the HTTP status as `code`"""
+
+    def __init__(self, code, message):
+        super().__init__(f"{code} {message}")
+        self.code = code
+
+
+class TestRateLimiting:
+    """Test quota limiting, retries and early failover"""
+
+    def test_retries_429_and_5xx_with_backoff(self):
+        """Test that 429 and 5xx errors are retried and the answer still arrives"""
+        limiter = GeminiRateLimiter(0, 0, max_retries=2, backoff_base=0.01)
+        model = FakeModel(delay=0.01, errors=[ApiError(429, "Resource exhausted"), ApiError(503, "Unavailable")])
+        client = make_client(model, rate_limiter=limiter)
+
+        assert asyncio.run(client.agenerate("budgeting", {})) == "Advice about budgeting for you"
+        stats = limiter.get_stats()
+        assert stats["retries"] == 2
+        assert stats["quota_errors"] == 1
+        assert stats["server_errors"] == 1
+
+    def test_persistent_429_fails_over(self):
+        """Test that a quota error that outlasts the retries raises GeminiBusyError"""
+        limiter = GeminiRateLimiter(0, 0, max_retries=1, backoff_base=0.01)
+        client = make_client(FakeModel(delay=0.01, error=ApiError(429, "Quota exceeded")), rate_limiter=limiter)
+
+        with pytest.raises(GeminiBusyError) as info:
+            client.get_response("budgeting", {})
+        assert info.value.reason == "quota"
+        assert limiter.get_stats()["retries"] == 1
+
+    def test_client_errors_are_not_retried(self):
+        """Test that errors a retry will not fix are answered straight away"""
+        limiter = GeminiRateLimiter(0, 0, backoff_base=0.01)
+        model = FakeModel(delay=0.01, error=ApiError(400, "API key not valid"))
+        client = make_client(model, rate_limiter=limiter)
+
+        assert "API configuration issue" in asyncio.run(client.agenerate("budgeting", {}))
+        assert model.calls == 1
+
+    def test_requests_wait_for_the_quota(self):
+        """Test that requests beyond the per-minute quota wait for the bucket to refill"""
+        limiter = GeminiRateLimiter(requests_per_minute=600, tokens_per_minute=0, max_queue_wait=0)
+        limiter.requests.level = 1  # One request left; then one every 0.1s
+        client = make_client(FakeModel(delay=0), rate_limiter=limiter)
+
+        start = time.perf_counter()
+        asyncio.run(client.agenerate_many([(f"q{i}", {}) for i in range(3)]))
+        assert time.perf_counter() - start >= 0.18
+        stats = limiter.get_stats()
+        assert stats["admitted"] == 3
+        assert stats["max_wait_seconds"] >= 0.18
+
+    def test_long_queue_wait_fails_over_early(self):
+        """Test that a request whose estimated quota wait is too long is turned away without waiting"""
+        limiter = GeminiRateLimiter(requests_per_minute=6, tokens_per_minute=0, max_queue_wait=2)
+        limiter.requests.level = 0  # Next request in 10s
+        model = FakeModel(delay=0)
+        client = make_client(model, rate_limiter=limiter)
+
+        start = time.perf_counter()
+        with pytest.raises(GeminiBusyError) as info:
+            client.get_response("budgeting", {})
+        assert time.perf_counter() - start < 1
+        assert info.value.reason == "queue_wait"
+        assert info.value.estimated_wait == pytest.approx(10, abs=0.5)
+        assert model.calls == 0
+        assert limiter.get_stats()["rejected"] == 1
+
+    def test_token_quota_is_settled_with_real_usage(self):
+        """Test that the token bucket is charged what the request really used"""
+        limiter = GeminiRateLimiter(requests_per_minute=0, tokens_per_minute=100_000)
+        client = make_client(FakeModel(delay=0), rate_limiter=limiter)
+
+        async def answer(prompt, **kwargs):
+            return SimpleNamespace(text="A long enough answer", usage_metadata=SimpleNamespace(total_token_count=300))
+
+        client.model.generate_content_async = answer
+        asyncio.run(client.agenerate("budgeting", {}))
+        assert limiter.tokens.level_at(limiter.tokens.updated) == pytest.approx(100_000 - 300, abs=5)
+
+    def test_failed_attempts_are_refunded(self):
+        """Test that only the attempt that answered is charged to the token bucket"""
+        limiter = GeminiRateLimiter(requests_per_minute=0, tokens_per_minute=100_000, max_retries=2, backoff_base=0.01)
+        model = FakeModel(delay=0, errors=[ApiError(429, "Resource exhausted"), ApiError(503, "Unavailable")])
+        client = make_client(model, rate_limiter=limiter)
+        reserved = estimate_tokens(SYSTEM_INSTRUCTION + client._create_financial_prompt("budgeting", {}),
+                                   GENERATION_SETTINGS['max_output_tokens'])
+
+        asyncio.run(client.agenerate("budgeting", {}))
+        assert model.calls == 3
+        assert limiter.tokens.level_at(limiter.tokens.updated) == pytest.approx(100_000 - reserved, abs=5)
+
+    def test_failed_requests_are_refunded(self):
+        """Test that requests that end without an answer give back their whole reservation"""
+        limiter = GeminiRateLimiter(requests_per_minute=0, tokens_per_minute=100_000, max_retries=1, backoff_base=0.01)
+        client = make_client(FakeModel(delay=0, error=ApiError(429, "Quota exceeded")), rate_limiter=limiter)
+        with pytest.raises(GeminiBusyError):
+            asyncio.run(client.agenerate("budgeting", {}))
+        assert limiter.tokens.level_at(limiter.tokens.updated) == pytest.approx(100_000, abs=5)
+
+        client.model = FakeModel(delay=0, chunks=[FakeChunk("Save "), RuntimeError("connection reset")])
+        asyncio.run(TestStreaming._collect(client.astream("saving", {})))
+        assert limiter.tokens.level_at(limiter.tokens.updated) == pytest.approx(100_000, abs=5)
+
+    def test_quota_error_pauses_the_queue(self):
+        """Test that a 429 holds back the requests behind it for the backoff delay"""
+        limiter = GeminiRateLimiter(0, 0, max_queue_wait=0.05, max_retries=0, backoff_base=2)
+        client = make_client(FakeModel(delay=0, error=ApiError(429, "Quota exceeded")), rate_limiter=limiter)
+
+        with pytest.raises(GeminiBusyError):
+            client.get_response("budgeting", {})
+        # The next request would wait out the pause, so it fails over straight away
+        with pytest.raises(GeminiBusyError) as info:
+            client.get_response("saving", {})
+        assert info.value.reason == "queue_wait"
+        assert client.get_model_info()["rate_limit"]["paused_seconds"] > 0
@@ -0,0 +1,64 @@
+"""
+Unit tests for the compact Gemini prompts
+"""
+
+import sys
+import os
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from chatbot.gemini_prompts import SYSTEM_INSTRUCTION, build_prompt, profile_block, profile_cache_stats
+
+
+class TestGeminiPrompts:
+    """Test the per-request prompt and the cached profile blocks"""
+
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.user_context = {
+            'age': 26,
+            'occupation': 'engineer',
+            'income': 85000,
+            'experience_level': 'intermediate',
+            'goals': ['Buy a house', 'Retirement'],
+            'risk_tolerance': 'moderate',
+        }
+
+    def test_prompt_has_profile_and_question_only(self):
+        """Test that the per-request prompt leaves the fixed instructions to the system instruction"""
+        prompt = build_prompt("How much should I save?", self.user_context)
+
+        assert prompt.endswith("USER QUESTION: How much should I save?")
+        assert "Age 26" in prompt
+        assert "Monthly income ₹85000" in prompt
+        assert "Goals Buy a house, Retirement" in prompt
+        assert "PPF" not in prompt
+        assert "PPF" in SYSTEM_INSTRUCTION
+
+    def test_unspecified_fields_are_left_out(self):
+        """Test that an empty profile only shows the defaults"""
+        block = profile_block({})
+
+        assert "Not specified" not in block
+        assert "Age" not in block
+        assert block == ("USER PROFILE: Experience beginner; Goals General financial wellness; "
+                         "Risk tolerance moderate")
+
+    def test_profile_block_rendered_once_per_version(self):
+        """Test that a profile's block is reused until one of its fields changes"""
+        context = dict(self.user_context, occupation='profile-cache-test')
+        before = profile_cache_stats()
+        first = profile_block(context)
+        profile_block(dict(context))
+        changed = profile_block(dict(context, income=90000))
+        after = profile_cache_stats()
+
+        assert after["misses"] - before["misses"] == 2
+        assert after["hits"] - before["hits"] == 1
+        assert first != changed
+
+    def test_unhashable_fields_still_render(self):
+        """Test that odd field values are rendered without the cache instead of failing"""
+        block = profile_block(dict(self.user_context, age={'years': 26}))
+        assert "Age {'years': 26}" in block
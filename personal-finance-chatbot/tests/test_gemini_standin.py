@@ -0,0 +1,132 @@
+"""
+Unit tests for the local Gemini stand-in and GeminiClient's REST endpoint option
+Runs the whole Gemini request path against a local server, without network access
+"""
+
+import pytest
+import random
+import sys
+import os
+from unittest.mock import patch
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+pytest.importorskip("google.generativeai")
+
+from chatbot.dual_ai_client import DualAIClient
+from chatbot.gemini_client import GeminiClient
+from chatbot.gemini_standin import ANSWER_OPENING, GeminiStandIn, LatencyDistribution, StandInConfig
+from chatbot.granite_client_lite import GraniteClientLite
+from chatbot.rate_limiter import GeminiBusyError, GeminiRateLimiter
+
+
+def make_client(standin, max_retries=0):
+    """GeminiClient pointed at the stand-in, with an unlimited rate limiter and short backoff"""
+    client = GeminiClient("test-key", endpoint=standin.endpoint)
+    client.rate_limiter = GeminiRateLimiter(requests_per_minute=0, tokens_per_minute=0,
+                                            max_retries=max_retries, backoff_base=0.01)
+    client.timeout_seconds = 5.0
+    return client
+
+
+@pytest.fixture
+def standin():
+    """A fast stand-in on a free port"""
+    with GeminiStandIn(StandInConfig(latency="fixed:0.01", chunk_delay="fixed:0", words_per_chunk=5, seed=1)) as server:
+        yield server
+
+
+class TestLatencyDistribution:
+    """Test the latency specs"""
+
+    def test_parse_and_sample(self):
+        """Test that samples stay within the distribution and are never negative"""
+        rng = random.Random(0)
+        uniform = LatencyDistribution.parse("uniform:0.2,0.4")
+        assert all(0.2 <= uniform.sample(rng) <= 0.4 for _ in range(100))
+        assert LatencyDistribution.parse("0.5").sample(rng) == 0.5
+        assert all(LatencyDistribution.parse("normal:0,1").sample(rng) >= 0 for _ in range(100))
+
+    def test_invalid_spec(self):
+        """Test that unknown kinds and wrong parameter counts are rejected"""
+        with pytest.raises(ValueError):
+            LatencyDistribution.parse("pareto:1,2")
+        with pytest.raises(ValueError):
+            LatencyDistribution.parse("uniform:1")
+
+
+class TestStandIn:
+    """Test GeminiClient against the stand-in"""
+
+    def test_get_response(self, standin):
+        """Test that a plain request is answered through the REST endpoint"""
+        client = make_client(standin)
+        answer = client.get_response("How much should I save?", {'age': 30})
+
+        assert answer.startswith(ANSWER_OPENING)
+        assert "How much should I save?" in answer
+        assert client.get_model_info()['endpoint'] == standin.endpoint
+        assert client.test_connection() is True
+
+    def test_stream_arrives_in_chunks(self, standin):
+        """Test that streamed answers arrive as several chunks that add up to the whole answer"""
+        client = make_client(standin)
+        chunks = list(client.stream_response("Should I buy gold?", {}))
+
+        assert len(chunks) > 3
+        assert "".join(chunks).startswith(ANSWER_OPENING)
+        assert standin.get_stats()["streamed"] == 1
+
+    def test_429_burst_makes_gemini_busy(self, standin):
+        """Test that 429s that outlast the retries raise GeminiBusyError"""
+        client = make_client(standin, max_retries=1)
+        standin.start_burst(5)
+
+        with pytest.raises(GeminiBusyError) as error:
+            client.get_response("How much should I save?", {})
+        assert error.value.reason == "quota"
+        assert standin.get_stats()["statuses"] == {429: 2}
+
+    def test_server_errors_are_retried(self):
+        """Test that a 5xx answer is retried and then counted as a server error"""
+        with GeminiStandIn(StandInConfig(latency="fixed:0", error_rate=1.0)) as failing:
+            client = make_client(failing, max_retries=2)
+            with pytest.raises(GeminiBusyError) as error:
+                client.get_response("How much should I save?", {})
+        assert error.value.reason == "server"
+        assert client.rate_limiter.get_stats()["server_errors"] == 3
+
+    def test_dual_client_fails_over_during_burst(self, standin):
+        """Test that DualAIClient answers with Granite while the stand-in returns 429"""
+        with patch.object(DualAIClient, '_initialize_clients'):
+            dual = DualAIClient("test-key")
+        dual.gemini_client = make_client(standin)
+        dual.granite_client = GraniteClientLite()
+        dual.active_ai = "gemini"
+
+        assert ANSWER_OPENING in dual.get_response("How much should I save?", {})
+        standin.start_burst(5)
+        answer = dual.get_response("How much should I save?", {})
+        assert answer.startswith("🔧")
+        assert dual.gemini_failovers == 1
+
+    def test_retries_outlasting_the_request_timeout_fail_over(self, standin):
+        """Test that a stand-in answering 429 throughout ends in Granite's answer, however long the retries take"""
+        with patch.object(DualAIClient, '_initialize_clients'):
+            dual = DualAIClient("test-key")
+        dual.gemini_client = make_client(standin)
+        # Backoff (2s, then 4s) longer than one request timeout plus the old 5s margin
+        dual.gemini_client.rate_limiter = GeminiRateLimiter(requests_per_minute=0, tokens_per_minute=0,
+                                                            max_retries=2, backoff_base=4)
+        dual.gemini_client.timeout_seconds = 0.5
+        dual.gemini_client.queue_timeout_seconds = 0.1
+        dual.granite_client = GraniteClientLite()
+        dual.active_ai = "gemini"
+        standin.start_burst(60)
+
+        with patch("chatbot.rate_limiter.random.uniform", return_value=0.0):
+            answer = dual.get_response("How much should I save?", {})
+        assert answer.startswith("🔧")
+        assert dual.gemini_failovers == 1
+        assert standin.get_stats()["statuses"] == {429: 3}
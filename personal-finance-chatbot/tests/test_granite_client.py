@@ -0,0 +1,311 @@
+"""
+Unit tests for the local Granite client
+Uses a tiny randomly initialised Granite model so no download is needed
+"""
+
+import pytest
+import sys
+import os
+import time
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+torch = pytest.importorskip("torch")
+
+from chatbot.granite_client import (
+    AdviceResponse, GraniteClient, PromptRequest, StreamingResponseCleaner, FinancialAdviceStoppingCriteria,
+    find_stop_reason, generate_batch
+)
+
+
+class TestGraniteClientLoading:
+    """Test model loading through the shared registry"""
+
+    def test_client_loads_local_model(self, tiny_granite_dir):
+        """Test that a local model directory is loaded without network access"""
+        client = GraniteClient(model_path=tiny_granite_dir)
+
+        assert client.initialized
+        assert client.model is not None
+        assert client.tokenizer is not None
+        assert "weights" in client.get_model_info()["load_timings"]
+        client.release()
+
+    def test_clients_share_weights(self, tiny_granite_dir):
+        """Test that two sessions use the same weights"""
+        first = GraniteClient(model_path=tiny_granite_dir)
+        second = GraniteClient(model_path=tiny_granite_dir)
+
+        assert first.model is second.model
+        assert second.get_model_info()["shared_clients"] == 2
+
+        first.release()
+        assert not first.initialized
+        assert first.model is None
+        assert second.model is not None
+        second.release()
+
+    def test_missing_model_falls_back(self, tmp_path):
+        """Test that an unusable model directory leaves the client in fallback mode"""
+        client = GraniteClient(model_path=str(tmp_path))
+
+        assert not client.initialized
+        assert "budget" in client.get_response("How do I make a budget?").lower()
+
+
+class TestStreamingResponseCleaner:
+    """Test incremental cleaning of streamed text"""
+
+    SAMPLES = [
+        "Save 20% of your income.\nBuild an emergency fund.\n\nUser Query: what else?",
+        "Track spending.\nTrack spending.\nTrack spending weekly.\nInvest monthly.",
+        "  Pay off debt first.\n\n\nThen invest.\nAssistant: more text",
+        "\n".join(f"Tip number {i}" for i in range(15)),
+        "Use the 50/30/20 rule.\n---\nIgnored footer",
+    ]
+
+    def _stream(self, text, chunk_size):
+        cleaner = StreamingResponseCleaner()
+        chunks = []
+        for i in range(0, len(text), chunk_size):
+            chunk = cleaner.feed(text[i:i + chunk_size])
+            if chunk:
+                chunks.append(chunk)
+            if cleaner.stopped:
+                break
+        chunks.append(cleaner.finish())
+        return chunks
+
+    def test_stream_matches_full_cleaning(self):
+        """Test that streamed chunks add up to the blocking cleaner's output"""
+        client = GraniteClient.__new__(GraniteClient)
+        for text in self.SAMPLES:
+            for chunk_size in [1, 2, 3, 7, 1000]:
+                assert "".join(self._stream(text, chunk_size)) == client._clean_response(text)
+
+    def test_text_is_released_before_generation_ends(self):
+        """Test that safe text is shown without waiting for the end"""
+        cleaner = StreamingResponseCleaner()
+        assert cleaner.feed("Start an SIP ") == "Start an SIP"
+        assert cleaner.feed("today") == " today"
+
+    def test_split_stop_pattern_is_held_back(self):
+        """Test that a stop pattern arriving in pieces never leaks into the output"""
+        cleaner = StreamingResponseCleaner()
+        released = cleaner.feed("Budget first.\n\nUser")
+        released += cleaner.feed(" Que")
+        released += cleaner.feed("ry: next question")
+
+        assert cleaner.stopped
+        assert released + cleaner.finish() == "Budget first."
+
+
+class TestGraniteStreaming:
+    """Test token streaming with a tiny local model"""
+
+    def test_stream_yields_cleaned_chunks(self, tiny_granite_dir):
+        """Test that streaming produces the same kind of cleaned text as get_response"""
+        client = GraniteClient(model_path=tiny_granite_dir)
+        chunks = list(client.stream_response("How should I budget?", "student"))
+
+        assert chunks
+        assert all(isinstance(chunk, str) for chunk in chunks)
+        text = "".join(chunks)
+        assert text.strip()
+        assert "User Query:" not in text
+        client.release()
+
+    def test_closing_stream_stops_early(self, tiny_granite_dir):
+        """Test that a consumer can stop the stream after the first chunk"""
+        client = GraniteClient(model_path=tiny_granite_dir)
+        stream = client.stream_response("How do I save money?", {"user_type": "professional"})
+
+        first = next(stream)
+        stream.close()
+        assert first
+        client.release()
+
+    def test_uninitialized_client_streams_fallback(self, tmp_path):
+        """Test that fallback advice is streamed when the model is unavailable"""
+        client = GraniteClient(model_path=str(tmp_path))
+        chunks = list(client.stream_response("How do I build savings?", "student"))
+
+        assert len(chunks) == 1
+        assert "emergency fund" in chunks[0].lower()
+
+
+class TestStopAwareGeneration:
+    """Test that generation ends as soon as the answer is complete"""
+
+    def test_find_stop_reason(self):
+        """Test detection of the conditions _clean_response would trim at"""
+        assert find_stop_reason("Save more.\n\nUser Query: next") == "stop_pattern"
+        assert find_stop_reason("Save more.\nAssistant:") == "stop_pattern"
+        assert find_stop_reason("Track spending.\nTrack spending.\n") == "repeated_line"
+        assert find_stop_reason("".join(f"Tip {i}\n" for i in range(10))) == "line_limit"
+        assert find_stop_reason("Tip one\nTip two\nTip thr") is None
+        # A repeat is only final once the line is complete
+        assert find_stop_reason("Track spending.\nTrack spending") is None
+
+    def test_criteria_stops_rows_independently(self, tiny_granite_dir):
+        """Test that only the finished row of a batch is stopped"""
+        client = GraniteClient(model_path=tiny_granite_dir)
+        tokenizer = client.tokenizer
+        prompt_ids = tokenizer("Financial Advice:", return_tensors="pt").input_ids
+        finished = tokenizer(" Save 20%.\n\nUser Query:", add_special_tokens=False).input_ids
+        ongoing = tokenizer(" Save 20% of your income and inv", add_special_tokens=False).input_ids
+        width = max(len(finished), len(ongoing))
+        pad = tokenizer.pad_token_id
+        rows = torch.tensor([
+            prompt_ids[0].tolist() + [pad] * (width - len(finished)) + finished,
+            prompt_ids[0].tolist() + [pad] * (width - len(ongoing)) + ongoing,
+        ])
+
+        criteria = FinancialAdviceStoppingCriteria(tokenizer, prompt_ids.shape[1])
+        done = criteria(rows, None)
+
+        assert done.tolist() == [True, False]
+        assert criteria.stop_reasons == {0: "stop_pattern"}
+        client.release()
+
+    def test_max_new_tokens_budget(self, tiny_granite_dir, monkeypatch):
+        """Test that GRANITE_MAX_NEW_TOKENS bounds the answer length"""
+        monkeypatch.setenv("GRANITE_MAX_NEW_TOKENS", "8")
+        client = GraniteClient(model_path=tiny_granite_dir)
+        client.get_response("How should I budget?", "student")
+
+        stats = client.get_model_info()["last_generation"]
+        assert stats["max_new_tokens"] == 8
+        assert stats["new_tokens"] <= 8
+        client.release()
+
+    def test_generation_reports_tokens_saved(self, tiny_granite_dir):
+        """Test that every generation records its stop reason and tokens saved"""
+        client = GraniteClient(model_path=tiny_granite_dir)
+        prompt_parts = client._build_prompt_parts("How do I save?", "student")
+
+        output = generate_batch(client._handle.weights, client.device, client.max_length, [prompt_parts],
+                                max_new_tokens=120)[0]
+
+        stats = output.stats
+        assert stats["stop_reason"] in ("stop_pattern", "line_limit", "repeated_line", "eos", "max_new_tokens")
+        if stats["stop_reason"] in ("stop_pattern", "line_limit", "repeated_line"):
+            assert stats["tokens_saved"] == 120 - output.new_tokens > 0
+        else:
+            assert stats["tokens_saved"] == 0
+        client.release()
+
+
+class TestGenerationDeadline:
+    """Test per-request deadlines that return partial answers"""
+
+    def test_advice_response_is_a_string(self):
+        """Test that the truncated flag rides along on a plain string"""
+        response = AdviceResponse("Save 20% of your income.", truncated=True)
+
+        assert response == "Save 20% of your income."
+        assert response.truncated is True
+        assert AdviceResponse("ok").truncated is False
+
+    def test_expired_deadline_truncates_answer(self, tiny_granite_dir, monkeypatch):
+        """Test that an expired deadline stops decoding and flags the answer"""
+        monkeypatch.setenv("GRANITE_MAX_NEW_TOKENS", "400")
+        client = GraniteClient(model_path=tiny_granite_dir)
+
+        response = client.get_response("How should I budget?", "student", deadline_seconds=1e-6)
+
+        stats = client.get_model_info()["last_generation"]
+        assert isinstance(response, str) and response
+        assert response.truncated is True
+        assert stats["stop_reason"] == "deadline"
+        assert stats["new_tokens"] < 400
+        client.release()
+
+    def test_no_deadline_is_not_truncated(self, tiny_granite_dir, monkeypatch):
+        """Test that GRANITE_DEADLINE_SECONDS=0 turns the deadline off"""
+        monkeypatch.setenv("GRANITE_DEADLINE_SECONDS", "0")
+        client = GraniteClient(model_path=tiny_granite_dir)
+
+        response = client.get_response("How should I budget?", "student")
+
+        assert client.deadline_seconds is None
+        assert response.truncated is False
+        assert client.get_model_info()["last_generation"]["stop_reason"] != "deadline"
+        client.release()
+
+    def test_deadlined_row_is_handed_back_before_batch_ends(self, tiny_granite_dir):
+        """Test that a row past its deadline is delivered while the others keep decoding"""
+        client = GraniteClient(model_path=tiny_granite_dir)
+        prefix, suffix = client._build_prompt_parts("How do I save?", "student")
+        prompts = [PromptRequest(prefix, suffix, deadline=time.monotonic()), PromptRequest(prefix, suffix)]
+        delivered = []
+
+        results = generate_batch(client._handle.weights, client.device, client.max_length, prompts,
+                                 max_new_tokens=40, on_result=lambda index, output: delivered.append(index))
+
+        assert delivered[0] == 0
+        assert results[0].stats["truncated"] is True
+        assert results[1].stats["truncated"] is False
+        assert results[0].new_tokens == 1
+        client.release()
+
+    def test_stream_stops_at_deadline(self, tiny_granite_dir):
+        """Test that streaming honours the deadline too"""
+        client = GraniteClient(model_path=tiny_granite_dir)
+
+        chunks = list(client.stream_response("How should I budget?", "student", deadline_seconds=1e-6))
+
+        assert "".join(chunks)
+        assert client.get_model_info()["last_generation"]["stop_reason"] == "deadline"
+        client.release()
+
+
+class TestIdleEviction:
+    """Test idle eviction of the real (tiny) Granite weights"""
+
+    def test_evicted_weights_reload_on_next_request(self, tiny_granite_dir, monkeypatch):
+        """Test that get_model_info reports eviction and the next request reloads"""
+        from chatbot.model_registry import get_model_registry
+
+        monkeypatch.setenv("GRANITE_IDLE_TIMEOUT_SECONDS", "3600")
+        client = GraniteClient(model_path=tiny_granite_dir)
+        assert client.get_model_info()["weights"]["state"] == "resident"
+        assert client.get_model_info()["weights"]["memory_bytes"] > 0
+
+        assert get_model_registry().evict(client._registry_key())
+        info = client.get_model_info()["weights"]
+        assert info["state"] == "evicted"
+        assert info["memory_bytes"] == 0
+
+        assert client.get_response("How should I budget?", "student")
+        info = client.get_model_info()["weights"]
+        assert info["state"] == "resident"
+        assert info["reloads"] == 1
+        client.release()
+
+
+class TestAdmissionControl:
+    """Test that a saturated model turns requests away instead of queueing them"""
+
+    def test_busy_model_rejects_requests(self, tiny_granite_dir, monkeypatch):
+        """Test that blocking and streaming requests are rejected while every slot is taken"""
+        from chatbot.admission import AdmissionRejectedError
+
+        client = GraniteClient(model_path=tiny_granite_dir)
+        admission = client._admission()
+        monkeypatch.setattr(admission, "max_queue_depth", 0)
+        for _ in range(admission.max_concurrent):
+            admission.acquire()
+
+        with pytest.raises(AdmissionRejectedError):
+            client.get_response("How should I budget?", "student")
+        with pytest.raises(AdmissionRejectedError):
+            next(iter(client.stream_response("How should I budget?", "student")))
+        assert client.get_model_info()["admission"]["rejected"]["queue_full"] == 2
+
+        for _ in range(admission.max_concurrent):
+            admission.release()
+        assert client.get_response("How should I budget?", "student")
+        assert client.get_model_info()["admission"]["active"] == 0
+        client.release()
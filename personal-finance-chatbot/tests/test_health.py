@@ -0,0 +1,73 @@
+"""
+Unit tests for the cached backend health probes
+"""
+
+import sys
+import os
+import threading
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from chatbot.health import HealthProbe
+
+
+class TestHealthProbe:
+    """Test caching and background refresh of health results"""
+
+    def test_status_does_not_wait_for_first_check(self):
+        """Test that the result is None while the first check is still running"""
+        release = threading.Event()
+        probe = HealthProbe("test", lambda: release.wait(5))
+
+        status = probe.status()
+        assert status["healthy"] is None
+        assert status["refreshing"] is True
+
+        release.set()
+        probe.refresh(wait=True)
+        assert probe.status()["healthy"] is True
+
+    def test_fresh_result_is_reused(self):
+        """Test that the check runs once per TTL however often the status is read"""
+        calls = []
+        probe = HealthProbe("test", lambda: calls.append(1) or True, ttl_seconds=60)
+        probe.refresh(wait=True)
+
+        for _ in range(100):
+            assert probe.status()["healthy"] is True
+        assert len(calls) == 1
+
+    def test_stale_result_is_served_while_refreshing(self):
+        """Test that an expired result is still returned while a refresh runs in the background"""
+        release = threading.Event()
+        answers = [True, False]
+
+        def check():
+            if probe.probes:  # Checks after the first wait for the test
+                release.wait(5)
+            return answers[probe.probes]
+
+        probe = HealthProbe("test", check, ttl_seconds=0)
+        probe.refresh(wait=True)
+
+        status = probe.status()
+        assert status["healthy"] is True
+        assert status["refreshing"] is True
+
+        release.set()
+        probe.refresh(wait=True)
+        assert probe.healthy is False
+
+    def test_failed_check_is_unhealthy(self):
+        """Test that an exception from the check is recorded as unhealthy with its message"""
+        def check():
+            raise ConnectionError("connection refused")
+
+        probe = HealthProbe("test", check)
+        probe.refresh(wait=True)
+
+        status = probe.status()
+        assert status["healthy"] is False
+        assert status["error"] == "connection refused"
+        assert status["failures"] == 1
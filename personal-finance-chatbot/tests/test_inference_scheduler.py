@@ -0,0 +1,241 @@
+"""
+Unit tests for the dynamic batching inference scheduler
+Tests batching windows, result routing and metrics with a fake batch function
+"""
+
+import pytest
+import sys
+import os
+import threading
+import time
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from chatbot.inference_scheduler import BatchingScheduler, SchedulerClosedError
+from chatbot.model_registry import ModelRegistry
+
+
+class RecordingBatchFn:
+    """Fake batched generate that echoes prompts and records batch sizes"""
+
+    def __init__(self, delay: float = 0.0):
+        self.batch_sizes = []
+        self.delay = delay
+
+    def __call__(self, prompts, on_result=None):
+        self.batch_sizes.append(len(prompts))
+        time.sleep(self.delay)
+        return [(f"advice for {prompt}", len(prompt)) for prompt in prompts]
+
+
+def submit_concurrently(scheduler, prompts):
+    """Submit prompts from separate threads, like separate chat sessions"""
+    results = {}
+    barrier = threading.Barrier(len(prompts))
+
+    def session(prompt):
+        barrier.wait()
+        results[prompt] = scheduler.generate(prompt, timeout=5)
+
+    threads = [threading.Thread(target=session, args=(prompt,)) for prompt in prompts]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+class TestBatchingScheduler:
+    """Test request batching and routing"""
+
+    def test_concurrent_prompts_share_a_batch(self):
+        """Test that prompts arriving together run in one generate call"""
+        batch_fn = RecordingBatchFn()
+        scheduler = BatchingScheduler(batch_fn, max_batch_size=8, max_wait_ms=200)
+        prompts = [f"question {i}" for i in range(4)]
+
+        results = submit_concurrently(scheduler, prompts)
+
+        assert results == {prompt: (f"advice for {prompt}", len(prompt)) for prompt in prompts}
+        assert sum(batch_fn.batch_sizes) == 4
+        assert max(batch_fn.batch_sizes) > 1
+        scheduler.shutdown()
+
+    def test_max_batch_size_is_respected(self):
+        """Test that no batch exceeds the configured size"""
+        batch_fn = RecordingBatchFn()
+        scheduler = BatchingScheduler(batch_fn, max_batch_size=2, max_wait_ms=200)
+
+        results = submit_concurrently(scheduler, [f"q{i}" for i in range(6)])
+
+        assert len(results) == 6
+        assert max(batch_fn.batch_sizes) <= 2
+        scheduler.shutdown()
+
+    def test_single_prompt_waits_at_most_max_wait(self):
+        """Test that a lone prompt is not held longer than the batching window"""
+        scheduler = BatchingScheduler(RecordingBatchFn(), max_batch_size=8, max_wait_ms=50)
+
+        start = time.perf_counter()
+        assert scheduler.generate("lonely question", timeout=5)[0] == "advice for lonely question"
+        assert time.perf_counter() - start < 1.0
+        scheduler.shutdown()
+
+    def test_batch_error_reaches_every_caller(self):
+        """Test that a failed batch raises in each waiting caller"""
+        def failing_batch(prompts, on_result=None):
+            raise RuntimeError("out of memory")
+
+        scheduler = BatchingScheduler(failing_batch, max_batch_size=4, max_wait_ms=10)
+        future = scheduler.submit("question")
+
+        with pytest.raises(RuntimeError, match="out of memory"):
+            future.result(timeout=5)
+
+        # The worker keeps running after a failed batch
+        scheduler.generate_batch = RecordingBatchFn()
+        assert scheduler.generate("next", timeout=5)[0] == "advice for next"
+        scheduler.shutdown()
+
+    def test_early_result_does_not_wait_for_batch(self):
+        """Test that a result handed back mid-batch reaches its caller straight away"""
+        release = threading.Event()
+
+        def slow_batch(prompts, on_result=None):
+            on_result(0, ("quick answer", 2))
+            release.wait(timeout=5)
+            return [("quick answer", 2)] + [("slow answer", 9)] * (len(prompts) - 1)
+
+        scheduler = BatchingScheduler(slow_batch, max_batch_size=2, max_wait_ms=10)
+        start = time.perf_counter()
+        assert scheduler.generate("quick", timeout=2)[0] == "quick answer"
+        assert time.perf_counter() - start < 1.0
+
+        release.set()
+        scheduler.shutdown(wait=True)
+        assert scheduler.get_metrics()['total_requests'] == 1
+
+    def test_metrics_report_throughput_and_queue_time(self):
+        """Test that metrics cover batches, queue time and tokens per second"""
+        scheduler = BatchingScheduler(RecordingBatchFn(delay=0.01), max_batch_size=4, max_wait_ms=20)
+        submit_concurrently(scheduler, ["aa", "bbbb", "cccccc"])
+
+        metrics = scheduler.get_metrics()
+        assert metrics['total_requests'] == 3
+        assert 1 <= metrics['total_batches'] <= 3
+        assert metrics['avg_batch_size'] >= 1
+        assert metrics['avg_queue_ms'] >= 0
+        assert metrics['p95_queue_ms'] >= 0
+        assert metrics['tokens_per_second'] > 0
+        scheduler.shutdown()
+
+    def test_shutdown_rejects_new_prompts(self):
+        """Test that a stopped scheduler refuses work"""
+        scheduler = BatchingScheduler(RecordingBatchFn())
+        scheduler.shutdown()
+
+        with pytest.raises(SchedulerClosedError):
+            scheduler.submit("too late")
+
+
+class TestSchedulerRegistryAttachment:
+    """Test that the scheduler is shared per set of weights"""
+
+    def test_scheduler_shared_and_stopped_with_weights(self):
+        """Test that clients of the same weights get one scheduler, stopped on release"""
+        registry = ModelRegistry()
+        loader = lambda: (object(), object())
+        first = registry.acquire("granite", loader)
+        second = registry.acquire("granite", loader)
+
+        factory = lambda weights: BatchingScheduler(RecordingBatchFn())
+        scheduler = first.attachment("batching_scheduler", factory)
+        assert second.attachment("batching_scheduler", factory) is scheduler
+
+        first.release()
+        second.release()
+        with pytest.raises(SchedulerClosedError):
+            scheduler.submit("after release")
+
+
+class TestBatchedGraniteGeneration:
+    """Test real batched generation with a tiny model"""
+
+    def test_generate_batch_returns_one_result_per_prompt(self, tiny_granite_dir):
+        """Test left-padded batch generation of prompts with different lengths"""
+        pytest.importorskip("torch")
+        from chatbot.granite_client import GraniteClient, generate_batch
+
+        client = GraniteClient(model_path=tiny_granite_dir)
+        prompts = [
+            ("You are a financial advisor.", "\n\nUser Query: budget?\n\nFinancial Advice:"),
+            ("You are a helpful financial advisor.", "\n\nUser Query: how should I invest my salary?\n\nFinancial Advice:"),
+        ]
+        results = generate_batch(client._handle.weights, client.device, client.max_length, prompts)
+
+        assert len(results) == 2
+        for text, new_tokens, _ in results:
+            assert isinstance(text, str)
+            assert new_tokens > 0
+        client.release()
+
+    def test_concurrent_sessions_are_batched(self, tiny_granite_dir, monkeypatch):
+        """Test that concurrent GraniteClient requests go through one shared scheduler"""
+        pytest.importorskip("torch")
+        from chatbot.granite_client import GraniteClient
+
+        monkeypatch.setenv("GRANITE_BATCH_MAX_SIZE", "4")
+        monkeypatch.setenv("GRANITE_BATCH_MAX_WAIT_MS", "300")
+        sessions = [GraniteClient(model_path=tiny_granite_dir) for _ in range(3)]
+        barrier = threading.Barrier(3)
+        answers = []
+
+        def chat(client):
+            barrier.wait()
+            answers.append(client.get_response("How do I save money?", "student"))
+
+        threads = [threading.Thread(target=chat, args=(client,)) for client in sessions]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        metrics = sessions[0].get_model_info()['batching']
+        assert len(answers) == 3
+        assert metrics['total_requests'] == 3
+        assert metrics['total_batches'] < 3
+        for client in sessions:
+            client.release()
+
+    def test_concurrent_streams_share_one_generate_call(self, tiny_granite_dir, monkeypatch):
+        """Test that streamed chat requests are batched too, each getting its own answer streamed"""
+        pytest.importorskip("torch")
+        from chatbot.granite_client import GraniteClient
+
+        monkeypatch.setenv("GRANITE_BATCH_MAX_SIZE", "4")
+        monkeypatch.setenv("GRANITE_BATCH_MAX_WAIT_MS", "300")
+        sessions = [GraniteClient(model_path=tiny_granite_dir) for _ in range(2)]
+        model = sessions[0].model
+        generate_calls = []
+        generate = model.generate
+        monkeypatch.setattr(model, "generate", lambda **kwargs: generate_calls.append(1) or generate(**kwargs))
+        barrier = threading.Barrier(2)
+        answers = {}
+
+        def chat(index, client):
+            barrier.wait()
+            answers[index] = list(client.stream_response("How do I save money?", "student"))
+
+        threads = [threading.Thread(target=chat, args=(index, client)) for index, client in enumerate(sessions)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(generate_calls) == 1
+        assert sessions[0].get_model_info()['batching']['largest_batch'] == 2
+        for chunks in answers.values():
+            assert "".join(chunks).strip()
+        for client in sessions:
+            client.release()
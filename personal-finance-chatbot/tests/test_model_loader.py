@@ -0,0 +1,172 @@
+"""
+Unit tests for the offline-first Granite model loader
+Tests cache resolution, checksum manifests and selective shard repair
+"""
+
+import pytest
+import sys
+import os
+import json
+import shutil
+import threading
+from unittest.mock import patch
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from chatbot import model_loader
+from chatbot.model_loader import GraniteModelLoader, LoadCancelledError, ModelLoadError
+
+REPO_ID = "ibm-granite/granite-3.3-2b-base"
+COMMIT = "0123456789abcdef0123456789abcdef01234567"
+
+
+def make_sharded_snapshot(root, shards):
+    """Create a fake Hugging Face snapshot with an index and the given shard contents"""
+    snapshot = os.path.join(root, "snapshots", COMMIT)
+    os.makedirs(snapshot)
+    with open(os.path.join(snapshot, "model.safetensors.index.json"), "w") as f:
+        json.dump({"weight_map": {f"layer.{i}": name for i, name in enumerate(shards)}}, f)
+    for name, content in shards.items():
+        with open(os.path.join(snapshot, name), "wb") as f:
+            f.write(content)
+    return snapshot
+
+
+class TestShardVerification:
+    """Test manifest creation and selective re-download"""
+
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.shards = {
+            "model-00001-of-00002.safetensors": b"first shard weights" * 100,
+            "model-00002-of-00002.safetensors": b"second shard weights" * 100,
+        }
+
+    def _fake_download(self, snapshot):
+        def download(repo_id, filename, revision=None, force_download=False):
+            assert repo_id == REPO_ID
+            assert revision == COMMIT
+            path = os.path.join(snapshot, filename)
+            with open(path, "wb") as f:
+                f.write(self.shards[filename])
+            return path
+        return download
+
+    def test_first_resolve_records_manifest_without_downloading(self, tmp_path):
+        """Test that a healthy cache resolves offline and writes a manifest"""
+        snapshot = make_sharded_snapshot(str(tmp_path), self.shards)
+
+        with patch("huggingface_hub.snapshot_download", return_value=snapshot) as snapshot_download, \
+             patch("huggingface_hub.hf_hub_download") as hf_hub_download:
+            loader = GraniteModelLoader(REPO_ID)
+            assert loader.resolve() == snapshot
+
+        snapshot_download.assert_called_once_with(REPO_ID, local_files_only=True)
+        hf_hub_download.assert_not_called()
+        assert loader.revision == COMMIT
+        assert loader.repaired_files == []
+
+        with open(loader.manifest_path()) as f:
+            manifest = json.load(f)
+        assert manifest["revision"] == COMMIT
+        assert set(manifest["files"]) == set(self.shards)
+
+    def test_unchanged_shards_are_not_rehashed(self, tmp_path):
+        """Test that the fast path skips hashing files verified before"""
+        snapshot = make_sharded_snapshot(str(tmp_path), self.shards)
+
+        with patch("huggingface_hub.snapshot_download", return_value=snapshot):
+            GraniteModelLoader(REPO_ID).resolve()
+            with patch.object(model_loader, "_sha256_file") as sha256_file:
+                GraniteModelLoader(REPO_ID).resolve()
+
+        sha256_file.assert_not_called()
+
+    def test_only_corrupt_shard_is_downloaded_again(self, tmp_path):
+        """Test that a corrupted shard is repaired without touching the others"""
+        snapshot = make_sharded_snapshot(str(tmp_path), self.shards)
+
+        with patch("huggingface_hub.snapshot_download", return_value=snapshot):
+            GraniteModelLoader(REPO_ID).resolve()
+
+            # Flip the content but keep the size so only the checksum can tell
+            corrupt_path = os.path.join(snapshot, "model-00002-of-00002.safetensors")
+            with open(corrupt_path, "wb") as f:
+                f.write(b"X" * len(self.shards["model-00002-of-00002.safetensors"]))
+
+            with patch("huggingface_hub.hf_hub_download", side_effect=self._fake_download(snapshot)) as download:
+                loader = GraniteModelLoader(REPO_ID)
+                loader.resolve()
+
+        assert loader.repaired_files == ["model-00002-of-00002.safetensors"]
+        assert download.call_count == 1
+        with open(corrupt_path, "rb") as f:
+            assert f.read() == self.shards["model-00002-of-00002.safetensors"]
+
+    def test_missing_shard_is_downloaded(self, tmp_path):
+        """Test that a shard listed in the index but absent on disk is fetched"""
+        snapshot = make_sharded_snapshot(str(tmp_path), self.shards)
+        os.remove(os.path.join(snapshot, "model-00001-of-00002.safetensors"))
+
+        with patch("huggingface_hub.snapshot_download", return_value=snapshot), \
+             patch("huggingface_hub.hf_hub_download", side_effect=self._fake_download(snapshot)):
+            loader = GraniteModelLoader(REPO_ID)
+            loader.resolve()
+
+        assert loader.repaired_files == ["model-00001-of-00002.safetensors"]
+
+    def test_corrupt_local_directory_raises(self, tmp_path):
+        """Test that a corrupt shard in a plain directory is reported, not silently used"""
+        snapshot = make_sharded_snapshot(str(tmp_path), self.shards)
+        GraniteModelLoader(snapshot).resolve()
+
+        with open(os.path.join(snapshot, "model-00001-of-00002.safetensors"), "ab") as f:
+            f.write(b"truncated download garbage")
+
+        with pytest.raises(ModelLoadError):
+            GraniteModelLoader(snapshot).resolve()
+
+
+class TestModelLoading:
+    """Test loading a real (tiny) model strictly from disk"""
+
+    def test_load_reports_stage_timings(self, tiny_granite_dir, tmp_path):
+        """Test that load returns model and tokenizer plus a timing breakdown"""
+        model_dir = str(tmp_path / "model")
+        shutil.copytree(tiny_granite_dir, model_dir)
+
+        loader = GraniteModelLoader(model_dir)
+        model, tokenizer = loader.load("cpu")
+
+        assert model is not None
+        assert tokenizer is not None
+        assert not model.training
+        for stage in ["resolve", "verify", "tokenizer", "weights", "device_move", "total"]:
+            assert stage in loader.timings
+        assert "weights=" in loader.format_timings()
+
+    def test_load_reports_progress(self, tiny_granite_dir):
+        """Test that the progress callback sees every stage in order, ending at 100%"""
+        events = []
+        loader = GraniteModelLoader(tiny_granite_dir, progress_callback=lambda stage, fraction: events.append((stage, fraction)))
+        loader.load("cpu")
+
+        stages = [stage for stage, _ in events]
+        assert stages[0] == "resolving"
+        assert stages[-1] == "loaded"
+        assert [fraction for _, fraction in events] == sorted(fraction for _, fraction in events)
+        assert events[-1][1] == 1.0
+
+    def test_cancelled_load_stops_before_weights(self, tiny_granite_dir):
+        """Test that a set cancel event stops the load at the next stage"""
+        cancel_event = threading.Event()
+
+        def cancel_at_tokenizer(stage, fraction):
+            if stage == "tokenizer":
+                cancel_event.set()
+
+        loader = GraniteModelLoader(tiny_granite_dir, progress_callback=cancel_at_tokenizer, cancel_event=cancel_event)
+        with pytest.raises(LoadCancelledError):
+            loader.load("cpu")
+        assert "weights" not in loader.timings
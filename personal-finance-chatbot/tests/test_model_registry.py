@@ -0,0 +1,276 @@
+"""
+Unit tests for the process-wide Granite model registry
+Tests weight sharing, refcounting and thread safety without loading a real model
+"""
+
+import pytest
+import sys
+import os
+import threading
+import time
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from chatbot.model_registry import ModelRegistry, get_model_registry
+
+
+class CountingLoader:
+    """Fake loader that records how many times the weights were loaded"""
+
+    def __init__(self, delay: float = 0.0):
+        self.calls = 0
+        self.delay = delay
+
+    def __call__(self):
+        self.calls += 1
+        time.sleep(self.delay)
+        return object(), object()
+
+
+class TestModelRegistry:
+    """Test shared model loading and release"""
+
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.registry = ModelRegistry()
+        self.key = ("ibm-granite/granite-3.3-2b-base", "cpu")
+
+    def test_weights_loaded_once_and_shared(self):
+        """Test that several clients share one copy of the weights"""
+        loader = CountingLoader()
+
+        first = self.registry.acquire(self.key, loader)
+        second = self.registry.acquire(self.key, loader)
+
+        assert loader.calls == 1
+        assert first.model is second.model
+        assert first.tokenizer is second.tokenizer
+        assert self.registry.get_refcount(self.key) == 2
+
+    def test_release_frees_weights_after_last_handle(self):
+        """Test that weights are dropped only when the last handle is released"""
+        loader = CountingLoader()
+        first = self.registry.acquire(self.key, loader)
+        second = self.registry.acquire(self.key, loader)
+
+        first.release()
+        assert first.model is None
+        assert second.model is not None
+        assert self.registry.get_refcount(self.key) == 1
+
+        second.release()
+        assert self.registry.get_refcount(self.key) == 0
+        assert self.registry.get_stats()['loaded_models'] == 0
+
+        # A new client after everything was released loads again
+        self.registry.acquire(self.key, loader)
+        assert loader.calls == 2
+
+    def test_release_is_idempotent(self):
+        """Test that releasing twice does not steal another client's reference"""
+        loader = CountingLoader()
+        first = self.registry.acquire(self.key, loader)
+        second = self.registry.acquire(self.key, loader)
+
+        first.release()
+        first.release()
+
+        assert self.registry.get_refcount(self.key) == 1
+        assert second.model is not None
+
+    def test_different_settings_are_loaded_separately(self):
+        """Test that each distinct key gets its own weights"""
+        loader = CountingLoader()
+        cpu = self.registry.acquire(self.key, loader)
+        cuda = self.registry.acquire(("ibm-granite/granite-3.3-2b-base", "cuda"), loader)
+
+        assert loader.calls == 2
+        assert cpu.model is not cuda.model
+
+    def test_failed_load_does_not_leak_entry(self):
+        """Test that a loader error leaves the registry clean"""
+        def failing_loader():
+            raise RuntimeError("download interrupted")
+
+        with pytest.raises(RuntimeError):
+            self.registry.acquire(self.key, failing_loader)
+
+        assert self.registry.get_refcount(self.key) == 0
+
+        loader = CountingLoader()
+        handle = self.registry.acquire(self.key, loader)
+        assert handle.model is not None
+        assert loader.calls == 1
+
+    def test_concurrent_sessions_load_once(self):
+        """Test that sessions starting at the same time trigger a single load"""
+        loader = CountingLoader(delay=0.05)
+        handles = []
+        handles_lock = threading.Lock()
+
+        def session():
+            handle = self.registry.acquire(self.key, loader)
+            with handles_lock:
+                handles.append(handle)
+
+        threads = [threading.Thread(target=session) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert loader.calls == 1
+        assert len({id(handle.model) for handle in handles}) == 1
+        assert self.registry.get_refcount(self.key) == 8
+
+    def test_slow_attachment_does_not_block_the_registry(self):
+        """Test that an attachment being built leaves other registry calls free, and is built once"""
+        handle = self.registry.acquire(self.key, CountingLoader())
+        release = threading.Event()
+        built = []
+
+        def factory(weights):
+            built.append(1)
+            release.wait(5)
+            return object()
+
+        attachments = []
+        threads = [threading.Thread(target=lambda: attachments.append(handle.attachment("slow", factory)))
+                   for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        while not built:
+            time.sleep(0.01)
+
+        in_use = threading.Thread(target=lambda: handle.in_use().__enter__())
+        in_use.start()
+        in_use.join(timeout=1)
+        assert not in_use.is_alive()
+        assert self.registry.get_refcount(self.key) == 1
+
+        release.set()
+        for thread in threads:
+            thread.join()
+        assert len(built) == 1
+        assert attachments[0] is attachments[1]
+
+    def test_process_wide_registry_is_singleton(self):
+        """Test that all callers see the same registry"""
+        assert get_model_registry() is get_model_registry()
+
+
+class TestIdleEviction:
+    """Test unloading idle weights and reloading them on demand"""
+
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.registry = ModelRegistry()
+        self.key = ("ibm-granite/granite-3.3-2b-base", "cpu")
+
+    def test_idle_model_is_evicted_and_reloaded(self):
+        """Test that an idle model is unloaded and transparently reloaded on next use"""
+        loader = CountingLoader()
+        handle = self.registry.acquire(self.key, loader, idle_timeout=3600)
+        assert self.registry.evict_idle() == 0
+
+        handle._entry.last_used -= 3601
+        assert self.registry.evict_idle() == 1
+        assert handle.model is None
+        assert handle.get_stats()["state"] == "evicted"
+
+        model, tokenizer = handle.weights()
+        assert model is not None
+        assert loader.calls == 2
+        stats = handle.get_stats()
+        assert stats["state"] == "resident"
+        assert stats["evictions"] == 1
+        assert stats["reloads"] == 1
+
+    def test_models_without_timeout_stay_resident(self):
+        """Test that eviction only applies to entries acquired with an idle timeout"""
+        handle = self.registry.acquire(self.key, CountingLoader())
+        handle._entry.last_used -= 10 ** 6
+
+        assert self.registry.evict_idle() == 0
+        assert not self.registry.evict(self.key)
+        assert handle.model is not None
+
+    def test_model_in_use_is_not_evicted(self):
+        """Test that a running generation keeps its weights"""
+        handle = self.registry.acquire(self.key, CountingLoader(), idle_timeout=0.01)
+
+        with handle.in_use() as (model, _):
+            time.sleep(0.05)
+            assert not self.registry.evict(self.key)
+            assert handle.model is model
+
+    def test_generation_starting_during_eviction_keeps_weights(self):
+        """Test that a generation starting after evict() checked for users still keeps its weights"""
+        class Cache:
+            cleared = False
+
+            def on_evict(self):
+                self.cleared = True
+
+        handle = self.registry.acquire(self.key, CountingLoader(), idle_timeout=60)
+        cache = handle.attachment("cache", lambda weights: Cache())
+        entry = handle._entry
+        results = []
+
+        # evict() gets past its first check, then waits for the load lock
+        with entry.load_lock:
+            evicting = threading.Thread(target=lambda: results.append(self.registry.evict(self.key)))
+            evicting.start()
+            time.sleep(0.05)
+            generation = handle.in_use()
+            model, _ = generation.__enter__()
+        evicting.join(5)
+
+        assert results == [False]
+        assert handle.model is model
+        assert not cache.cleared
+        generation.__exit__(None, None, None)
+        assert self.registry.evict(self.key)
+
+    def test_eviction_notifies_attachments(self):
+        """Test that attachments can drop state tied to the evicted weights"""
+        class Cache:
+            cleared = False
+
+            def on_evict(self):
+                self.cleared = True
+
+        handle = self.registry.acquire(self.key, CountingLoader(), idle_timeout=60)
+        cache = handle.attachment("cache", lambda weights: Cache())
+
+        assert self.registry.evict(self.key)
+        assert cache.cleared
+
+    def test_reload_notifies_attachments_with_the_weights_usable(self):
+        """Test that attachments hear about a reload and can use the reloaded weights"""
+        class Warmer:
+            def __init__(self, weights):
+                self.weights = weights
+                self.seen = []
+
+            def on_reload(self):
+                self.seen.append(self.weights()[0])
+
+        handle = self.registry.acquire(self.key, CountingLoader(), idle_timeout=60)
+        warmer = handle.attachment("warmer", Warmer)
+        assert self.registry.evict(self.key)
+
+        model, _ = handle.weights()
+        assert warmer.seen == [model]
+        handle.weights()
+        assert warmer.seen == [model]
+
+    def test_background_reaper_evicts(self):
+        """Test that the reaper thread evicts without anyone calling evict_idle"""
+        handle = self.registry.acquire(self.key, CountingLoader(), idle_timeout=0.1)
+
+        deadline = time.monotonic() + 5
+        while handle.model is not None and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert handle.get_stats()["state"] == "evicted"
@@ -0,0 +1,102 @@
+"""
+Unit tests for the system prompt KV-cache prefixes
+Uses a tiny randomly initialised Granite model so no download is needed
+"""
+
+import pytest
+import sys
+import os
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+torch = pytest.importorskip("torch")
+
+from chatbot.granite_client import GraniteClient
+from chatbot.prefix_cache import PrefixKVCache
+
+
+@pytest.fixture
+def granite_client(tiny_granite_dir):
+    """Granite client on the tiny model"""
+    client = GraniteClient(model_path=tiny_granite_dir)
+    yield client
+    client.release()
+
+
+class TestPrefixKVCache:
+    """Test prefix reuse, bounds and correctness"""
+
+    def test_cached_prefix_gives_identical_greedy_output(self, granite_client):
+        """Test that reusing prefix key/values does not change what the model generates"""
+        prefix, suffix = granite_client._build_prompt_parts("How should I budget?", "student")
+        cache = PrefixKVCache(granite_client._handle.weights, granite_client.device)
+        model, tokenizer = granite_client._handle.weights()
+
+        plain_ids = torch.cat([
+            tokenizer(prefix, return_tensors="pt").input_ids,
+            tokenizer(suffix, return_tensors="pt", add_special_tokens=False).input_ids,
+        ], dim=1)
+        expected = model.generate(input_ids=plain_ids, attention_mask=torch.ones_like(plain_ids),
+                                  max_new_tokens=15, do_sample=False, pad_token_id=tokenizer.eos_token_id)
+
+        cache.build_inputs(prefix, suffix)  # warm the cache
+        inputs, stats = cache.build_inputs(prefix, suffix)
+        cached = model.generate(**inputs, max_new_tokens=15, do_sample=False, pad_token_id=tokenizer.eos_token_id)
+
+        assert stats['prefix_cache_hit']
+        assert torch.equal(expected, cached)
+
+    def test_prefill_covers_only_the_query(self, granite_client):
+        """Test that a hit reports prefix tokens skipped and the time saved"""
+        prefix, suffix = granite_client._build_prompt_parts("Should I invest?", "professional")
+        cache = PrefixKVCache(granite_client._handle.weights, granite_client.device)
+
+        _, first = cache.build_inputs(prefix, suffix)
+        _, second = cache.build_inputs(prefix, suffix)
+
+        assert not first['prefix_cache_hit']
+        assert first['prefill_saved_ms'] == 0.0
+        assert second['prefix_cache_hit']
+        assert second['prefill_saved_ms'] > 0
+        assert second['prefix_tokens'] > second['prefill_tokens']
+        assert cache.get_stats()['total_prefill_saved_ms'] == pytest.approx(second['prefill_saved_ms'])
+
+    def test_cache_is_bounded(self, granite_client):
+        """Test that the least recently used prefix is evicted"""
+        cache = PrefixKVCache(granite_client._handle.weights, granite_client.device, max_entries=2)
+        suffix = "\n\nUser Query: hi\n\nFinancial Advice:"
+
+        for user_type in ["student", "professional", "senior"]:
+            prefix, _ = granite_client._build_prompt_parts("hi", user_type)
+            cache.build_inputs(prefix, suffix)
+
+        stats = cache.get_stats()
+        assert stats['entries'] == 2
+        assert stats['evictions'] == 1
+
+    def test_cached_copy_is_not_mutated_by_generation(self, granite_client):
+        """Test that each request works on its own copy of the prefix cache"""
+        prefix, suffix = granite_client._build_prompt_parts("Pay off debt?", "young_adult")
+        cache = PrefixKVCache(granite_client._handle.weights, granite_client.device)
+        model, tokenizer = granite_client._handle.weights()
+
+        inputs, _ = cache.build_inputs(prefix, suffix)
+        model.generate(**inputs, max_new_tokens=5, do_sample=False, pad_token_id=tokenizer.eos_token_id)
+        inputs, _ = cache.build_inputs(prefix, suffix)
+
+        assert inputs['past_key_values'].get_seq_length() == len(tokenizer(prefix).input_ids)
+
+
+class TestGraniteClientPrefixReuse:
+    """Test prefix reuse through the client API"""
+
+    def test_repeat_user_type_hits_cache(self, granite_client):
+        """Test that a second request for the same user type skips the system prompt prefill"""
+        granite_client.get_response("How do I save?", "senior")
+        granite_client.get_response("What about healthcare costs?", "senior")
+
+        stats = granite_client.get_model_info()
+        assert stats['last_generation']['prefix_cache_hit']
+        assert stats['last_generation']['prefill_saved_ms'] > 0
+        assert stats['prefix_cache']['hits'] >= 1
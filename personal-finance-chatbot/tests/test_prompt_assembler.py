@@ -0,0 +1,126 @@
+"""
+Unit tests for token-budgeted prompt assembly
+Counts tokens with the tiny test model's tokenizer so no download is needed
+"""
+
+import pytest
+import sys
+import os
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+pytest.importorskip("transformers")
+
+from chatbot.prompt_assembler import PromptAssembler
+
+SYSTEM_PROMPT = "You are a knowledgeable and helpful financial advisor."
+ANSWER = "Save 20% of your income every month and keep it in a high-yield account."
+
+
+@pytest.fixture(scope="module")
+def tokenizer(tiny_granite_dir):
+    """Tokenizer of the tiny test model"""
+    from transformers import AutoTokenizer
+    return AutoTokenizer.from_pretrained(tiny_granite_dir)
+
+
+def history(turns):
+    """Conversation history in the chat page's (question, answer) format"""
+    return [(f"Question {index}: how do I save?", ANSWER) for index in range(turns)]
+
+
+class TestPromptAssembler:
+    """Test fitting prompts into the context window"""
+
+    def test_prompt_without_history(self, tokenizer):
+        """Test that system prompt and query make up the prompt"""
+        assembled = PromptAssembler(tokenizer, 2048, 400).assemble(SYSTEM_PROMPT, "How should I budget?")
+
+        assert assembled.prefix == SYSTEM_PROMPT
+        assert assembled.suffix == "\n\nUser Query: How should I budget?\n\nFinancial Advice:"
+        counts = assembled.token_counts
+        assert counts["history"] == 0
+        assert counts["history_turns"] == 0
+        assert counts["prompt"] == len(tokenizer(assembled.prefix + assembled.suffix)["input_ids"])
+
+    def test_history_turns_included_oldest_first(self, tokenizer):
+        """Test that earlier turns come before the new question, in order"""
+        assembled = PromptAssembler(tokenizer, 2048, 400, history_budget=2000).assemble(
+            SYSTEM_PROMPT, "And investing?", history(3))
+
+        positions = [assembled.suffix.index(f"Question {index}") for index in range(3)]
+        assert positions == sorted(positions)
+        assert assembled.suffix.endswith("User Query: And investing?\n\nFinancial Advice:")
+        assert assembled.token_counts["history_turns"] == 3
+        assert assembled.token_counts["history"] > 0
+
+    def test_history_budget_keeps_most_recent_turns(self, tokenizer):
+        """Test that only the newest turns that fit the budget are kept"""
+        assembler = PromptAssembler(tokenizer, 2048, 400)
+        one_turn = assembler.count(f"\n\nUser Query: Question 9: how do I save?\n\nFinancial Advice: {ANSWER}")
+        assembler.history_budget = 2 * one_turn + 1
+
+        assembled = assembler.assemble(SYSTEM_PROMPT, "And investing?", history(6))
+        counts = assembled.token_counts
+        assert counts["history_turns"] == 2
+        assert counts["history_turns_dropped"] == 4
+        assert counts["history"] <= assembler.history_budget
+        assert "Question 5" in assembled.suffix and "Question 4" in assembled.suffix
+        assert "Question 3" not in assembled.suffix
+
+    def test_answer_room_is_always_reserved(self, tokenizer):
+        """Test that history and even the query give way to the answer's reservation"""
+        assembler = PromptAssembler(tokenizer, 256, 100, history_budget=1000)
+        assembled = assembler.assemble(SYSTEM_PROMPT, "Tell me about money. " * 200, history(5))
+
+        counts = assembled.token_counts
+        assert counts["query_truncated"]
+        assert counts["history_turns"] == 0
+        assert counts["prompt"] + counts["answer_reserved"] <= 256
+
+    def test_unusable_history_turns_are_skipped(self, tokenizer):
+        """Test that empty or malformed turns are ignored, dict turns accepted"""
+        turns = [("", "no question"), "not a turn", {"question": "Dict turn?", "answer": ANSWER}]
+        assembled = PromptAssembler(tokenizer, 2048, 400).assemble(SYSTEM_PROMPT, "Next?", turns)
+
+        assert assembled.token_counts["history_turns"] == 1
+        assert "Dict turn?" in assembled.suffix
+
+    def test_budget_from_env(self, tokenizer, monkeypatch):
+        """Test GRANITE_HISTORY_TOKEN_BUDGET"""
+        monkeypatch.setenv("GRANITE_HISTORY_TOKEN_BUDGET", "0")
+        assembled = PromptAssembler.from_env(tokenizer, 2048, 400).assemble(SYSTEM_PROMPT, "Next?", history(2))
+        assert assembled.token_counts["history_turns"] == 0
+
+
+class TestGraniteClientHistory:
+    """Test conversation history in Granite requests"""
+
+    def test_history_from_user_context(self, tiny_granite_dir):
+        """Test that user_context history reaches the prompt and its token use is reported"""
+        from chatbot.granite_client import GraniteClient
+
+        client = GraniteClient(model_path=tiny_granite_dir)
+        context = {"user_type": "student", "conversation_history": history(2)}
+        assert client.get_response("And what about investing?", context)
+
+        prompt_tokens = client.get_model_info()["last_generation"]["prompt_tokens"]
+        assert prompt_tokens["history_turns"] == 2
+        assert prompt_tokens["system"] > 0 and prompt_tokens["query"] > 0
+
+        assert "".join(client.stream_response("Anything else?", context))
+        assert client.last_generation_stats["prompt_tokens"]["history_turns"] == 2
+        client.release()
+
+    def test_long_query_keeps_answer_budget(self, tiny_granite_dir):
+        """Test that an over-long query no longer squeezes out the answer"""
+        from chatbot.granite_client import GraniteClient
+
+        client = GraniteClient(model_path=tiny_granite_dir)
+        assert client.get_response("Explain my finances. " * 1000, "student", deadline_seconds=0)
+
+        stats = client.last_generation_stats
+        assert stats["prompt_tokens"]["query_truncated"]
+        assert stats["max_new_tokens"] == client.max_new_tokens
+        client.release()
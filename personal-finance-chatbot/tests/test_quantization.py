@@ -0,0 +1,89 @@
+"""
+Unit tests for quantized CPU inference
+Tests mode resolution and int8/bf16 loading with a tiny random Granite model
+"""
+
+import pytest
+import sys
+import os
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+torch = pytest.importorskip("torch")
+
+from chatbot import quantization
+from chatbot.quantization import apply_quantization, model_memory_bytes, resolve_quantization_mode
+from chatbot.granite_client import GraniteClient
+
+
+class TestQuantizationMode:
+    """Test how requested modes are resolved"""
+
+    def test_default_is_full_precision(self, monkeypatch):
+        """Test that quantization is opt-in"""
+        monkeypatch.delenv("GRANITE_QUANTIZATION", raising=False)
+        assert resolve_quantization_mode() == "none"
+
+    def test_mode_read_from_environment(self, monkeypatch):
+        """Test that GRANITE_QUANTIZATION selects the mode"""
+        monkeypatch.setenv("GRANITE_QUANTIZATION", "INT8")
+        assert resolve_quantization_mode() == "int8"
+
+    def test_unknown_mode_falls_back(self):
+        """Test that a typo does not break loading"""
+        assert resolve_quantization_mode("int4") == "none"
+
+    def test_cuda_is_never_quantized(self):
+        """Test that CPU-only modes are ignored on GPU"""
+        assert resolve_quantization_mode("int8", device="cuda") == "none"
+
+    def test_bf16_requires_cpu_support(self, monkeypatch):
+        """Test that bf16 is only used where the CPU supports it"""
+        monkeypatch.setattr(quantization, "cpu_supports_bf16", lambda: False)
+        assert resolve_quantization_mode("bf16") == "none"
+        assert resolve_quantization_mode("auto") == "int8"
+
+        monkeypatch.setattr(quantization, "cpu_supports_bf16", lambda: True)
+        assert resolve_quantization_mode("bf16") == "bf16"
+        assert resolve_quantization_mode("auto") == "bf16"
+
+
+class TestQuantizedModels:
+    """Test quantized loading through GraniteClient"""
+
+    def test_int8_replaces_linear_layers(self, tiny_granite_dir):
+        """Test that dynamic int8 quantization shrinks the linear weights"""
+        from transformers import AutoModelForCausalLM
+
+        model = AutoModelForCausalLM.from_pretrained(tiny_granite_dir).eval()
+        fp32_bytes = model_memory_bytes(model)
+        quantized = apply_quantization(model, "int8")
+
+        assert not any(type(module) is torch.nn.Linear for module in quantized.modules())
+        assert model_memory_bytes(quantized) < fp32_bytes
+
+    def test_int8_client_generates(self, tiny_granite_dir, monkeypatch):
+        """Test that an int8 client loads separately and still answers"""
+        monkeypatch.setenv("GRANITE_QUANTIZATION", "int8")
+        client = GraniteClient(model_path=tiny_granite_dir)
+
+        assert client.initialized
+        assert client.get_model_info()["quantization"] == "int8"
+        assert client.get_response("How should I budget?", "student")
+
+        monkeypatch.setenv("GRANITE_QUANTIZATION", "none")
+        fp32_client = GraniteClient(model_path=tiny_granite_dir)
+        assert fp32_client.model is not client.model
+        client.release()
+        fp32_client.release()
+
+    def test_bf16_client_loads_bf16_weights(self, tiny_granite_dir, monkeypatch):
+        """Test that bf16 mode keeps bfloat16 weights on a supporting CPU"""
+        monkeypatch.setattr(quantization, "cpu_supports_bf16", lambda: True)
+        monkeypatch.setenv("GRANITE_QUANTIZATION", "bf16")
+        client = GraniteClient(model_path=tiny_granite_dir)
+
+        assert next(client.model.parameters()).dtype == torch.bfloat16
+        assert client.get_response("Should I invest?", "professional")
+        client.release()
@@ -0,0 +1,142 @@
+"""
+Unit tests for Granite weights shared between app processes
+Uses a tiny randomly initialised Granite model so everything runs offline
+"""
+
+import pytest
+import signal
+import subprocess
+import sys
+import os
+import time
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+torch = pytest.importorskip("torch")
+
+from chatbot.backends import EagerBackend
+from chatbot.model_loader import GraniteModelLoader
+from chatbot.shared_weights import SharedWeightsStore, _try_lock, resolve_shared_weights_dir
+
+
+def logits(model, tokenizer, text="How should I budget my salary?"):
+    """Next-token logits for a fixed prompt"""
+    with torch.no_grad():
+        return model(**tokenizer(text, return_tensors="pt")).logits
+
+
+class TestResolveSharedWeightsDir:
+    """Test when shared weights are used"""
+
+    def test_unset_means_private_weights(self, monkeypatch):
+        """Test that nothing is shared without GRANITE_SHARED_WEIGHTS_DIR"""
+        monkeypatch.delenv("GRANITE_SHARED_WEIGHTS_DIR", raising=False)
+        assert resolve_shared_weights_dir("cpu", "none") is None
+
+    def test_cpu_float_weights_are_shared(self, monkeypatch, tmp_path):
+        """Test that fp32 and bf16 CPU weights use the shared directory"""
+        monkeypatch.setenv("GRANITE_SHARED_WEIGHTS_DIR", str(tmp_path))
+        assert resolve_shared_weights_dir("cpu", "none") == str(tmp_path)
+        assert resolve_shared_weights_dir("cpu", "bf16") == str(tmp_path)
+
+    def test_unshareable_setups_fall_back(self, monkeypatch, tmp_path):
+        """Test that int8 and CUDA weights stay private"""
+        monkeypatch.setenv("GRANITE_SHARED_WEIGHTS_DIR", str(tmp_path))
+        assert resolve_shared_weights_dir("cpu", "int8") is None
+        assert resolve_shared_weights_dir("cuda", "none") is None
+
+
+class TestSharedWeightsStore:
+    """Test writing and mapping the shared state dict"""
+
+    def test_mapped_model_matches_private_load(self, tiny_granite_dir, tmp_path):
+        """Test that the mapped model gives the same logits as a normal load"""
+        private, tokenizer = GraniteModelLoader(tiny_granite_dir).load("cpu")
+        shared, _ = SharedWeightsStore(str(tmp_path)).load(GraniteModelLoader(tiny_granite_dir), torch.float32)
+
+        assert torch.allclose(logits(private, tokenizer), logits(shared, tokenizer))
+        assert shared.shared_weights_path.startswith(str(tmp_path))
+
+    def test_file_is_written_once(self, tiny_granite_dir, tmp_path):
+        """Test that later loads reuse the shared file instead of rewriting it"""
+        store = SharedWeightsStore(str(tmp_path / "shared"))
+        loader = GraniteModelLoader(tiny_granite_dir)
+        store.load(loader, torch.float32)
+        path = store.path_for(loader, tiny_granite_dir, torch.float32)
+        written = os.stat(path).st_mtime_ns
+        assert "export" in loader.timings
+
+        second = GraniteModelLoader(tiny_granite_dir)
+        store.load(second, torch.float32)
+        assert os.stat(path).st_mtime_ns == written
+        assert "export" not in second.timings
+        assert os.listdir(tmp_path / "shared") == [os.path.basename(path)]
+
+    @pytest.mark.skipif(not os.path.exists("/proc/self/maps"), reason="needs /proc")
+    def test_weights_are_memory_mapped(self, tiny_granite_dir, tmp_path):
+        """Test that the parameters live in a mapping of the shared file"""
+        model, _ = SharedWeightsStore(str(tmp_path)).load(GraniteModelLoader(tiny_granite_dir), torch.float32)
+        with open("/proc/self/maps") as f:
+            assert model.shared_weights_path in f.read()
+
+    def test_bf16_weights_are_stored_in_bf16(self, tiny_granite_dir, tmp_path):
+        """Test that each dtype gets its own file and keeps its dtype when mapped"""
+        store = SharedWeightsStore(str(tmp_path))
+        model, _ = store.load(GraniteModelLoader(tiny_granite_dir), torch.bfloat16)
+        assert next(model.parameters()).dtype == torch.bfloat16
+        assert model.shared_weights_path.endswith("-bfloat16.pt")
+
+    def test_changed_local_weights_get_a_new_file(self, tiny_granite_dir, tmp_path):
+        """Test that touching a local shard changes the shared file name"""
+        store = SharedWeightsStore(str(tmp_path))
+        loader = GraniteModelLoader(tiny_granite_dir)
+        before = store.path_for(loader, tiny_granite_dir, torch.float32)
+        shard = os.path.join(tiny_granite_dir, "model.safetensors")
+        stat = os.stat(shard)
+        try:
+            os.utime(shard, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+            assert store.path_for(loader, tiny_granite_dir, torch.float32) != before
+        finally:
+            os.utime(shard, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+    def test_busy_writer_falls_back_to_private_copy(self, tiny_granite_dir, tmp_path):
+        """Test that a load does not block forever on another process's lock"""
+        store = SharedWeightsStore(str(tmp_path), wait_seconds=0.1)
+        loader = GraniteModelLoader(tiny_granite_dir)
+        lock_path = store.path_for(loader, tiny_granite_dir, torch.float32) + ".lock"
+        fd = os.open(lock_path, os.O_CREAT | os.O_RDWR)
+        try:
+            assert _try_lock(fd)  # Held by a writer that is still running
+            model, tokenizer = store.load(loader, torch.float32)
+        finally:
+            os.close(fd)
+        assert getattr(model, "shared_weights_path", None) is None
+        assert logits(model, tokenizer).shape[-1] == model.config.vocab_size
+
+    @pytest.mark.skipif(not hasattr(signal, "SIGKILL"), reason="needs SIGKILL")
+    def test_killed_writer_is_taken_over(self, tiny_granite_dir, tmp_path):
+        """Test that the lock of a writer killed part way through does not block later loads"""
+        store = SharedWeightsStore(str(tmp_path), wait_seconds=30)
+        loader = GraniteModelLoader(tiny_granite_dir)
+        lock_path = store.path_for(loader, tiny_granite_dir, torch.float32) + ".lock"
+        writer = subprocess.Popen(
+            [sys.executable, "-c", "import fcntl, os, sys, time; "
+             "fd = os.open(sys.argv[1], os.O_CREAT | os.O_RDWR); fcntl.flock(fd, fcntl.LOCK_EX); "
+             "print('locked', flush=True); time.sleep(60)", lock_path],
+            stdout=subprocess.PIPE, text=True)
+        assert writer.stdout.readline().strip() == "locked"
+        writer.send_signal(signal.SIGKILL)
+        writer.wait()
+        assert os.path.exists(lock_path)  # Left behind by the killed writer
+
+        start = time.perf_counter()
+        model, _ = store.load(loader, torch.float32)
+        assert model.shared_weights_path.startswith(str(tmp_path))
+        assert time.perf_counter() - start < 30
+
+    def test_eager_backend_uses_shared_dir(self, tiny_granite_dir, tmp_path, monkeypatch):
+        """Test that the eager backend maps the weights when the directory is configured"""
+        monkeypatch.setenv("GRANITE_SHARED_WEIGHTS_DIR", str(tmp_path))
+        model, _ = EagerBackend().load(GraniteModelLoader(tiny_granite_dir), "cpu", "none")
+        assert model.shared_weights_path.startswith(str(tmp_path))
@@ -0,0 +1,115 @@
+"""
+Unit tests for speculative (assisted) Granite decoding
+Uses tiny randomly initialised target and draft models so everything runs offline
+"""
+
+import pytest
+import sys
+import os
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+torch = pytest.importorskip("torch")
+
+from chatbot.model_registry import ModelRegistry
+from chatbot.speculative import SpeculativeDecoder
+
+
+def greedy_kwargs(tokenizer, text):
+    """Fixed-length greedy generation settings for one prompt"""
+    inputs = tokenizer(text, return_tensors="pt")
+    return dict(**inputs, max_new_tokens=24, min_new_tokens=24, do_sample=False,
+                pad_token_id=tokenizer.eos_token_id)
+
+
+class TestSpeculativeDecoder:
+    """Test draft-model assisted generation"""
+
+    def setup_method(self):
+        """Setup test fixtures"""
+        self.registry = ModelRegistry()
+        self.prompt = "You are a financial advisor. User Query: How should I budget?"
+
+    def _target(self, model_dir):
+        from transformers import AutoModelForCausalLM, AutoTokenizer
+        loader = lambda: (AutoModelForCausalLM.from_pretrained(model_dir).eval(),
+                          AutoTokenizer.from_pretrained(model_dir))
+        return self.registry.acquire("target", loader)
+
+    def test_identical_draft_is_always_accepted(self, tiny_granite_dir):
+        """Test that a draft equal to the target has every proposal accepted and changes nothing"""
+        handle = self._target(tiny_granite_dir)
+        model, tokenizer = handle.weights()
+        decoder = SpeculativeDecoder(handle.weights, tiny_granite_dir, "cpu")
+
+        with torch.no_grad():
+            plain = model.generate(**greedy_kwargs(tokenizer, self.prompt))
+            assisted, stats = decoder.generate(model, **greedy_kwargs(tokenizer, self.prompt))
+
+        assert torch.equal(plain, assisted)
+        assert stats["draft_tokens"] > 0
+        assert stats["acceptance_rate"] == pytest.approx(1.0)
+        assert stats["target_passes"] < 24
+        handle.release()
+
+    def test_different_draft_keeps_greedy_output(self, tiny_granite_dir, tiny_draft_dir):
+        """Test that rejected proposals never change the greedy result"""
+        handle = self._target(tiny_granite_dir)
+        model, tokenizer = handle.weights()
+        decoder = SpeculativeDecoder(handle.weights, tiny_draft_dir, "cpu")
+
+        with torch.no_grad():
+            plain = model.generate(**greedy_kwargs(tokenizer, self.prompt))
+            assisted, stats = decoder.generate(model, **greedy_kwargs(tokenizer, self.prompt))
+
+        assert torch.equal(plain, assisted)
+        assert 0.0 <= stats["acceptance_rate"] <= 1.0
+        summary = decoder.get_stats()
+        assert summary["generations"] == 1
+        assert summary["estimated_speedup"] > 0
+        handle.release()
+
+    def test_missing_draft_is_reported(self, tiny_granite_dir, tmp_path):
+        """Test that an unusable draft model is reported instead of breaking generation"""
+        handle = self._target(tiny_granite_dir)
+        decoder = SpeculativeDecoder(handle.weights, str(tmp_path / "no-such-model"), "cpu")
+
+        assert not decoder.ensure_loaded()
+        assert decoder.get_stats()["error"]
+        handle.release()
+
+
+class TestGraniteClientSpeculative:
+    """Test the GRANITE_DRAFT_MODEL option end to end"""
+
+    def test_client_reports_acceptance(self, tiny_granite_dir, tiny_draft_dir, monkeypatch):
+        """Test that a configured draft model is used and its statistics reported"""
+        from chatbot.granite_client import GraniteClient
+
+        monkeypatch.setenv("GRANITE_DRAFT_MODEL", tiny_draft_dir)
+        client = GraniteClient(model_path=tiny_granite_dir)
+
+        assert not client.batching_enabled
+        assert client.get_response("How should I budget?", "student")
+        info = client.get_model_info()
+        assert info["speculative"]["loaded"]
+        assert info["speculative"]["generations"] == 1
+        assert "acceptance_rate" in info["last_generation"]["speculative"]
+
+        chunks = list(client.stream_response("How do I save?", "student"))
+        assert "".join(chunks)
+        assert client.get_model_info()["speculative"]["generations"] == 2
+        client.release()
+
+    def test_unusable_draft_falls_back(self, tiny_granite_dir, tmp_path, monkeypatch):
+        """Test that answers still come when the draft model cannot be loaded"""
+        from chatbot.granite_client import GraniteClient
+
+        monkeypatch.setenv("GRANITE_DRAFT_MODEL", str(tmp_path / "missing-draft"))
+        client = GraniteClient(model_path=tiny_granite_dir)
+
+        assert client.get_response("How should I budget?", "student")
+        assert client.get_model_info()["speculative"]["error"]
+        assert "speculative" not in client.get_model_info()["last_generation"]
+        client.release()
@@ -0,0 +1,193 @@
+"""
+Unit tests for the Granite start-up warm-up
+Uses a tiny randomly initialised Granite model so everything runs offline
+"""
+
+import pytest
+import threading
+import sys
+import os
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+torch = pytest.importorskip("torch")
+
+from chatbot.model_loader import LoadCancelledError
+from chatbot.quantization import model_memory_bytes
+from chatbot.warmup import WARMUP_PROMPTS, WarmupTracker, combine_reports, touch_weight_pages, warm_up
+
+
+class TestWarmUp:
+    """Test page touching and cold/warm timing"""
+
+    def test_touches_every_tensor(self):
+        """Test that every parameter and buffer byte is covered once"""
+        model = torch.nn.Sequential(torch.nn.Linear(64, 64), torch.nn.LayerNorm(64))
+        assert touch_weight_pages(model) == model_memory_bytes(model)
+
+    def test_non_torch_models_are_skipped(self):
+        """Test that models without PyTorch tensors are not touched"""
+        assert touch_weight_pages(object()) == 0
+
+    def test_rounds_per_user_type(self):
+        """Test that each user type is generated `rounds` times, the first counted as cold"""
+        calls = []
+        report = warm_up(None, calls.append, ["student", "senior"], rounds=3)
+
+        assert calls == ["student"] * 3 + ["senior"] * 3
+        assert set(report["user_types"]) == {"student", "senior"}
+        assert report["first_ms"] == report["user_types"]["student"]["cold_ms"]
+        assert report["warm_ms"] is not None
+
+    def test_single_round_has_no_warm_latency(self):
+        """Test that one round only gives a cold latency"""
+        report = warm_up(None, lambda user_type: None, ["general"], rounds=1)
+        assert report["user_types"]["general"]["warm_ms"] is None
+        assert report["warm_ms"] is None
+
+    def test_cancel_stops_warm_up(self):
+        """Test that a set cancel event aborts warm-up"""
+        cancel = threading.Event()
+        cancel.set()
+        with pytest.raises(LoadCancelledError):
+            warm_up(None, lambda user_type: None, ["general"], cancel_event=cancel)
+
+    def test_combined_worker_reports(self):
+        """Test that worker reports are averaged"""
+        reports = [warm_up(None, lambda user_type: None, ["general"]) for _ in range(2)]
+        combined = combine_reports(reports)
+        assert combined["workers"] == reports
+        assert combine_reports([]) is None
+
+
+class TestWarmupTracker:
+    """Test the shared warm-up state"""
+
+    def test_runs_only_once(self):
+        """Test that later clients reuse the first warm-up"""
+        tracker = WarmupTracker(rounds=1)
+        calls = []
+        first = tracker.run(None, calls.append, ["general"])
+        assert tracker.run(None, calls.append, ["general"]) is first
+        assert calls == ["general"]
+
+    def test_failure_leaves_model_usable(self):
+        """Test that a failing warm-up is reported, not raised"""
+        def fail(user_type):
+            raise RuntimeError("boom")
+
+        tracker = WarmupTracker()
+        assert tracker.run(None, fail, ["general"]) is None
+        assert tracker.get_stats()["error"] == "boom"
+
+    def test_first_request_latency(self):
+        """Test that the first real request is kept apart from the average"""
+        tracker = WarmupTracker()
+        tracker.record_request(0.5)
+        tracker.record_request(0.1)
+        stats = tracker.get_stats()
+        assert stats["first_request_ms"] == pytest.approx(500.0)
+        assert stats["avg_request_ms"] == pytest.approx(300.0)
+        assert stats["requests"] == 2
+
+    def test_eviction_resets(self):
+        """Test that evicted weights count as cold again"""
+        tracker = WarmupTracker(rounds=1)
+        tracker.run(None, lambda user_type: None, ["general"])
+        tracker.record_request(0.2)
+        tracker.on_evict()
+        stats = tracker.get_stats()
+        assert not stats["warmed_up"]
+        assert stats["first_request_ms"] is None
+
+    def test_reload_warms_up_again(self):
+        """Test that reloaded weights are warmed up with the same generations"""
+        calls = []
+        tracker = WarmupTracker(rounds=1, weights=lambda: (None, None))
+        tracker.run(None, calls.append, ["general", "student"])
+        tracker.on_evict()
+        tracker.on_reload()
+        assert calls == ["general", "student", "general", "student"]
+        assert tracker.get_stats()["warmed_up"]
+
+
+class TestGraniteClientWarmup:
+    """Test GraniteClient warming up before it reports ready"""
+
+    def test_ready_after_warm_up(self, tiny_granite_dir, monkeypatch):
+        """Test that the client warms every user type before it is initialized"""
+        from chatbot.granite_client import GraniteClient
+
+        monkeypatch.setenv("GRANITE_WARMUP", "true")
+        monkeypatch.setenv("GRANITE_WARMUP_ROUNDS", "2")
+        stages = []
+        client = GraniteClient(model_path=tiny_granite_dir, progress_callback=lambda stage, fraction: stages.append(stage))
+
+        assert client.initialized
+        assert "warming_up" in stages
+        info = client.get_model_info()
+        report = info["warmup"]["report"]
+        assert set(report["user_types"]) == set(WARMUP_PROMPTS)
+        assert report["touched_mb"] > 0
+        # Every user type's system prompt is already cached for the first real request
+        assert info["prefix_cache"]["entries"] == len(WARMUP_PROMPTS)
+
+        assert client.get_response("How should I budget?", "student")
+        assert client.get_model_info()["warmup"]["first_request_ms"] > 0
+        client.release()
+
+    def test_shared_weights_warm_up_once(self, tiny_granite_dir, monkeypatch):
+        """Test that a second client of the same weights does not warm up again"""
+        from chatbot.granite_client import GraniteClient
+
+        monkeypatch.setenv("GRANITE_WARMUP", "true")
+        first = GraniteClient(model_path=tiny_granite_dir)
+        report = first.get_model_info()["warmup"]["report"]
+        second = GraniteClient(model_path=tiny_granite_dir)
+        assert second.get_model_info()["warmup"]["report"] is report
+        first.release()
+        second.release()
+
+    def test_idle_reload_warms_up_again(self, tiny_granite_dir, monkeypatch):
+        """Test that weights reloaded after idle eviction are not served cold"""
+        from chatbot.granite_client import GraniteClient
+        from chatbot.model_registry import get_model_registry
+
+        monkeypatch.setenv("GRANITE_WARMUP", "true")
+        monkeypatch.setenv("GRANITE_IDLE_TIMEOUT_SECONDS", "3600")
+        client = GraniteClient(model_path=tiny_granite_dir)
+        assert get_model_registry().evict(client._registry_key())
+        assert not client.get_model_info()["warmup"]["warmed_up"]
+
+        assert client.get_response("How should I budget?", "student")
+        info = client.get_model_info()
+        assert info["warmup"]["warmed_up"]
+        assert info["warmup"]["requests"] == 1
+        assert info["prefix_cache"]["entries"] == len(WARMUP_PROMPTS)
+        client.release()
+
+    def test_disabled(self, tiny_granite_dir):
+        """Test that GRANITE_WARMUP=false skips warm-up"""
+        from chatbot.granite_client import GraniteClient
+
+        client = GraniteClient(model_path=tiny_granite_dir)
+        assert client.initialized
+        assert not client.get_model_info()["warmup"]["warmed_up"]
+        client.release()
+
+    def test_worker_processes_warm_up(self, tiny_granite_dir, monkeypatch):
+        """Test that worker processes warm up before the pool reports ready"""
+        from chatbot.granite_client import GraniteClient
+
+        monkeypatch.setenv("GRANITE_WARMUP", "true")
+        monkeypatch.setenv("GRANITE_WARMUP_ROUNDS", "1")
+        monkeypatch.setenv("GRANITE_WORKERS", "1")
+        monkeypatch.setenv("GRANITE_THREADS_PER_WORKER", "1")
+        client = GraniteClient(model_path=tiny_granite_dir)
+
+        info = client.get_model_info()
+        assert info["warmup"]["warmed_up"]
+        assert len(info["warmup"]["report"]["workers"]) == 1
+        assert info["workers"]["processes"][0]["warmup"]["user_types"]
+        client.release()
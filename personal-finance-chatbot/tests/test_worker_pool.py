@@ -0,0 +1,161 @@
+"""
+Unit tests for the multi-process Granite worker pool
+Worker processes load a tiny randomly initialised model so everything runs offline
+"""
+
+import pytest
+import json
+import sys
+import os
+
+# Add src to path for imports
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+pytest.importorskip("torch")
+
+from chatbot.granite_client import GenerationOutput, PromptRequest
+from chatbot.model_loader import ModelLoadError
+from chatbot.worker_pool import (InferenceWorkerPool, WorkerConfig, WorkerPoolClosedError,
+                                 assign_cpus, resolve_worker_config)
+
+
+def tiny_config(model_path: str) -> WorkerConfig:
+    """Single-thread worker settings for the tiny test model"""
+    return WorkerConfig(model_path, "cpu", "none", "eager", max_length=2048, max_new_tokens=20, threads=1)
+
+
+REQUEST = PromptRequest("You are a financial advisor.", "\n\nUser Query: How should I budget?\n\nFinancial Advice:")
+
+
+@pytest.fixture(scope="module")
+def pool(tiny_granite_dir):
+    """One running single-worker pool shared by the tests below"""
+    pool = InferenceWorkerPool(tiny_config(tiny_granite_dir), workers=1).start()
+    yield pool
+    pool.shutdown()
+
+
+class TestWorkerConfig:
+    """Test GRANITE_WORKERS / GRANITE_THREADS_PER_WORKER resolution"""
+
+    def test_default_is_in_process(self, monkeypatch):
+        """Test that no setting keeps inference in-process"""
+        monkeypatch.delenv("GRANITE_WORKERS", raising=False)
+        assert resolve_worker_config() == (0, 0)
+
+    def test_explicit_shape(self):
+        """Test that explicit worker and thread counts are used as given"""
+        assert resolve_worker_config("3", "2") == (3, 2)
+
+    def test_threads_default_to_an_even_split(self, monkeypatch):
+        """Test that CPUs are shared out evenly when threads are not given"""
+        monkeypatch.setattr("chatbot.worker_pool.available_cpus", lambda: list(range(8)))
+        assert resolve_worker_config("2", "0") == (2, 4)
+        assert resolve_worker_config("16", "0") == (16, 1)
+
+    def test_invalid_value_falls_back(self):
+        """Test that a non-numeric worker count means in-process inference"""
+        assert resolve_worker_config("lots", "0") == (0, 0)
+
+    def test_auto_uses_tuning_file(self, tmp_path, monkeypatch):
+        """Test that GRANITE_WORKERS=auto reads the autotune result"""
+        tuning = tmp_path / "tuning.json"
+        tuning.write_text(json.dumps({"best": {"workers": 2, "threads_per_worker": 3, "tokens_per_second": 9.0}}))
+        monkeypatch.setenv("GRANITE_WORKER_TUNING_FILE", str(tuning))
+        assert resolve_worker_config("auto") == (2, 3)
+
+    def test_auto_without_tuning_falls_back(self, tmp_path, monkeypatch):
+        """Test that GRANITE_WORKERS=auto without a tuning file stays in-process"""
+        monkeypatch.setenv("GRANITE_WORKER_TUNING_FILE", str(tmp_path / "missing.json"))
+        assert resolve_worker_config("auto") == (0, 0)
+
+    def test_cpu_assignment(self):
+        """Test that workers get disjoint CPU blocks only when they fit"""
+        if not hasattr(os, "sched_setaffinity"):
+            pytest.skip("CPU affinity not supported here")
+        assert assign_cpus(2, 2, [0, 1, 2, 3]) == [[0, 1], [2, 3]]
+        assert assign_cpus(3, 2, [0, 1, 2, 3]) == [None, None, None]
+
+
+class TestInferenceWorkerPool:
+    """Test dispatching to worker processes"""
+
+    def test_submit_returns_generation_output(self, pool):
+        """Test that a worker answers a submitted prompt"""
+        output = pool.submit(REQUEST).result(timeout=60)
+        assert isinstance(output, GenerationOutput)
+        assert 0 < output.new_tokens <= 20
+        assert output.stats["worker"] == 0
+        assert output.stats["stop_reason"]
+
+    def test_concurrent_requests(self, pool):
+        """Test that several queued prompts are all answered"""
+        futures = [pool.submit(REQUEST) for _ in range(4)]
+        assert all(future.result(timeout=60).new_tokens > 0 for future in futures)
+
+    def test_stream_yields_text_then_output(self, pool):
+        """Test that streamed chunks add up to the final answer"""
+        stream = pool.stream(REQUEST)
+        text = "".join(stream)
+        assert stream.wait(timeout=10)
+        assert stream.error is None
+        assert text.strip() == stream.output.text
+
+    def test_closed_stream_stops_worker(self, pool):
+        """Test that a closed stream still hands back its final output"""
+        request = REQUEST._replace(suffix=REQUEST.suffix + " ")
+        stream = pool.stream(request)
+        next(iter(stream))
+        stream.close()
+        assert stream.wait(timeout=10)
+        assert stream.output is not None
+        assert stream.output.new_tokens <= 20
+
+    def test_stats(self, pool):
+        """Test that worker state and throughput are reported"""
+        stats = pool.get_stats()
+        assert stats["workers"] == 1
+        assert stats["threads_per_worker"] == 1
+        assert stats["ready_workers"] == 1
+        assert stats["processes"][0]["pid"]
+        assert stats["total_requests"] >= 1
+
+    def test_load_failure_raises(self, tmp_path):
+        """Test that a pool whose workers cannot load the model fails to start"""
+        with pytest.raises(ModelLoadError):
+            InferenceWorkerPool(tiny_config(str(tmp_path / "no-such-model")), workers=1).start()
+
+    def test_shutdown_rejects_new_requests(self, tiny_granite_dir):
+        """Test that a shut-down pool refuses work"""
+        pool = InferenceWorkerPool(tiny_config(tiny_granite_dir), workers=1).start()
+        pool.shutdown()
+        with pytest.raises(WorkerPoolClosedError):
+            pool.submit(REQUEST)
+
+
+class TestGraniteClientWorkers:
+    """Test GraniteClient dispatching to the worker pool"""
+
+    def test_client_uses_worker_processes(self, tiny_granite_dir, monkeypatch):
+        """Test blocking and streaming answers from worker processes"""
+        from chatbot.granite_client import GraniteClient
+
+        monkeypatch.setenv("GRANITE_WORKERS", "1")
+        monkeypatch.setenv("GRANITE_THREADS_PER_WORKER", "1")
+        client = GraniteClient(model_path=tiny_granite_dir)
+
+        assert client.initialized
+        assert client.model is None  # weights live in the workers
+        assert client.get_response("How should I budget?", "student")
+        assert client.last_generation_stats["worker"] == 0
+
+        chunks = list(client.stream_response("How do I save?", "student"))
+        assert "".join(chunks)
+        info = client.get_model_info()
+        assert info["workers"]["ready_workers"] == 1
+        assert info["workers"]["total_requests"] == 2
+
+        pool = client._pool
+        client.release()
+        with pytest.raises(WorkerPoolClosedError):
+            pool.submit(REQUEST)